@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
 """
-Скрипт для добавления теста в базу данных.
+Скрипт для добавления тестов из каталога TESTS_DIR в базу данных.
 """
 
 import os
 import sys
-import json
-from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
 # Добавляем текущую директорию в путь Python
@@ -16,44 +14,22 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 load_dotenv()
 
 # Импортируем модели и базу данных
-from db.database import SessionLocal
-from models.test import Test
+from utils.catalog import load_test_catalog, sync_test_catalog
 
 def add_test():
-    """Добавляет тест в базу данных"""
+    """Добавляет в базу данных тесты из каталога TESTS_DIR, которых там еще нет"""
     try:
-        # print("🔧 Добавление теста в базу данных...")
+        # Разбираем и проверяем JSON файлы тестов
+        load_test_catalog()
         
-        # Создаем сессию базы данных
-        db = SessionLocal()
+        # Недостающие тесты добавляются одним запросом
+        added = sync_test_catalog()
         
-        # Проверяем есть ли уже тест
-        existing_test = db.query(Test).filter(Test.filename == "questions.json").first()
-        if existing_test:
-            # print(f"✅ Тест уже существует: ID={existing_test.id}, filename={existing_test.filename}")
-            return
-        
-        # Создаем новый тест
-        new_test = Test(
-            filename="questions.json",
-            is_available=True
-        )
-        
-        db.add(new_test)
-        db.commit()
-        db.refresh(new_test)
-        
-        # print(f"✅ Тест успешно добавлен!")
-        # print(f"📋 ID: {new_test.id}")
-        # print(f"📋 Filename: {new_test.filename}")
-        # print(f"📋 Available: {new_test.is_available}")
-        # print(f"📋 Created at: {new_test.created_at}")
+        print(f"✅ Добавлено тестов: {added}")
         
     except Exception as e:
-        # print(f"❌ Ошибка при добавлении теста: {e}")
+        print(f"❌ Ошибка при добавлении тестов: {e}")
         sys.exit(1)
-    finally:
-        db.close()
 
 if __name__ == "__main__":
     add_test() 
\ No newline at end of file
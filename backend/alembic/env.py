@@ -1,6 +1,8 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
-from sqlalchemy import pool
+from sqlalchemy import pool, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
 from alembic import context
 import os
 import sys
@@ -31,13 +33,28 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+@compiles(CreateColumn, "sqlite")
+def compile_sqlite_column(element, compiler, **kw):
+    """
+    Примененные миграции не меняются: server_default now() базовой миграции
+    (PostgreSQL) в SQLite задается через CURRENT_TIMESTAMP
+    """
+    column = compiler.visit_create_column(element, **kw)
+    return column.replace("DEFAULT now()", "DEFAULT CURRENT_TIMESTAMP")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Служебные таблицы миграций не сравниваются с моделями при autogenerate"""
+    from db.online_migrations import BACKFILL_STATE_TABLE
+    return not (type_ == "table" and name == BACKFILL_STATE_TABLE)
+
+
 def get_url():
-    """Получает URL базы данных из переменных окружения или конфига"""
-    from dotenv import load_dotenv
-    load_dotenv()
+    """Получает URL базы данных из настроек приложения или конфига"""
+    from config import get_settings
     
-    # Сначала пытаемся получить из переменных окружения
-    url = os.getenv("DATABASE_URL")
+    # Сначала пытаемся получить из настроек (переменные окружения и .env)
+    url = get_settings().database_url
     if url:
         return url
     
@@ -45,6 +62,21 @@ def get_url():
     return config.get_main_option("sqlalchemy.url")
 
 
+def get_tenant_schema():
+    """
+    Схема PostgreSQL арендатора (alembic -x schema=NAME upgrade head)
+
+    Таблицы арендатора и его alembic_version создаются в этой схеме;
+    без параметра миграции применяются к схеме по умолчанию.
+    """
+    from db.tenancy import SCHEMA_NAME_PATTERN
+
+    schema = context.get_x_argument(as_dictionary=True).get("schema")
+    if schema and not SCHEMA_NAME_PATTERN.match(schema):
+        raise ValueError(f"Недопустимое имя схемы: {schema}")
+    return schema
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -65,6 +97,8 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        include_object=include_object,
+        render_as_batch=url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -88,12 +122,28 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
 
+    schema = get_tenant_schema()
+
     with connectable.connect() as connection:
+        if schema:
+            # Неквалифицированные имена таблиц миграций - в схеме арендатора
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+            connection.execute(text(f'SET search_path TO "{schema}"'))
+            connection.commit()
+
         context.configure(
             connection=connection, 
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_object=include_object,
+            # Каждая миграция - своя транзакция: онлайн-операции
+            # (db/online_migrations.py) фиксируют только свою миграцию
+            transaction_per_migration=True,
+            # SQLite не умеет большинство ALTER TABLE: автогенерация
+            # оборачивает изменения в batch (пересоздание таблицы)
+            render_as_batch=connection.dialect.name == "sqlite",
+            version_table_schema=schema,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,117 @@
+"""add test attempts history
+
+Revision ID: 5c2e8f1a9d47
+Revises: 126be9a74c78
+Create Date: 2026-10-19 10:12:40.118305
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.partitions import attempt_partition_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8f1a9d47'
+down_revision = '126be9a74c78'
+branch_labels = None
+depends_on = None
+
+
+def _parse_completed_at(value):
+    """Разбирает completed_at из JSON completed_tests (наивное UTC-время)"""
+    if not value:
+        return datetime.now(timezone.utc)
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Последовательности нет в SQLite: там id назначает модель (max + 1)
+    has_sequences = bind.dialect.supports_sequences
+    if has_sequences:
+        op.execute(sa.schema.CreateSequence(sa.Sequence('test_attempts_id_seq')))
+    op.create_table('test_attempts',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('test_attempts_id_seq')") if has_sequences else None, autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='ID пользователя'),
+    sa.Column('test_id', sa.Integer(), nullable=False, comment='ID теста'),
+    sa.Column('attempt_number', sa.Integer(), nullable=False, comment='Номер попытки пользователя для этого теста'),
+    sa.Column('answers', sa.JSON(), nullable=True, comment='Ответы пользователя'),
+    sa.Column('result', sa.JSON(), nullable=False, comment='Результаты теста'),
+    sa.Column('completed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False, comment='Дата и время завершения попытки'),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'test_id', 'completed_at'),
+    postgresql_partition_by='LIST (test_id)'
+    )
+    op.create_index('ix_test_attempts_user_test_completed', 'test_attempts', ['user_id', 'test_id', sa.text('completed_at DESC')], unique=False)
+    op.create_table('latest_test_results',
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='ID пользователя'),
+    sa.Column('test_id', sa.Integer(), nullable=False, comment='ID теста'),
+    sa.Column('attempt_id', sa.BigInteger(), nullable=False, comment='ID последней попытки'),
+    sa.Column('attempt_number', sa.Integer(), nullable=False, comment='Количество попыток'),
+    sa.Column('result', sa.JSON(), nullable=False, comment='Результаты последней попытки'),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=False, comment='Дата и время завершения последней попытки'),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'test_id')
+    )
+
+    # Переносим уже сохраненные результаты из users.completed_tests как первые попытки
+    attempts = sa.table('test_attempts',
+        sa.column('id', sa.BigInteger), sa.column('user_id', sa.Integer),
+        sa.column('test_id', sa.Integer), sa.column('attempt_number', sa.Integer),
+        sa.column('answers', sa.JSON), sa.column('result', sa.JSON),
+        sa.column('completed_at', sa.DateTime(timezone=True)))
+    latest = sa.table('latest_test_results',
+        sa.column('user_id', sa.Integer), sa.column('test_id', sa.Integer),
+        sa.column('attempt_id', sa.BigInteger), sa.column('attempt_number', sa.Integer),
+        sa.column('result', sa.JSON), sa.column('completed_at', sa.DateTime(timezone=True)))
+
+    created_partitions = set()
+    next_attempt_id = 1
+    rows = bind.execute(sa.text("SELECT id, completed_tests FROM users WHERE completed_tests IS NOT NULL"))
+    for user_id, completed_tests in rows.fetchall():
+        for entry in completed_tests or []:
+            test_id = int(entry["test_id"])
+            completed_at = _parse_completed_at(entry.get("completed_at"))
+
+            if bind.dialect.name == 'postgresql':
+                partition_key = (test_id, completed_at.year, completed_at.month)
+                if partition_key not in created_partitions:
+                    for statement in attempt_partition_ddl(test_id, completed_at):
+                        op.execute(statement)
+                    created_partitions.add(partition_key)
+
+            values = dict(
+                user_id=user_id, test_id=test_id, attempt_number=1,
+                answers=None, result=entry.get("result") or {},
+                completed_at=completed_at
+            )
+            if has_sequences:
+                attempt_id = bind.execute(
+                    attempts.insert().values(**values).returning(attempts.c.id)
+                ).scalar()
+            else:
+                attempt_id = next_attempt_id
+                next_attempt_id += 1
+                bind.execute(attempts.insert().values(id=attempt_id, **values))
+            bind.execute(latest.insert().values(
+                user_id=user_id, test_id=test_id, attempt_id=attempt_id,
+                attempt_number=1, result=entry.get("result") or {},
+                completed_at=completed_at
+            ))
+
+
+def downgrade() -> None:
+    op.drop_table('latest_test_results')
+    op.drop_index('ix_test_attempts_user_test_completed', table_name='test_attempts')
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table('test_attempts')
+    if op.get_bind().dialect.supports_sequences:
+        op.execute(sa.schema.DropSequence(sa.Sequence('test_attempts_id_seq')))
@@ -0,0 +1,138 @@
+"""add tenants and reference tables
+
+Revision ID: d8b3f6a1c204
+Revises: c5e7a2d9f416
+Create Date: 2026-10-19 21:05:12.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f6a1c204'
+down_revision = 'c5e7a2d9f416'
+branch_labels = None
+depends_on = None
+
+# Значения бывших FacultyEnum и CourseEnum
+FACULTIES = [
+    ('FIB', 'ФИБ'),
+    ('FKSIS', 'ФКСИС'),
+    ('FKP', 'ФКП'),
+    ('FRE', 'ФРЭ'),
+    ('IEF', 'ИЭФ'),
+    ('FITU', 'ФИТУ'),
+]
+COURSES = ['FIRST', 'SECOND', 'THIRD', 'FOURTH', 'FIFTH', 'SIXTH']
+
+# CASE для перевода курса между названием значения enum и номером
+COURSE_TO_NUMBER = "CASE {column} " + " ".join(
+    f"WHEN '{name}' THEN {number}" for number, name in enumerate(COURSES, start=1)
+) + " END"
+COURSE_TO_NAME = "CASE {column} " + " ".join(
+    f"WHEN {number} THEN '{name}'" for number, name in enumerate(COURSES, start=1)
+) + " END"
+
+
+def upgrade() -> None:
+    op.create_table('tenants',
+    sa.Column('slug', sa.String(length=63), nullable=False, comment='Идентификатор арендатора (заголовок X-Tenant)'),
+    sa.Column('name', sa.String(length=255), nullable=False, comment='Название университета'),
+    sa.Column('hosts', sa.JSON(), nullable=False, comment='Домены арендатора'),
+    sa.Column('database_url', sa.String(length=1024), nullable=True, comment='URL своей БД (NULL - основная)'),
+    sa.Column('db_schema', sa.String(length=63), nullable=True, comment='Схема PostgreSQL с таблицами арендатора'),
+    sa.Column('tests_dir', sa.String(length=1024), nullable=True, comment='Свой каталог тестов (NULL - общий)'),
+    sa.Column('pool_size', sa.Integer(), nullable=True, comment='Пул соединений (NULL - TENANT_POOL_SIZE)'),
+    sa.Column('max_overflow', sa.Integer(), nullable=True, comment='Сверх пула (NULL - TENANT_MAX_OVERFLOW)'),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False, comment='Принимать запросы арендатора'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False, comment='Дата и время регистрации'),
+    sa.PrimaryKeyConstraint('slug')
+    )
+    faculties = op.create_table('faculties',
+    sa.Column('code', sa.String(length=16), nullable=False, comment='Код факультета'),
+    sa.Column('name', sa.String(length=100), nullable=False, comment='Название факультета'),
+    sa.Column('sort_order', sa.Integer(), server_default='0', nullable=False, comment='Порядок в списках'),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False, comment='Доступен при регистрации'),
+    sa.PrimaryKeyConstraint('code'),
+    sa.UniqueConstraint('name')
+    )
+    courses = op.create_table('courses',
+    sa.Column('number', sa.SmallInteger(), autoincrement=False, nullable=False, comment='Номер курса'),
+    sa.Column('name', sa.String(length=50), nullable=False, comment='Название курса'),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False, comment='Доступен при регистрации'),
+    sa.PrimaryKeyConstraint('number')
+    )
+    # Справочники заполняются бывшими значениями enum: коды факультетов в
+    # users не меняются, курс становится номером
+    op.bulk_insert(faculties, [
+        {'code': code, 'name': name, 'sort_order': index}
+        for index, (code, name) in enumerate(FACULTIES)
+    ])
+    op.bulk_insert(courses, [
+        {'number': number, 'name': f'{number} курс'}
+        for number in range(1, len(COURSES) + 1)
+    ])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # ALTER COLUMN TYPE переписывает всю таблицу users под ACCESS
+        # EXCLUSIVE: чтение и запись пользователей (вход, завершение теста)
+        # ждут до конца миграции, время растет с размером таблицы - выполнять
+        # в окно обслуживания. lock_timeout не дает ожиданию блокировки за
+        # долгой транзакцией остановить все запросы к users
+        op.execute("SET LOCAL lock_timeout = '5s'")
+        op.execute("ALTER TABLE users ALTER COLUMN faculty TYPE VARCHAR(16) USING faculty::text")
+        op.execute(
+            "ALTER TABLE users ALTER COLUMN course TYPE SMALLINT USING "
+            + COURSE_TO_NUMBER.format(column="course::text")
+        )
+        op.execute("DROP TYPE IF EXISTS facultyenum")
+        op.execute("DROP TYPE IF EXISTS courseenum")
+        # NOT VALID: существующие строки не проверяются под блокировкой,
+        # проверка - VALIDATE CONSTRAINT в следующей ревизии (f3c9e1b7a452)
+        op.create_foreign_key('fk_users_faculty_faculties', 'users', 'faculties', ['faculty'], ['code'],
+                              postgresql_not_valid=True)
+        op.create_foreign_key('fk_users_course_courses', 'users', 'courses', ['course'], ['number'],
+                              postgresql_not_valid=True)
+    else:
+        # SQLite хранит enum строкой: номер курса записывается до смены типа
+        op.execute("UPDATE users SET course = " + COURSE_TO_NUMBER.format(column="course"))
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.alter_column('faculty', existing_type=sa.Enum(*[code for code, _ in FACULTIES], name='facultyenum'),
+                                  type_=sa.String(length=16), existing_nullable=False)
+            batch_op.alter_column('course', existing_type=sa.Enum(*COURSES, name='courseenum'),
+                                  type_=sa.SmallInteger(), existing_nullable=False)
+            batch_op.create_foreign_key('fk_users_faculty_faculties', 'faculties', ['faculty'], ['code'])
+            batch_op.create_foreign_key('fk_users_course_courses', 'courses', ['course'], ['number'])
+
+
+def downgrade() -> None:
+    faculty_enum = sa.Enum(*[code for code, _ in FACULTIES], name='facultyenum')
+    course_enum = sa.Enum(*COURSES, name='courseenum')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('fk_users_course_courses', 'users', type_='foreignkey')
+        op.drop_constraint('fk_users_faculty_faculties', 'users', type_='foreignkey')
+        faculty_enum.create(op.get_bind())
+        course_enum.create(op.get_bind())
+        op.execute("ALTER TABLE users ALTER COLUMN faculty TYPE facultyenum USING faculty::facultyenum")
+        op.execute(
+            "ALTER TABLE users ALTER COLUMN course TYPE courseenum USING ("
+            + COURSE_TO_NAME.format(column="course") + ")::courseenum"
+        )
+    else:
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.drop_constraint('fk_users_course_courses', type_='foreignkey')
+            batch_op.drop_constraint('fk_users_faculty_faculties', type_='foreignkey')
+            batch_op.alter_column('course', existing_type=sa.SmallInteger(),
+                                  type_=sa.String(length=6), existing_nullable=False)
+        op.execute("UPDATE users SET course = " + COURSE_TO_NAME.format(column="CAST(course AS INTEGER)"))
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.alter_column('faculty', existing_type=sa.String(length=16),
+                                  type_=faculty_enum, existing_nullable=False)
+            batch_op.alter_column('course', existing_type=sa.String(length=6),
+                                  type_=course_enum, existing_nullable=False)
+
+    op.drop_table('courses')
+    op.drop_table('faculties')
+    op.drop_table('tenants')
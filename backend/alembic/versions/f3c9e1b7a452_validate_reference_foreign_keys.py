@@ -0,0 +1,35 @@
+"""validate reference foreign keys
+
+Revision ID: f3c9e1b7a452
+Revises: d8b3f6a1c204
+Create Date: 2026-10-19 21:40:27.318560
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9e1b7a452'
+down_revision = 'd8b3f6a1c204'
+branch_labels = None
+depends_on = None
+
+# Внешние ключи users на справочники, созданные NOT VALID в d8b3f6a1c204
+CONSTRAINTS = ['fk_users_faculty_faculties', 'fk_users_course_courses']
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # VALIDATE CONSTRAINT берет SHARE UPDATE EXCLUSIVE: проверка строк users
+    # идет без блокировки чтения и записи. Отдельно от предыдущей ревизии,
+    # чтобы не выполняться под ее ACCESS EXCLUSIVE; повторная проверка
+    # уже проверенного ключа ничего не делает
+    with op.get_context().autocommit_block():
+        for name in CONSTRAINTS:
+            op.execute(f"ALTER TABLE users VALIDATE CONSTRAINT {name}")
+
+
+def downgrade() -> None:
+    # Непроверенным ключ сделать нельзя: его удаляет downgrade d8b3f6a1c204
+    pass
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Оценка качества ответов для уже сохраненных попыток.
+
+Новые попытки оцениваются при завершении теста; скрипт заполняет
+test_attempts.quality и latest_test_results.is_careless для исторических
+данных (или пересчитывает их после изменения порогов в
+utils/response_quality.py). Попытки обрабатываются пачками, каждая пачка
+коммитится отдельно, поэтому прерванный запуск можно продолжить.
+
+Использование:
+    python assess_responses.py                 # все тесты, только неоцененные попытки
+    python assess_responses.py --test-id 1 --recompute
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Добавляем текущую директорию в путь Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import bindparam, select, update
+
+from db.database import SessionLocal, get_read_session
+from models.test import Test
+from models.attempt import TestAttempt, LatestTestResult
+from utils.catalog import load_test_catalog
+from utils.item_analysis import build_answer_matrix
+from utils.response_quality import assess_batch
+from utils.test_loader import load_test_data
+
+def save_batch(db, test_id: int, rows: list, reports: list):
+    """
+    Сохраняет оценки пачки попыток
+
+    Args:
+        db: Сессия основной БД
+        test_id: ID теста
+        rows: Строки (id, answers) попыток
+        reports: Оценки из assess_batch в том же порядке
+    """
+    attempts = TestAttempt.__table__
+    db.execute(
+        update(attempts)
+        .where(attempts.c.id == bindparam("attempt_id"), attempts.c.test_id == test_id)
+        .values(quality=bindparam("quality")),
+        [{"attempt_id": attempt_id, "quality": report} for (attempt_id, _), report in zip(rows, reports)]
+    )
+
+    # Флаг последнего результата обновляется только для попыток из этой пачки
+    attempt_ids = [attempt_id for attempt_id, _ in rows]
+    flagged_ids = [attempt_id for (attempt_id, _), report in zip(rows, reports) if report["flags"]]
+    db.execute(
+        update(LatestTestResult)
+        .where(LatestTestResult.test_id == test_id, LatestTestResult.attempt_id.in_(attempt_ids))
+        .values(is_careless=LatestTestResult.attempt_id.in_(flagged_ids))
+    )
+    db.commit()
+
+def assess_test(test: Test, recompute: bool, batch_size: int) -> tuple:
+    """
+    Оценивает попытки одного теста
+
+    Args:
+        test: Тест
+        recompute: Пересчитать уже оцененные попытки
+        batch_size: Попыток в пачке
+
+    Returns:
+        tuple: (оценено попыток, помечено небрежными)
+    """
+    test_data = load_test_data(test.filename)
+    if not test_data:
+        print(f"⚠️ Тест {test.filename} не найден в каталоге, пропускаем")
+        return 0, 0
+
+    n_items = len(test_data["questions"])
+    query = select(TestAttempt.id, TestAttempt.answers).where(TestAttempt.test_id == test.id)
+    if not recompute:
+        query = query.where(TestAttempt.quality.is_(None))
+
+    read_db = get_read_session()
+    write_db = SessionLocal()
+    assessed = flagged = 0
+
+    try:
+        result = read_db.execute(query.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            matrix = build_answer_matrix((answers for _, answers in rows), n_items)
+            reports = assess_batch(matrix, test_data)
+            save_batch(write_db, test.id, rows, reports)
+
+            assessed += len(rows)
+            flagged += sum(1 for report in reports if report["flags"])
+            print(f"  ... {test.filename}: {assessed}")
+    finally:
+        read_db.close()
+        write_db.close()
+
+    return assessed, flagged
+
+def main():
+    """Точка входа скрипта"""
+    parser = argparse.ArgumentParser(description="Оценка качества ответов сохраненных попыток")
+    parser.add_argument("--test-id", type=int, default=None, help="ID теста (по умолчанию все тесты)")
+    parser.add_argument("--recompute", action="store_true", help="Пересчитать уже оцененные попытки")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Попыток в пачке")
+    args = parser.parse_args()
+
+    load_test_catalog()
+
+    db = SessionLocal()
+    try:
+        query = db.query(Test)
+        if args.test_id is not None:
+            query = query.filter(Test.id == args.test_id)
+        tests = query.all()
+    finally:
+        db.close()
+
+    started_at = time.perf_counter()
+    for test in tests:
+        assessed, flagged = assess_test(test, args.recompute, args.batch_size)
+        print(f"✅ {test.filename}: оценено {assessed}, помечено небрежными {flagged}")
+
+    print(f"⏱️ Готово за {time.perf_counter() - started_at:.1f} с")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ from .auth import (
     get_password_hash,
     get_current_user,
     get_current_active_user,
+    get_user_read_db,
+    require_admin,
+    require_live_access,
+    create_live_ticket,
     authenticate_user
 )
 
@@ -13,5 +17,9 @@ __all__ = [
     "get_password_hash",
     "get_current_user",
     "get_current_active_user",
+    "get_user_read_db",
+    "require_admin",
+    "require_live_access",
+    "create_live_ticket",
     "authenticate_user"
 ] 
\ No newline at end of file
@@ -10,25 +10,54 @@
 
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union
+import hashlib
+import hmac
+import math
 import secrets
-from fastapi import Depends, HTTPException, status, Request
+import time
+from fastapi import Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from passlib.hash import bcrypt
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from db.database import get_db
+from config import get_settings
+from db.database import get_read_session, SessionLocal, has_replica
+from db.tenancy import get_current_tenant
 from models.user import User
 from schemas.auth import TokenData
+from utils.request_context import memoize
+from utils.tracing import start_span, traced
 
 # Настройка bcrypt для хеширования паролей
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Настройка JWT
-SECRET_KEY = secrets.token_urlsafe(32)
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+_settings = get_settings()
+# Без SECRET_KEY ключ случайный, и токены не переживают перезапуск процесса;
+# так можно работать только в режиме разработки (см. check_secret_key)
+SECRET_KEY = _settings.secret_key or secrets.token_urlsafe(32)
+ALGORITHM = _settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = _settings.access_token_expire_minutes
+
+def check_secret_key():
+    """
+    Проверяет SECRET_KEY при запуске API
+    
+    Со случайным ключом у каждого воркера свои подписи: токен и метка
+    закрепления за основной БД, выданные одним воркером, другой отвергает,
+    а после перезапуска все студенты разлогиниваются.
+    
+    Raises:
+        RuntimeError: SECRET_KEY не задан и DEBUG выключен
+    """
+    settings = get_settings()
+    if settings.secret_key:
+        return
+    if not settings.debug:
+        raise RuntimeError("Не задан SECRET_KEY: без него API запускается только с DEBUG=True")
+    print("⚠️ SECRET_KEY не задан: токены подписываются случайным ключом этого процесса")
 
 # HTTP Bearer схема для получения токена из заголовка
 security = HTTPBearer(auto_error=False)
@@ -77,6 +106,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     Создает JWT токен
     
+    Токен действует только у арендатора, выдавшего его (claim tenant):
+    ID пользователей разных университетов пересекаются.
+    
     Args:
         data: Данные для включения в токен
         expires_delta: Время жизни токена
@@ -85,6 +117,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         str: JWT токен
     """
     to_encode = data.copy()
+    to_encode.setdefault("tenant", get_current_tenant())
     
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -143,6 +176,21 @@ def authenticate_user(db: Session, first_name: str, last_name: str, middle_name:
     
     return user
 
+def token_matches_tenant(payload: dict) -> bool:
+    """
+    Проверяет, что токен выдан текущим арендатором
+    
+    Токены без claim tenant выданы до появления арендаторов - они
+    принадлежат арендатору по умолчанию.
+    
+    Args:
+        payload: Расшифрованный JWT
+        
+    Returns:
+        bool: True, если токен действует у текущего арендатора
+    """
+    return payload.get("tenant", get_settings().default_tenant) == get_current_tenant()
+
 def get_token_from_request(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = None) -> Optional[str]:
     """
     Извлекает токен из запроса (заголовок Authorization или cookie)
@@ -180,6 +228,7 @@ def get_token_from_request(request: Request, credentials: Optional[HTTPAuthoriza
     print("[DEBUG TEMPORARY LOG] get_token_from_request(): токен не найден")
     return None
 
+@traced("auth.get_current_user")
 async def get_current_user(request: Request):
     print(f"[DEBUG TEMPORARY LOG] get_current_user() началась")
     
@@ -216,10 +265,11 @@ async def get_current_user(request: Request):
     print(f"[DEBUG TEMPORARY LOG] Проверяем токен: {token[:20]}...")
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with start_span("auth.decode_jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
-        if user_id is None:
-            print("[DEBUG TEMPORARY LOG] user_id не найден в токене")
+        if user_id is None or not token_matches_tenant(payload):
+            print("[DEBUG TEMPORARY LOG] user_id не найден в токене или токен другого арендатора")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
@@ -233,8 +283,10 @@ async def get_current_user(request: Request):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Получаем пользователя из БД
-    user = get_user_by_id(user_id)
+    # Получаем пользователя из БД (один раз за запрос)
+    user_id = int(user_id)
+    primary = is_pinned_to_primary(request, user_id)
+    user = memoize("user", user_id, lambda: get_user_by_id(user_id, primary))
     if user is None:
         print(f"[DEBUG TEMPORARY LOG] Пользователь с ID {user_id} не найден в БД")
         raise HTTPException(
@@ -263,6 +315,168 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     # Можно добавить дополнительные проверки при необходимости
     return current_user
 
+# Закрепление чтений за основной БД после записи пользователя (read-your-writes).
+# Метка хранится у клиента - в cookie и заголовке ответа, а не в памяти
+# процесса, поэтому следующий запрос может прийти на любой воркер:
+# "<университет>:<user_id>:<до, unix-время>:<HMAC-SHA256 на SECRET_KEY>"
+PRIMARY_PIN_COOKIE = "primary_pin"
+PRIMARY_PIN_HEADER = "X-Primary-Pin"
+
+def _sign_primary_pin(value: str) -> str:
+    """Подпись метки закрепления"""
+    return hmac.new(SECRET_KEY.encode(), f"{PRIMARY_PIN_COOKIE}:{value}".encode(), hashlib.sha256).hexdigest()
+
+def pin_user_to_primary(response: Response, user_id: int):
+    """
+    Закрепляет чтения пользователя за основной БД на DB_REPLICA_PIN_SECONDS.
+    Вызывается после записи, которую пользователь сразу захочет прочитать.
+    
+    Метка уходит клиенту в cookie (браузер возвращает ее сам) и в заголовке
+    X-Primary-Pin - для клиентов без сторонних cookie (Safari), которые
+    возвращают ее тем же заголовком.
+    
+    Args:
+        response: Ответ, в который записывается метка
+        user_id: ID пользователя
+    """
+    if not has_replica():
+        return
+    
+    pin_seconds = get_settings().db_replica_pin_seconds
+    value = f"{get_current_tenant()}:{user_id}:{math.ceil(time.time() + pin_seconds)}"
+    pin = f"{value}:{_sign_primary_pin(value)}"
+    
+    response.headers[PRIMARY_PIN_HEADER] = pin
+    response.set_cookie(
+        key=PRIMARY_PIN_COOKIE,
+        value=pin,
+        httponly=True,
+        max_age=math.ceil(pin_seconds),
+        secure=True,  # Как и access_token: cross-origin требует SameSite=None
+        samesite="none",
+        path="/"
+    )
+
+def is_pinned_to_primary(request: Request, user_id: int) -> bool:
+    """
+    Проверяет, должен ли пользователь сейчас читать из основной БД
+    
+    Args:
+        request: Входящий запрос (cookie или заголовок X-Primary-Pin)
+        user_id: ID пользователя
+        
+    Returns:
+        bool: True, если подписанная метка этого пользователя и университета
+        еще действует
+    """
+    if not has_replica():
+        return False
+    
+    pin = request.headers.get(PRIMARY_PIN_HEADER) or request.cookies.get(PRIMARY_PIN_COOKIE)
+    if not pin:
+        return False
+    
+    value, _, signature = pin.rpartition(":")
+    if not secrets.compare_digest(signature.encode(), _sign_primary_pin(value).encode()):
+        return False
+    
+    try:
+        tenant, pinned_user_id, expires_at = value.split(":")
+        return (
+            tenant == get_current_tenant()
+            and pinned_user_id == str(user_id)
+            and int(expires_at) > time.time()
+        )
+    except ValueError:
+        return False
+
+def get_user_read_db(request: Request, current_user: User = Depends(get_current_active_user)):
+    """
+    Dependency для чтения данных текущего пользователя (результаты, история).
+    
+    Использует реплику, но сразу после собственной записи пользователя
+    переключается на основную БД (read-your-writes, см. pin_user_to_primary).
+    
+    Args:
+        request: Входящий запрос
+        current_user: Текущий пользователь
+    """
+    db = get_read_session(is_pinned_to_primary(request, current_user.id))
+    
+    try:
+        yield db
+    finally:
+        db.close()
+
+def require_admin(request: Request):
+    """
+    Dependency для административных эндпоинтов.
+    
+    Проверяет заголовок X-Admin-Token (ADMIN_TOKEN в настройках).
+    Без ADMIN_TOKEN административные эндпоинты отключены.
+    
+    Args:
+        request: Входящий запрос
+        
+    Raises:
+        HTTPException: 403, если токен не задан или не совпадает
+    """
+    admin_token = get_settings().admin_token
+    provided = request.headers.get("X-Admin-Token", "")
+    
+    if not admin_token or not secrets.compare_digest(provided.encode(), admin_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав"
+        )
+
+# Область действия билета панели проктора (claim scope, без sub)
+LIVE_TICKET_SCOPE = "live"
+
+def create_live_ticket() -> str:
+    """
+    Создает билет на подключение панели проктора
+    
+    EventSource в браузере не передает заголовки, поэтому панель получает
+    билет через POST /admin/live/ticket (с X-Admin-Token) и подключается
+    к /live/events?ticket=... Билет без sub не годится как токен пользователя.
+    
+    Returns:
+        str: JWT со scope=live на LIVE_TICKET_MINUTES минут
+    """
+    return create_access_token(
+        {"scope": LIVE_TICKET_SCOPE},
+        expires_delta=timedelta(minutes=get_settings().live_ticket_minutes)
+    )
+
+def require_live_access(request: Request, ticket: Optional[str] = None):
+    """
+    Dependency для потока событий панели проктора
+    
+    Принимает заголовок X-Admin-Token или параметр ticket (create_live_ticket).
+    
+    Args:
+        request: Входящий запрос
+        ticket: Билет из query-параметра
+        
+    Raises:
+        HTTPException: 403, если нет ни токена администратора, ни действующего билета
+    """
+    if request.headers.get("X-Admin-Token") or not ticket:
+        require_admin(request)
+        return
+    
+    try:
+        payload = jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        payload = {}
+    
+    if payload.get("scope") != LIVE_TICKET_SCOPE or not token_matches_tenant(payload):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав"
+        )
+
 def get_token_expire_time() -> int:
     """
     Возвращает время жизни токена в секундах
@@ -278,19 +492,34 @@ def get_token_expire_time() -> int:
     
     return expire_seconds
 
-def get_user_by_id(user_id: int) -> Optional[User]:
+@traced("auth.get_user_by_id")
+def get_user_by_id(user_id: int, primary: bool = False) -> Optional[User]:
     """
     Получает пользователя из БД по ID
     
+    Читает с реплики, если она настроена и пользователь не закреплен
+    за основной БД после собственной записи.
+    
     Args:
         user_id: ID пользователя
+        primary: Пользователь закреплен за основной БД (is_pinned_to_primary)
         
     Returns:
         User или None: Объект пользователя или None если не найден
     """
-    db = next(get_db())
+    db = get_read_session(primary)
     try:
         user = db.query(User).filter(User.id == user_id).first()
-        return user
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+    
+    if user is None and has_replica():
+        # Пользователь мог только что зарегистрироваться на другом воркере,
+        # а реплика еще не догнала основную БД
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.id == user_id).first()
+        finally:
+            db.close()
+    
+    return user
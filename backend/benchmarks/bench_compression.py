@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Замер экономии от сжатия ответов и кеширования preflight.
+
+Трафик: размеры тел без сжатия, с gzip и brotli для ответов, которые
+отдает API (вопросы тестов из каталога, схема OpenAPI, типичные
+ответы /users/status и /users/{id}/results), время сжатия на лету
+и время выдачи из кеша предварительно сжатых тел.
+
+Запросы: сколько preflight (OPTIONS) отправит браузер за сессию
+студента при текущем CORS_MAX_AGE и без него. max_age берется из
+ответа приложения на настоящий preflight.
+
+БД не нужна: приложение импортируется, но запросы к БД не выполняются.
+
+Использование:
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --session-minutes 40 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Корень backend в пути Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from config import get_settings
+from utils.catalog import load_test_catalog, test_catalog
+from utils.compression import PrecompressedCache, compress_body, supported_encodings
+
+# Браузеры ограничивают Access-Control-Max-Age сверху (секунды)
+BROWSER_MAX_AGE_CAPS = {"chrome": 7200, "firefox": 86400}
+
+def student_session(session_minutes: float, status_polls: int) -> list:
+    """
+    Последовательность запросов фронтенда за одну сессию
+
+    Args:
+        session_minutes: Длительность сессии
+        status_polls: Сколько раз фронтенд обновляет статус тестов
+
+    Returns:
+        list: (метод, путь, время в секундах)
+    """
+    duration = session_minutes * 60
+    calls = [("POST", "/auth/login", 0), ("GET", "/auth/me", 1), ("GET", "/users/status", 2)]
+    for index in range(status_polls):
+        calls.append(("GET", "/users/status", 2 + duration * (index + 1) / (status_polls + 1)))
+    calls.append(("POST", "/users/1/complete", duration))
+    calls.append(("GET", "/users/1/results", duration + 1))
+    calls.append(("GET", "/auth/me", duration + 2))
+    return calls
+
+def count_preflights(calls: list, max_age: int) -> int:
+    """
+    Считает preflight-запросы браузера с кешем на max_age секунд
+
+    Кеш preflight в браузере - по паре (URL, метод); все вызовы API
+    фронтенда с заголовком Authorization/JSON требуют preflight.
+
+    Args:
+        calls: Запросы сессии
+        max_age: Время жизни записи кеша (0 - кеша нет)
+
+    Returns:
+        int: Количество OPTIONS
+    """
+    cached_until = {}
+    preflights = 0
+    for method, path, at in calls:
+        if cached_until.get((method, path), -1) <= at:
+            preflights += 1
+            cached_until[(method, path)] = at + max_age
+    return preflights
+
+def sample_payloads(client: TestClient) -> dict:
+    """
+    Тела ответов для замера
+
+    Returns:
+        dict: Название -> байты
+    """
+    payloads = {}
+    for entry in test_catalog.entries().values():
+        payloads[f"GET /tests/{{id}}/content ({entry.filename})"] = entry.public_body
+
+    payloads["GET /openapi.json"] = client.get("/openapi.json", headers={"Accept-Encoding": "identity"}).content
+
+    scores = {"адаптивность": 8, "конформность": 5, "интерактивность": 6,
+              "депрессивность": 4, "ностальгия": 4, "отчужденность": 5}
+    result = {
+        "test_id": 1,
+        "test_title": "Тест адаптации к социокультурной среде",
+        "result": {"score": 32},
+        "completed_at": "2026-09-01T10:00:00",
+        "attempt_number": 1,
+        "scores": scores,
+        "percentiles": {name: 50 for name in scores}
+    }
+    payloads["GET /users/{id}/results"] = json.dumps(result, ensure_ascii=False).encode("utf-8")
+    payloads["GET /users/status (10 тестов)"] = json.dumps(
+        [{**result, "status": "completed", "attempts": 1} for _ in range(10)], ensure_ascii=False
+    ).encode("utf-8")
+    return payloads
+
+def measure_bandwidth(payloads: dict, repeats: int) -> list:
+    """
+    Размеры и время сжатия для каждого тела
+
+    Args:
+        payloads: Название -> байты
+        repeats: Повторов для замера времени
+
+    Returns:
+        list: Строки отчета
+    """
+    settings = get_settings()
+    cache = PrecompressedCache()
+    rows = []
+
+    for name, body in payloads.items():
+        row = {"name": name, "identity": len(body)}
+        for encoding in supported_encodings():
+            started_at = time.perf_counter()
+            for _ in range(repeats):
+                compressed = compress_body(
+                    body, encoding, settings.compression_gzip_level, settings.compression_brotli_quality
+                )
+            row[encoding] = len(compressed)
+            row[f"{encoding}_ms"] = (time.perf_counter() - started_at) * 1000 / repeats
+
+            cache.get(name, encoding, lambda: body)
+            started_at = time.perf_counter()
+            for _ in range(repeats):
+                cached = cache.get(name, encoding, lambda: body)
+            row[f"{encoding}_cached"] = len(cached)
+            row[f"{encoding}_cached_ms"] = (time.perf_counter() - started_at) * 1000 / repeats
+        rows.append(row)
+    return rows
+
+def main():
+    """Точка входа скрипта"""
+    parser = argparse.ArgumentParser(description="Экономия трафика и preflight-запросов")
+    parser.add_argument("--session-minutes", type=float, default=30, help="Длительность сессии студента")
+    parser.add_argument("--status-polls", type=int, default=5, help="Обновлений статуса за сессию")
+    parser.add_argument("--repeats", type=int, default=20, help="Повторов для замера времени сжатия")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    from main import app
+
+    load_test_catalog()
+    origin = get_settings().cors_origins_list[0]
+
+    # Без контекстного менеджера: события startup (и подключение к БД) не нужны
+    client = TestClient(app)
+    preflight = client.options("/users/status", headers={
+        "Origin": origin,
+        "Access-Control-Request-Method": "GET",
+        "Access-Control-Request-Headers": "authorization"
+    })
+    max_age = int(preflight.headers.get("access-control-max-age", 0))
+    payloads = sample_payloads(client)
+
+    calls = student_session(args.session_minutes, args.status_polls)
+    requests_report = {
+        "api_calls": len(calls),
+        "max_age": max_age,
+        "preflights_without_cache": count_preflights(calls, 0),
+        "preflights": {
+            browser: count_preflights(calls, min(max_age, cap))
+            for browser, cap in BROWSER_MAX_AGE_CAPS.items()
+        }
+    }
+    bandwidth = measure_bandwidth(payloads, args.repeats)
+
+    if args.json:
+        print(json.dumps({"requests": requests_report, "bandwidth": bandwidth}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"🌐 Preflight за сессию ({requests_report['api_calls']} вызовов API, max_age={max_age} с):")
+    print(f"  без кеша: {requests_report['preflights_without_cache']}")
+    for browser, count in requests_report["preflights"].items():
+        print(f"  {browser}: {count}")
+
+    print("\n📦 Размер тела, байт (время сжатия на лету / из кеша, мс):")
+    for row in bandwidth:
+        parts = [f"identity {row['identity']}"]
+        for encoding in supported_encodings():
+            saved = 100 * (1 - row[encoding] / row["identity"]) if row["identity"] else 0
+            parts.append(
+                f"{encoding} {row[encoding]} (-{saved:.0f}%, {row[f'{encoding}_ms']:.2f} / "
+                f"{row[f'{encoding}_cached_ms']:.3f} мс, в кеше {row[f'{encoding}_cached']})"
+            )
+        print(f"  {row['name']}: " + ", ".join(parts))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Настройки приложения.
+
+Все параметры читаются один раз из переменных окружения и файла backend/.env
+и кешируются. Имена переменных окружения совпадают с именами полей
+в верхнем регистре (DATABASE_URL, DB_POOL_SIZE, CORS_ORIGINS, ...).
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CORS_ORIGINS = '["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173", "http://127.0.0.1:5173", "https://university-tests-pearl.vercel.app"]'
+
+# Используются, если CORS_ORIGINS задан, но не является корректным JSON
+FALLBACK_CORS_ORIGINS = [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "http://localhost:5173",  # Vite dev server
+    "http://127.0.0.1:5173",
+    "http://localhost:3001",  # React dev server альтернативный порт
+    "http://127.0.0.1:3001",
+    "http://localhost:8080",  # Webpack dev server
+    "http://127.0.0.1:8080",
+    "http://localhost:8000",  # Если фронтенд обращается к бэкенду на том же хосте
+    "http://127.0.0.1:8000",
+    # Docker контейнеры
+    "http://frontend:3000",
+    "http://backend:8000"
+    # Vercel домены ДОЛЖНЫ быть указаны точно в переменной CORS_ORIGINS
+    # "https://*.vercel.app" НЕ РАБОТАЕТ с credentials=True!
+]
+
+class Settings(BaseSettings):
+    """
+    Типизированные настройки приложения
+    
+    Attributes:
+        database_url: URL основной БД (проверяется при первом подключении)
+        database_replica_url: URL реплики только для чтения
+        db_pool_size: Постоянных соединений в пуле на воркер
+        db_max_overflow: Дополнительных соединений сверх db_pool_size
+        db_pool_timeout: Секунд ожидания соединения до ответа 503
+        db_pool_recycle: Через сколько секунд пересоздавать соединение
+        db_statement_timeout_ms: Серверный statement_timeout (0 - не задавать)
+        db_replica_pin_seconds: Сколько читать из основной БД после записи (метка в cookie primary_pin)
+        secret_key: Ключ подписи JWT (обязателен без debug; в debug без него - случайный на процесс)
+        algorithm: Алгоритм подписи JWT
+        access_token_expire_minutes: Время жизни токена
+        admin_token: Токен административных эндпоинтов (заголовок X-Admin-Token)
+        norms_refresh_seconds: Период пересчета процентильных норм (0 - выключен)
+        norms_min_group_size: Минимум результатов в группе для выдачи процентиля
+        report_cache_size: Интерпретаций результатов в LRU-кеше процесса
+        version_cache_size: Записей в кеше данных прошлых версий тестов
+        report_pdf_dir: Каталог кеша PDF-отчетов (по умолчанию backend/reports, вне git)
+        report_pdf_workers: Процессов рендеринга PDF
+        report_pdf_keep_files: Максимум PDF в кеше (давно не запрашивавшиеся удаляются)
+        report_pdf_font: TTF-шрифт с кириллицей для PDF
+        report_pdf_font_bold: Полужирное начертание шрифта PDF
+        tests_dir: Каталог с JSON-файлами тестов (по умолчанию backend/tests_data)
+        catalog_watch: Перезагружать измененные файлы тестов без перезапуска
+        catalog_poll_seconds: Период опроса файлов, если watchfiles недоступен
+        idempotency_ttl_seconds: Сколько хранить ответы по Idempotency-Key
+        idempotency_cache_size: Максимум ответов в кеше процесса
+        jobs_in_process: Выполнять фоновые задачи внутри процесса API
+        job_concurrency: Максимум одновременно выполняемых задач на раннер
+        job_poll_seconds: Период опроса очереди задач
+        job_max_attempts: Попыток по умолчанию до статуса failed
+        job_backoff_seconds: Задержка перед первым повтором (дальше - вдвое больше)
+        job_lock_timeout_seconds: Через сколько вернуть в очередь задачу упавшего воркера
+        completion_webhook_url: Адрес уведомлений о завершении тестов
+        import_hash_workers: Процессов хеширования паролей при импорте через API
+        cors_origins: JSON-список разрешенных origins
+        cors_max_age: Сколько секунд браузер кеширует ответ на preflight (OPTIONS)
+        compression_enabled: Сжимать ответы (brotli/gzip)
+        admission_enabled: Ограничивать одновременные запросы и отклонять лишние (503)
+        admission_max_concurrency: Одновременных запросов на процесс
+        admission_max_queue: Максимум запросов, ожидающих слота
+        admission_read_concurrency: Одновременных обычных запросов (чтения, админка)
+        admission_login_concurrency: Одновременных входов и регистраций (bcrypt)
+        admission_critical_budget_ms: Сколько завершение теста может ждать слота
+        admission_read_budget_ms: Сколько обычный запрос может ждать слота
+        admission_login_budget_ms: Сколько вход или регистрация может ждать слота
+        compression_min_size: Ответы меньше порога (байт) не сжимаются
+        compression_gzip_level: Уровень gzip для динамических ответов (1-9)
+        compression_brotli_quality: Качество brotli для динамических ответов (0-11)
+        tracing_enabled: Включить трассировку OpenTelemetry
+        tracing_exporter: Куда экспортировать span: otlp, file или console
+        tracing_otlp_endpoint: Адрес OTLP/HTTP коллектора
+        tracing_file_path: Файл JSON Lines для экспорта file (по умолчанию backend/traces.jsonl)
+        tracing_sample_ratio: Доля записываемых трасс (0-1)
+        tracing_service_name: service.name в ресурсах трасс
+        profile_dir: Каталог файлов профилей (по умолчанию backend/profiles)
+        profile_interval_ms: Интервал сэмплинга профиля по запросу или сигналу
+        profile_signal: Сигнал, запускающий профиль в файл (пусто - выключено)
+        profile_signal_seconds: Длительность профиля по сигналу
+        profile_continuous: Непрерывное профилирование с низкой частотой
+        profile_continuous_interval_ms: Интервал сэмплинга непрерывного профиля
+        profile_window_seconds: Длительность одного файла непрерывного профиля
+        profile_keep_files: Сколько последних файлов непрерывного профиля хранить
+        live_buffer_size: Событий в буфере одной панели проктора до ее отключения
+        live_max_subscribers: Максимум одновременно подключенных панелей на процесс
+        live_heartbeat_seconds: Интервал пинга в потоке событий панели
+        live_replay_size: Событий для досылки при переподключении (Last-Event-ID)
+        live_state_size: Студентов в снимке текущего состояния для новой панели
+        live_notify: Передавать события между воркерами через PostgreSQL LISTEN/NOTIFY
+        live_ticket_minutes: Время жизни билета на подключение панели (?ticket=)
+        default_tenant: Арендатор (университет) основной БД и запросов без X-Tenant/Host
+        tenant_header: Заголовок, явно выбирающий арендатора
+        tenant_refresh_seconds: Период перечитывания реестра арендаторов и их справочников
+        tenant_max_hot: Максимум арендаторов с движком и метаданными в памяти процесса
+        tenant_max_concurrency: Одновременных запросов одного арендатора на процесс (0 - без предела)
+        tenant_pool_size: Постоянных соединений в пуле арендатора со своей БД или схемой
+        tenant_max_overflow: Дополнительных соединений арендатора сверх tenant_pool_size
+        debug: Режим разработки (автоперезагрузка uvicorn)
+        host: Адрес для запуска через python main.py
+        port: Порт для запуска через python main.py
+    """
+    
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(BASE_DIR, ".env"),
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+    
+    database_url: Optional[str] = None
+    database_replica_url: Optional[str] = None
+    
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 3
+    db_pool_recycle: int = 300
+    db_statement_timeout_ms: int = 0
+    db_replica_pin_seconds: float = 10
+    
+    secret_key: Optional[str] = None
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+    admin_token: Optional[str] = None
+    
+    norms_refresh_seconds: float = 3600
+    norms_min_group_size: int = 30
+    report_cache_size: int = 10000
+    version_cache_size: int = 256
+    report_pdf_dir: str = os.path.join(BASE_DIR, "reports")
+    report_pdf_workers: int = 2
+    report_pdf_keep_files: int = 20000
+    report_pdf_font: str = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+    report_pdf_font_bold: str = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+    
+    tests_dir: str = os.path.join(BASE_DIR, "tests_data")
+    catalog_watch: bool = True
+    catalog_poll_seconds: float = 2
+    
+    idempotency_ttl_seconds: float = 86400
+    idempotency_cache_size: int = 10000
+    
+    jobs_in_process: bool = True
+    job_concurrency: int = 4
+    job_poll_seconds: float = 1
+    job_max_attempts: int = 5
+    job_backoff_seconds: float = 2
+    job_lock_timeout_seconds: float = 300
+    completion_webhook_url: Optional[str] = None
+    
+    import_hash_workers: int = 2
+    
+    cors_origins: str = DEFAULT_CORS_ORIGINS
+    # Chrome ограничивает кеш preflight 2 часами, Firefox - сутками
+    cors_max_age: int = 86400
+    
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+    
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 64
+    admission_max_queue: int = 1000
+    admission_read_concurrency: int = 48
+    # bcrypt выполняется в пуле потоков (40 по умолчанию) и загружает CPU
+    admission_login_concurrency: int = 8
+    admission_critical_budget_ms: float = 10000
+    admission_read_budget_ms: float = 2000
+    admission_login_budget_ms: float = 5000
+    
+    tracing_enabled: bool = False
+    tracing_exporter: str = "otlp"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: str = os.path.join(BASE_DIR, "traces.jsonl")
+    tracing_sample_ratio: float = 0.05
+    tracing_service_name: str = "university-tests-api"
+    
+    profile_dir: str = os.path.join(BASE_DIR, "profiles")
+    profile_interval_ms: float = 10
+    profile_signal: Optional[str] = "SIGUSR2"
+    profile_signal_seconds: float = 30
+    profile_continuous: bool = False
+    profile_continuous_interval_ms: float = 100
+    profile_window_seconds: float = 60
+    profile_keep_files: int = 60
+    
+    live_buffer_size: int = 256
+    live_max_subscribers: int = 500
+    live_heartbeat_seconds: float = 15
+    live_replay_size: int = 1000
+    live_state_size: int = 10000
+    live_notify: bool = False
+    live_ticket_minutes: int = 480
+    
+    default_tenant: str = "default"
+    tenant_header: str = "X-Tenant"
+    tenant_refresh_seconds: float = 60
+    tenant_max_hot: int = 32
+    tenant_max_concurrency: int = 32
+    # Пулы арендаторов складываются: (pool_size + max_overflow) * арендаторов
+    # * воркеров должно укладываться в max_connections
+    tenant_pool_size: int = 2
+    tenant_max_overflow: int = 3
+    
+    debug: bool = False
+    host: str = "0.0.0.0"
+    port: int = 8000
+    
+    @property
+    def cors_origins_list(self) -> List[str]:
+        """
+        Разбирает CORS_ORIGINS из JSON
+        
+        Returns:
+            List[str]: Список origins или значения по умолчанию при ошибке разбора
+        """
+        try:
+            return json.loads(self.cors_origins)
+        except json.JSONDecodeError:
+            return list(FALLBACK_CORS_ORIGINS)
+
+@lru_cache()
+def get_settings() -> Settings:
+    """
+    Возвращает единственный экземпляр настроек
+    
+    Returns:
+        Settings: Закешированные настройки
+    """
+    return Settings()
@@ -6,7 +6,6 @@
 
 import os
 import sys
-from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
 # Добавляем текущую директорию в путь Python
@@ -16,7 +15,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 load_dotenv()
 
 # Импортируем модели и базу данных
-from db.database import Base, engine
+from db.database import Base, engine, get_table_names
 from models import User, Test
 
 def create_tables():
@@ -30,16 +29,8 @@ def create_tables():
         # print("✅ Таблицы успешно созданы!")
         
         # Проверяем созданные таблицы
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                ORDER BY table_name;
-            """))
-            
-            tables = [row[0] for row in result]
-            # print(f"📋 Созданные таблицы: {', '.join(tables)}")
+        tables = get_table_names(engine)
+        # print(f"📋 Созданные таблицы: {', '.join(tables)}")
             
     except Exception as e:
         # print(f"❌ Ошибка при создании таблиц: {e}")
@@ -1,27 +1,423 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+from sqlalchemy.pool import QueuePool, StaticPool
+from typing import Optional
+import threading
 
-# Загружаем переменные окружения
-load_dotenv()
+from config import get_settings
 
-# Получаем URL базы данных из переменных окружения
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Параметры пула соединений задаются в config.Settings (DB_POOL_*).
+# Сумма DB_POOL_SIZE + DB_MAX_OVERFLOW на каждый воркер uvicorn должна
+# укладываться в max_connections PostgreSQL (с запасом под миграции и psql).
+# DB_POOL_TIMEOUT - сколько секунд запрос ждет свободное соединение, прежде
+# чем получить 503; значение SQLAlchemy по умолчанию (30 с) скрывает перегрузку.
+#
+# DATABASE_URL=sqlite:///path.db или sqlite:// (в памяти) - режим без
+# PostgreSQL для локального запуска, тестов и бенчмарков. Секционирование,
+# statement_timeout и блокировки строк в нем не действуют.
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
+# Ожидание блокировки записи в SQLite, мс (писатель в файле всегда один)
+SQLITE_BUSY_TIMEOUT_MS = 5000
 
-# Создаем движок SQLAlchemy
-engine = create_engine(
-    DATABASE_URL,  
-    pool_pre_ping=True,  # Проверка соединения перед использованием
-    pool_recycle=300,  # Переподключение каждые 5 минут
-)
+def is_sqlite_url(database_url: str) -> bool:
+    """Проверяет, что URL указывает на SQLite"""
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+def is_memory_url(database_url: str) -> bool:
+    """
+    Проверяет, что URL указывает на SQLite в памяти
+
+    Args:
+        database_url: URL базы данных
+
+    Returns:
+        bool: True для sqlite://, sqlite:///:memory: и file:...?mode=memory
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return False
+    database = url.database or ""
+    return database in ("", ":memory:") or url.query.get("mode") == "memory"
+
+class CountingQueuePool(QueuePool):
+    """
+    QueuePool, считающий запросы, не дождавшиеся соединения
+
+    Таймаут учитывается в счетчиках своего пула (основная БД, реплика,
+    арендатор), поэтому /health/db и /health/tenants показывают, какой
+    именно пул исчерпан. Пул, пересозданный при dispose(), сохраняет счетчики.
+    """
+
+    counters: Optional[dict] = None
+
+    def connect(self):
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.counters is not None:
+                self.counters["timeouts"] += 1
+            raise
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.counters = self.counters
+        return pool
+
+def _sqlite_engine_options(database_url: str) -> dict:
+    """
+    Параметры create_engine для SQLite
+
+    База в памяти живет, пока открыто ее соединение, поэтому все потоки
+    работают через одно соединение (StaticPool). Для файла остается
+    обычный пул: соединения переходят между потоками пула FastAPI.
+
+    Args:
+        database_url: URL базы данных
+
+    Returns:
+        dict: Именованные аргументы для create_engine
+    """
+    options = {"connect_args": {"check_same_thread": False}}
+    options["poolclass"] = StaticPool if is_memory_url(database_url) else CountingQueuePool
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Включает внешние ключи (ON DELETE CASCADE), WAL и ожидание блокировки"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    # Для базы в памяти WAL недоступен, запрос просто вернет "memory"
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+def _engine_options(database_url: str, pool_size: Optional[int] = None,
+                    max_overflow: Optional[int] = None, search_path: Optional[str] = None) -> dict:
+    """
+    Собирает параметры create_engine из настроек пула
+
+    Args:
+        database_url: URL базы данных
+        pool_size: Размер пула вместо DB_POOL_SIZE (пулы арендаторов)
+        max_overflow: Сверх пула вместо DB_MAX_OVERFLOW
+        search_path: Схема PostgreSQL для всех запросов соединения
+
+    Returns:
+        dict: Именованные аргументы для create_engine
+    """
+    if is_sqlite_url(database_url):
+        return _sqlite_engine_options(database_url)
+
+    settings = get_settings()
+    options = {
+        "pool_pre_ping": True,  # Проверка соединения перед использованием
+        "pool_recycle": settings.db_pool_recycle,  # Переподключение каждые N секунд
+        "pool_size": settings.db_pool_size if pool_size is None else pool_size,
+        "max_overflow": settings.db_max_overflow if max_overflow is None else max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "poolclass": CountingQueuePool,
+    }
+
+    # Передаем параметры сессии через libpq при подключении, чтобы не
+    # тратить отдельный запрос SET на каждое соединение
+    server_options = []
+    if settings.db_statement_timeout_ms > 0:
+        server_options.append(f"-c statement_timeout={settings.db_statement_timeout_ms}")
+    if search_path:
+        server_options.append(f"-c search_path={search_path}")
+    if server_options:
+        options["connect_args"] = {"options": " ".join(server_options)}
+
+    return options
+
+# Счетчики событий пула (на процесс)
+pool_counters = {
+    "connects": 0,
+    "checkouts": 0,
+    "timeouts": 0,
+}
+replica_pool_counters = {
+    "connects": 0,
+    "checkouts": 0,
+    "timeouts": 0,
+}
+
+def _attach_pool_counters(target_engine, counters: dict):
+    """
+    Подписывает счетчики на события пула движка
+
+    Args:
+        target_engine: Движок SQLAlchemy
+        counters: Словарь счетчиков этого движка
+    """
+    if isinstance(target_engine.pool, CountingQueuePool):
+        target_engine.pool.counters = counters
+
+    @event.listens_for(target_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(target_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+
+def build_engine(database_url: str, **pool_options):
+    """
+    Создает движок с параметрами пула для данного URL
+
+    Для SQLite включаются PRAGMA каждого соединения; база в памяти сразу
+    получает схему, так как миграции к ней не применить.
+
+    Args:
+        database_url: URL базы данных
+        pool_options: pool_size, max_overflow, search_path (см. _engine_options)
+
+    Returns:
+        Engine: Движок SQLAlchemy
+    """
+    new_engine = create_engine(database_url, **_engine_options(database_url, **pool_options))
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+        if is_memory_url(database_url):
+            _create_schema(new_engine)
+    return new_engine
+
+# Движки создаются при первом обращении, а не при импорте: приложение и
+# скрипты стартуют без подключения к БД, а отсутствие DATABASE_URL
+# обнаруживается только там, где БД действительно нужна
+_engine = None
+_replica_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Возвращает движок основной БД, создавая его при первом вызове
+
+    Returns:
+        Engine: Движок SQLAlchemy
+
+    Raises:
+        ValueError: Если DATABASE_URL не задан
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                database_url = get_settings().database_url
+                if not database_url:
+                    raise ValueError(
+                        "DATABASE_URL environment variable is not set "
+                        "(для запуска без PostgreSQL: DATABASE_URL=sqlite://)"
+                    )
+
+                new_engine = build_engine(database_url)
+                _attach_pool_counters(new_engine, pool_counters)
+                _engine = new_engine
+
+    return _engine
+
+def get_replica_engine():
+    """
+    Возвращает движок реплики, создавая его при первом вызове
+
+    Returns:
+        Engine или None: Движок реплики или None, если DATABASE_REPLICA_URL не задан
+    """
+    global _replica_engine
+
+    replica_url = get_settings().database_replica_url
+    if not replica_url:
+        return None
+
+    if _replica_engine is None:
+        with _engine_lock:
+            if _replica_engine is None:
+                new_engine = build_engine(replica_url)
+                _attach_pool_counters(new_engine, replica_pool_counters)
+                _replica_engine = new_engine
+
+    return _replica_engine
+
+def use_database(database_url: str):
+    """
+    Переключает процесс на другую основную БД
+
+    Предыдущие движки закрываются, фабрики сессий пересоздаются при
+    следующем вызове. Нужна тестам и бенчмаркам: каждый набор получает
+    свою базу, например use_database("sqlite://") - чистая БД в памяти.
+    Реплика при этом не используется.
+
+    Args:
+        database_url: URL новой основной БД
+
+    Returns:
+        Engine: Движок новой БД
+    """
+    global _engine, _replica_engine
+
+    with _engine_lock:
+        for old_engine in (_engine, _replica_engine):
+            if old_engine is not None:
+                old_engine.dispose()
+        settings = get_settings()
+        settings.database_url = database_url
+        settings.database_replica_url = None
+        _replica_engine = None
+        _engine = build_engine(database_url)
+        _attach_pool_counters(_engine, pool_counters)
+        SessionLocal.reset()
+        ReplicaSessionLocal.reset()
+        ControlSessionLocal.reset()
+
+    return _engine
+
+def has_replica() -> bool:
+    """Проверяет, настроена ли реплика для чтения"""
+    return bool(get_settings().database_replica_url)
+
+def __getattr__(name):
+    # Совместимость со скриптами, импортирующими engine/replica_engine напрямую
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engine":
+        return get_replica_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _describe_pool(target_engine, counters: dict, pool_size: Optional[int] = None,
+                   max_overflow: Optional[int] = None) -> dict:
+    """
+    Собирает статистику пула одного движка
+
+    Args:
+        target_engine: Движок SQLAlchemy
+        counters: Счетчики событий этого движка
+        pool_size: Размер пула, если он отличается от DB_POOL_SIZE
+        max_overflow: Сверх пула, если отличается от DB_MAX_OVERFLOW
+
+    Returns:
+        dict: Настройки пула, текущая загрузка и счетчики событий
+    """
+    settings = get_settings()
+    pool = target_engine.pool
+    status = {
+        "pool_class": type(pool).__name__,
+        "pool_size": settings.db_pool_size if pool_size is None else pool_size,
+        "max_overflow": settings.db_max_overflow if max_overflow is None else max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "statement_timeout_ms": settings.db_statement_timeout_ms or None,
+        **counters,
+    }
+
+    # NullPool/StaticPool не ведут учет соединений
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+
+    return status
+
+def get_pool_status() -> dict:
+    """
+    Возвращает состояние пулов соединений для мониторинга
+
+    Returns:
+        dict: Статистика пула основной БД и, если настроена, реплики
+    """
+    status = _describe_pool(get_engine(), pool_counters)
+
+    replica = get_replica_engine()
+    if replica is not None:
+        status["replica"] = _describe_pool(replica, replica_pool_counters)
+
+    return status
+
+def get_server_max_connections():
+    """
+    Запрашивает max_connections у сервера PostgreSQL
+
+    Returns:
+        int или None: Лимит соединений сервера или None для других СУБД
+    """
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return None
+
+    with engine.connect() as conn:
+        return int(conn.execute(text("SHOW max_connections")).scalar())
+
+# Маршрутизация сессий по арендаторам (db/tenancy.py): функция без
+# аргументов, возвращающая sessionmaker БД текущего арендатора или None
+# для основной БД
+_tenant_router = None
+
+def set_tenant_router(router):
+    """
+    Подключает маршрутизацию SessionLocal/ReplicaSessionLocal по арендаторам
+
+    Args:
+        router: Функция () -> sessionmaker или None (основная БД)
+    """
+    global _tenant_router
+    _tenant_router = router
+
+class _LazySessionFactory:
+    """
+    Фабрика сессий, которая создает движок при первом вызове.
+    Используется как обычный sessionmaker: SessionLocal().
+
+    Args:
+        engine_getter: Возвращает движок основной БД (или реплики)
+        routed: Открывать сессии в БД текущего арендатора, если она своя
+    """
+
+    def __init__(self, engine_getter, routed: bool = True):
+        self._engine_getter = engine_getter
+        self._routed = routed
+        self._sessionmaker = None
+
+    def __call__(self, **kwargs):
+        if self._routed and _tenant_router is not None:
+            tenant_sessionmaker = _tenant_router()
+            if tenant_sessionmaker is not None:
+                return tenant_sessionmaker(**kwargs)
+        if self._sessionmaker is None:
+            self._sessionmaker = sessionmaker(
+                autocommit=False, autoflush=False, bind=self._engine_getter()
+            )
+        return self._sessionmaker(**kwargs)
+
+    def reset(self):
+        """Забывает движок: следующая сессия будет открыта на текущем"""
+        self._sessionmaker = None
 
 # Создаем фабрику сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionFactory(get_engine)
+
+# Фабрика сессий для чтения: реплика, а без нее - основная БД
+# (у арендаторов со своей БД реплики нет - чтения идут в их БД)
+ReplicaSessionLocal = _LazySessionFactory(lambda: get_replica_engine() or get_engine())
+
+# Сессии основной (управляющей) БД независимо от арендатора запроса:
+# реестр арендаторов и прочие общие данные
+ControlSessionLocal = _LazySessionFactory(get_engine, routed=False)
+
+def get_read_session(primary: bool = False):
+    """
+    Создает сессию для чтения
+
+    Args:
+        primary: Читать из основной БД (пользователь закреплен за ней после
+            собственной записи, см. auth.pin_user_to_primary)
+
+    Returns:
+        Session: Сессия реплики или основной БД
+    """
+    if primary:
+        return SessionLocal()
+    return ReplicaSessionLocal()
 
 # Базовый класс для моделей
 Base = declarative_base()
@@ -33,7 +429,7 @@ def get_db():
     Автоматически закрывает сессию после использования.
     """
     db = SessionLocal()
-    
+
     try:
         yield db
     except Exception as e:
@@ -41,10 +437,48 @@ def get_db():
     finally:
         db.close()
 
+# Dependency для сессии только для чтения (каталог тестов и т.п.)
+def get_read_db():
+    """
+    Dependency для получения сессии чтения.
+    Использует реплику, если она настроена. Изменения через эту сессию
+    не коммитятся - для записи используйте get_db.
+    """
+    db = ReplicaSessionLocal()
+
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _create_schema(target_engine):
+    """Создает таблицы всех моделей на указанном движке"""
+    # Модели регистрируются в Base.metadata при импорте пакета
+    import models  # noqa: F401
+    from models.reference import seed_reference_data
+    Base.metadata.create_all(bind=target_engine)
+    # Справочники факультетов и курсов, которые в PostgreSQL заполняет миграция
+    with sessionmaker(bind=target_engine)() as session:
+        seed_reference_data(session)
+        session.commit()
+
 # Функция для создания всех таблиц (используется в разработке)
 def create_tables():
     """
     Создает все таблицы в базе данных.
     В продакшене используйте Alembic миграции.
     """
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    _create_schema(get_engine())
+
+def get_table_names(target_engine=None) -> list:
+    """
+    Возвращает имена таблиц БД (вместо запроса к information_schema,
+    которого нет в SQLite)
+
+    Args:
+        target_engine: Движок (по умолчанию - основной)
+
+    Returns:
+        list: Отсортированные имена таблиц
+    """
+    return sorted(inspect(target_engine or get_engine()).get_table_names())
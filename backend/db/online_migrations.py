@@ -0,0 +1,376 @@
+"""
+Онлайн-миграции для Alembic: пакетное заполнение данных и индексы без
+блокировки таблиц.
+
+backfill - заполнение (UPDATE, перенос в другую таблицу) пачками по
+ключу: SELECT ключей "после последнего обработанного" (keyset, без
+OFFSET), затем изменение диапазона ключей пачки в отдельной короткой
+транзакции. Последний обработанный ключ сохраняется в таблице
+alembic_backfill_state в той же транзакции, что и пачка, поэтому
+прерванная миграция при повторном запуске продолжает с места остановки,
+а уже завершенное заполнение пропускается. Между пачками - пауза
+(pause_seconds) или доля занятого времени (duty_cycle), чтобы не
+забивать диск и репликацию. Прогресс печатается раз в
+PROGRESS_INTERVAL_SECONDS.
+
+create_index_concurrently / drop_index_concurrently - CREATE/DROP INDEX
+CONCURRENTLY в PostgreSQL (запись в таблицу не блокируется). Невалидный
+индекс от прерванной сборки удаляется и строится заново. Для
+секционированных таблиц (test_attempts) индекс создается ON ONLY на
+родителе, строится CONCURRENTLY на каждой секции и присоединяется
+(ATTACH PARTITION). В других СУБД - обычный CREATE INDEX IF NOT EXISTS.
+
+Обе операции выполняются вне транзакции миграции (autocommit_block):
+все, что миграция сделала до вызова, уже закоммичено. Если заполнение
+прервется, миграция запустится заново целиком, поэтому DDL перед ним
+(add_column и т.п.) лучше вынести в отдельную предыдущую ревизию.
+
+Параметры можно переопределить при запуске без правки миграции:
+    alembic -x backfill_batch_size=5000 -x backfill_pause=0.2 upgrade head
+
+Пример миграции:
+    from db.online_migrations import backfill, create_index_concurrently
+
+    def upgrade():  # столбец total добавлен предыдущей ревизией
+        attempts = sa.table('test_attempts', sa.column('id'), sa.column('total'))
+        backfill('test_attempts_total', attempts, 'id', values={'total': 0},
+                 where=attempts.c.total.is_(None))
+        create_index_concurrently('ix_test_attempts_total', 'test_attempts', ['total'])
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import sqlalchemy as sa
+from alembic import context, op
+
+# Таблица состояния заполнений (исключена из autogenerate в alembic/env.py)
+BACKFILL_STATE_TABLE = "alembic_backfill_state"
+
+DEFAULT_BATCH_SIZE = 1000
+PROGRESS_INTERVAL_SECONDS = 10
+
+# Максимальная длина идентификатора PostgreSQL
+MAX_IDENTIFIER_LENGTH = 63
+
+_state_metadata = sa.MetaData()
+backfill_state = sa.Table(
+    BACKFILL_STATE_TABLE, _state_metadata,
+    sa.Column("name", sa.String(200), primary_key=True, comment="Имя заполнения"),
+    sa.Column("last_key", sa.JSON(), nullable=True, comment="Последний обработанный ключ"),
+    sa.Column("rows", sa.BigInteger(), nullable=False, comment="Измененных строк"),
+    sa.Column("batches", sa.Integer(), nullable=False, comment="Выполненных пачек"),
+    sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, comment="Время последней пачки"),
+    sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True, comment="Время завершения"),
+)
+
+def _x_option(name: str, default, cast):
+    """Параметр из alembic -x name=value или значение по умолчанию"""
+    try:
+        value = context.get_x_argument(as_dictionary=True).get(name)
+    except Exception:
+        # Вызов вне команды alembic (например, из скрипта)
+        value = None
+    return default if value is None else cast(value)
+
+def _load_state(connection, name: str):
+    """Строка состояния заполнения или None"""
+    return connection.execute(
+        sa.select(backfill_state).where(backfill_state.c.name == name)
+    ).first()
+
+def _save_state(connection, name: str, last_key, rows: int, batches: int, completed: bool = False):
+    """Сохраняет состояние заполнения (в транзакции пачки)"""
+    now = datetime.now(timezone.utc)
+    values = {
+        "last_key": last_key,
+        "rows": rows,
+        "batches": batches,
+        "updated_at": now,
+        "completed_at": now if completed else None,
+    }
+    updated = connection.execute(
+        sa.update(backfill_state).where(backfill_state.c.name == name).values(**values)
+    ).rowcount
+    if not updated:
+        connection.execute(sa.insert(backfill_state).values(name=name, **values))
+
+def reset_backfill(name: str):
+    """
+    Забывает состояние заполнения (для downgrade: следующий upgrade
+    выполнит заполнение заново)
+
+    Args:
+        name: Имя заполнения
+    """
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table(BACKFILL_STATE_TABLE):
+        bind.execute(sa.delete(backfill_state).where(backfill_state.c.name == name))
+
+def _key_bounds(connection, key_column, where) -> tuple:
+    """Минимальный и максимальный ключ (для оценки прогресса по числовым ключам)"""
+    query = sa.select(sa.func.min(key_column), sa.func.max(key_column))
+    if where is not None:
+        query = query.where(where)
+    return tuple(connection.execute(query).one())
+
+def _progress_percent(bounds: tuple, last_key) -> Optional[float]:
+    """Доля пройденного диапазона ключей или None для нечисловых ключей"""
+    low, high = bounds
+    if not all(isinstance(value, (int, float)) for value in (low, high, last_key)) or high <= low:
+        return None
+    return min(100.0, 100.0 * (last_key - low) / (high - low))
+
+def backfill(name: str, table, key: str, values: Optional[dict] = None,
+             apply: Optional[Callable] = None, where=None,
+             batch_size: Optional[int] = None, pause_seconds: Optional[float] = None,
+             duty_cycle: Optional[float] = None) -> dict:
+    """
+    Пакетное возобновляемое заполнение данных по уникальному ключу
+
+    Пачка - диапазон (предыдущий ключ, последний ключ пачки]: сначала
+    выбираются batch_size ключей по порядку, затем одной транзакцией
+    выполняется изменение диапазона и сохраняется состояние.
+
+    Args:
+        name: Уникальное имя заполнения (ключ состояния)
+        table: Таблица (sa.table(...) или Model.__table__)
+        key: Имя уникального упорядочиваемого столбца (целое число или строка)
+        values: Значения для UPDATE строк пачки (вместо apply)
+        apply: Функция (connection, lower, upper) -> число строк; lower
+            не входит в пачку (None у первой пачки), upper входит
+        where: Дополнительное условие отбора строк (например, col IS NULL);
+            с apply учитывается только при выборе ключей пачки
+        batch_size: Ключей в пачке (-x backfill_batch_size)
+        pause_seconds: Пауза после каждой пачки (-x backfill_pause)
+        duty_cycle: Доля времени на работу от 0 до 1: пауза пропорциональна
+            времени пачки (-x backfill_duty_cycle)
+
+    Returns:
+        dict: rows, batches и seconds этого запуска
+
+    Raises:
+        ValueError: Если не задано ровно одно из values и apply
+        RuntimeError: В режиме --sql (заполнению нужны данные БД)
+    """
+    if (values is None) == (apply is None):
+        raise ValueError("Нужно задать values или apply")
+
+    migration_context = op.get_context()
+    if migration_context.as_sql:
+        raise RuntimeError(f"Заполнение {name} не выполняется в режиме --sql")
+
+    batch_size = _x_option("backfill_batch_size", batch_size or DEFAULT_BATCH_SIZE, int)
+    pause_seconds = _x_option("backfill_pause", pause_seconds or 0.0, float)
+    duty_cycle = _x_option("backfill_duty_cycle", duty_cycle, float)
+    key_column = table.c[key]
+
+    # Изменения миграции до этого места фиксируются, пачки - отдельные
+    # транзакции на своем соединении
+    with migration_context.autocommit_block():
+        engine = op.get_bind().engine
+        backfill_state.create(engine, checkfirst=True)
+
+        with engine.connect() as connection:
+            state = _load_state(connection, name)
+            if state is not None and state.completed_at is not None:
+                print(f"⏭️ Заполнение {name} уже выполнено ({state.rows} строк)")
+                return {"rows": 0, "batches": 0, "seconds": 0.0}
+
+            last_key = state.last_key if state is not None else None
+            total_rows = state.rows if state is not None else 0
+            total_batches = state.batches if state is not None else 0
+            if last_key is not None:
+                print(f"▶️ Заполнение {name}: продолжение после ключа {last_key}")
+            connection.rollback()
+
+            bounds = _key_bounds(connection, key_column, where)
+            connection.rollback()
+
+            started_at = time.monotonic()
+            reported_at = started_at
+            rows, batches = 0, 0
+            while True:
+                batch_started_at = time.monotonic()
+                with connection.begin():
+                    keys = sa.select(key_column.label("key")).order_by(key_column).limit(batch_size)
+                    if where is not None:
+                        keys = keys.where(where)
+                    if last_key is not None:
+                        keys = keys.where(key_column > last_key)
+                    keys = keys.subquery()
+                    upper, count = connection.execute(
+                        sa.select(sa.func.max(keys.c.key), sa.func.count()).select_from(keys)
+                    ).one()
+
+                    if not count:
+                        _save_state(connection, name, last_key, total_rows, total_batches, completed=True)
+                        break
+
+                    if values is not None:
+                        statement = sa.update(table).where(key_column <= upper).values(**values)
+                        if last_key is not None:
+                            statement = statement.where(key_column > last_key)
+                        if where is not None:
+                            statement = statement.where(where)
+                        changed = connection.execute(statement).rowcount
+                    else:
+                        changed = apply(connection, last_key, upper)
+
+                    rows += max(changed or 0, 0)
+                    total_rows += max(changed or 0, 0)
+                    batches += 1
+                    total_batches += 1
+                    last_key = upper
+                    _save_state(connection, name, last_key, total_rows, total_batches)
+
+                now = time.monotonic()
+                if now - reported_at >= PROGRESS_INTERVAL_SECONDS:
+                    reported_at = now
+                    percent = _progress_percent(bounds, last_key)
+                    done = f", {percent:.1f}% ключей" if percent is not None else ""
+                    rate = rows / (now - started_at) if now > started_at else 0
+                    print(f"  {name}: {total_rows} строк, пачек {total_batches}{done}, {rate:.0f} строк/с")
+
+                # Троттлинг: фиксированная пауза и/или пауза по доле занятого времени
+                pause = pause_seconds
+                if duty_cycle and 0 < duty_cycle < 1:
+                    pause += (now - batch_started_at) * (1 - duty_cycle) / duty_cycle
+                if pause > 0:
+                    time.sleep(pause)
+
+    seconds = time.monotonic() - started_at
+    print(f"✅ Заполнение {name}: {rows} строк, {batches} пачек за {seconds:.1f} с")
+    return {"rows": rows, "batches": batches, "seconds": seconds}
+
+def _quote(bind, name: str) -> str:
+    """Экранирует идентификатор для диалекта"""
+    return bind.dialect.identifier_preparer.quote(name)
+
+def _columns_sql(bind, columns: List[str]) -> str:
+    """Список столбцов индекса: имена экранируются, выражения (с пробелом или скобкой) - как есть"""
+    return ", ".join(
+        column if any(char in column for char in " ()") else _quote(bind, column)
+        for column in columns
+    )
+
+def _child_index_name(index_name: str, child_table: str) -> str:
+    """Имя индекса секции, не длиннее MAX_IDENTIFIER_LENGTH"""
+    name = f"{child_table}_{index_name}"
+    if len(name) <= MAX_IDENTIFIER_LENGTH:
+        return name
+    digest = hashlib.md5(name.encode("utf-8")).hexdigest()[:8]
+    return f"{name[:MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+
+def _index_valid(bind, index_name: str) -> Optional[bool]:
+    """Состояние индекса PostgreSQL: True, False (невалидный) или None (нет)"""
+    return bind.execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name}
+    ).scalar()
+
+def _partitions(bind, table_name: str) -> Optional[List[str]]:
+    """Прямые секции таблицы или None, если таблица не секционирована"""
+    relkind = bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+    ).scalar()
+    if relkind != "p":
+        return None
+    return list(bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name) ORDER BY c.relname"
+    ), {"name": table_name}).scalars())
+
+def _build_index(bind, index_name: str, table_name: str, columns_sql: str, unique: bool, where: Optional[str]):
+    """Строит индекс таблицы или дерева секций (PostgreSQL, autocommit)"""
+    unique_sql = "UNIQUE " if unique else ""
+    where_sql = f" WHERE {where}" if where else ""
+    children = _partitions(bind, table_name)
+
+    if children is None:
+        valid = _index_valid(bind, index_name)
+        if valid:
+            return
+        if valid is False:
+            print(f"🧹 Невалидный индекс {index_name} от прерванной сборки удаляется")
+            bind.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(bind, index_name)}"))
+        bind.execute(sa.text(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY {_quote(bind, index_name)} "
+            f"ON {_quote(bind, table_name)} ({columns_sql}){where_sql}"
+        ))
+        return
+
+    # CONCURRENTLY для секционированной таблицы недоступен: пустой индекс
+    # на родителе (без сканирования), секции - по одной, затем ATTACH
+    bind.execute(sa.text(
+        f"CREATE {unique_sql}INDEX IF NOT EXISTS {_quote(bind, index_name)} "
+        f"ON ONLY {_quote(bind, table_name)} ({columns_sql}){where_sql}"
+    ))
+    for child in children:
+        child_index = _child_index_name(index_name, child)
+        _build_index(bind, child_index, child, columns_sql, unique, where)
+        attached = bind.execute(sa.text(
+            "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:child) AND inhparent = to_regclass(:parent)"
+        ), {"child": child_index, "parent": index_name}).scalar()
+        if not attached:
+            bind.execute(sa.text(
+                f"ALTER INDEX {_quote(bind, index_name)} ATTACH PARTITION {_quote(bind, child_index)}"
+            ))
+
+def create_index_concurrently(index_name: str, table_name: str, columns: List[str],
+                              unique: bool = False, where: Optional[str] = None):
+    """
+    Создает индекс без блокировки записи в таблицу
+
+    Повторный вызов безопасен: готовый индекс пропускается, невалидный
+    пересоздается, у секционированной таблицы достраиваются недостающие
+    индексы секций.
+
+    Args:
+        index_name: Имя индекса
+        table_name: Имя таблицы
+        columns: Столбцы или выражения ("completed_at DESC", "lower(last_name)")
+        unique: Уникальный индекс (для секционированной таблицы должен
+            включать ключ секционирования)
+        where: Условие частичного индекса (SQL)
+    """
+    bind = op.get_bind()
+    columns_sql = _columns_sql(bind, columns)
+
+    if bind.dialect.name != "postgresql":
+        unique_sql = "UNIQUE " if unique else ""
+        where_sql = f" WHERE {where}" if where else ""
+        op.execute(
+            f"CREATE {unique_sql}INDEX IF NOT EXISTS {_quote(bind, index_name)} "
+            f"ON {_quote(bind, table_name)} ({columns_sql}){where_sql}"
+        )
+        return
+
+    started_at = time.monotonic()
+    with op.get_context().autocommit_block():
+        _build_index(bind, index_name, table_name, columns_sql, unique, where)
+    print(f"✅ Индекс {index_name} готов за {time.monotonic() - started_at:.1f} с")
+
+def drop_index_concurrently(index_name: str):
+    """
+    Удаляет индекс без блокировки записи в таблицу
+
+    Индекс секционированной таблицы удаляется обычным DROP INDEX
+    (CONCURRENTLY для него недоступен), вместе с индексами секций.
+
+    Args:
+        index_name: Имя индекса
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.execute(f"DROP INDEX IF EXISTS {_quote(bind, index_name)}")
+        return
+
+    with op.get_context().autocommit_block():
+        relkind = bind.execute(
+            sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": index_name}
+        ).scalar()
+        concurrently = "" if relkind == "I" else "CONCURRENTLY "
+        bind.execute(sa.text(f"DROP INDEX {concurrently}IF EXISTS {_quote(bind, index_name)}"))
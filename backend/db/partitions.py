@@ -0,0 +1,113 @@
+"""
+Управление секциями таблицы test_attempts в PostgreSQL.
+
+Схема секционирования:
+    test_attempts                       PARTITION BY LIST (test_id)
+      test_attempts_t{test_id}          PARTITION BY RANGE (completed_at)
+        test_attempts_t{test_id}_YYYY_MM  - один месяц
+
+Секции создаются по требованию перед вставкой попытки. Для других СУБД
+(SQLite в разработке) функции ничего не делают.
+"""
+
+import threading
+import weakref
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError, IntegrityError
+
+ATTEMPTS_TABLE = "test_attempts"
+
+# Уже созданные в этом процессе секции: движок -> {(test_id, год, месяц)}.
+# У арендаторов свои БД или схемы (db/tenancy.py), поэтому секция,
+# созданная через движок одного арендатора, ничего не говорит о другом
+_known_partitions = weakref.WeakKeyDictionary()
+_known_partitions_lock = threading.Lock()
+
+def _month_bounds(moment: datetime):
+    """
+    Возвращает границы месяца в UTC
+
+    Args:
+        moment: Момент времени внутри месяца
+
+    Returns:
+        tuple: (начало месяца, начало следующего месяца)
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+
+    start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+    if moment.month == 12:
+        end = datetime(moment.year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        end = datetime(moment.year, moment.month + 1, 1, tzinfo=timezone.utc)
+
+    return start, end
+
+def partition_name_for_test(test_id: int) -> str:
+    """Имя секции теста"""
+    return f"{ATTEMPTS_TABLE}_t{int(test_id)}"
+
+def partition_name_for_month(test_id: int, moment: datetime) -> str:
+    """Имя месячной секции теста"""
+    start, _ = _month_bounds(moment)
+    return f"{partition_name_for_test(test_id)}_{start.year:04d}_{start.month:02d}"
+
+def attempt_partition_ddl(test_id: int, moment: datetime) -> list:
+    """
+    Формирует DDL секции теста и месячной секции для момента времени
+
+    Args:
+        test_id: ID теста
+        moment: Момент времени внутри нужного месяца
+
+    Returns:
+        list: SQL-выражения CREATE TABLE IF NOT EXISTS
+    """
+    start, end = _month_bounds(moment)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {partition_name_for_test(test_id)} "
+        f"PARTITION OF {ATTEMPTS_TABLE} FOR VALUES IN ({int(test_id)}) "
+        f"PARTITION BY RANGE (completed_at)",
+        f"CREATE TABLE IF NOT EXISTS {partition_name_for_month(test_id, moment)} "
+        f"PARTITION OF {partition_name_for_test(test_id)} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')",
+    ]
+
+def ensure_attempt_partition(engine, test_id: int, moment: datetime):
+    """
+    Создает (если нужно) секцию теста и месячную секцию для момента времени.
+
+    DDL выполняется в отдельном соединении в режиме autocommit, чтобы
+    блокировка родительской таблицы держалась только на время CREATE TABLE,
+    а не на всю транзакцию запроса.
+
+    Args:
+        engine: Движок SQLAlchemy БД (арендатора), куда пишется попытка
+        test_id: ID теста
+        moment: Время завершения попытки
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    start, _ = _month_bounds(moment)
+    key = (int(test_id), start.year, start.month)
+
+    with _known_partitions_lock:
+        if key in _known_partitions.get(engine, ()):
+            return
+
+    statements = attempt_partition_ddl(test_id, moment)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in statements:
+            try:
+                conn.execute(text(statement))
+            except (ProgrammingError, IntegrityError):
+                # Секцию одновременно создал другой воркер
+                pass
+
+    with _known_partitions_lock:
+        _known_partitions.setdefault(engine, set()).add(key)
@@ -0,0 +1,457 @@
+"""
+Арендаторы (университеты) одного развертывания.
+
+- Арендатор запроса определяется по заголовку X-Tenant или Host
+  (utils/tenants.py) и хранится в ContextVar: код в пуле потоков получает
+  его вместе с контекстом, фоновые задачи входят в tenant_scope().
+- Реестр арендаторов - таблица tenants основной (управляющей) БД. Арендатор
+  работает в своей БД (database_url) или своей схеме PostgreSQL
+  (db_schema, через search_path соединения). Арендатор по умолчанию
+  (DEFAULT_TENANT) - основная БД со всеми ее настройками и репликой.
+- SessionLocal/ReplicaSessionLocal открывают сессии в БД текущего
+  арендатора. У каждого арендатора свой движок с небольшим пулом
+  (TENANT_POOL_SIZE + TENANT_MAX_OVERFLOW): нагрузка одного университета
+  исчерпывает только свой пул, а не соединения остальных.
+- Активные ("горячие") арендаторы держат в памяти движок и свои объекты
+  (TenantLocal: справочники, каталог тестов, нормы). Их не больше
+  TENANT_MAX_HOT; давно не использовавшийся арендатор вытесняется вместе
+  с пулом соединений и при следующем запросе активируется заново.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from config import get_settings
+from db.database import (
+    ControlSessionLocal, _attach_pool_counters, _describe_pool, build_engine,
+    is_sqlite_url, set_tenant_router
+)
+
+# Допустимые идентификатор арендатора и имя схемы
+TENANT_SLUG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+SCHEMA_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+class TenantNotFound(LookupError):
+    """Арендатор не зарегистрирован или отключен"""
+
+_current_tenant: ContextVar[Optional[str]] = ContextVar("tenant", default=None)
+
+def get_current_tenant() -> str:
+    """Арендатор текущего запроса или задачи (по умолчанию - DEFAULT_TENANT)"""
+    return _current_tenant.get() or get_settings().default_tenant
+
+def is_default_tenant(slug: Optional[str] = None) -> bool:
+    """Проверяет, что арендатор (по умолчанию - текущий) работает в основной БД"""
+    return (slug or get_current_tenant()) == get_settings().default_tenant
+
+@contextmanager
+def tenant_scope(slug: str) -> Iterator[str]:
+    """
+    Выполняет блок от имени арендатора
+
+    Args:
+        slug: Идентификатор арендатора
+
+    Yields:
+        str: Идентификатор арендатора
+    """
+    token = _current_tenant.set(slug)
+    try:
+        yield slug
+    finally:
+        _current_tenant.reset(token)
+
+@dataclass(frozen=True)
+class TenantConfig:
+    """
+    Настройки арендатора из таблицы tenants
+
+    Attributes:
+        slug: Идентификатор (заголовок X-Tenant, claim tenant в JWT)
+        name: Название университета
+        hosts: Домены, по которым арендатор определяется без заголовка
+        database_url: Своя БД (None - основная)
+        db_schema: Своя схема PostgreSQL в database_url или основной БД
+        tests_dir: Свой каталог тестов (None - общий TESTS_DIR)
+        pool_size: Пул соединений вместо TENANT_POOL_SIZE
+        max_overflow: Сверх пула вместо TENANT_MAX_OVERFLOW
+    """
+    slug: str
+    name: str
+    hosts: Tuple[str, ...] = ()
+    database_url: Optional[str] = None
+    db_schema: Optional[str] = None
+    tests_dir: Optional[str] = None
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+
+    @property
+    def uses_primary(self) -> bool:
+        """Данные арендатора лежат в основной БД (только арендатор по умолчанию)"""
+        return not self.database_url and not self.db_schema
+
+    @classmethod
+    def from_row(cls, row) -> "TenantConfig":
+        """
+        Настройки из строки таблицы tenants
+
+        Raises:
+            ValueError: Если строка не описывает отдельное хранилище данных
+        """
+        if not TENANT_SLUG_PATTERN.match(row.slug):
+            raise ValueError(f"некорректный идентификатор арендатора: {row.slug}")
+        if row.db_schema and not SCHEMA_NAME_PATTERN.match(row.db_schema):
+            raise ValueError(f"{row.slug}: некорректное имя схемы {row.db_schema}")
+        database_url = row.database_url or get_settings().database_url
+        if row.db_schema and is_sqlite_url(database_url):
+            raise ValueError(f"{row.slug}: схемы доступны только в PostgreSQL, задайте database_url")
+        if row.slug != get_settings().default_tenant and not (row.database_url or row.db_schema):
+            raise ValueError(f"{row.slug}: не задана ни database_url, ни db_schema")
+
+        return cls(
+            slug=row.slug,
+            name=row.name,
+            hosts=tuple(host.lower() for host in row.hosts or ()),
+            database_url=row.database_url,
+            db_schema=row.db_schema,
+            tests_dir=row.tests_dir,
+            pool_size=row.pool_size,
+            max_overflow=row.max_overflow,
+        )
+
+def default_tenant_config() -> TenantConfig:
+    """Арендатор по умолчанию, если его нет в таблице tenants"""
+    slug = get_settings().default_tenant
+    return TenantConfig(slug=slug, name=slug)
+
+class TenantState:
+    """
+    Активный арендатор: движок его БД и объекты в памяти
+
+    Attributes:
+        config: Настройки арендатора
+        engine: Движок своей БД/схемы (None - основная БД)
+        objects: Объекты TenantLocal этого арендатора
+        ready: Активация (справочники, каталог, нормы) завершена
+    """
+
+    def __init__(self, config: TenantConfig):
+        self.config = config
+        self.engine = None
+        self.session_factory = None
+        self.counters = {"connects": 0, "checkouts": 0, "timeouts": 0}
+        self.objects: Dict[str, Any] = {}
+        self.ready = threading.Event()
+        self.activated_at = time.time()
+        self._objects_lock = threading.Lock()
+
+        if not config.uses_primary:
+            settings = get_settings()
+            self.engine = build_engine(
+                config.database_url or settings.database_url,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                search_path=config.db_schema,
+            )
+            _attach_pool_counters(self.engine, self.counters)
+            self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    @property
+    def pool_size(self) -> int:
+        value = self.config.pool_size
+        return get_settings().tenant_pool_size if value is None else value
+
+    @property
+    def max_overflow(self) -> int:
+        value = self.config.max_overflow
+        return get_settings().tenant_max_overflow if value is None else value
+
+    def get_object(self, name: str, factory: Callable[[TenantConfig], Any]) -> Any:
+        """Объект арендатора, создаваемый при первом обращении"""
+        value = self.objects.get(name)
+        if value is None:
+            with self._objects_lock:
+                value = self.objects.get(name)
+                if value is None:
+                    value = factory(self.config)
+                    self.objects[name] = value
+        return value
+
+    def dispose(self):
+        """Закрывает пул соединений (арендатор вытеснен или изменен)"""
+        if self.engine is not None:
+            self.engine.dispose()
+
+    def stats(self) -> dict:
+        status = {
+            "name": self.config.name,
+            "storage": "schema" if self.config.db_schema else "database" if self.engine else "primary",
+            "ready": self.ready.is_set(),
+            "objects": sorted(self.objects),
+        }
+        if self.engine is not None:
+            status["pool"] = _describe_pool(self.engine, self.counters, self.pool_size, self.max_overflow)
+        return status
+
+class TenantRegistry:
+    """
+    Реестр арендаторов процесса и LRU активных арендаторов
+
+    Args:
+        max_hot: Максимум активных арендаторов (арендатор по умолчанию
+            не вытесняется)
+    """
+
+    def __init__(self, max_hot: int):
+        self.max_hot = max(1, max_hot)
+        default = default_tenant_config()
+        self._configs: Dict[str, TenantConfig] = {default.slug: default}
+        self._hosts: Dict[str, str] = {}
+        self._hot: "OrderedDict[str, TenantState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._activation_locks: Dict[str, threading.Lock] = {}
+        self._activation_hooks: List[Callable[[TenantState], None]] = []
+        self.loaded_at: Optional[float] = None
+        self.activations = 0
+        self.evictions = 0
+
+    def load(self) -> int:
+        """
+        Перечитывает таблицу tenants основной БД
+
+        Измененные арендаторы (БД, схема, пул) вытесняются и активируются
+        заново при следующем запросе; удаленные и отключенные перестают
+        приниматься.
+
+        Returns:
+            int: Количество активных записей реестра
+        """
+        # Импорт здесь: модели импортируют db.tenancy
+        from models.tenant import Tenant
+
+        db = ControlSessionLocal()
+        try:
+            rows = db.query(Tenant).filter(Tenant.is_active.is_(True)).all()
+        except SQLAlchemyError as e:
+            # До миграции таблицы tenants нет - работает только основная БД
+            print(f"⚠️ Реестр арендаторов недоступен: {e.__class__.__name__}")
+            rows = []
+        finally:
+            db.close()
+
+        default = default_tenant_config()
+        configs = {default.slug: default}
+        for row in rows:
+            try:
+                configs[row.slug] = TenantConfig.from_row(row)
+            except ValueError as e:
+                print(f"⚠️ Арендатор пропущен: {e}")
+
+        hosts = {host: config.slug for config in configs.values() for host in config.hosts}
+
+        with self._lock:
+            self._configs = configs
+            self._hosts = hosts
+            stale = [
+                slug for slug, state in self._hot.items()
+                if configs.get(slug) != state.config
+            ]
+            evicted = [self._hot.pop(slug) for slug in stale]
+            self.loaded_at = time.time()
+
+        for state in evicted:
+            state.dispose()
+        return len(rows)
+
+    def on_activate(self, hook: Callable[[TenantState], None]):
+        """
+        Регистрирует действие при активации арендатора
+
+        Hook выполняется в tenant_scope арендатора, в потоке, который
+        активирует арендатора (не в цикле событий).
+        """
+        self._activation_hooks.append(hook)
+
+    def config(self, slug: str) -> Optional[TenantConfig]:
+        """Настройки арендатора или None, если он не зарегистрирован"""
+        return self._configs.get(slug)
+
+    def resolve_host(self, host: str) -> Optional[str]:
+        """
+        Арендатор по домену запроса
+
+        Args:
+            host: Заголовок Host (порт отбрасывается)
+
+        Returns:
+            str или None, если домен не привязан к арендатору
+        """
+        return self._hosts.get(host.rsplit(":", 1)[0].lower())
+
+    def slugs(self) -> List[str]:
+        """Все зарегистрированные арендаторы"""
+        return list(self._configs)
+
+    def hot_slugs(self) -> List[str]:
+        """Активные арендаторы"""
+        with self._lock:
+            return list(self._hot)
+
+    def peek(self, slug: str, touch: bool = False) -> Optional[TenantState]:
+        """
+        Активный арендатор без активации
+
+        Args:
+            slug: Идентификатор арендатора
+            touch: Отметить арендатора использованным (запрос пользователя,
+                а не фоновый цикл)
+        """
+        with self._lock:
+            state = self._hot.get(slug)
+            if state is not None and touch:
+                self._hot.move_to_end(slug)
+            return state
+
+    def _activation_lock(self, slug: str) -> threading.Lock:
+        with self._lock:
+            return self._activation_locks.setdefault(slug, threading.Lock())
+
+    def state(self, slug: str) -> TenantState:
+        """
+        Активный арендатор; неактивный активируется (блокирующий вызов)
+
+        Состояние публикуется до выполнения hook'ов активации, чтобы они
+        открывали сессии в БД арендатора; дождаться их - activate().
+
+        Raises:
+            TenantNotFound: Если арендатор не зарегистрирован
+        """
+        state = self.peek(slug)
+        if state is not None:
+            return state
+
+        with self._activation_lock(slug):
+            state = self.peek(slug)
+            if state is not None:
+                return state
+
+            config = self._configs.get(slug)
+            if config is None:
+                raise TenantNotFound(slug)
+
+            state = TenantState(config)
+            with self._lock:
+                self._hot[slug] = state
+                evicted = self._evict_locked()
+                self.activations += 1
+            for old_state in evicted:
+                old_state.dispose()
+
+            try:
+                with tenant_scope(slug):
+                    for hook in self._activation_hooks:
+                        try:
+                            hook(state)
+                        except Exception as e:
+                            print(f"⚠️ Активация арендатора {slug}: {hook.__name__}: {e}")
+            finally:
+                state.ready.set()
+            print(f"🏛️ Арендатор активирован: {slug}")
+            return state
+
+    def activate(self, slug: str) -> TenantState:
+        """Активирует арендатора и ждет завершения активации в другом потоке"""
+        state = self.state(slug)
+        state.ready.wait()
+        return state
+
+    def _evict_locked(self) -> List[TenantState]:
+        """Вытесняет самых давно использованных арендаторов сверх max_hot"""
+        default_slug = get_settings().default_tenant
+        evicted = []
+        for slug in list(self._hot):
+            if len(self._hot) <= self.max_hot:
+                break
+            if slug == default_slug:
+                continue
+            evicted.append(self._hot.pop(slug))
+            self.evictions += 1
+        return evicted
+
+    def session_factory(self) -> Optional[sessionmaker]:
+        """Фабрика сессий БД текущего арендатора (None - основная БД)"""
+        slug = get_current_tenant()
+        if slug == get_settings().default_tenant:
+            return None
+        state = self.peek(slug) or self.state(slug)
+        return state.session_factory
+
+    def stats(self) -> dict:
+        """Реестр и активные арендаторы для /health/tenants"""
+        with self._lock:
+            hot = list(self._hot.items())
+        return {
+            "default_tenant": get_settings().default_tenant,
+            "registered": len(self._configs),
+            "max_hot": self.max_hot,
+            "hot": len(hot),
+            "activations": self.activations,
+            "evictions": self.evictions,
+            "loaded_at": self.loaded_at,
+            "tenants": {slug: state.stats() for slug, state in hot},
+        }
+
+class TenantLocal:
+    """
+    Объект, отдельный для каждого арендатора (справочники, каталог, нормы)
+
+    Атрибуты проксируются объекту текущего арендатора. Для арендатора по
+    умолчанию используется default (если задан), для остальных - результат
+    factory(config); объект живет, пока арендатор активен.
+
+    Args:
+        name: Имя объекта в TenantState.objects
+        factory: Создание объекта для арендатора
+        default: Объект арендатора по умолчанию
+    """
+
+    def __init__(self, name: str, factory: Callable[[TenantConfig], Any], default: Any = None):
+        self._name = name
+        self._factory = factory
+        self._default = default
+
+    @property
+    def default(self) -> Any:
+        """Объект арендатора по умолчанию"""
+        if self._default is None:
+            return self.for_tenant(get_settings().default_tenant)
+        return self._default
+
+    def for_tenant(self, slug: Optional[str] = None) -> Any:
+        """
+        Объект арендатора
+
+        Args:
+            slug: Арендатор (по умолчанию - текущий)
+        """
+        slug = slug or get_current_tenant()
+        if self._default is not None and slug == get_settings().default_tenant:
+            return self._default
+        return tenant_registry.state(slug).get_object(self._name, self._factory)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.for_tenant(), name)
+
+# Реестр процесса (один экземпляр на воркер)
+tenant_registry = TenantRegistry(max_hot=get_settings().tenant_max_hot)
+
+set_tenant_router(tenant_registry.session_factory)
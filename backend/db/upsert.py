@@ -0,0 +1,40 @@
+"""
+INSERT ... ON CONFLICT DO NOTHING для поддерживаемых диалектов.
+
+PostgreSQL и SQLite поддерживают пропуск конфликтующих строк на уровне
+запроса, поэтому одновременные вставки одинаковых ключей не падают
+с IntegrityError. Для остальных СУБД выполняется обычный INSERT.
+"""
+
+from sqlalchemy import insert
+
+def insert_ignore_conflicts(db_session, model, rows, index_elements):
+    """
+    Вставляет строки, пропуская конфликты по уникальному ключу
+
+    Args:
+        db_session: Сессия БД
+        model: Модель или таблица
+        rows: Словарь или список словарей со значениями
+        index_elements: Столбцы уникального ключа
+
+    Returns:
+        int: Количество вставленных строк
+    """
+    dialect = db_session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        statement = dialect_insert(model).values(rows).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+    else:
+        statement = insert(model).values(rows)
+
+    return db_session.execute(statement).rowcount
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Генерация синтетической популяции студентов для бенчмарков.
+
+Создает N пользователей (ФИО на кириллице, все факультеты и курсы,
+настоящие bcrypt-хеши) и M попыток теста с коррелированными ответами,
+баллами по шкалам и флагами качества (см. utils/population.py).
+Результат определяется seed: повторный запуск на пустой БД дает
+те же данные. Запись - COPY пачками; 1 млн пользователей - несколько минут.
+
+Пароль пользователя с номером n (с 0) - bench-{n mod --passwords:04d};
+--credentials сохраняет данные для входа первых пользователей в CSV
+того же формата, что читает import_users.py.
+
+Использование:
+    python generate_population.py --users 1000000 --attempts 1500000
+    python generate_population.py --users 10000 --seed 7 --credentials users.csv
+    DATABASE_URL=sqlite:///bench.db python generate_population.py --users 50000
+    python generate_population.py --users 100000 --offset 1000000   # дополнить популяцию
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+# Добавляем текущую директорию в путь Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db.database import SessionLocal, get_engine
+from models.test import Test
+from utils.catalog import load_test_catalog
+from utils.population import (
+    DEFAULT_DISTINCT_PASSWORDS, PopulationError, PopulationGenerator,
+    hash_benchmark_passwords, write_population
+)
+from utils.test_loader import load_test_data
+
+def find_test(test_id):
+    """
+    Тест, для которого создаются попытки
+
+    Args:
+        test_id: ID теста или None (тест из questions.json, иначе первый доступный)
+
+    Returns:
+        Test или None
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Test).filter(Test.is_available == True)
+        if test_id is not None:
+            return query.filter(Test.id == test_id).first()
+        return query.filter(Test.filename == "questions.json").first() or query.order_by(Test.id).first()
+    finally:
+        db.close()
+
+def write_credentials(path: str, generator: PopulationGenerator, count: int, distinct_passwords: int):
+    """Сохраняет данные для входа первых count пользователей"""
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(["Фамилия", "Имя", "Отчество", "Факультет", "Курс", "Пароль"])
+        writer.writerows(generator.credentials(count, distinct_passwords))
+
+def main():
+    """Точка входа скрипта"""
+    parser = argparse.ArgumentParser(description="Синтетическая популяция студентов для бенчмарков")
+    parser.add_argument("--users", type=int, required=True, help="Количество пользователей")
+    parser.add_argument("--attempts", type=int, default=None,
+                        help="Количество попыток теста (по умолчанию - по одной на пользователя)")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="Номер первого пользователя: продолжение популяции того же seed")
+    parser.add_argument("--test-id", type=int, default=None, help="ID теста (по умолчанию - questions.json)")
+    parser.add_argument("--days", type=int, default=365, help="За сколько дней распределить регистрации")
+    parser.add_argument("--until", default=None,
+                        help="Дата последней регистрации, ГГГГ-ММ-ДД (по умолчанию - сегодня)")
+    parser.add_argument("--careless-ratio", type=float, default=0.03, help="Доля небрежных анкет")
+    parser.add_argument("--passwords", type=int, default=DEFAULT_DISTINCT_PASSWORDS,
+                        help="Различных паролей (каждый хешируется bcrypt один раз)")
+    parser.add_argument("--workers", type=int, default=None, help="Процессов хеширования паролей")
+    parser.add_argument("--credentials", default=None, help="CSV с данными для входа первых пользователей")
+    parser.add_argument("--credentials-count", type=int, default=1000, help="Сколько пользователей в CSV")
+    args = parser.parse_args()
+
+    attempts = args.users if args.attempts is None else args.attempts
+    until = datetime.fromisoformat(args.until) if args.until else datetime.now(timezone.utc)
+    # Полночь UTC: запуски в течение одного дня дают одинаковые даты
+    until = until.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=until.tzinfo or timezone.utc)
+
+    load_test_catalog()
+    test = find_test(args.test_id)
+    if test is None:
+        print("❌ Тест не найден: зарегистрируйте каталог (python init_database.py) или укажите --test-id")
+        sys.exit(1)
+    test_data = load_test_data(test.filename)
+
+    try:
+        generator = PopulationGenerator(
+            seed=args.seed,
+            users=args.users,
+            test_data=test_data,
+            until=until,
+            days=args.days,
+            careless_ratio=args.careless_ratio,
+            offset=args.offset
+        )
+    except PopulationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    started_at = time.perf_counter()
+    password_hashes = hash_benchmark_passwords(args.passwords, args.workers)
+    print(f"🔐 Хешей паролей: {len(password_hashes)} за {time.perf_counter() - started_at:.1f} с")
+
+    def progress(table: str, done: int, total: int):
+        elapsed = time.perf_counter() - started_at
+        print(f"  {table}: {done}/{total} ({elapsed:.0f} с)")
+
+    summary = write_population(
+        get_engine(), generator, test.id, test_data["title"], attempts, password_hashes, progress
+    )
+    elapsed = time.perf_counter() - started_at
+
+    print(f"👥 Пользователей: {summary['users']} (id с {summary['first_user_id']})")
+    print(f"📝 Попыток теста {test.id}: {summary['attempts']}, последних результатов: {summary['latest_results']}")
+    if args.credentials:
+        write_credentials(args.credentials, generator, args.credentials_count, args.passwords)
+        print(f"🔑 Данные для входа: {args.credentials}")
+    print(f"⏱️ {elapsed:.1f} с")
+
+if __name__ == "__main__":
+    main()
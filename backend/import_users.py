@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Массовый импорт пользователей из CSV/XLSX (списки студентов от деканата).
+
+Файл читается потоково, пароли хешируются в пуле процессов параллельно
+со вставкой пачек (см. utils/user_import.py). Пользователи с уже
+существующим ФИО пропускаются, поэтому прерванный импорт можно повторить.
+Построчный отчет об ошибках сохраняется в JSON.
+
+Столбцы (заголовок в первой строке, по-русски или по-английски):
+    Фамилия;Имя;Отчество;Факультет;Курс;Пароль
+
+Использование:
+    python import_users.py students.csv
+    python import_users.py students.xlsx --workers 8 --report import_report.json
+    python import_users.py students.csv --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Добавляем текущую директорию в путь Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db.database import SessionLocal
+from utils.user_import import IMPORT_CHUNK_SIZE, ImportFormatError, import_users, read_rows
+
+def main():
+    """Точка входа скрипта"""
+    parser = argparse.ArgumentParser(description="Массовый импорт пользователей из CSV/XLSX")
+    parser.add_argument("path", help="Файл .csv или .xlsx")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Процессов хеширования паролей (по умолчанию - число ядер)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Строк в одной пачке")
+    parser.add_argument("--dry-run", action="store_true", help="Только проверить файл")
+    parser.add_argument("--report", default=None,
+                        help="Файл отчета (по умолчанию <имя файла>.report.json)")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as file:
+            report = import_users(
+                db,
+                read_rows(file, args.path),
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                dry_run=args.dry_run
+            )
+    except ImportFormatError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started_at
+
+    output = args.report or f"{args.path}.report.json"
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report.to_dict(), file, ensure_ascii=False, indent=2)
+
+    print(f"📄 Строк: {report.total_rows}")
+    if args.dry_run:
+        print(f"✅ Можно создать: {report.total_rows - report.skipped_count - report.error_count}")
+    else:
+        print(f"✅ Создано: {report.created}")
+    print(f"⏭️ Пропущено (ФИО уже есть): {report.skipped_count}")
+    print(f"⚠️ Ошибок: {report.error_count}")
+    for error in report.errors[:10]:
+        print(f"  строка {error['row']}: {'; '.join(error['errors'])}")
+    print(f"⏱️ {elapsed:.1f} с, отчет: {output}")
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@
 import os
 import sys
 import time
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 from dotenv import load_dotenv
 
@@ -17,9 +17,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Загружаем переменные окружения
 load_dotenv()
 
-# Импортируем модели и базу данных
-from db.database import Base, engine, SessionLocal
+# Импортируем настройки, модели и базу данных
+from config import get_settings
+from db.database import Base, engine, SessionLocal, get_table_names
 from models import User, Test
+from models.reference import seed_reference_data
+from utils.catalog import load_test_catalog, sync_test_catalog
 
 def wait_for_database(max_retries=30, delay=2):
     """Ждет пока база данных станет доступной"""
@@ -49,17 +52,18 @@ def create_tables():
         
         print("✅ Таблицы успешно созданы!")
         
+        # Справочники факультетов и курсов (users ссылается на них)
+        db = SessionLocal()
+        try:
+            if seed_reference_data(db):
+                db.commit()
+                print("✅ Справочники факультетов и курсов заполнены")
+        finally:
+            db.close()
+        
         # Проверяем созданные таблицы
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                ORDER BY table_name;
-            """))
-            
-            tables = [row[0] for row in result]
-            print(f"📋 Созданные таблицы: {', '.join(tables)}")
+        tables = get_table_names(engine)
+        print(f"📋 Созданные таблицы: {', '.join(tables)}")
             
         return True
         
@@ -68,49 +72,29 @@ def create_tables():
         return False
 
 def add_initial_test():
-    """Добавляет начальный тест в базу данных"""
+    """Регистрирует в базе данных все тесты из каталога TESTS_DIR"""
     try:
-        print("🔧 Добавление начального теста...")
+        print("🔧 Добавление тестов из каталога...")
         
-        # Создаем сессию базы данных
-        db = SessionLocal()
+        if load_test_catalog() == 0:
+            print("⚠️ В каталоге нет корректных тестов")
+            return False
         
-        # Проверяем есть ли уже тест
-        existing_test = db.query(Test).filter(Test.filename == "questions.json").first()
-        if existing_test:
-            print(f"✅ Тест уже существует: ID={existing_test.id}, filename={existing_test.filename}")
-            return True
-        
-        # Создаем новый тест
-        new_test = Test(
-            filename="questions.json",
-            is_available=True
-        )
-        
-        db.add(new_test)
-        db.commit()
-        db.refresh(new_test)
-        
-        print(f"✅ Тест успешно добавлен!")
-        print(f"📋 ID: {new_test.id}")
-        print(f"📋 Filename: {new_test.filename}")
-        print(f"📋 Available: {new_test.is_available}")
-        print(f"📋 Created at: {new_test.created_at}")
+        added = sync_test_catalog()
+        print(f"✅ Добавлено новых тестов: {added}")
         
         return True
         
     except Exception as e:
-        print(f"❌ Ошибка при добавлении теста: {e}")
+        print(f"❌ Ошибка при добавлении тестов: {e}")
         return False
-    finally:
-        db.close()
 
 def main():
     """Главная функция инициализации"""
     print("🚀 Запуск инициализации базы данных для Railway...")
     
     # Выводим информацию о подключении
-    database_url = os.getenv("DATABASE_URL")
+    database_url = get_settings().database_url
     if database_url:
         # Маскируем пароль в URL для безопасности
         masked_url = database_url.split('@')[1] if '@' in database_url else database_url
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Психометрический анализ шкал теста по накопленным ответам.
+
+Потоково читает ответы попыток из БД (реплики, если настроена), собирает
+их в матрицу int8 и считает для каждой шкалы альфу Кронбаха,
+корреляции пунктов с суммой шкалы и распределения ответов
+(см. utils/item_analysis.py). Отчет сохраняется в JSON.
+
+Использование:
+    python item_analysis.py --test-id 1
+    python item_analysis.py --test-id 1 --all-attempts --output report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Добавляем текущую директорию в путь Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select
+
+from db.database import get_read_session
+from models.test import Test
+from models.attempt import TestAttempt, LatestTestResult
+from utils.catalog import load_test_catalog
+from utils.item_analysis import AnswerMatrixBuilder, analyze_test
+from utils.test_loader import load_test_data
+
+# Пункты с корреляцией ниже порога выделяются в отчете
+LOW_ITEM_TOTAL_R = 0.2
+
+def stream_answers(db, test_id: int, all_attempts: bool, batch_size: int):
+    """
+    Потоково читает ответы попыток теста
+
+    Args:
+        db: Сессия БД
+        test_id: ID теста
+        all_attempts: Все попытки, а не только последняя попытка каждого пользователя
+        batch_size: Строк за одну выборку с сервера
+
+    Yields:
+        list: Ответы одной попытки
+    """
+    query = select(TestAttempt.answers).where(TestAttempt.test_id == test_id)
+    if not all_attempts:
+        query = query.join(
+            LatestTestResult,
+            (LatestTestResult.test_id == TestAttempt.test_id)
+            & (LatestTestResult.attempt_id == TestAttempt.id)
+        )
+
+    # yield_per включает серверный курсор: в памяти только одна пачка строк
+    yield from db.execute(query.execution_options(yield_per=batch_size)).scalars()
+
+def print_summary(report: dict):
+    """
+    Печатает краткую сводку отчета
+
+    Args:
+        report: Отчет analyze_test
+    """
+    print(f"👥 Попыток: {report['respondents']}, вопросов: {report['items']}")
+
+    for name, scale in report["scales"].items():
+        alpha = f"{scale['alpha']:.3f}" if scale["alpha"] is not None else "—"
+        print(f"\n📐 {name}: α = {alpha}, пунктов {scale['n_items']}")
+
+        weak = [
+            item for item in scale["items"]
+            if item["item_total_r"] is None or item["item_total_r"] < LOW_ITEM_TOTAL_R
+        ]
+        for item in weak:
+            r = f"{item['item_total_r']:.3f}" if item["item_total_r"] is not None else "—"
+            print(f"  ⚠️ вопрос {item['item']} ({item['key']}): r = {r}, p = {item['p']:.2f}")
+
+def main():
+    """Точка входа скрипта"""
+    parser = argparse.ArgumentParser(description="Психометрический анализ шкал теста")
+    parser.add_argument("--test-id", type=int, required=True, help="ID теста")
+    parser.add_argument("--all-attempts", action="store_true",
+                        help="Учитывать все попытки (по умолчанию - последняя попытка пользователя)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Строк за одну выборку")
+    parser.add_argument("--output", default=None,
+                        help="Файл отчета (по умолчанию item_analysis_<test_id>.json)")
+    args = parser.parse_args()
+
+    load_test_catalog()
+
+    db = get_read_session()
+    try:
+        test = db.get(Test, args.test_id)
+        if test is None:
+            print(f"❌ Тест {args.test_id} не найден")
+            sys.exit(1)
+
+        test_data = load_test_data(test.filename)
+        if not test_data or not test_data.get("scales"):
+            print(f"❌ У теста {test.filename} нет ключа шкал")
+            sys.exit(1)
+
+        started_at = time.perf_counter()
+        builder = AnswerMatrixBuilder(len(test_data["questions"]))
+        for answers in stream_answers(db, test.id, args.all_attempts, args.batch_size):
+            builder.add(answers)
+        matrix = builder.build()
+        loaded_at = time.perf_counter()
+    finally:
+        db.close()
+
+    report = analyze_test(matrix, test_data["scales"])
+    report["test_id"] = test.id
+    report["test_title"] = test_data["title"]
+    report["all_attempts"] = args.all_attempts
+    finished_at = time.perf_counter()
+
+    output = args.output or f"item_analysis_{test.id}.json"
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    print_summary(report)
+    print(f"\n⏱️ Чтение: {loaded_at - started_at:.1f} с, расчет: {finished_at - loaded_at:.2f} с")
+    print(f"📄 Отчет: {output}")
+
+if __name__ == "__main__":
+    main()
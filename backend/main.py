@@ -2,24 +2,47 @@
 Главный модуль FastAPI приложения для системы психологического тестирования.
 
 Настраивает:
-- CORS для фронтенда
+- CORS для фронтенда и сжатие ответов
+- Определение университета (арендатора) запроса
 - Роутеры для API
 - Обработчики событий запуска/остановки
 """
 
-import uvicorn
-from fastapi import FastAPI
+import asyncio
+import time
+
+# Отсчет времени холодного старта (импорт приложения -> готовность)
+_import_started_at = time.perf_counter()
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
-from dotenv import load_dotenv
+
+from config import get_settings
+from auth.auth import check_secret_key, require_admin
 
 # Импорт роутеров
-from routers import auth, tests, users
+from routers import auth, tests, users, admin, live, reports, tenant
 from utils.exceptions import create_exception_handlers
+from db.database import get_pool_status, get_server_max_connections
+from db.tenancy import tenant_registry
+from utils.norms import norms_engine, run_norms_refresh_loop
+from utils.reports import report_cache
+from utils.pdf_reports import pdf_store
+from utils.idempotency import IDEMPOTENCY_PURGE_SECONDS, run_idempotency_purge_loop
+from utils.jobs import job_runner, get_queue_counts
+import utils.job_handlers  # Регистрация обработчиков фоновых задач
+from utils.catalog import load_test_catalog, register_test_catalog, watch_test_catalog
+from utils.admission import AdmissionMiddleware, admission_controller
+from utils.request_context import RequestContextMiddleware
+from utils.tenants import TenantMiddleware, run_tenant_refresh_loop, tenant_concurrency
+from utils.compression import CompressionMiddleware, PrecompressedStaticFiles, precompressed_cache, supported_encodings
+from utils.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from utils.live_events import live_broker, start_live_events, stop_live_events
+from utils.profiler import create_continuous_profiler, install_profile_signal_handler
+from starlette.concurrency import run_in_threadpool
 
-# Загружаем переменные окружения
-load_dotenv()
+settings = get_settings()
 
 # Создаем экземпляр FastAPI
 app = FastAPI(
@@ -30,44 +53,48 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Настройка CORS
-cors_origins = os.getenv("CORS_ORIGINS", 
-    '["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173", "http://127.0.0.1:5173", "https://university-tests-pearl.vercel.app"]'
-)
+# Кеш объектов запроса (пользователь, тесты) для зависимостей и роутеров
+app.add_middleware(RequestContextMiddleware)
+
+# Контроль допуска (ADMISSION_*) - внутренний слой: ответы 503 при
+# перегрузке получают заголовки CORS и попадают в трассировку
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware)
 
-# Парсим строку JSON с origins
-import json
-try:
-    origins_list = json.loads(cors_origins)
-except json.JSONDecodeError:
-    # Fallback на значения по умолчанию
-    origins_list = [
-        "http://localhost:3000", 
-        "http://127.0.0.1:3000",
-        "http://localhost:5173",  # Vite dev server
-        "http://127.0.0.1:5173",
-        "http://localhost:3001",  # React dev server альтернативный порт
-        "http://127.0.0.1:3001",
-        "http://localhost:8080",  # Webpack dev server
-        "http://127.0.0.1:8080",
-        "http://localhost:8000",  # Если фронтенд обращается к бэкенду на том же хосте
-        "http://127.0.0.1:8000",
-        # Docker контейнеры
-        "http://frontend:3000",
-        "http://backend:8000"
-        # Vercel домены ДОЛЖНЫ быть указаны точно в переменной CORS_ORIGINS
-        # "https://*.vercel.app" НЕ РАБОТАЕТ с credentials=True!
-    ]
+# Университет запроса (X-Tenant или домен) - снаружи контроля допуска:
+# предел TENANT_MAX_CONCURRENCY отсекает наплыв одного университета до
+# общей очереди
+app.add_middleware(TenantMiddleware)
+
+# Сжатие ответов (COMPRESSION_*). Добавляется до CORS, чтобы CORS был
+# внешним слоем и ответы на preflight не проходили через сжатие
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+# Настройка CORS (CORS_ORIGINS - JSON-список, см. config/settings.py)
+origins_list = settings.cors_origins_list
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins_list,
     allow_credentials=True,  # Важно для httpOnly cookies
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Accept", "Accept-Language", "Content-Language", "Content-Type", "Authorization"],
-    expose_headers=["*"],
+    allow_headers=["Accept", "Accept-Language", "Content-Language", "Content-Type", "Authorization", "Idempotency-Key", "X-Primary-Pin", settings.tenant_header],
+    # "*" в запросах с credentials браузер понимает буквально - нужные заголовки перечислены явно
+    expose_headers=["*", "X-Primary-Pin"],
+    max_age=settings.cors_max_age,  # Браузер не повторяет OPTIONS перед каждым запросом
 )
 
+# Трассировка OpenTelemetry (TRACING_*) - внешний слой: span запроса
+# включает CORS и сжатие
+if setup_tracing():
+    app.add_middleware(TracingMiddleware)
+
 # Логируем настройки CORS для дебага
 print(f"🌐 CORS origins configured: {origins_list}")
 
@@ -78,10 +105,14 @@ create_exception_handlers(app)
 app.include_router(auth.router)
 app.include_router(tests.router)
 app.include_router(users.router)
+app.include_router(admin.router)
+app.include_router(live.router)
+app.include_router(reports.router)
+app.include_router(tenant.router)
 
 # Подключение статических файлов (если нужно)
 if os.path.exists("static"):
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 @app.get("/")
 async def root():
@@ -93,6 +124,8 @@ async def root():
         "redoc": "/redoc"
     }
 
+# /health открыт для Docker и балансировщика; подробные /health/* раскрывают
+# пулы, очереди и реестр университетов и доступны только с X-Admin-Token
 @app.get("/health")
 async def health_check():
     """Health check эндпоинт для Docker и мониторинга"""
@@ -103,23 +136,149 @@ async def health_check():
         "version": "2.0.0"
     }
 
+@app.get("/health/db", dependencies=[Depends(require_admin)])
+async def database_pool_status():
+    """Состояние пула соединений с БД (для подбора DB_POOL_SIZE под max_connections)"""
+    pool_status = get_pool_status()
+    pool_status["server_max_connections"] = await run_in_threadpool(get_server_max_connections)
+    return pool_status
+
+@app.get("/health/jobs", dependencies=[Depends(require_admin)])
+async def jobs_status():
+    """Очередь фоновых задач по статусам и состояние раннера этого процесса"""
+    return {
+        "queue": await run_in_threadpool(get_queue_counts),
+        "runner": job_runner.status() if settings.jobs_in_process else None
+    }
+
+@app.get("/health/norms", dependencies=[Depends(require_admin)])
+async def norms_status():
+    """Время последнего пересчета процентильных норм, размеры групп и кеш отчетов"""
+    return {**norms_engine.status(), "report_cache": report_cache.stats(), "pdf": pdf_store.stats()}
+
+@app.get("/health/compression", dependencies=[Depends(require_admin)])
+async def compression_status():
+    """Настройки сжатия и счетчики кеша сжатых тел"""
+    return {
+        "enabled": settings.compression_enabled,
+        "encodings": list(supported_encodings()),
+        "min_size": settings.compression_min_size,
+        "cors_max_age": settings.cors_max_age,
+        "precompressed_cache": precompressed_cache.stats()
+    }
+
+@app.get("/health/admission", dependencies=[Depends(require_admin)])
+async def admission_status():
+    """Занятые слоты, очереди и отклоненные запросы по классам в этом процессе"""
+    return {"enabled": settings.admission_enabled, **admission_controller.stats()}
+
+@app.get("/health/tenants", dependencies=[Depends(require_admin)])
+async def tenants_status():
+    """Реестр университетов, активные арендаторы с их пулами и пределы запросов"""
+    return {**tenant_registry.stats(), "concurrency": tenant_concurrency.stats()}
+
+@app.get("/health/live", dependencies=[Depends(require_admin)])
+async def live_status():
+    """Подключенные панели проктора и счетчики событий этого процесса"""
+    return live_broker.stats()
+
 # Событие запуска приложения
 @app.on_event("startup")
 async def startup_event():
     """Событие запуска приложения"""
     print("🚀 Запуск API системы психологического тестирования")
     print("📚 Документация доступна по адресу: /docs")
+    
+    # Без SECRET_KEY в продакшене токены не переживают перезапуск и не
+    # принимаются другими воркерами - не запускаемся
+    check_secret_key()
+    
+    # Реестр университетов; арендатор по умолчанию активен всегда
+    await run_in_threadpool(tenant_registry.load)
+    await run_in_threadpool(tenant_registry.activate, settings.default_tenant)
+    print(f"🏛️ Университетов в реестре: {len(tenant_registry.slugs())}")
+    if settings.tenant_refresh_seconds > 0:
+        app.state.tenant_refresh_task = asyncio.create_task(
+            run_tenant_refresh_loop(settings.tenant_refresh_seconds)
+        )
+    
+    # Каталог тестов: разбор файлов до приема запросов, регистрация в БД - в фоне
+    await run_in_threadpool(load_test_catalog)
+    app.state.catalog_sync_task = asyncio.create_task(register_test_catalog())
+    
+    # Перезагрузка измененных файлов тестов без перезапуска
+    if settings.catalog_watch:
+        app.state.catalog_stop = asyncio.Event()
+        app.state.catalog_task = asyncio.create_task(
+            watch_test_catalog(app.state.catalog_stop)
+        )
+    
+    # Профиль по сигналу (kill -USR2 <pid>) и непрерывное профилирование
+    profile_signal = install_profile_signal_handler()
+    if profile_signal:
+        print(f"🔥 Профиль по сигналу {profile_signal}: файлы в {settings.profile_dir}")
+    if settings.profile_continuous:
+        app.state.continuous_profiler = create_continuous_profiler()
+        app.state.continuous_profiler.start()
+    
+    # События для панели проктора; при LIVE_NOTIFY - общие для всех воркеров
+    if start_live_events(asyncio.get_running_loop()):
+        print("📡 События панели проктора: PostgreSQL LISTEN/NOTIFY")
+    
+    startup_ms = (time.perf_counter() - _import_started_at) * 1000
+    print(f"⏱️ Приложение готово за {startup_ms:.0f} мс (детализация импорта: python startup_report.py)")
+    
+    # Периодический пересчет процентильных норм по шкалам
+    if settings.norms_refresh_seconds > 0:
+        app.state.norms_task = asyncio.create_task(
+            run_norms_refresh_loop(settings.norms_refresh_seconds)
+        )
+    
+    # Удаление просроченных Idempotency-Key
+    app.state.idempotency_purge_task = asyncio.create_task(
+        run_idempotency_purge_loop(IDEMPOTENCY_PURGE_SECONDS)
+    )
+    
+    # Фоновые задачи (можно выполнять и отдельным процессом: python worker.py)
+    if settings.jobs_in_process:
+        app.state.job_runner_task = asyncio.create_task(job_runner.run())
 
 # Событие остановки приложения
 @app.on_event("shutdown")
 async def shutdown_event():
     """Событие остановки приложения"""
     print("🛑 Остановка API системы психологического тестирования")
+    
+    for task_name in ("norms_task", "idempotency_purge_task", "tenant_refresh_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    
+    # Выполняемые задачи дорабатывают, новые не берутся
+    job_runner_task = getattr(app.state, "job_runner_task", None)
+    if job_runner_task is not None:
+        job_runner.stop()
+        await asyncio.gather(job_runner_task, return_exceptions=True)
+    
+    catalog_stop = getattr(app.state, "catalog_stop", None)
+    if catalog_stop is not None:
+        catalog_stop.set()
+        await asyncio.gather(app.state.catalog_task, return_exceptions=True)
+    
+    continuous_profiler = getattr(app.state, "continuous_profiler", None)
+    if continuous_profiler is not None:
+        await run_in_threadpool(continuous_profiler.stop)
+    
+    stop_live_events()
+    pdf_store.shutdown()
+    shutdown_tracing()
 
 if __name__ == "__main__":
-    host = "0.0.0.0"
-    port = 8000
-    debug = os.getenv("DEBUG", "False").lower() == "true"
+    import uvicorn
+    
+    host = settings.host
+    port = settings.port
+    debug = settings.debug
     
     print(f"🌐 Запуск сервера на {host}:{port}")
     
@@ -129,4 +288,4 @@ if __name__ == "__main__":
         port=port,
         reload=debug,
         log_level="info"
-    ) 
\ No newline at end of file
+    )
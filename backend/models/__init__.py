@@ -1,4 +1,9 @@
+from .reference import Faculty, Course
+from .tenant import Tenant
 from .user import User
-from .test import Test
+from .test import Test, TestVersion
+from .attempt import TestAttempt, LatestTestResult
+from .idempotency import IdempotencyKey
+from .job import BackgroundJob
 
-__all__ = ["User", "Test"] 
\ No newline at end of file
+__all__ = ["Faculty", "Course", "Tenant", "User", "Test", "TestVersion", "TestAttempt", "LatestTestResult", "IdempotencyKey", "BackgroundJob"] 
\ No newline at end of file
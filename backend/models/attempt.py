@@ -0,0 +1,302 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, DateTime, JSON, ForeignKey, Index, Sequence, event, false, select
+from sqlalchemy.sql import func
+from db.database import Base
+from db.partitions import ensure_attempt_partition
+from models.user import User
+from utils.request_context import forget, memoize
+
+class TestAttempt(Base):
+    """
+    Попытка прохождения теста (append-only история результатов).
+    
+    Строки только добавляются и никогда не изменяются. В PostgreSQL таблица
+    секционирована по test_id (LIST), а каждая секция теста - по месяцу
+    completed_at (RANGE); секции создаются по требованию (db/partitions.py).
+    
+    Attributes:
+        id: Идентификатор попытки
+        user_id: ID пользователя
+        test_id: ID теста
+        attempt_number: Порядковый номер попытки пользователя для этого теста
+        answers: Ответы пользователя ("да"/"нет"/"не знаю")
+        result: Результаты теста
+        scores: Сырые баллы по шкалам, посчитанные на сервере
+        quality: Показатели небрежных ответов и флаги (utils/response_quality.py)
+        version_hash: Версия теста, по которой посчитана попытка (NULL - до версионирования)
+        completed_at: Дата и время завершения попытки
+    """
+    
+    __tablename__ = "test_attempts"
+    
+    # Значения из последовательности: автоинкремент (SERIAL) недоступен,
+    # так как первичный ключ составной. В СУБД без последовательностей
+    # (SQLite) id назначает _assign_attempt_id
+    id = Column(
+        BigInteger,
+        Sequence("test_attempts_id_seq"),
+        primary_key=True,
+        autoincrement=False
+    )
+    
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="ID пользователя"
+    )
+    
+    # Ключи секционирования входят в первичный ключ (требование PostgreSQL)
+    test_id = Column(
+        Integer,
+        ForeignKey("tests.id"),
+        primary_key=True,
+        comment="ID теста"
+    )
+    
+    attempt_number = Column(
+        Integer,
+        nullable=False,
+        comment="Номер попытки пользователя для этого теста"
+    )
+    
+    answers = Column(JSON, nullable=True, comment="Ответы пользователя")
+    
+    result = Column(JSON, nullable=False, comment="Результаты теста")
+    
+    scores = Column(JSON, nullable=True, comment="Сырые баллы по шкалам")
+    
+    quality = Column(JSON, nullable=True, comment="Показатели качества ответов и флаги")
+    
+    # Ссылка на test_versions без внешнего ключа: проверка при каждой вставке
+    # и проверка всех секций при добавлении ограничения не нужны - версии
+    # только добавляются и регистрируются до сохранения попытки
+    version_hash = Column(
+        String(64),
+        nullable=True,
+        comment="Версия теста (SHA-256 файла), по которой посчитана попытка"
+    )
+    
+    completed_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        comment="Дата и время завершения попытки"
+    )
+    
+    __table_args__ = (
+        # История пользователя по тесту и поиск последней попытки
+        Index("ix_test_attempts_user_test_completed", user_id, test_id, completed_at.desc()),
+        {"postgresql_partition_by": "LIST (test_id)"},
+    )
+    
+    def __repr__(self):
+        return f"<TestAttempt(id={self.id}, user_id={self.user_id}, test_id={self.test_id}, number={self.attempt_number})>"
+    
+    def to_dict(self):
+        """
+        Преобразует попытку в словарь для JSON сериализации
+        
+        Returns:
+            dict: Словарь с данными попытки
+        """
+        return {
+            "attempt_id": self.id,
+            "attempt_number": self.attempt_number,
+            "test_id": self.test_id,
+            "result": self.result,
+            "scores": self.scores,
+            "version_hash": self.version_hash,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
+    
+    @classmethod
+    def record(cls, db_session, user_id: int, test_id: int, answers: list, result: dict,
+               scores: dict = None, quality: dict = None, version_hash: str = None):
+        """
+        Добавляет новую попытку и обновляет последний результат пользователя
+        
+        Строка пользователя блокируется (SELECT ... FOR UPDATE) до коммита,
+        который выполняет вызывающий код.
+        
+        Args:
+            db_session: Сессия основной БД
+            user_id: ID пользователя
+            test_id: ID теста
+            answers: Ответы пользователя
+            result: Результаты теста
+            scores: Баллы по шкалам (если у теста есть ключ шкал)
+            quality: Показатели качества ответов (если посчитаны)
+            version_hash: Версия теста, по которой посчитаны баллы
+            
+        Returns:
+            TestAttempt: Сохраненная попытка
+        """
+        completed_at = datetime.now(timezone.utc)
+        ensure_attempt_partition(db_session.get_bind(), test_id, completed_at)
+        
+        # Блокировка строки пользователя до коммита: одновременные завершения
+        # выполняются по очереди и не получают одинаковый номер попытки
+        db_session.execute(select(User.id).where(User.id == user_id).with_for_update())
+        
+        latest = db_session.get(LatestTestResult, (user_id, test_id), populate_existing=True)
+        attempt_number = latest.attempt_number + 1 if latest else 1
+        
+        attempt = cls(
+            user_id=user_id,
+            test_id=test_id,
+            attempt_number=attempt_number,
+            answers=answers,
+            result=result,
+            scores=scores,
+            quality=quality,
+            version_hash=version_hash,
+            completed_at=completed_at
+        )
+        db_session.add(attempt)
+        db_session.flush()
+        
+        if latest is None:
+            latest = LatestTestResult(user_id=user_id, test_id=test_id)
+            db_session.add(latest)
+        
+        latest.attempt_id = attempt.id
+        latest.attempt_number = attempt_number
+        latest.result = result
+        latest.scores = scores
+        latest.is_careless = bool(quality and quality.get("flags"))
+        latest.version_hash = version_hash
+        latest.completed_at = completed_at
+        
+        # Индекс последних результатов пользователя в этом запросе устарел
+        forget("latest_results", user_id)
+        
+        return attempt
+    
+    @classmethod
+    def get_history(cls, db_session, user_id: int, test_id: int):
+        """
+        Получает все попытки пользователя по тесту в хронологическом порядке
+        
+        Args:
+            db_session: Сессия базы данных
+            user_id: ID пользователя
+            test_id: ID теста
+            
+        Returns:
+            list: Попытки от первой к последней
+        """
+        return db_session.query(cls).filter(
+            cls.user_id == user_id,
+            cls.test_id == test_id
+        ).order_by(cls.completed_at.asc()).all()
+
+@event.listens_for(TestAttempt, "before_insert")
+def _assign_attempt_id(mapper, connection, target):
+    """
+    Назначает id попытки там, где нет последовательностей (SQLite)
+
+    max(id) + 1 вычисляется подзапросом внутри самого INSERT: SQLite
+    выполняет его под блокировкой записи, и параллельный писатель получит
+    следующее значение. Отдельный SELECT max(id) перед вставкой выполняется
+    вне транзакции, и два писателя могли получить одинаковый id.
+    """
+    if target.id is None and not connection.dialect.supports_sequences:
+        target.id = select(func.coalesce(func.max(TestAttempt.id), 0) + 1).scalar_subquery()
+
+class LatestTestResult(Base):
+    """
+    Последний результат пользователя по каждому тесту.
+    
+    Одна строка на пару (user_id, test_id), обновляется при каждой попытке.
+    Поиск последнего результата - чтение по первичному ключу, без сканирования
+    истории попыток.
+    
+    Attributes:
+        user_id: ID пользователя
+        test_id: ID теста
+        attempt_id: ID последней попытки в test_attempts
+        attempt_number: Количество попыток пользователя
+        result: Результаты последней попытки
+        scores: Сырые баллы по шкалам последней попытки
+        is_careless: У последней попытки есть флаги небрежных ответов
+        version_hash: Версия теста последней попытки
+        completed_at: Дата и время завершения последней попытки
+    """
+    
+    __tablename__ = "latest_test_results"
+    
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="ID пользователя"
+    )
+    
+    test_id = Column(
+        Integer,
+        ForeignKey("tests.id"),
+        primary_key=True,
+        comment="ID теста"
+    )
+    
+    attempt_id = Column(BigInteger, nullable=False, comment="ID последней попытки")
+    
+    attempt_number = Column(Integer, nullable=False, comment="Количество попыток")
+    
+    result = Column(JSON, nullable=False, comment="Результаты последней попытки")
+    
+    scores = Column(JSON, nullable=True, comment="Сырые баллы по шкалам последней попытки")
+    
+    # Такие результаты не участвуют в процентильных нормах
+    is_careless = Column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+        comment="Последняя попытка помечена как небрежная"
+    )
+    
+    version_hash = Column(String(64), nullable=True, comment="Версия теста последней попытки")
+    
+    completed_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Дата и время завершения последней попытки"
+    )
+    
+    def __repr__(self):
+        return f"<LatestTestResult(user_id={self.user_id}, test_id={self.test_id}, attempts={self.attempt_number})>"
+    
+    @classmethod
+    def get_for_user(cls, db_session, user_id: int) -> dict:
+        """
+        Получает последние результаты пользователя по всем тестам
+        
+        Индекс загружается один раз за HTTP-запрос.
+        
+        Args:
+            db_session: Сессия базы данных
+            user_id: ID пользователя
+            
+        Returns:
+            dict: test_id -> LatestTestResult
+        """
+        return memoize("latest_results", user_id, lambda: {
+            row.test_id: row
+            for row in db_session.query(cls).filter(cls.user_id == user_id).all()
+        })
+    
+    def to_dict(self):
+        """
+        Преобразует результат в словарь в формате completed_tests
+        
+        Returns:
+            dict: Словарь с test_id, result и completed_at
+        """
+        return {
+            "test_id": self.test_id,
+            "result": self.result,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "attempt_number": self.attempt_number
+        }
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.sql import func
+from db.database import Base
+
+class IdempotencyKey(Base):
+    """
+    Сохраненный ответ на запрос с заголовком Idempotency-Key.
+    
+    Строка создается (INSERT ... ON CONFLICT DO NOTHING) в той же транзакции,
+    что и сама запись: параллельный запрос с тем же ключом ждет ее коммита
+    и получает сохраненный ответ вместо повторной записи. Строки старше
+    IDEMPOTENCY_TTL_SECONDS удаляются периодически.
+    
+    Attributes:
+        user_id: ID пользователя
+        key: Значение заголовка Idempotency-Key
+        fingerprint: Отпечаток тела запроса (SHA-256)
+        response: Сохраненный ответ
+        created_at: Дата и время первого запроса
+    """
+    
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="ID пользователя"
+    )
+    
+    key = Column(String(255), primary_key=True, comment="Значение заголовка Idempotency-Key")
+    
+    fingerprint = Column(String(64), nullable=False, comment="SHA-256 тела запроса")
+    
+    response = Column(JSON, nullable=True, comment="Сохраненный ответ")
+    
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Дата и время первого запроса"
+    )
+    
+    __table_args__ = (
+        # Удаление просроченных ключей
+        Index("ix_idempotency_keys_created_at", created_at),
+    )
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, key='{self.key}')>"
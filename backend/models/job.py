@@ -0,0 +1,101 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from db.database import Base
+
+class BackgroundJob(Base):
+    """
+    Задача фоновой очереди (utils/jobs.py).
+    
+    Очередь хранится в БД: задачи переживают перезапуск и не требуют
+    внешнего брокера. Задача добавляется в транзакции, породившей ее
+    (например, вместе с попыткой прохождения теста), и выбирается
+    воркерами через SELECT ... FOR UPDATE SKIP LOCKED.
+    
+    Attributes:
+        id: Идентификатор задачи
+        kind: Тип задачи (имя зарегистрированного обработчика)
+        payload: Параметры задачи
+        status: pending / running / done / failed
+        attempts: Количество выполненных попыток
+        max_attempts: Максимум попыток до статуса failed
+        run_after: Не запускать раньше этого момента (отложенный повтор)
+        locked_at: Когда задачу взял воркер
+        locked_by: Идентификатор воркера
+        last_error: Текст последней ошибки
+        created_at: Дата и время добавления
+        finished_at: Дата и время завершения
+    """
+    
+    __tablename__ = "background_jobs"
+    
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    
+    # В SQLite автоинкремент работает только для INTEGER PRIMARY KEY
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    
+    kind = Column(String(100), nullable=False, comment="Тип задачи")
+    
+    payload = Column(JSON, nullable=False, default=dict, comment="Параметры задачи")
+    
+    status = Column(
+        String(20),
+        nullable=False,
+        default=STATUS_PENDING,
+        server_default=STATUS_PENDING,
+        comment="pending / running / done / failed"
+    )
+    
+    attempts = Column(Integer, nullable=False, default=0, server_default="0", comment="Выполненных попыток")
+    
+    max_attempts = Column(Integer, nullable=False, comment="Максимум попыток")
+    
+    run_after = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="Не запускать раньше этого момента"
+    )
+    
+    locked_at = Column(DateTime(timezone=True), nullable=True, comment="Когда задачу взял воркер")
+    
+    locked_by = Column(String(100), nullable=True, comment="Идентификатор воркера")
+    
+    last_error = Column(Text, nullable=True, comment="Текст последней ошибки")
+    
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Дата и время добавления"
+    )
+    
+    finished_at = Column(DateTime(timezone=True), nullable=True, comment="Дата и время завершения")
+    
+    __table_args__ = (
+        # Выбор готовых к запуску задач
+        Index("ix_background_jobs_status_run_after", status, run_after),
+    )
+    
+    def __repr__(self):
+        return f"<BackgroundJob(id={self.id}, kind='{self.kind}', status='{self.status}', attempts={self.attempts})>"
+    
+    def to_dict(self):
+        """
+        Преобразует задачу в словарь для JSON сериализации
+        
+        Returns:
+            dict: Словарь с данными задачи
+        """
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
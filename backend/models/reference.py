@@ -0,0 +1,225 @@
+"""
+Справочники факультетов и курсов.
+
+Таблицы лежат в БД (схеме) каждого арендатора: у каждого университета свои
+факультеты и число курсов. users.faculty ссылается на faculties.code,
+users.course - на courses.number. В API факультет передается названием
+("ФКСИС") или кодом ("FKSIS"), курс - номером.
+
+Справочники меняются редко, поэтому читаются один раз при активации
+арендатора и перечитываются вместе с реестром арендаторов
+(TENANT_REFRESH_SECONDS); проверка и вывод факультета не обращаются к БД.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, select, true
+from db.database import Base, ReplicaSessionLocal
+from db.tenancy import TenantLocal
+
+class Faculty(Base):
+    """
+    Факультет университета
+
+    Attributes:
+        code: Код факультета (хранится в users.faculty)
+        name: Название для интерфейса
+        sort_order: Порядок в списках
+        is_active: Доступен при регистрации
+    """
+
+    __tablename__ = "faculties"
+
+    code = Column(String(16), primary_key=True, comment="Код факультета")
+    name = Column(String(100), nullable=False, unique=True, comment="Название факультета")
+    sort_order = Column(Integer, nullable=False, default=0, server_default="0", comment="Порядок в списках")
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true(), comment="Доступен при регистрации")
+
+    def __repr__(self):
+        return f"<Faculty(code='{self.code}', name='{self.name}')>"
+
+class Course(Base):
+    """
+    Курс обучения
+
+    Attributes:
+        number: Номер курса (хранится в users.course)
+        name: Название для интерфейса
+        is_active: Доступен при регистрации
+    """
+
+    __tablename__ = "courses"
+
+    number = Column(SmallInteger, primary_key=True, autoincrement=False, comment="Номер курса")
+    name = Column(String(50), nullable=False, comment="Название курса")
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true(), comment="Доступен при регистрации")
+
+    def __repr__(self):
+        return f"<Course(number={self.number})>"
+
+# Справочники арендатора по умолчанию (бывшие FacultyEnum и CourseEnum)
+DEFAULT_FACULTIES = (
+    ("FIB", "ФИБ"),
+    ("FKSIS", "ФКСИС"),
+    ("FKP", "ФКП"),
+    ("FRE", "ФРЭ"),
+    ("IEF", "ИЭФ"),
+    ("FITU", "ФИТУ"),
+)
+DEFAULT_COURSES = tuple((number, f"{number} курс") for number in range(1, 7))
+
+def seed_reference_data(db_session) -> bool:
+    """
+    Заполняет пустые справочники значениями по умолчанию
+
+    Коммит выполняет вызывающий код.
+
+    Args:
+        db_session: Сессия БД арендатора
+
+    Returns:
+        bool: True, если справочники были пустыми
+    """
+    if db_session.execute(select(Faculty.code).limit(1)).first() is not None:
+        return False
+
+    db_session.add_all(
+        Faculty(code=code, name=name, sort_order=index)
+        for index, (code, name) in enumerate(DEFAULT_FACULTIES)
+    )
+    db_session.add_all(Course(number=number, name=name) for number, name in DEFAULT_COURSES)
+    return True
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """
+    Снимок справочников арендатора
+
+    Attributes:
+        faculties: (код, название, доступен) в порядке sort_order
+        courses: (номер, название, доступен) по возрастанию номера
+    """
+    faculties: Tuple[Tuple[str, str, bool], ...] = ()
+    courses: Tuple[Tuple[int, str, bool], ...] = ()
+
+    def __post_init__(self):
+        # Поиск по коду и названию без учета регистра
+        lookup = {}
+        for code, name, _ in self.faculties:
+            lookup[code.casefold()] = code
+            lookup[name.casefold()] = code
+        object.__setattr__(self, "_faculty_lookup", lookup)
+        object.__setattr__(self, "_faculty_names", {code: name for code, name, _ in self.faculties})
+        object.__setattr__(self, "_course_numbers", {number for number, _, _ in self.courses})
+
+    def faculty_code(self, value: str) -> Optional[str]:
+        return self._faculty_lookup.get(str(value).strip().casefold())
+
+    def faculty_name(self, code: str) -> Optional[str]:
+        return self._faculty_names.get(code)
+
+    def has_course(self, number: int) -> bool:
+        return number in self._course_numbers
+
+    def to_dict(self) -> dict:
+        """Доступные для регистрации значения (GET /tenant)"""
+        return {
+            "faculties": [
+                {"code": code, "name": name} for code, name, active in self.faculties if active
+            ],
+            "courses": [
+                {"number": number, "name": name} for number, name, active in self.courses if active
+            ],
+        }
+
+class ReferenceCache:
+    """Справочники одного арендатора в памяти процесса"""
+
+    def __init__(self):
+        self._data: Optional[ReferenceData] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ReferenceData:
+        """Перечитывает справочники из БД текущего арендатора"""
+        db = ReplicaSessionLocal()
+        try:
+            faculties = db.execute(
+                select(Faculty.code, Faculty.name, Faculty.is_active)
+                .order_by(Faculty.sort_order, Faculty.name)
+            ).all()
+            courses = db.execute(
+                select(Course.number, Course.name, Course.is_active).order_by(Course.number)
+            ).all()
+        finally:
+            db.close()
+
+        data = ReferenceData(
+            faculties=tuple(tuple(row) for row in faculties),
+            courses=tuple(tuple(row) for row in courses),
+        )
+        self._data = data
+        return data
+
+    def data(self) -> ReferenceData:
+        """Снимок справочников (загружается при первом обращении)"""
+        data = self._data
+        if data is None:
+            with self._lock:
+                data = self._data or self.load()
+        return data
+
+# Справочники каждого арендатора
+reference_cache = TenantLocal("reference", lambda config: ReferenceCache())
+
+def resolve_faculty(value: str) -> str:
+    """
+    Код факультета текущего арендатора по названию или коду
+
+    Args:
+        value: Название ("ФКСИС") или код ("FKSIS")
+
+    Returns:
+        str: Код факультета
+
+    Raises:
+        ValueError: Если факультет не найден
+    """
+    code = reference_cache.data().faculty_code(value)
+    if code is None:
+        raise ValueError(f"Неизвестный факультет: {value}")
+    return code
+
+def resolve_course(value: Union[int, str]) -> int:
+    """
+    Номер курса текущего арендатора
+
+    Args:
+        value: Номер курса
+
+    Returns:
+        int: Номер курса
+
+    Raises:
+        ValueError: Если курс не найден
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Неизвестный курс: {value}")
+    if not reference_cache.data().has_course(number):
+        raise ValueError(f"Неизвестный курс: {value}")
+    return number
+
+def faculty_name(code: str) -> str:
+    """
+    Название факультета текущего арендатора для вывода
+
+    Args:
+        code: Код факультета
+
+    Returns:
+        str: Название (или сам код, если его нет в справочнике)
+    """
+    return reference_cache.data().faculty_name(code) or code
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, true
+from sqlalchemy.sql import func
+from db.database import Base
+
+class Tenant(Base):
+    """
+    Арендатор (университет) в реестре основной БД.
+
+    Реестр читается при запуске и каждые TENANT_REFRESH_SECONDS
+    (db/tenancy.py). Данные арендатора лежат в своей БД (database_url)
+    или своей схеме PostgreSQL (db_schema); строка для арендатора по
+    умолчанию (DEFAULT_TENANT) нужна, только чтобы задать его название
+    и домены.
+
+    Attributes:
+        slug: Идентификатор арендатора (заголовок X-Tenant)
+        name: Название университета
+        hosts: JSON-список доменов арендатора
+        database_url: URL своей БД (None - основная)
+        db_schema: Схема PostgreSQL с таблицами арендатора
+        tests_dir: Свой каталог JSON-файлов тестов (None - общий TESTS_DIR)
+        pool_size: Пул соединений арендатора (None - TENANT_POOL_SIZE)
+        max_overflow: Соединений сверх пула (None - TENANT_MAX_OVERFLOW)
+        is_active: Принимать запросы арендатора
+        created_at: Дата и время регистрации
+    """
+
+    __tablename__ = "tenants"
+
+    slug = Column(String(63), primary_key=True, comment="Идентификатор арендатора (заголовок X-Tenant)")
+    name = Column(String(255), nullable=False, comment="Название университета")
+    hosts = Column(JSON, nullable=False, default=list, comment="Домены арендатора")
+    database_url = Column(String(1024), nullable=True, comment="URL своей БД (NULL - основная)")
+    db_schema = Column(String(63), nullable=True, comment="Схема PostgreSQL с таблицами арендатора")
+    tests_dir = Column(String(1024), nullable=True, comment="Свой каталог тестов (NULL - общий)")
+    pool_size = Column(Integer, nullable=True, comment="Пул соединений (NULL - TENANT_POOL_SIZE)")
+    max_overflow = Column(Integer, nullable=True, comment="Сверх пула (NULL - TENANT_MAX_OVERFLOW)")
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true(), comment="Принимать запросы арендатора")
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Дата и время регистрации"
+    )
+
+    def __repr__(self):
+        return f"<Tenant(slug='{self.slug}', name='{self.name}')>"
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from db.database import Base
+from db.upsert import insert_ignore_conflicts
+from utils.request_context import memoize
 
 class Test(Base):
     """
@@ -55,6 +57,24 @@ class Test(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
     
+    @classmethod
+    def get_by_id(cls, db_session, test_id: int, available_only: bool = False):
+        """
+        Получает тест по ID (один запрос к БД на HTTP-запрос)
+        
+        Args:
+            db_session: Сессия базы данных
+            test_id: ID теста
+            available_only: Вернуть None, если тест недоступен для прохождения
+            
+        Returns:
+            Test или None: Тест или None, если не найден
+        """
+        test = memoize("test", test_id, lambda: db_session.get(cls, test_id))
+        if test is not None and available_only and not test.is_available:
+            return None
+        return test
+    
     @classmethod
     def get_available_tests(cls, db_session):
         """
@@ -74,4 +94,65 @@ class Test(Base):
     
     def enable(self):
         """Включает тест (делает доступным для прохождения)"""
-        self.is_available = True 
\ No newline at end of file
+        self.is_available = True
+
+class TestVersion(Base):
+    """
+    Версия содержимого файла теста, адресуемая SHA-256.
+    
+    Строка на каждое различное содержимое файла: вопросы и ключ шкал
+    хранятся вместе с хешем и никогда не изменяются. Попытки ссылаются на
+    версию, по которой они посчитаны, поэтому правка файла теста (порядок
+    вопросов, ключ шкал) не меняет интерпретацию старых результатов.
+    
+    Attributes:
+        content_hash: SHA-256 файла теста
+        test_id: ID теста, для которого версия зарегистрирована
+        content: Данные теста (title, description, questions, scales)
+        created_at: Дата и время регистрации версии
+    """
+    
+    __tablename__ = "test_versions"
+    
+    content_hash = Column(String(64), primary_key=True, comment="SHA-256 файла теста")
+    
+    test_id = Column(
+        Integer,
+        ForeignKey("tests.id"),
+        nullable=False,
+        comment="ID теста"
+    )
+    
+    content = Column(JSON, nullable=False, comment="Вопросы, ключ шкал и описание теста")
+    
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="Дата и время регистрации версии"
+    )
+    
+    __table_args__ = (
+        # Версии теста по порядку регистрации
+        Index("ix_test_versions_test_id_created_at", test_id, created_at),
+    )
+    
+    def __repr__(self):
+        return f"<TestVersion(test_id={self.test_id}, hash='{self.content_hash[:12]}')>"
+    
+    @classmethod
+    def register(cls, db_session, rows):
+        """
+        Добавляет версии, пропуская уже зарегистрированные
+        
+        Args:
+            db_session: Сессия основной БД
+            rows: Список словарей content_hash, test_id, content
+            
+        Returns:
+            int: Количество добавленных версий
+        """
+        if not rows:
+            return 0
+        return insert_ignore_conflicts(db_session, cls, rows, index_elements=["content_hash"])
+
@@ -1,25 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from db.database import Base
-import enum
-
-class FacultyEnum(enum.Enum):
-    """Перечисление факультетов"""
-    FIB = "ФИБ"
-    FKSIS = "ФКСИС"
-    FKP = "ФКП"
-    FRE = "ФРЭ"
-    IEF = "ИЭФ"
-    FITU = "ФИТУ"
-
-class CourseEnum(enum.Enum):
-    """Перечисление курсов"""
-    FIRST = 1
-    SECOND = 2
-    THIRD = 3
-    FOURTH = 4
-    FIFTH = 5
-    SIXTH = 6
+from utils.request_context import forget, memoize
 
 class User(Base):
     """
@@ -30,11 +12,12 @@ class User(Base):
         first_name: Имя пользователя
         last_name: Фамилия пользователя
         middle_name: Отчество пользователя
-        faculty: Факультет (enum)
-        course: Курс обучения (enum)
+        faculty: Код факультета (справочник faculties арендатора)
+        course: Номер курса (справочник courses арендатора)
         password_hash: Хэш пароля
         created_at: Дата и время создания аккаунта
-        completed_tests: JSON с информацией о пройденных тестах
+        completed_tests: JSON с результатами, сохраненными до появления
+            истории попыток (новые результаты пишутся в test_attempts)
     """
     
     __tablename__ = "users"
@@ -45,13 +28,15 @@ class User(Base):
     middle_name = Column(String(100), nullable=False, comment="Отчество пользователя")
     
     faculty = Column(
-        Enum(FacultyEnum), 
+        String(16),
+        ForeignKey("faculties.code"),
         nullable=False, 
         comment="Факультет пользователя"
     )
     
     course = Column(
-        Enum(CourseEnum), 
+        SmallInteger,
+        ForeignKey("courses.number"),
         nullable=False, 
         comment="Курс обучения"
     )
@@ -71,8 +56,23 @@ class User(Base):
         comment="Список пройденных тестов с результатами"
     )
     
+    __table_args__ = (
+        # Keyset-пагинация административного списка
+        Index("ix_users_created_at_id", created_at, id),
+        Index("ix_users_faculty_course_created_at", faculty, course, created_at),
+        # Вход по ФИО и поиск по началу ФИО (LIKE 'Ива%' независимо от collation)
+        Index(
+            "ix_users_fio_prefix", last_name, first_name, middle_name,
+            postgresql_ops={
+                "last_name": "varchar_pattern_ops",
+                "first_name": "varchar_pattern_ops",
+                "middle_name": "varchar_pattern_ops"
+            }
+        ),
+    )
+    
     def __repr__(self):
-        return f"<User(id={self.id}, name='{self.last_name} {self.first_name} {self.middle_name}', faculty={self.faculty.value})>"
+        return f"<User(id={self.id}, name='{self.last_name} {self.first_name} {self.middle_name}', faculty={self.faculty})>"
     
     @property
     def full_name(self):
@@ -110,6 +110,19 @@ class User(Base):
         else:
             # Добавляем новый результат
             self.completed_tests.append(test_info)
+        
+        forget("completed_tests", self.id)
+    
+    @property
+    def completed_tests_index(self) -> dict:
+        """
+        Индекс completed_tests по test_id
+        
+        Строится один раз за HTTP-запрос (см. utils/request_context.py).
+        """
+        return memoize("completed_tests", self.id, lambda: {
+            test.get("test_id"): test for test in self.completed_tests or []
+        })
     
     def get_test_result(self, test_id: int):
         """
@@ -121,14 +134,7 @@ class User(Base):
         Returns:
             dict или None: Результат теста или None если тест не пройден
         """
-        if not self.completed_tests:
-            return None
-        
-        for test in self.completed_tests:
-            if test.get("test_id") == test_id:
-                return test
-        
-        return None
+        return self.completed_tests_index.get(test_id)
     
     def has_completed_test(self, test_id: int) -> bool:
         """
@@ -140,58 +146,4 @@ class User(Base):
         Returns:
             bool: True если тест пройден, False иначе
         """
-        return self.get_test_result(test_id) is not None 
-
-def get_faculty_enum(faculty_str: str) -> FacultyEnum:
-    """
-    Преобразует строковое значение факультета в enum
-    
-    Args:
-        faculty_str: Строковое значение факультета
-        
-    Returns:
-        FacultyEnum: Соответствующий enum
-        
-    Raises:
-        ValueError: Если факультет не найден
-    """
-    faculty_mapping = {
-        "ФИБ": FacultyEnum.FIB,
-        "ФКСИС": FacultyEnum.FKSIS,
-        "ФКП": FacultyEnum.FKP,
-        "ФРЭ": FacultyEnum.FRE,
-        "ИЭФ": FacultyEnum.IEF,
-        "ФИТУ": FacultyEnum.FITU
-    }
-    
-    if faculty_str not in faculty_mapping:
-        raise ValueError(f"Неизвестный факультет: {faculty_str}")
-    
-    return faculty_mapping[faculty_str]
-
-def get_course_enum(course_int: int) -> CourseEnum:
-    """
-    Преобразует числовое значение курса в enum
-    
-    Args:
-        course_int: Числовое значение курса
-        
-    Returns:
-        CourseEnum: Соответствующий enum
-        
-    Raises:
-        ValueError: Если курс не найден
-    """
-    course_mapping = {
-        1: CourseEnum.FIRST,
-        2: CourseEnum.SECOND,
-        3: CourseEnum.THIRD,
-        4: CourseEnum.FOURTH,
-        5: CourseEnum.FIFTH,
-        6: CourseEnum.SIXTH
-    }
-    
-    if course_int not in course_mapping:
-        raise ValueError(f"Неизвестный курс: {course_int}")
-    
-    return course_mapping[course_int] 
\ No newline at end of file
+        return self.get_test_result(test_id) is not None
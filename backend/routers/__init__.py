@@ -1,5 +1,9 @@
 from .auth import router as auth_router
 from .tests import router as tests_router
 from .users import router as users_router
+from .admin import router as admin_router
+from .live import router as live_router
+from .reports import router as reports_router
+from .tenant import router as tenant_router
 
-__all__ = ["auth_router", "tests_router", "users_router"] 
\ No newline at end of file
+__all__ = ["auth_router", "tests_router", "users_router", "admin_router", "live_router", "reports_router", "tenant_router"] 
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Административный роутер: поиск, просмотр и массовый импорт пользователей,
+профилирование воркера, билеты панели проктора
+
+Доступ - по заголовку X-Admin-Token (ADMIN_TOKEN в настройках).
+"""
+
+import asyncio
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy import exists, select, tuple_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from config import get_settings
+from db.database import SessionLocal, get_read_db
+from models.user import User
+from models.reference import resolve_course, resolve_faculty
+from models.attempt import LatestTestResult
+from schemas.admin import AdminUserResponse, AdminUserPage, AdminImportReport
+from auth.auth import create_live_ticket, require_admin
+from utils.pagination import encode_cursor, decode_cursor, estimate_count
+from utils.user_import import ImportFormatError, import_users, read_rows
+from utils.profiler import MAX_PROFILE_SECONDS, StackSampler, acquire_on_demand, release_on_demand
+
+router = APIRouter(prefix="/admin", tags=["Администрирование"], dependencies=[Depends(require_admin)])
+
+# Поля ФИО в порядке ввода в строке поиска
+NAME_SEARCH_FIELDS = (User.last_name, User.first_name, User.middle_name)
+
+def _escape_like(value: str) -> str:
+    """Экранирует спецсимволы LIKE"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _name_conditions(q: str) -> list:
+    """
+    Условия поиска по ФИО: "Иванов Ив" - фамилия "Иванов", имя начинается с "Ив"
+
+    Все слова, кроме последнего, сравниваются точно, последнее - по префиксу.
+    Имена хранятся с заглавной буквы (см. UserCreate), поэтому запрос
+    приводится к тому же виду и может использовать индекс ix_users_fio_prefix.
+
+    Args:
+        q: Строка поиска
+
+    Returns:
+        list: Условия SQLAlchemy
+    """
+    words = q.split()[:len(NAME_SEARCH_FIELDS)]
+    conditions = []
+
+    for index, word in enumerate(words):
+        field = NAME_SEARCH_FIELDS[index]
+        value = word.title()
+        if index == len(words) - 1:
+            conditions.append(field.like(_escape_like(value) + "%", escape="\\"))
+        else:
+            conditions.append(field == value)
+
+    return conditions
+
+@router.get("/users", response_model=AdminUserPage)
+async def list_users(
+    q: Optional[str] = Query(None, max_length=200, description="Начало ФИО: 'Иванов Ив'"),
+    faculty: Optional[str] = Query(None, description="Факультет, например ФКСИС"),
+    course: Optional[int] = Query(None, ge=1, description="Курс"),
+    test_id: Optional[int] = Query(None, description="Тест для фильтра по прохождению"),
+    completed: Optional[bool] = Query(None, description="Прошел тест (test_id) или хотя бы один тест"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Список пользователей с фильтрами, от новых к старым
+
+    Пагинация по курсору (created_at, id): каждая страница - один
+    индексный поиск, независимо от глубины. Общее количество (total)
+    считается только для первой страницы; для больших выборок это
+    оценка планировщика PostgreSQL (total_is_estimate=true).
+    """
+    filters = []
+
+    if q and q.strip():
+        filters.extend(_name_conditions(q))
+
+    try:
+        if faculty:
+            filters.append(User.faculty == resolve_faculty(faculty))
+        if course:
+            filters.append(User.course == resolve_course(course))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    # Фильтр по прохождению: test_id без completed - прошедшие этот тест
+    if test_id is not None and completed is None:
+        completed = True
+    if completed is not None:
+        completion = exists().where(LatestTestResult.user_id == User.id)
+        if test_id is not None:
+            completion = completion.where(LatestTestResult.test_id == test_id)
+        filters.append(completion if completed else ~completion)
+
+    query = select(User).where(*filters)
+
+    total, total_is_exact = None, False
+    if cursor is None:
+        total, total_is_exact = estimate_count(db, query)
+
+    page_query = query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+    if cursor is not None:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        page_query = page_query.where(
+            tuple_(User.created_at, User.id) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    users = db.execute(page_query).scalars().all()
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+
+    return AdminUserPage(
+        items=[AdminUserResponse.model_validate(user) for user in users],
+        next_cursor=next_cursor,
+        total=total,
+        total_is_estimate=total is not None and not total_is_exact
+    )
+
+@router.get("/users/{user_id}", response_model=AdminUserResponse)
+async def get_user(user_id: int, db: Session = Depends(get_read_db)):
+    """Данные одного пользователя"""
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден"
+        )
+    return AdminUserResponse.model_validate(user)
+
+def _import_file(stream, filename: str, dry_run: bool) -> dict:
+    """Импорт в отдельной сессии основной БД (выполняется в пуле потоков)"""
+    db = SessionLocal()
+    try:
+        report = import_users(
+            db,
+            read_rows(stream, filename),
+            workers=get_settings().import_hash_workers,
+            dry_run=dry_run
+        )
+        return report.to_dict()
+    finally:
+        db.close()
+
+@router.post("/users/import", response_model=AdminImportReport)
+async def import_users_file(
+    file: UploadFile = File(..., description="CSV или XLSX: фамилия, имя, отчество, факультет, курс, пароль"),
+    dry_run: bool = Query(False, description="Только проверить файл, ничего не записывать")
+):
+    """
+    Массовый импорт пользователей из списка деканата
+
+    Строки проверяются по правилам регистрации; пользователи с уже
+    существующим ФИО пропускаются. Пароли хешируются в IMPORT_HASH_WORKERS
+    процессах, вставка идет пачками с коммитом после каждой, поэтому
+    прерванный импорт можно просто повторить. Для очень больших файлов
+    удобнее скрипт import_users.py.
+    """
+    try:
+        report = await run_in_threadpool(_import_file, file.file, file.filename, dry_run)
+    except ImportFormatError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    finally:
+        await file.close()
+
+    print(f"📥 Импорт {file.filename}: создано {report['created']}, "
+          f"пропущено {report['skipped_count']}, ошибок {report['error_count']}")
+    return AdminImportReport(**report)
+
+@router.get("/profile")
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS, description="Длительность профиля"),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000, description="Интервал сэмплинга (по умолчанию PROFILE_INTERVAL_MS)"),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$", description="speedscope (JSON) или collapsed (flamegraph.pl)"),
+    idle: bool = Query(False, description="Учитывать простаивающие потоки")
+):
+    """
+    CPU-профиль воркера, обработавшего запрос, за N секунд
+
+    Стеки всех потоков снимаются сэмплером на sys._current_frames;
+    цикл событий продолжает обслуживать запросы во время профиля.
+    При нескольких воркерах uvicorn профиль снимается с одного из них
+    (PID - в заголовке X-Profile-Pid). Одновременно - один профиль.
+    """
+    if not acquire_on_demand():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Профилирование уже выполняется"
+        )
+
+    try:
+        interval = (interval_ms or get_settings().profile_interval_ms) / 1000
+        sampler = StackSampler(interval, include_idle=idle)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await run_in_threadpool(sampler.stop)
+    finally:
+        release_on_demand()
+
+    name = f"profile-{os.getpid()}-{int(sampler.started_at)}"
+    headers = {"X-Profile-Pid": str(os.getpid()), "X-Profile-Samples": str(sampler.sample_count)}
+
+    if format == "collapsed":
+        return PlainTextResponse(sampler.to_collapsed(), headers=headers)
+
+    headers["Content-Disposition"] = f'attachment; filename="{name}.speedscope.json"'
+    return JSONResponse(sampler.to_speedscope(name), headers=headers)
+
+@router.post("/live/ticket")
+async def issue_live_ticket():
+    """
+    Билет для подключения панели проктора к /live/events?ticket=...
+
+    EventSource не передает заголовок X-Admin-Token, поэтому панель
+    обменивает его на билет со сроком LIVE_TICKET_MINUTES.
+    """
+    settings = get_settings()
+    return {
+        "ticket": create_live_ticket(),
+        "expires_in": settings.live_ticket_minutes * 60
+    }
@@ -5,17 +5,21 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from db.database import get_db
 from schemas.user import UserCreate, UserLogin, UserResponse
 from schemas.auth import Token
-from models.user import User, get_faculty_enum, get_course_enum
+from models.user import User
+from models.attempt import LatestTestResult
 from auth.auth import (
     verify_password, 
     get_password_hash, 
     create_access_token, 
     authenticate_user,
     get_current_active_user,
+    get_user_read_db,
+    pin_user_to_primary,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_token_expire_time
 )
@@ -48,8 +52,9 @@ async def register(
             detail="Пользователь с таким ФИО уже существует"
         )
     
-    # Создаем нового пользователя
-    hashed_password = get_password_hash(user_data.password)
+    # Создаем нового пользователя; bcrypt - в пуле потоков, чтобы не
+    # останавливать цикл событий (и очередь допуска) на время хеширования
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     
     db_user = User(
         first_name=user_data.first_name,
@@ -65,6 +70,9 @@ async def register(
     db.commit()
     db.refresh(db_user)
     
+    # Сразу после регистрации фронтенд запрашивает /auth/me
+    pin_user_to_primary(response, db_user.id)
+    
     # Создаем JWT токен
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -110,7 +118,9 @@ async def login(
         "password": "***"  # Не логируем пароль полностью
     })
     
-    user = authenticate_user(
+    # Проверка пароля bcrypt - в пуле потоков
+    user = await run_in_threadpool(
+        authenticate_user,
         db,
         user_credentials.first_name,
         user_credentials.last_name,
@@ -170,12 +180,18 @@ async def logout(response: Response):
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    user_db: Session = Depends(get_user_read_db)
 ):
-    print("[DEBUG TEMPORARY LOG] get_current_user_info(): вход в функцию, current_user =", current_user)
     """
     Получение информации о текущем пользователе
     
-    Защищенный эндпоинт, требует авторизации
+    Защищенный эндпоинт, требует авторизации. В completed_tests
+    возвращаются последние результаты по каждому тесту.
     """
-    return current_user 
\ No newline at end of file
+    user_info = UserResponse.model_validate(current_user)
+    user_info.completed_tests = [
+        latest.to_dict()
+        for latest in LatestTestResult.get_for_user(user_db, current_user.id).values()
+    ]
+    return user_info
@@ -0,0 +1,64 @@
+"""
+Роутер панели проктора: поток событий прохождения тестов (Server-Sent Events)
+
+Доступ - по заголовку X-Admin-Token или билету ?ticket= из POST /admin/live/ticket.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from config import get_settings
+from db.tenancy import get_current_tenant
+from models.reference import faculty_name, resolve_course, resolve_faculty
+from auth.auth import require_live_access
+from utils.live_events import LiveFilter, LiveLimitError, live_broker, stream_events
+
+router = APIRouter(prefix="/live", tags=["Панель проктора"])
+
+@router.get("/events", dependencies=[Depends(require_live_access)])
+async def live_events(
+    faculty: Optional[str] = Query(None, description="Факультет, например ФКСИС"),
+    course: Optional[int] = Query(None, ge=1, description="Курс"),
+    test_id: Optional[int] = Query(None, description="Тест"),
+    ticket: Optional[str] = Query(None, description="Билет из POST /admin/live/ticket"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Поток событий started / progress / completed по фильтру
+
+    Первое сообщение - snapshot (текущее состояние студентов по фильтру),
+    при переподключении с Last-Event-ID - пропущенные события. Если панель
+    не успевает читать, поток завершается событием dropped.
+    """
+    try:
+        live_filter = LiveFilter(
+            tenant=get_current_tenant(),
+            faculty=faculty_name(resolve_faculty(faculty)) if faculty else None,
+            course=resolve_course(course) if course else None,
+            test_id=test_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    try:
+        subscription = live_broker.subscribe(live_filter, last_event_id)
+    except LiveLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+
+    return StreamingResponse(
+        stream_events(subscription, get_settings().live_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginx не буферизует поток
+            "X-Accel-Buffering": "no"
+        }
+    )
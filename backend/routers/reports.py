@@ -0,0 +1,130 @@
+"""
+Роутер PDF-отчетов для психологов: отчет по студенту и архив группы
+
+Доступ - по заголовку X-Admin-Token (ADMIN_TOKEN в настройках).
+"""
+
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from db.database import get_read_db
+from models.user import User
+from models.reference import faculty_name, resolve_course, resolve_faculty
+from models.test import Test
+from models.attempt import LatestTestResult
+from auth.auth import require_admin
+from utils.test_loader import load_test_data
+from utils.pdf_reports import (
+    PDF_MEDIA_TYPE, ZIP_MEDIA_TYPE, PdfUnavailableError, generated_at, pdf_store,
+    stream_cohort_zip, student_document
+)
+from utils.range_response import ranged_file_response
+
+router = APIRouter(prefix="/admin/reports", tags=["Отчеты"], dependencies=[Depends(require_admin)])
+
+def _content_disposition(kind: str, filename: str) -> str:
+    """Content-Disposition с именем файла на кириллице (RFC 6266)"""
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace("?", "_")
+    return f"{kind}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+def _load_test(db: Session, test_id: int):
+    """Тест и его данные из файла"""
+    test = Test.get_by_id(db, test_id)
+    test_data = load_test_data(test.filename) if test else None
+    if not test_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Тест не найден"
+        )
+    return test, test_data
+
+def _unavailable(error: PdfUnavailableError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error)
+    )
+
+@router.get("/users/{user_id}/tests/{test_id}")
+async def student_report(
+    user_id: int,
+    test_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
+    """
+    PDF-отчет по последнему результату студента
+
+    Поддерживает Range (206) и If-None-Match (304): ETag - хеш
+    содержимого отчета, файл с тем же ETag не меняется.
+    """
+    test, test_data = _load_test(db, test_id)
+
+    user = db.get(User, user_id)
+    latest = db.get(LatestTestResult, (user_id, test_id)) if user else None
+    if latest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Результат студента по тесту не найден"
+        )
+
+    try:
+        digest, path = await pdf_store.get_or_render(student_document(user, latest, test.filename, test_data))
+    except PdfUnavailableError as e:
+        raise _unavailable(e)
+
+    response = ranged_file_response(request, path, PDF_MEDIA_TYPE, digest)
+    response.headers["Content-Disposition"] = _content_disposition(
+        "inline", f"{user.last_name}_{user.first_name}_{user_id}.pdf"
+    )
+    return response
+
+@router.get("/cohort")
+async def cohort_reports(
+    test_id: int = Query(..., description="Тест"),
+    faculty: str = Query(..., description="Факультет, например ФКСИС"),
+    course: int = Query(..., ge=1, description="Курс"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    ZIP с PDF-отчетами всех студентов группы (факультет × курс) и сводкой
+
+    Архив передается по мере рендеринга, без предварительной сборки
+    в памяти или на диске.
+    """
+    try:
+        faculty_code = resolve_faculty(faculty)
+        course = resolve_course(course)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    test, test_data = _load_test(db, test_id)
+
+    has_results = db.scalar(select(exists().where(
+        LatestTestResult.user_id == User.id,
+        LatestTestResult.test_id == test_id,
+        User.faculty == faculty_code,
+        User.course == course
+    )))
+    if not has_results:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="В группе нет результатов по тесту"
+        )
+
+    try:
+        pdf_store.check_available()
+    except PdfUnavailableError as e:
+        raise _unavailable(e)
+
+    filename = f"{faculty_name(faculty_code)}_{course}_курс_тест{test_id}_{generated_at()}.zip"
+    return StreamingResponse(
+        stream_cohort_zip(test_id, test.filename, test_data, faculty_code, course),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": _content_disposition("attachment", filename)}
+    )
@@ -0,0 +1,27 @@
+"""
+Роутер университета (арендатора) запроса
+"""
+
+from fastapi import APIRouter
+
+from db.tenancy import get_current_tenant, tenant_registry
+from models.reference import reference_cache
+from schemas.tenant import TenantInfo
+
+router = APIRouter(prefix="/tenant", tags=["Университет"])
+
+@router.get("", response_model=TenantInfo)
+async def get_tenant():
+    """
+    Университет запроса и его справочники
+    
+    Факультеты и курсы для форм регистрации и входа; берутся из памяти
+    процесса, без запроса к БД
+    """
+    slug = get_current_tenant()
+    config = tenant_registry.config(slug)
+    return TenantInfo(
+        slug=slug,
+        name=config.name if config else slug,
+        **reference_cache.data().to_dict()
+    )
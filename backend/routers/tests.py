@@ -3,19 +3,21 @@
 """
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from db.database import get_db
+from db.database import get_read_db
 from models.user import User
 from models.test import Test
 from schemas.test import TestResponse
 from auth.auth import get_current_active_user
+from utils.catalog import test_catalog
+from utils.compression import precompressed_response
 
 router = APIRouter(prefix="/tests", tags=["Тесты"])
 
 @router.get("/", response_model=List[TestResponse])
-async def get_all_tests(db: Session = Depends(get_db)):
+async def get_all_tests(db: Session = Depends(get_read_db)):
     """
     Получение списка всех тестов
     
@@ -25,7 +27,7 @@ async def get_all_tests(db: Session = Depends(get_db)):
     return tests
 
 @router.get("/available", response_model=List[TestResponse])
-async def get_available_tests(db: Session = Depends(get_db)):
+async def get_available_tests(db: Session = Depends(get_read_db)):
     """
     Получение списка всех доступных тестов
     
@@ -37,7 +39,7 @@ async def get_available_tests(db: Session = Depends(get_db)):
 @router.get("/{test_id}", response_model=TestResponse)
 async def get_test_by_id(
     test_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Получение информации о конкретном тесте
@@ -51,10 +53,7 @@ async def get_test_by_id(
     Raises:
         HTTPException: Если тест не найден или недоступен
     """
-    test = db.query(Test).filter(
-        Test.id == test_id,
-        Test.is_available == True
-    ).first()
+    test = Test.get_by_id(db, test_id, available_only=True)
     
     if not test:
         raise HTTPException(
@@ -62,4 +61,41 @@ async def get_test_by_id(
             detail="Тест не найден или недоступен"
         )
     
-    return test 
\ No newline at end of file
+    return test 
+
+@router.get("/{test_id}/content")
+async def get_test_content(
+    test_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Вопросы теста (title, description, questions) без ключа шкал
+    
+    Тело готовится при загрузке файла в каталог, сжатые варианты
+    кешируются по хешу содержимого. ETag - хеш файла: клиент
+    с актуальной копией получает 304 без тела.
+    
+    Args:
+        test_id: ID теста
+        
+    Raises:
+        HTTPException: Если тест не найден, недоступен или его файл не загружен
+    """
+    test = Test.get_by_id(db, test_id, available_only=True)
+    
+    entry = test_catalog.get(test.filename) if test else None
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Тест не найден или недоступен"
+        )
+    
+    return precompressed_response(
+        request,
+        key=entry.content_hash,
+        body=entry.public_body,
+        media_type="application/json",
+        etag=f'"{entry.content_hash}"',
+        cache_control="public, max-age=300"
+    )
@@ -2,90 +2,155 @@
 Роутер для работы с пользователями и их тестами
 """
 
-from typing import List
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
 
-from db.database import get_db
+from db.database import get_db, get_read_db
 from models.user import User
 from models.test import Test
-from schemas.test import TestStatus, TestStatusEnum, TestResult, TestCompleteRequest
-from auth.auth import get_current_active_user
-from utils.test_loader import get_test_title
+from models.attempt import TestAttempt, LatestTestResult
+from schemas.test import (
+    TestStatus, TestStatusEnum, TestResult, TestCompleteRequest,
+    TestProgressRequest, TestAttemptResponse, TestHistory
+)
+from auth.auth import get_current_active_user, get_user_read_db, pin_user_to_primary
+from utils.test_loader import get_test_title, load_test_data
+from utils.scoring import score_test_answers
+from utils.response_quality import assess_answers
+from utils.idempotency import (
+    REPLAY_HEADER, request_fingerprint, get_cached_response, cache_response,
+    claim_key, save_response
+)
+from utils.jobs import job_runner
+from utils.job_handlers import enqueue_completion_jobs
+from utils.live_events import completion_event, progress_event, publish_event
+from utils.norms import norms_engine
+from utils.reports import build_report
+from utils.test_versions import data_for_result, ensure_version
+from utils.tracing import start_span
 
 router = APIRouter(prefix="/user-tests", tags=["Пользовательские тесты"])
 
 @router.get("/status", response_model=List[TestStatus])
 async def get_user_tests_status(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user_db: Session = Depends(get_user_read_db)
 ):
     """
     Получение статуса всех тестов для текущего пользователя
     
     Возвращает статус каждого теста:
-    - completed: тест завершен
+    - completed: тест завершен (с последним результатом и числом попыток)
     - not_started: тест не проходился
     """
     # Получаем все доступные тесты
     available_tests = Test.get_available_tests(db)
     
-    # Получаем завершенные тесты
-    completed_tests = {test["test_id"]: test for test in (current_user.completed_tests or [])}
+    # Последние результаты пользователя: test_id -> LatestTestResult
+    latest_results = LatestTestResult.get_for_user(user_db, current_user.id)
     
     # Дебаг логирование
     
     test_statuses = []
     
-    for test in available_tests:
-        # Загружаем название теста из JSON файла
-        test_title = get_test_title(test.filename)
-        
-        if test.id in completed_tests:
-            # Тест завершен
-            completed_test = completed_tests[test.id]
-            status_obj = TestStatus(
-                test_id=test.id,
-                test_title=test_title,
-                status=TestStatusEnum.COMPLETED,
-                completed_at=datetime.fromisoformat(completed_test["completed_at"]),
-                result=completed_test["result"]
-            )
-        else:
-            # Тест не проходился
-            status_obj = TestStatus(
-                test_id=test.id,
-                test_title=test_title,
-                status=TestStatusEnum.NOT_STARTED
-            )
-        
-        test_statuses.append(status_obj)
+    with start_span("user_tests.build_status", {"tests.count": len(available_tests)}):
+        for test in available_tests:
+            # Загружаем название теста из JSON файла
+            test_title = get_test_title(test.filename)
+            
+            if test.id in latest_results:
+                # Тест завершен
+                latest = latest_results[test.id]
+                status_obj = TestStatus(
+                    test_id=test.id,
+                    test_title=test_title,
+                    status=TestStatusEnum.COMPLETED,
+                    completed_at=latest.completed_at,
+                    result=latest.result,
+                    attempts=latest.attempt_number
+                )
+            else:
+                # Тест не проходился
+                status_obj = TestStatus(
+                    test_id=test.id,
+                    test_title=test_title,
+                    status=TestStatusEnum.NOT_STARTED
+                )
+            
+            test_statuses.append(status_obj)
     
     
     return test_statuses
 
+@router.post("/{test_id}/progress", status_code=status.HTTP_204_NO_CONTENT)
+def report_progress(
+    test_id: int,
+    progress: TestProgressRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Ход прохождения теста для панели проктора (/live/events)
+    
+    Клиент сообщает об открытии теста (answered=0) и о числе данных
+    ответов. Ничего не сохраняется - событие только рассылается панелям.
+    
+    Обработчик синхронный и выполняется в пуле потоков: проверка теста
+    и NOTIFY (LIVE_NOTIFY) ходят в БД, не блокируя цикл событий.
+    """
+    test = Test.get_by_id(db, test_id, available_only=True)
+    
+    if not test:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Тест не найден или недоступен"
+        )
+    
+    publish_event(progress_event(current_user, test_id, progress.answered, progress.total))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 @router.post("/{test_id}/complete")
-async def complete_test(
+def complete_test(
     test_id: int,
     completion_data: TestCompleteRequest,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
     """
     Завершение теста и сохранение результатов
     
-    Сохраняет результат в completed_tests
+    Каждое прохождение добавляется в историю попыток (test_attempts),
+    повторное прохождение теста разрешено.
+    
+    С заголовком Idempotency-Key повтор того же запроса (двойной клик,
+    повтор после таймаута) не создает новую попытку, а возвращает
+    сохраненный ответ с заголовком Idempotent-Replayed: true.
+    
+    Обработчик синхронный и выполняется в пуле потоков: запрос с тем же
+    ключом ждет коммита первого на уникальном индексе, не блокируя цикл
+    событий.
     """
     # Убеждаемся что test_id - это int
     test_id = int(test_id)
     
+    # Отпечаток - ответы пользователя: result собирается клиентом заново
+    # при каждом клике (время завершения) и не влияет на сохраненные данные
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(test_id, completion_data.answers)
+        cached = get_cached_response(current_user.id, idempotency_key, fingerprint)
+        if cached is not None:
+            response.headers[REPLAY_HEADER] = "true"
+            # Первый ответ мог не дойти до клиента вместе с меткой закрепления
+            pin_user_to_primary(response, current_user.id)
+            return cached
+    
     # Проверяем, что тест существует и доступен
-    test = db.query(Test).filter(
-        Test.id == test_id,
-        Test.is_available == True
-    ).first()
+    test = Test.get_by_id(db, test_id, available_only=True)
     
     if not test:
         raise HTTPException(
@@ -93,79 +158,153 @@ async def complete_test(
             detail="Тест не найден или недоступен"
         )
     
-    # Проверяем, не завершен ли уже тест
-    if current_user.has_completed_test(test_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Тест уже завершен"
-        )
+    # Занимаем ключ; параллельный запрос с тем же ключом ждет нашего коммита
+    if idempotency_key:
+        stored = claim_key(db, current_user.id, idempotency_key, fingerprint)
+        if stored is not None:
+            db.rollback()
+            cache_response(current_user.id, idempotency_key, fingerprint, stored)
+            response.headers[REPLAY_HEADER] = "true"
+            pin_user_to_primary(response, current_user.id)
+            return stored
+    
+    # Баллы по шкалам считаются на сервере по ключу из JSON файла теста;
+    # попытка закрепляется за версией файла, по которой посчитана
+    entry = ensure_version(db, test)
+    version_hash = entry.content_hash if entry else None
+    test_data = entry.data if entry else load_test_data(test.filename)
+    scores = score_test_answers(test_data, completion_data.answers)
+    
+    # Небрежные ответы сохраняются, но помечаются и не попадают в нормы
+    quality = assess_answers(completion_data.answers, test_data, version=version_hash)
     
-    # Сохраняем результат в completed_tests
-    current_user.add_completed_test(
+    # Добавляем попытку и обновляем последний результат
+    attempt = TestAttempt.record(
+        db,
+        user_id=current_user.id,
         test_id=test_id,
+        answers=completion_data.answers,
         result=completion_data.result,
-        completed_at=datetime.utcnow().isoformat()
+        scores=scores,
+        quality=quality,
+        version_hash=version_hash
     )
     
-    # ВАЖНО: Помечаем JSON поле как измененное для SQLAlchemy
-    flag_modified(current_user, 'completed_tests')
+    response_data = {
+        "message": "Тест успешно завершен",
+        "test_id": test_id,
+        "attempt_number": attempt.attempt_number,
+        "result": completion_data.result,
+        "scores": scores
+    }
+    
+    if idempotency_key:
+        save_response(db, current_user.id, idempotency_key, response_data)
+    
+    # Уведомления и прочая работа после завершения - в фоновой очереди,
+    # в той же транзакции, что и попытка
+    enqueue_completion_jobs(db, attempt, quality)
+    
+    # Событие для панели проктора уходит после коммита
+    publish_event(completion_event(current_user, test_id, attempt, quality), db)
     
     # Коммитим изменения
     db.commit()
+    job_runner.notify()
     
-    return {
-        "message": "Тест успешно завершен",
-        "test_id": test_id,
-        "result": completion_data.result
-    }
+    # Следующие чтения пользователя (статус, результаты) идут в основную БД,
+    # пока реплика не догонит запись
+    pin_user_to_primary(response, current_user.id)
+    
+    if idempotency_key:
+        cache_response(current_user.id, idempotency_key, fingerprint, response_data)
+    
+    return response_data
 
 @router.get("/{test_id}/results", response_model=TestResult)
 async def get_test_results(
     test_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user_db: Session = Depends(get_user_read_db)
 ):
     """
     Получение результатов завершенного теста
     
-    Возвращает результаты теста из completed_tests
+    Возвращает результат последней попытки с интерпретацией по шкалам
+    (report): описание, уровень и процентильная полоса
     """
     # Проверяем, что тест существует
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = Test.get_by_id(db, test_id)
     if not test:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Тест не найден"
         )
     
-    # Проверяем, что тест завершен
-    if not current_user.has_completed_test(test_id):
+    # Последний результат - чтение по первичному ключу (user_id, test_id)
+    latest = user_db.get(LatestTestResult, (current_user.id, test_id))
+    
+    if not latest:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Результаты теста не найдены. Тест не завершен."
         )
     
-    # Получаем результат из completed_tests
-    completed_tests = current_user.completed_tests or []
-    test_result = None
+    # Название и описания шкал - из версии теста, по которой посчитан результат
+    version, test_data = data_for_result(test.filename, latest.version_hash)
+    test_title = test_data['title'] if test_data else get_test_title(test.filename)
     
-    for completed_test in completed_tests:
-        if completed_test["test_id"] == test_id:
-            test_result = completed_test
-            break
+    # Процентили берутся из закешированных норм той же версии теста,
+    # без чтения чужих результатов
+    percentiles = norms_engine.lookup(
+        test_id, latest.version_hash, current_user.faculty, current_user.course, latest.scores
+    )
     
-    if not test_result:
+    return TestResult(
+        test_id=test_id,
+        test_title=test_title,
+        result=latest.result,
+        completed_at=latest.completed_at,
+        attempt_number=latest.attempt_number,
+        scores=latest.scores,
+        percentiles=percentiles or None,
+        report=build_report(test.filename, test_data, latest.scores, percentiles, version)
+    )
+
+@router.get("/{test_id}/history", response_model=TestHistory)
+async def get_test_history(
+    test_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db),
+    user_db: Session = Depends(get_user_read_db)
+):
+    """
+    Получение истории всех попыток теста текущим пользователем
+    
+    Возвращает результаты попыток в хронологическом порядке
+    (динамика от семестра к семестру)
+    """
+    test = Test.get_by_id(db, test_id)
+    if not test:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Результаты теста не найдены"
+            detail="Тест не найден"
         )
     
-    # Загружаем название теста из JSON файла
-    test_title = get_test_title(test.filename)
+    attempts = TestAttempt.get_history(user_db, current_user.id, test_id)
     
-    return TestResult(
+    return TestHistory(
         test_id=test_id,
-        test_title=test_title,
-        result=test_result["result"],
-        completed_at=datetime.fromisoformat(test_result["completed_at"])
-    ) 
\ No newline at end of file
+        test_title=get_test_title(test.filename),
+        attempts=[
+            TestAttemptResponse(
+                attempt_id=attempt.id,
+                attempt_number=attempt.attempt_number,
+                result=attempt.result,
+                scores=attempt.scores,
+                completed_at=attempt.completed_at
+            )
+            for attempt in attempts
+        ]
+    )
@@ -1,9 +1,17 @@
 from .user import UserCreate, UserLogin, UserResponse, UserUpdate
-from .test import TestResponse, TestStatus, TestStatusEnum, TestResult, TestCompleteRequest
+from .test import (
+    TestResponse, TestStatus, TestStatusEnum, TestResult, TestCompleteRequest, TestProgressRequest,
+    TestAttemptResponse, TestHistory, ScaleReport
+)
 from .auth import Token, TokenData
+from .admin import AdminUserResponse, AdminUserPage, AdminImportReport
+from .tenant import TenantInfo, FacultyOption, CourseOption
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
-    "TestResponse", "TestStatus", "TestStatusEnum", "TestResult", "TestCompleteRequest",
-    "Token", "TokenData"
+    "TestResponse", "TestStatus", "TestStatusEnum", "TestResult", "TestCompleteRequest", "TestProgressRequest",
+    "TestAttemptResponse", "TestHistory", "ScaleReport",
+    "Token", "TokenData",
+    "AdminUserResponse", "AdminUserPage", "AdminImportReport",
+    "TenantInfo", "FacultyOption", "CourseOption"
 ] 
\ No newline at end of file
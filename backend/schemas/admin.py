@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field, validator
+from typing import Optional, List
+from datetime import datetime
+from models.reference import faculty_name
+
+class AdminUserResponse(BaseModel):
+    """Схема пользователя в административном списке"""
+    id: int
+    first_name: str
+    last_name: str
+    middle_name: str
+    faculty: str
+    course: int
+    created_at: datetime
+    
+    @validator('faculty', pre=True)
+    def faculty_display_name(cls, v):
+        """Код факультета из БД - название для интерфейса"""
+        return faculty_name(v)
+    
+    class Config:
+        from_attributes = True
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+class AdminUserPage(BaseModel):
+    """Страница списка пользователей (keyset-пагинация)"""
+    items: List[AdminUserResponse]
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None - последняя)")
+    total: Optional[int] = Field(None, description="Количество пользователей по фильтрам")
+    total_is_estimate: bool = Field(False, description="total - оценка планировщика, а не точный подсчет")
+
+class AdminImportRowError(BaseModel):
+    """Строка файла импорта с ошибками проверки"""
+    row: int = Field(..., description="Номер строки в файле (заголовок - 1)")
+    errors: List[str]
+
+class AdminImportSkippedRow(BaseModel):
+    """Пропущенная строка файла импорта"""
+    row: int
+    full_name: str
+    reason: str
+
+class AdminImportReport(BaseModel):
+    """Итог массового импорта пользователей"""
+    total_rows: int = Field(..., description="Строк с данными в файле")
+    created: int = Field(..., description="Создано пользователей")
+    skipped_count: int = Field(..., description="Пропущено: ФИО уже есть в БД или повторяется в файле")
+    error_count: int = Field(..., description="Строк с ошибками проверки")
+    skipped: List[AdminImportSkippedRow] = Field(default_factory=list, description="Первые 1000 пропущенных строк")
+    errors: List[AdminImportRowError] = Field(default_factory=list, description="Первые 1000 строк с ошибками")
+    dry_run: bool = False
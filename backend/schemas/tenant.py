@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class FacultyOption(BaseModel):
+    """Факультет для форм регистрации и входа"""
+    code: str
+    name: str
+
+class CourseOption(BaseModel):
+    """Курс для форм регистрации и входа"""
+    number: int
+    name: str
+
+class TenantInfo(BaseModel):
+    """Университет запроса и его справочники"""
+    slug: str = Field(..., description="Идентификатор университета (заголовок X-Tenant)")
+    name: str
+    faculties: List[FacultyOption]
+    courses: List[CourseOption]
@@ -28,24 +28,60 @@ class TestStatus(BaseModel):
     status: TestStatusEnum
     completed_at: Optional[datetime] = None
     result: Optional[Dict[str, Any]] = None
+    attempts: int = 0  # Количество завершенных попыток
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
 
+class ScaleReport(BaseModel):
+    """Интерпретация одной шкалы в отчете о результате"""
+    scale: str
+    score: int
+    max_score: int
+    level: str  # низкий / средний / высокий - по доле от максимального балла
+    description: str  # Текст описания из файла теста
+    percentile: Optional[float] = None  # Процентильный ранг среди всех студентов
+    band: Optional[str] = None  # Полоса по процентилю (нет норм - None)
+
 class TestResult(BaseModel):
     """Схема для результата теста"""
     test_id: int
     test_title: str  # Это поле будет заполняться из JSON файла
     result: Dict[str, Any]
     completed_at: datetime
+    attempt_number: int = 1  # Номер попытки, к которой относится результат
+    scores: Optional[Dict[str, int]] = None  # Сырые баллы по шкалам
+    # Процентильные ранги: шкала -> {"all"|"faculty"|"course": процентиль}
+    percentiles: Optional[Dict[str, Dict[str, float]]] = None
+    # Интерпретация по шкалам (для тестов с ключом шкал)
+    report: Optional[List[ScaleReport]] = None
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
 
+class TestAttemptResponse(BaseModel):
+    """Схема для одной попытки прохождения теста"""
+    attempt_id: int
+    attempt_number: int
+    result: Dict[str, Any]
+    scores: Optional[Dict[str, int]] = None
+    completed_at: datetime
+    
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+class TestHistory(BaseModel):
+    """Схема для истории попыток пользователя по тесту"""
+    test_id: int
+    test_title: str
+    attempts: List[TestAttemptResponse]
+
 class TestCompleteRequest(BaseModel):
     """Схема для завершения теста"""
     answers: List[str] = Field(..., description="Финальные ответы пользователя")
@@ -58,4 +94,17 @@ class TestCompleteRequest(BaseModel):
         for answer in v:
             if answer.lower() not in valid_answers:
                 raise ValueError(f'Недопустимый ответ: {answer}. Разрешены: да, нет, не знаю')
-        return v 
\ No newline at end of file
+        return v
+
+class TestProgressRequest(BaseModel):
+    """Схема хода прохождения теста (для панели проктора)"""
+    answered: int = Field(..., ge=0, description="Сколько вопросов отвечено (0 - тест открыт)")
+    total: Optional[int] = Field(None, ge=1, description="Всего вопросов в тесте")
+    
+    @validator('total')
+    def validate_total(cls, v, values):
+        """Отвечено не больше, чем вопросов в тесте"""
+        answered = values.get('answered')
+        if v is not None and answered is not None and answered > v:
+            raise ValueError('answered не может быть больше total')
+        return v
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Отчет о времени холодного старта приложения.
+
+Запускает импорт модуля приложения в отдельном интерпретаторе с
+`python -X importtime` и выводит:
+- общее время импорта;
+- самые дорогие модули по накопленному (cumulative) времени;
+- собственное (self) время импорта, сгруппированное по пакетам верхнего уровня.
+
+Использование:
+    python startup_report.py              # импорт main
+    python startup_report.py --top 30
+    python startup_report.py --module routers.users
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def collect_import_times(module: str):
+    """
+    Импортирует модуль в дочернем процессе и разбирает вывод -X importtime
+
+    Args:
+        module: Имя импортируемого модуля
+
+    Returns:
+        tuple: (записи [(self_us, cumulative_us, имя)], время работы процесса в секундах)
+    """
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started_at
+
+    if completed.returncode != 0:
+        print(completed.stderr)
+        sys.exit(completed.returncode)
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        # Формат: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()))
+
+    return entries, elapsed
+
+def print_report(module: str, top: int):
+    """
+    Печатает отчет о времени импорта
+
+    Args:
+        module: Имя импортируемого модуля
+        top: Сколько строк выводить в таблицах
+    """
+    entries, elapsed = collect_import_times(module)
+
+    total_self_us = sum(self_us for self_us, _, _ in entries)
+    print(f"📦 Импорт '{module}': {total_self_us / 1000:.1f} мс "
+          f"(процесс целиком: {elapsed * 1000:.0f} мс, модулей: {len(entries)})")
+
+    print(f"\n🐢 Топ-{top} модулей по накопленному времени:")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: e[1], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} мс  (self {self_us / 1000:6.1f} мс)  {name}")
+
+    by_package = defaultdict(int)
+    for self_us, _, name in entries:
+        by_package[name.strip().split(".")[0]] += self_us
+
+    print(f"\n📊 Топ-{top} пакетов по собственному времени:")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        share = self_us / total_self_us * 100 if total_self_us else 0
+        print(f"  {self_us / 1000:8.1f} мс  {share:5.1f}%  {package}")
+
+def main():
+    """Точка входа скрипта"""
+    parser = argparse.ArgumentParser(description="Отчет о времени импорта приложения")
+    parser.add_argument("--module", default="main", help="Импортируемый модуль (по умолчанию main)")
+    parser.add_argument("--top", type=int, default=20, help="Количество строк в таблицах")
+    args = parser.parse_args()
+
+    print_report(args.module, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Общие фикстуры тестов backend.
+
+Окружение задается до импорта приложения: своя БД SQLite и каталог тестов
+во временной папке, без фоновых циклов, реплики и внешних сервисов.
+
+Запуск из папки backend: python -m pytest
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="psycho-tests-")
+TESTS_DIR = os.path.join(WORK_DIR, "tests_data")
+os.makedirs(TESTS_DIR)
+shutil.copy(os.path.join(BACKEND_DIR, "tests_data", "questions.json"), TESTS_DIR)
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORK_DIR, 'app.db')}",
+    "DATABASE_REPLICA_URL": "",
+    "SECRET_KEY": "test-secret-key",
+    "ADMIN_TOKEN": "test-admin-token",
+    "TESTS_DIR": TESTS_DIR,
+    "CATALOG_WATCH": "false",
+    "JOBS_IN_PROCESS": "false",
+    "NORMS_REFRESH_SECONDS": "0",
+    "TENANT_REFRESH_SECONDS": "0",
+    "REPORT_PDF_DIR": os.path.join(WORK_DIR, "reports"),
+    "PROFILE_SIGNAL": "",
+    "TRACING_ENABLED": "false",
+    "LIVE_NOTIFY": "false",
+    "COMPLETION_WEBHOOK_URL": "",
+})
+
+from db.database import create_tables  # noqa: E402
+from utils.catalog import load_test_catalog, sync_test_catalog  # noqa: E402
+
+# Тесты каталога регистрируются в БД сразу, а не фоновой задачей запуска
+create_tables()
+load_test_catalog()
+sync_test_catalog()
+
+@pytest.fixture(scope="session")
+def client():
+    """Приложение с выполненным запуском (startup/shutdown)"""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def db_session():
+    """Сессия основной БД"""
+    from db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+def cyrillic_suffix() -> str:
+    """Уникальный суффикс ФИО (имена принимают только кириллицу и дефис)"""
+    return "".join("абвгдежзиклмнопр"[int(digit, 16)] for digit in uuid.uuid4().hex[:10])
+
+@pytest.fixture
+def student(client):
+    """Зарегистрированный студент: заголовки авторизации"""
+    response = client.post("/auth/register", json={
+        "first_name": "Иван",
+        "last_name": f"Тестов-{cyrillic_suffix()}",
+        "middle_name": "Иванович",
+        "faculty": "ФКСИС",
+        "course": 2,
+        "password": "secret1",
+    })
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
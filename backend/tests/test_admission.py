@@ -0,0 +1,89 @@
+"""Классы запросов и бюджеты ожидания контроля допуска"""
+
+import asyncio
+
+import pytest
+
+from utils.admission import (
+    CLASS_CRITICAL, CLASS_LOGIN, CLASS_READ, AdmissionController, AdmissionRejected, classify
+)
+
+BUDGETS = {CLASS_CRITICAL: 1.0, CLASS_READ: 0.05, CLASS_LOGIN: 0.05}
+
+def make_controller(max_concurrency=1, max_queue=10, budgets=BUDGETS):
+    limits = {name: max_concurrency for name in budgets}
+    return AdmissionController(max_concurrency, max_queue, limits, budgets)
+
+def test_classify_routes():
+    assert classify("POST", "/user-tests/5/complete") == CLASS_CRITICAL
+    assert classify("POST", "/user-tests/5/progress") == CLASS_READ
+    assert classify("POST", "/auth/login") == CLASS_LOGIN
+    assert classify("POST", "/auth/register") == CLASS_LOGIN
+    assert classify("GET", "/tests/") == CLASS_READ
+    assert classify("GET", "/health/db") is None
+    assert classify("GET", "/live/events") is None
+    assert classify("GET", "/admin/profile") is None
+
+def test_waiting_request_is_rejected_after_budget():
+    async def scenario():
+        controller = make_controller()
+        started = await controller.acquire(CLASS_READ)
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire(CLASS_READ)
+        controller.release(CLASS_READ, started)
+        return controller, error.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.reason == "deadline"
+    assert controller.classes[CLASS_READ].shed["deadline"] == 1
+    assert controller.in_flight == 0
+
+def test_estimate_over_budget_rejects_without_queueing():
+    async def scenario():
+        controller = make_controller()
+        controller.classes[CLASS_READ].service_time = 1.0
+        started = await controller.acquire(CLASS_READ)
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire(CLASS_READ)
+        controller.release(CLASS_READ, None)
+        return controller, error.value, started
+
+    controller, error, _ = asyncio.run(scenario())
+    assert error.reason == "estimate"
+    assert error.retry_after >= 1.0
+    assert controller.stats()["queued"] == 0
+
+def test_released_slot_goes_to_critical_first():
+    async def scenario():
+        controller = make_controller(budgets={CLASS_CRITICAL: 1.0, CLASS_READ: 1.0, CLASS_LOGIN: 1.0})
+        started = await controller.acquire(CLASS_READ)
+        order = []
+
+        async def wait(request_class):
+            await controller.acquire(request_class)
+            order.append(request_class)
+            controller.release(request_class, None)
+
+        tasks = [asyncio.create_task(wait(CLASS_LOGIN)), asyncio.create_task(wait(CLASS_CRITICAL))]
+        await asyncio.sleep(0)
+        controller.release(CLASS_READ, started)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == [CLASS_CRITICAL, CLASS_LOGIN]
+
+def test_full_queue_evicts_lower_priority():
+    async def scenario():
+        controller = make_controller(max_queue=1, budgets={CLASS_CRITICAL: 1.0, CLASS_READ: 1.0, CLASS_LOGIN: 1.0})
+        started = await controller.acquire(CLASS_READ)
+        login = asyncio.create_task(controller.acquire(CLASS_LOGIN))
+        critical = asyncio.create_task(controller.acquire(CLASS_CRITICAL))
+        await asyncio.sleep(0)
+        controller.release(CLASS_READ, started)
+        await critical
+        controller.release(CLASS_CRITICAL, None)
+        with pytest.raises(AdmissionRejected) as error:
+            await login
+        return error.value
+
+    assert asyncio.run(scenario()).reason == "queue_full"
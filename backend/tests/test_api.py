@@ -0,0 +1,144 @@
+"""Прохождение теста через API: завершение, повтор по Idempotency-Key, результаты"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+
+import httpx
+import pytest
+
+import main
+import routers.users as users_router
+from config import get_settings
+from models.job import BackgroundJob
+from tests.conftest import TESTS_DIR
+from utils.idempotency import claim_key
+from utils.job_handlers import NORMS_REFRESH_JOB, refresh_test_norms
+from utils.norms import norms_engine
+
+def questions_count() -> int:
+    with open(os.path.join(TESTS_DIR, "questions.json"), encoding="utf-8") as file:
+        return sum(1 for item in json.load(file) if item.get("question"))
+
+@pytest.fixture(scope="module")
+def test_id(client):
+    tests = client.get("/tests/available").json()
+    [test] = [test for test in tests if test["filename"] == "questions.json"]
+    return test["id"]
+
+def complete(client, headers, test_id, answers, key=None):
+    if key:
+        headers = {**headers, "Idempotency-Key": key}
+    return client.post(f"/user-tests/{test_id}/complete", headers=headers, json={
+        "answers": answers,
+        "result": {"answered": len(answers)},
+    })
+
+def test_complete_replay_and_results(client, student, test_id):
+    answers = ["да"] * questions_count()
+
+    first = complete(client, student, test_id, answers, key="complete-1")
+    assert first.status_code == 200, first.text
+    assert "Idempotent-Replayed" not in first.headers
+    assert first.json()["attempt_number"] == 1
+
+    replay = complete(client, student, test_id, answers, key="complete-1")
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+
+    other = complete(client, student, test_id, ["нет"] * len(answers), key="complete-1")
+    assert other.status_code == 422
+
+    results = client.get(f"/user-tests/{test_id}/results", headers=student)
+    assert results.status_code == 200, results.text
+    body = results.json()
+    assert body["attempt_number"] == 1
+    assert body["scores"] == first.json()["scores"]
+    assert body["report"]
+
+    history = client.get(f"/user-tests/{test_id}/history", headers=student).json()
+    assert [attempt["attempt_number"] for attempt in history["attempts"]] == [1]
+
+def test_new_key_records_new_attempt(client, student, test_id):
+    answers = ["нет"] * questions_count()
+
+    assert complete(client, student, test_id, answers, key="attempt-1").json()["attempt_number"] == 1
+    assert complete(client, student, test_id, answers, key="attempt-2").json()["attempt_number"] == 2
+    assert complete(client, student, test_id, answers).json()["attempt_number"] == 3
+
+def test_results_before_completion_is_404(client, student, test_id):
+    assert client.get(f"/user-tests/{test_id}/results", headers=student).status_code == 404
+
+def test_complete_does_not_block_event_loop(client, student, test_id, monkeypatch):
+    # Ожидание ключа на уникальном индексе не должно блокировать цикл событий:
+    # пока завершение ждет, приложение отвечает на другие запросы
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_claim_key(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return claim_key(*args, **kwargs)
+
+    monkeypatch.setattr(users_router, "claim_key", slow_claim_key)
+    answers = ["нет"] * questions_count()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            completing = asyncio.create_task(http.post(
+                f"/user-tests/{test_id}/complete",
+                headers={**student, "Idempotency-Key": "slow-claim"},
+                json={"answers": answers, "result": {}},
+            ))
+            assert await asyncio.to_thread(entered.wait, 5)
+
+            health = await asyncio.wait_for(http.get("/health"), timeout=2)
+            assert health.status_code == 200
+            assert not completing.done()
+
+            release.set()
+            return await completing
+
+    try:
+        response = asyncio.run(scenario())
+    finally:
+        release.set()
+    assert response.status_code == 200, response.text
+
+def pending_norms_refreshes(db_session, test_id):
+    return [
+        job for job in db_session.query(BackgroundJob).filter(
+            BackgroundJob.kind == NORMS_REFRESH_JOB,
+            BackgroundJob.status == BackgroundJob.STATUS_PENDING
+        ).all()
+        if job.payload == {"test_id": test_id}
+    ]
+
+def varied_answers():
+    # Разнообразные ответы: однообразные помечаются небрежными и не входят в нормы
+    choices = random.Random(7)
+    return [choices.choice(["да", "нет", "не знаю"]) for _ in range(questions_count())]
+
+def test_norms_refresh_is_not_enqueued_without_in_process_runner(client, student, test_id, db_session):
+    assert not get_settings().jobs_in_process
+    complete(client, student, test_id, varied_answers())
+
+    assert pending_norms_refreshes(db_session, test_id) == []
+
+def test_completion_enqueues_one_norms_refresh_per_test(client, student, test_id, db_session, monkeypatch):
+    # Раннер в тестах не запускается: включаем только постановку задачи
+    monkeypatch.setattr(get_settings(), "jobs_in_process", True)
+
+    answers = varied_answers()
+    complete(client, student, test_id, answers)
+    complete(client, student, test_id, answers)
+
+    jobs = pending_norms_refreshes(db_session, test_id)
+    assert len(jobs) == 1
+
+    refresh_test_norms(jobs[0].payload)
+    [version_sizes] = norms_engine.status()["sample_sizes"][test_id].values()
+    assert version_sizes["all"] >= 1
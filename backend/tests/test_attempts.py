@@ -0,0 +1,47 @@
+"""Идентификаторы попыток в SQLite при параллельных завершениях"""
+
+import threading
+
+from sqlalchemy import func, select
+
+from db.database import SessionLocal
+from models.attempt import TestAttempt
+from models.test import Test
+from models.user import User
+from tests.conftest import cyrillic_suffix
+
+def test_parallel_attempts_get_distinct_ids(db_session):
+    users = [
+        User(first_name="Иван", last_name=f"Параллельный-{cyrillic_suffix()}", middle_name="Иванович",
+             faculty="FKSIS", course=2, password_hash="x", completed_tests=[])
+        for _ in range(6)
+    ]
+    db_session.add_all(users)
+    db_session.commit()
+    user_ids = [user.id for user in users]
+    test_id = db_session.execute(select(Test.id).where(Test.filename == "questions.json")).scalar_one()
+    errors = []
+
+    def complete_many(user_id):
+        for _ in range(10):
+            db = SessionLocal()
+            try:
+                TestAttempt.record(db, user_id, test_id, [], {})
+                db.commit()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=complete_many, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    total, distinct = db_session.execute(
+        select(func.count(), func.count(func.distinct(TestAttempt.id)))
+        .where(TestAttempt.user_id.in_(user_ids))
+    ).one()
+    assert total == distinct == 60
@@ -0,0 +1,25 @@
+"""Проверка SECRET_KEY при запуске"""
+
+import pytest
+
+from auth.auth import check_secret_key
+from config import get_settings
+
+def test_missing_secret_key_stops_startup(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "secret_key", None)
+    monkeypatch.setattr(settings, "debug", False)
+
+    with pytest.raises(RuntimeError, match="SECRET_KEY"):
+        check_secret_key()
+
+def test_missing_secret_key_is_allowed_in_debug(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "secret_key", None)
+    monkeypatch.setattr(settings, "debug", True)
+
+    check_secret_key()
+
+def test_configured_secret_key_passes():
+    assert get_settings().secret_key
+    check_secret_key()
@@ -0,0 +1,65 @@
+"""Перезагрузка каталога тестов и регистрация изменений в БД"""
+
+import json
+import os
+
+from sqlalchemy import select
+
+from models.test import Test, TestVersion
+from tests.conftest import TESTS_DIR
+from utils.catalog import TestCatalog, catalog_tenants, reload_catalog, test_catalog
+
+def write_test(path, title, questions=("Вопрос 1", "Вопрос 2")):
+    body = [{"title": title, "description": "Описание"}]
+    body.extend({"question": question} for question in questions)
+    body.append({"results": {"Шкала": {"positive": [1], "negative": [2]}}})
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(body, file, ensure_ascii=False)
+    # mtime меняется и при записи в ту же секунду
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_reload_keeps_last_valid_version(tmp_path):
+    path = tmp_path / "scale.json"
+    write_test(path, "Первая версия")
+    catalog = TestCatalog(str(tmp_path))
+    assert catalog.load_all() == []
+    first = catalog.get("scale.json")
+
+    write_test(path, "Вторая версия")
+    assert catalog.changed_paths() == [str(path)]
+    [updated] = catalog.reload_paths([str(path)])
+    assert updated.data["title"] == "Вторая версия"
+    assert updated.content_hash != first.content_hash
+    assert catalog.get_by_hash(first.content_hash) is None
+
+    path.write_text("{не json", encoding="utf-8")
+    assert catalog.reload_paths([str(path)]) == []
+    assert catalog.get("scale.json") is updated
+
+    path.unlink()
+    assert catalog.changed_paths() == [str(path)]
+    catalog.reload_paths([str(path)])
+    assert catalog.get("scale.json") is None
+
+def test_default_catalog_is_shared_by_default_tenant():
+    assert "default" in catalog_tenants(test_catalog.default)
+    assert catalog_tenants(TestCatalog(TESTS_DIR)) == []
+
+def test_reload_registers_tests_and_versions(db_session):
+    path = os.path.join(TESTS_DIR, "reloaded.json")
+    catalog = test_catalog.default
+    try:
+        write_test(path, "Новый тест")
+        [entry] = reload_catalog(catalog, [path])
+        test_id = db_session.execute(select(Test.id).where(Test.filename == "reloaded.json")).scalar_one()
+
+        write_test(path, "Новый тест, исправленный")
+        [changed] = reload_catalog(catalog, [path])
+        hashes = set(db_session.execute(
+            select(TestVersion.content_hash).where(TestVersion.test_id == test_id)
+        ).scalars())
+        assert {entry.content_hash, changed.content_hash} <= hashes
+    finally:
+        os.remove(path)
+        reload_catalog(catalog, [path])
@@ -0,0 +1,40 @@
+"""Выбор кодировки по Accept-Encoding и сжатие ответов"""
+
+import gzip
+
+import pytest
+
+from utils import compression
+from utils.compression import choose_encoding, compress_body, is_compressible
+
+brotli = pytest.importorskip("brotli")
+
+def test_brotli_preferred_over_gzip():
+    assert choose_encoding("gzip, deflate, br") == "br"
+
+def test_quality_zero_excludes_encoding():
+    assert choose_encoding("br;q=0, gzip") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+
+def test_wildcard_and_identity():
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+def test_gzip_only_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip") == "gzip"
+    assert choose_encoding("br") is None
+
+def test_compressible_types():
+    assert is_compressible("application/json")
+    assert is_compressible("application/problem+json")
+    assert not is_compressible("text/event-stream")
+    assert not is_compressible("application/pdf")
+
+def test_compress_body_roundtrip():
+    body = b'{"value": "' + b"x" * 2000 + b'"}'
+    assert gzip.decompress(compress_body(body, "gzip")) == body
+    assert brotli.decompress(compress_body(body, "br")) == body
+    # mtime=0: одинаковый вход дает одинаковые байты (ETag, кеш)
+    assert compress_body(body, "gzip") == compress_body(body, "gzip")
@@ -0,0 +1,35 @@
+"""Пулы соединений: учет таймаутов ожидания по пулам"""
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from db.database import CountingQueuePool, _attach_pool_counters
+
+def make_engine(counters):
+    engine = create_engine(
+        "sqlite://", poolclass=CountingQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.01
+    )
+    _attach_pool_counters(engine, counters)
+    return engine
+
+def exhaust(engine):
+    held = engine.connect()
+    try:
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    finally:
+        held.close()
+
+def test_timeouts_counted_per_pool():
+    first = {"connects": 0, "checkouts": 0, "timeouts": 0}
+    second = dict(first)
+    first_engine, second_engine = make_engine(first), make_engine(second)
+
+    exhaust(first_engine)
+    exhaust(first_engine)
+    # Пул, пересозданный при dispose(), пишет в те же счетчики
+    second_engine.dispose()
+    exhaust(second_engine)
+
+    assert first["timeouts"] == 2
+    assert second["timeouts"] == 1
@@ -0,0 +1,20 @@
+"""Доступ к /health и подробным /health/*"""
+
+import pytest
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+DETAILED = ["db", "jobs", "norms", "compression", "admission", "tenants", "live"]
+
+def test_health_is_public(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+
+@pytest.mark.parametrize("name", DETAILED)
+def test_detailed_health_requires_admin(client, name):
+    assert client.get(f"/health/{name}").status_code == 403
+    assert client.get(f"/health/{name}", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    response = client.get(f"/health/{name}", headers=ADMIN_HEADERS)
+    assert response.status_code == 200, response.text
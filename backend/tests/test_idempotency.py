@@ -0,0 +1,35 @@
+"""Отпечатки запросов и кеш ответов Idempotency-Key"""
+
+import pytest
+from fastapi import HTTPException
+
+from db.tenancy import tenant_scope
+from utils.idempotency import cache_response, get_cached_response, request_fingerprint
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint(1, {"a": 1, "b": 2}) == request_fingerprint(1, {"b": 2, "a": 1})
+
+def test_fingerprint_depends_on_answers():
+    assert request_fingerprint(1, ["да", "нет"]) != request_fingerprint(1, ["нет", "да"])
+    assert request_fingerprint(1, ["да"]) != request_fingerprint(2, ["да"])
+
+def test_cached_response_is_replayed():
+    fingerprint = request_fingerprint(1, ["да"])
+    cache_response(101, "key-replay", fingerprint, {"attempt_number": 1})
+
+    assert get_cached_response(101, "key-replay", fingerprint) == {"attempt_number": 1}
+    assert get_cached_response(102, "key-replay", fingerprint) is None
+
+def test_reused_key_with_other_request_is_422():
+    cache_response(103, "key-reused", request_fingerprint(1, ["да"]), {"attempt_number": 1})
+
+    with pytest.raises(HTTPException) as error:
+        get_cached_response(103, "key-reused", request_fingerprint(1, ["нет"]))
+    assert error.value.status_code == 422
+
+def test_cache_is_per_tenant():
+    fingerprint = request_fingerprint(1, ["да"])
+    cache_response(104, "key-tenant", fingerprint, {"attempt_number": 1})
+
+    with tenant_scope("other-university"):
+        assert get_cached_response(104, "key-tenant", fingerprint) is None
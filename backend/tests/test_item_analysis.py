@@ -0,0 +1,79 @@
+"""Матрица ответов и показатели надежности шкал"""
+
+import numpy as np
+import pytest
+
+from utils.item_analysis import (
+    CODE_MISSING, CODE_NO, CODE_UNKNOWN, CODE_YES, AnswerMatrixBuilder, analyze_scale, analyze_test,
+    build_answer_matrix
+)
+
+def test_matrix_normalizes_pads_and_truncates():
+    matrix = build_answer_matrix([
+        ["да", " Нет ", "не знаю"],
+        ["да"],
+        None,
+        ["нет", "да", "нет", "лишний"],
+        ["может быть", 5, "ДА"],
+    ], n_items=3)
+
+    assert matrix.dtype == np.int8
+    assert matrix.tolist() == [
+        [CODE_YES, CODE_NO, CODE_UNKNOWN],
+        [CODE_YES, CODE_MISSING, CODE_MISSING],
+        [CODE_MISSING] * 3,
+        [CODE_NO, CODE_YES, CODE_NO],
+        [CODE_MISSING, CODE_MISSING, CODE_YES],
+    ]
+
+def test_builder_joins_blocks():
+    builder = AnswerMatrixBuilder(2, block_rows=3)
+    for index in range(7):
+        builder.add(["да" if index % 2 else "нет", "да"])
+
+    matrix = builder.build()
+    assert matrix.shape == (7, 2)
+    assert matrix[:, 0].tolist() == [CODE_NO, CODE_YES] * 3 + [CODE_NO]
+
+def test_scale_statistics_match_direct_formulas():
+    rng = np.random.default_rng(3)
+    matrix = rng.integers(0, 3, size=(200, 6)).astype(np.int8)
+    positive, negative = [1, 2, 4], [3, 6]
+
+    report = analyze_scale(matrix, positive, negative)
+
+    keyed = np.column_stack(
+        [matrix[:, number - 1] == CODE_YES for number in positive]
+        + [matrix[:, number - 1] == CODE_NO for number in negative]
+    ).astype(float)
+    total = keyed.sum(axis=1)
+    k = keyed.shape[1]
+    alpha = k / (k - 1) * (1 - keyed.var(axis=0).sum() / total.var())
+    assert report["n_items"] == 5
+    assert report["alpha"] == pytest.approx(alpha)
+    assert report["mean"] == pytest.approx(total.mean())
+
+    for column, item in enumerate(report["items"]):
+        rest = total - keyed[:, column]
+        assert item["p"] == pytest.approx(keyed[:, column].mean())
+        assert item["item_total_r"] == pytest.approx(np.corrcoef(keyed[:, column], rest)[0, 1])
+    assert [item["key"] for item in report["items"]] == ["positive"] * 3 + ["negative"] * 2
+
+def test_degenerate_scales_have_no_alpha():
+    matrix = np.full((10, 3), CODE_YES, dtype=np.int8)
+
+    assert analyze_scale(matrix[:1], [1, 2], [])["alpha"] is None
+    assert analyze_scale(matrix, [7], [])["n_items"] == 0
+    constant = analyze_scale(matrix, [1, 2], [3])
+    assert constant["alpha"] is None
+    assert all(item["item_total_r"] is None for item in constant["items"])
+
+def test_report_counts_answers_per_item():
+    matrix = build_answer_matrix([["да", "нет"], ["да", "не знаю"], ["нет"]], n_items=2)
+
+    report = analyze_test(matrix, {"Шкала": {"positive": [1], "negative": [2]}})
+
+    assert report["respondents"] == 3
+    assert report["distribution"][0] == {"item": 1, "нет": 1, "да": 2, "не знаю": 0, "нет ответа": 0}
+    assert report["distribution"][1] == {"item": 2, "нет": 1, "да": 0, "не знаю": 1, "нет ответа": 1}
+    assert set(report["scales"]) == {"Шкала"}
@@ -0,0 +1,125 @@
+"""Очередь фоновых задач: выборка, повторы, задачи упавших воркеров"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from db.database import SessionLocal
+from models.job import BackgroundJob
+from utils.jobs import JobRunner, claim_jobs, enqueue_job, execute_job, finish_job, job_handler
+
+calls = []
+
+@job_handler("test.record")
+def record_payload(payload: dict):
+    calls.append(payload)
+
+@job_handler("test.fail")
+def fail(payload: dict):
+    raise RuntimeError("сбой обработчика")
+
+@pytest.fixture(autouse=True)
+def clean_queue():
+    """Задачи других тестов (пересчет норм и т.п.) не мешают выборке"""
+    db = SessionLocal()
+    db.query(BackgroundJob).delete()
+    db.commit()
+    db.close()
+    calls.clear()
+
+def add_job(kind, payload=None, max_attempts=3, **values):
+    db = SessionLocal()
+    try:
+        job = enqueue_job(db, kind, payload, max_attempts=max_attempts)
+        for name, value in values.items():
+            setattr(job, name, value)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+def load(job_id) -> BackgroundJob:
+    db = SessionLocal()
+    try:
+        return db.get(BackgroundJob, job_id)
+    finally:
+        db.close()
+
+def test_claimed_job_runs_once():
+    job_id = add_job("test.record", {"n": 1})
+
+    [job] = claim_jobs(10, "worker-a")
+    assert (job.id, job.attempts, job.worker) == (job_id, 1, "worker-a")
+    assert claim_jobs(10, "worker-b") == []
+
+    assert execute_job(job) is None
+    assert calls == [{"n": 1}]
+    stored = load(job_id)
+    assert stored.status == BackgroundJob.STATUS_DONE
+    assert stored.locked_by is None
+
+def test_failed_job_is_retried_until_max_attempts():
+    job_id = add_job("test.fail", max_attempts=2)
+
+    [job] = claim_jobs(10, "worker-a")
+    assert "сбой обработчика" in execute_job(job)
+    stored = load(job_id)
+    assert stored.status == BackgroundJob.STATUS_PENDING
+    assert stored.run_after.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+    db = SessionLocal()
+    db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(
+        {BackgroundJob.run_after: datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+    db.commit()
+    db.close()
+
+    [retry] = claim_jobs(10, "worker-a")
+    assert retry.attempts == 2
+    execute_job(retry)
+    assert load(job_id).status == BackgroundJob.STATUS_FAILED
+
+def test_stale_jobs_are_released_or_failed():
+    stale_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    retryable = add_job("test.record", {"n": 2}, status=BackgroundJob.STATUS_RUNNING,
+                        attempts=1, locked_at=stale_at, locked_by="dead")
+    exhausted = add_job("test.record", {"n": 3}, max_attempts=1, status=BackgroundJob.STATUS_RUNNING,
+                        attempts=1, locked_at=stale_at, locked_by="dead")
+
+    [job] = claim_jobs(10, "worker-a")
+
+    assert job.id == retryable and job.attempts == 2
+    failed = load(exhausted)
+    assert failed.status == BackgroundJob.STATUS_FAILED
+    assert failed.locked_by is None and failed.finished_at is not None
+    assert "не завершил" in failed.last_error
+
+def test_reclaimed_job_ignores_result_of_previous_worker():
+    job_id = add_job("test.record")
+    [first] = claim_jobs(10, "worker-a")
+
+    # Воркер завис дольше JOB_LOCK_TIMEOUT_SECONDS - задачу взял другой
+    db = SessionLocal()
+    db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(
+        {BackgroundJob.locked_at: datetime.now(timezone.utc) - timedelta(hours=1)}
+    )
+    db.commit()
+    db.close()
+    [second] = claim_jobs(10, "worker-b")
+
+    assert finish_job(first, "опоздавший результат") is False
+    assert load(job_id).status == BackgroundJob.STATUS_RUNNING
+
+    assert finish_job(second, None) is True
+    assert load(job_id).status == BackgroundJob.STATUS_DONE
+
+def test_runner_drains_queue():
+    for n in range(5):
+        add_job("test.record", {"n": n})
+
+    runner = JobRunner(concurrency=2, poll_seconds=0.01, worker_id="runner")
+    asyncio.run(runner.run(until_empty=True))
+
+    assert sorted(payload["n"] for payload in calls) == list(range(5))
+    assert runner.status()["done"] == 5
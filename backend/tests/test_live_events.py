@@ -0,0 +1,153 @@
+"""События панели проктора: раздача подпискам, публикация после коммита, доступ к /live/events"""
+
+import asyncio
+import json
+import threading
+
+import httpx
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+import main
+import routers.users as users_router
+from utils.live_events import (
+    EVENT_PROGRESS, LiveEventBroker, LiveFilter, LiveLimitError, live_broker, publish_event,
+)
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+def event(user_id: int, test_id: int = 1, faculty: str = "ФКСИС", tenant: str = "default") -> dict:
+    return {
+        "type": EVENT_PROGRESS, "tenant": tenant, "user_id": user_id, "test_id": test_id,
+        "faculty": faculty, "course": 1, "answered": 3, "total": 10,
+    }
+
+def messages(batch) -> list:
+    """Разбирает SSE-сообщения в пары (тип, данные)"""
+    parsed = []
+    for message in batch:
+        fields = dict(line.split(": ", 1) for line in message.decode("utf-8").strip().split("\n"))
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+def test_subscription_gets_snapshot_then_matching_events():
+    broker = LiveEventBroker()
+
+    async def scenario():
+        broker.publish(event(1))
+        subscription = broker.subscribe(LiveFilter(tenant="default", faculty="ФКСИС"))
+        broker.publish(event(2, faculty="ФИТУ"))
+        broker.publish(event(3, tenant="other"))
+        broker.publish(event(4))
+        return await subscription.next_batch(1)
+
+    [(snapshot_type, snapshot), (event_type, data)] = messages(asyncio.run(scenario()))
+    assert snapshot_type == "snapshot"
+    assert [item["user_id"] for item in snapshot] == [1]
+    assert (event_type, data["user_id"]) == (EVENT_PROGRESS, 4)
+
+def test_slow_subscriber_is_dropped():
+    broker = LiveEventBroker(buffer_size=2)
+
+    async def scenario():
+        subscription = broker.subscribe(LiveFilter())
+        for user_id in range(3):
+            broker.publish(event(user_id))
+        return subscription
+
+    subscription = asyncio.run(scenario())
+    assert subscription.dropped
+    assert broker.stats()["dropped_subscribers"] == 1
+    assert broker.stats()["subscribers"] == 0
+
+def test_reconnect_replays_missed_events():
+    broker = LiveEventBroker()
+
+    async def scenario():
+        first = broker.subscribe(LiveFilter())
+        broker.publish(event(1))
+        [_, delivered] = await first.next_batch(1)
+        last_event_id = delivered.decode("utf-8").split("\n")[0][len("id: "):]
+        broker.unsubscribe(first)
+
+        broker.publish(event(2))
+        broker.publish(event(3))
+        second = broker.subscribe(LiveFilter(), last_event_id)
+        return await second.next_batch(1)
+
+    assert [data["user_id"] for _, data in messages(asyncio.run(scenario()))] == [2, 3]
+
+def test_subscriber_limit():
+    broker = LiveEventBroker(max_subscribers=1)
+
+    async def scenario():
+        broker.subscribe(LiveFilter())
+        broker.subscribe(LiveFilter())
+
+    try:
+        asyncio.run(scenario())
+    except LiveLimitError:
+        return
+    raise AssertionError("ожидался LiveLimitError")
+
+def test_event_is_published_after_commit_only(monkeypatch):
+    published = []
+    monkeypatch.setattr(live_broker, "publish", published.append)
+    engine = sa.create_engine("sqlite://")
+
+    with Session(engine) as session:
+        session.execute(sa.text("SELECT 1"))
+        publish_event(event(1), session)
+        session.rollback()
+        assert published == []
+
+        publish_event(event(2), session)
+        assert published == []
+        session.commit()
+
+    assert [item["user_id"] for item in published] == [2]
+
+def test_progress_does_not_block_event_loop(client, student, monkeypatch):
+    # NOTIFY без сессии ходит в БД: обработчик не должен держать цикл событий
+    entered, release = threading.Event(), threading.Event()
+    published = []
+
+    def slow_publish(live_event, db_session=None):
+        entered.set()
+        release.wait(5)
+        published.append(live_event)
+
+    monkeypatch.setattr(users_router, "publish_event", slow_publish)
+    [test] = [test for test in client.get("/tests/available").json() if test["filename"] == "questions.json"]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            reporting = asyncio.create_task(http.post(
+                f"/user-tests/{test['id']}/progress",
+                headers=student,
+                json={"answered": 0},
+            ))
+            assert await asyncio.to_thread(entered.wait, 5)
+
+            health = await asyncio.wait_for(http.get("/health"), timeout=2)
+            assert health.status_code == 200
+            assert not reporting.done()
+
+            release.set()
+            return await reporting
+
+    try:
+        response = asyncio.run(scenario())
+    finally:
+        release.set()
+    assert response.status_code == 204, response.text
+    assert [(item["type"], item["test_id"]) for item in published] == [("started", test["id"])]
+
+def test_live_events_require_admin_or_ticket(client):
+    assert client.get("/live/events").status_code == 403
+    assert client.get("/live/events", params={"ticket": "not-a-jwt"}).status_code == 403
+
+    assert client.post("/admin/live/ticket").status_code == 403
+    ticket = client.post("/admin/live/ticket", headers=ADMIN_HEADERS).json()
+    assert ticket["ticket"] and ticket["expires_in"] > 0
@@ -0,0 +1,60 @@
+"""Скетч квантилей и таблица процентилей норм"""
+
+from utils.norms import NormsEngine, QuantileSketch
+
+def test_percentile_rank_is_midpoint_of_step():
+    sketch = QuantileSketch()
+    for value in (1, 2, 2, 3):
+        sketch.add(value)
+    table = sketch.to_table()
+
+    assert table.percentile_rank(1) == 12.5
+    assert table.percentile_rank(2) == 50.0
+    assert table.percentile_rank(3) == 87.5
+
+def test_percentile_rank_outside_range():
+    sketch = QuantileSketch()
+    sketch.add(10, weight=4)
+    table = sketch.to_table()
+
+    assert table.percentile_rank(0) == 0.0
+    assert table.percentile_rank(11) == 100.0
+
+def test_empty_table_has_no_rank():
+    assert QuantileSketch().to_table().percentile_rank(5) is None
+
+def test_merge_equals_single_sketch():
+    left, right, single = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in range(20):
+        (left if value % 2 else right).add(value)
+        single.add(value)
+    left.merge(right)
+
+    assert left.count == single.count == 20
+    for value in range(20):
+        assert left.to_table().percentile_rank(value) == single.to_table().percentile_rank(value)
+
+def test_compression_keeps_bin_limit_and_count():
+    sketch = QuantileSketch(max_bins=8)
+    for value in range(100):
+        sketch.add(value)
+    table = sketch.to_table()
+
+    assert len(table.values) == 8
+    assert sketch.count == table.total == 100
+    assert table.values == sorted(table.values)
+    assert 40 <= table.percentile_rank(50) <= 60
+
+def test_norms_are_separate_per_test_version():
+    engine = NormsEngine(min_group_size=2)
+    rows = [(1, "v1", "FKSIS", 2, {"шкала": score}) for score in (1, 2, 3, 4)]
+    rows += [(1, "v2", "FKSIS", 2, {"шкала": score}) for score in (10, 20)]
+    engine._tables, engine._sample_sizes = engine._build(rows)
+
+    old = engine.lookup(1, "v1", "FKSIS", 2, {"шкала": 4})
+    new = engine.lookup(1, "v2", "FKSIS", 2, {"шкала": 4})
+
+    assert old["шкала"]["all"] == 87.5
+    assert new["шкала"]["all"] == 0.0
+    assert engine.lookup(1, None, "FKSIS", 2, {"шкала": 4}) == {}
+    assert engine.status()["sample_sizes"][1]["v2"]["all"] == 2
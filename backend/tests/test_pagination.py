@@ -0,0 +1,146 @@
+"""Курсоры постраничного вывода и оценка количества строк"""
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import main
+from db.database import SessionLocal, get_read_db
+from models.user import User
+from routers.admin import _name_conditions
+from utils.pagination import decode_cursor, encode_cursor, estimate_count
+
+class FakePostgresSession:
+    """Сессия PostgreSQL без сервера: запоминает запрос EXPLAIN"""
+
+    class _Bind:
+        dialect = postgresql.dialect()
+
+    class _Result:
+        def scalar(self):
+            return [{"Plan": {"Plan Rows": 250000}}]
+
+    def __init__(self):
+        self.calls = []
+
+    def get_bind(self):
+        return self._Bind()
+
+    @contextmanager
+    def begin_nested(self):
+        yield
+
+    def connection(self):
+        return self
+
+    def exec_driver_sql(self, sql, parameters=None, execution_options=None):
+        self.calls.append((sql, parameters, execution_options))
+        return self._Result()
+
+def test_cursor_roundtrip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+def test_naive_datetime_roundtrip():
+    created_at = datetime(2026, 3, 1, 12, 30)
+    assert decode_cursor(encode_cursor(created_at, 7)) == (created_at, 7)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "W10", "WyJ4IiwgMV0"])
+def test_broken_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+def test_estimate_passes_like_pattern_as_parameter():
+    session = FakePostgresSession()
+    statement = select(User).where(*_name_conditions("иванов ив"), User.course.in_([1, 2]))
+
+    assert estimate_count(session, statement) == (250000, False)
+
+    [(sql, parameters, _)] = session.calls
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    # % шаблона - в значении параметра, а в тексте только маркеры psycopg2
+    assert "%" not in sql.replace("%(", "").replace(")s", "")
+    assert sorted(parameters.values(), key=str) == [1, 2, "Ив%", "Иванов"]
+
+class AbortingPostgresSession:
+    """
+    Сессия SQLite, которая выдает себя за PostgreSQL с неудачным EXPLAIN
+
+    Как в PostgreSQL, после ошибки любой запрос падает, пока транзакция не
+    откачена к точке сохранения.
+    """
+
+    _Bind = FakePostgresSession._Bind
+
+    def __init__(self, session):
+        self._session = session
+        self.aborted = False
+        self.savepoint_rollbacks = 0
+
+    def get_bind(self):
+        return self._Bind()
+
+    @contextmanager
+    def begin_nested(self):
+        try:
+            yield
+        except Exception:
+            self.aborted = False
+            self.savepoint_rollbacks += 1
+            raise
+
+    def connection(self):
+        return self
+
+    def exec_driver_sql(self, sql, parameters=None, execution_options=None):
+        self.aborted = True
+        raise RuntimeError("canceling statement due to statement timeout")
+
+    def execute(self, statement, *args, **kwargs):
+        if self.aborted:
+            raise RuntimeError("current transaction is aborted, commands ignored until end of transaction block")
+        return self._session.execute(statement, *args, **kwargs)
+
+def test_failed_estimate_rolls_back_to_savepoint_and_page_loads(client, student):
+    sessions = []
+
+    def aborting_read_db():
+        db = SessionLocal()
+        sessions.append(AbortingPostgresSession(db))
+        try:
+            yield sessions[-1]
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[get_read_db] = aborting_read_db
+    try:
+        response = client.get("/admin/users", headers={"X-Admin-Token": "test-admin-token"})
+    finally:
+        main.app.dependency_overrides.pop(get_read_db)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] is None
+    assert response.json()["items"]
+    assert sessions[0].savepoint_rollbacks == 1
+
+def test_admin_search_counts_exactly_on_sqlite(client, student):
+    me = client.get("/auth/me", headers=student).json()
+    response = client.get(
+        "/admin/users",
+        params={"q": f"{me['last_name']} Ив"},
+        headers={"X-Admin-Token": "test-admin-token"},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["total"] == 1
+    assert body["total_is_estimate"] is False
+    assert [user["id"] for user in body["items"]] == [me["id"]]
@@ -0,0 +1,52 @@
+"""Создание секций test_attempts по требованию"""
+
+from datetime import datetime, timezone
+
+from db.partitions import ensure_attempt_partition
+
+class FakePostgresEngine:
+    """Движок PostgreSQL без сервера: запоминает выполненный DDL"""
+
+    class _Dialect:
+        name = "postgresql"
+
+    dialect = _Dialect()
+
+    def __init__(self):
+        self.statements = []
+
+    def connect(self):
+        return self
+
+    def execution_options(self, **options):
+        return self
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+MOMENT = datetime(2026, 9, 15, tzinfo=timezone.utc)
+
+def test_partition_created_once_per_engine():
+    engine = FakePostgresEngine()
+
+    ensure_attempt_partition(engine, 1, MOMENT)
+    ensure_attempt_partition(engine, 1, MOMENT.replace(day=30))
+
+    assert len(engine.statements) == 2
+    assert "test_attempts_t1_2026_09" in engine.statements[1]
+
+def test_each_tenant_engine_gets_its_partitions():
+    # Арендаторы со своей БД или схемой - разные движки
+    first_tenant, second_tenant = FakePostgresEngine(), FakePostgresEngine()
+
+    ensure_attempt_partition(first_tenant, 2, MOMENT)
+    ensure_attempt_partition(second_tenant, 2, MOMENT)
+
+    assert first_tenant.statements == second_tenant.statements
+    assert len(second_tenant.statements) == 2
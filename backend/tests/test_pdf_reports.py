@@ -0,0 +1,159 @@
+"""PDF-отчеты: Range-ответы, кеш рендеринга и архив группы"""
+
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils.pdf_reports as pdf_reports
+from tests.conftest import TESTS_DIR
+from utils.pdf_reports import PdfReportStore, PdfUnavailableError, document_hash, pdf_store
+from utils.range_response import parse_range
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=10-5000", (10, 1023)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-9", None),
+    ("bytes=a-b", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1024) == expected
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=9-5", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1024)
+
+def fake_render(document: dict) -> bytes:
+    return json.dumps(document, ensure_ascii=False, default=str).encode("utf-8")
+
+@pytest.fixture
+def rendered(monkeypatch, tmp_path):
+    """Кеш PDF в tmp_path, рендеринг в потоках вместо reportlab"""
+    renders = []
+
+    def render(document):
+        renders.append(document["kind"])
+        time.sleep(0.05)
+        return fake_render(document)
+
+    monkeypatch.setattr(pdf_reports, "render_pdf", render)
+    monkeypatch.setattr(pdf_store, "directory", str(tmp_path))
+    monkeypatch.setattr(pdf_store, "check_available", lambda: None)
+    monkeypatch.setattr(pdf_store, "_pool", ThreadPoolExecutor(max_workers=2))
+    monkeypatch.setattr(pdf_store, "_files", None)
+    yield renders
+    pdf_store.shutdown()
+
+@pytest.fixture
+def completed(client, student):
+    """Студент с результатом по тесту: (user_id, test_id)"""
+    [test] = [test for test in client.get("/tests/available").json() if test["filename"] == "questions.json"]
+    with open(os.path.join(TESTS_DIR, "questions.json"), encoding="utf-8") as file:
+        answers = ["да"] * sum(1 for item in json.load(file) if item.get("question"))
+    response = client.post(f"/user-tests/{test['id']}/complete", headers=student,
+                           json={"answers": answers, "result": {}})
+    assert response.status_code == 200, response.text
+    return client.get("/auth/me", headers=student).json()["id"], test["id"]
+
+def test_store_renders_each_document_once(rendered, tmp_path):
+    store = PdfReportStore(str(tmp_path), workers=2, keep_files=10)
+    store._pool = ThreadPoolExecutor(max_workers=2)
+    document = {"kind": "student", "scales": []}
+
+    async def scenario():
+        return await asyncio.gather(*(store.get_or_render(document) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert set(results) == {(document_hash(document), store.path_for(document_hash(document)))}
+    assert rendered == ["student"]
+    assert store.rendered == 1
+
+    asyncio.run(store.get_or_render(document))
+    assert (store.rendered, store.hits) == (1, 1)
+    store.shutdown()
+
+def test_store_prunes_least_recently_used(tmp_path):
+    store = PdfReportStore(str(tmp_path), workers=1, keep_files=2)
+    for number in range(3):
+        path = store.path_for(f"doc{number}")
+        store._store(path, b"%PDF")
+        os.utime(path, (number, number))
+    store._store(store.path_for("doc3"), b"%PDF")
+    assert sorted(os.listdir(tmp_path)) == ["doc2.pdf", "doc3.pdf"]
+
+def test_student_report_ranges(client, completed, rendered):
+    user_id, test_id = completed
+    url = f"/admin/reports/users/{user_id}/tests/{test_id}"
+    assert client.get(url).status_code == 403
+
+    full = client.get(url, headers=ADMIN_HEADERS)
+    assert full.status_code == 200, full.text
+    assert full.headers["content-type"] == "application/pdf"
+    assert full.headers["accept-ranges"] == "bytes"
+    assert "filename*=UTF-8''" in full.headers["content-disposition"]
+    content, etag = full.content, full.headers["etag"]
+    assert json.loads(content)["student"]["id"] == user_id
+
+    part = client.get(url, headers={**ADMIN_HEADERS, "Range": "bytes=10-19"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == f"bytes 10-19/{len(content)}"
+    assert part.content == content[10:20]
+
+    assert client.get(url, headers={**ADMIN_HEADERS, "If-None-Match": etag}).status_code == 304
+
+    # If-Range с другим ETag - файл изменился, отдается целиком
+    stale = client.get(url, headers={**ADMIN_HEADERS, "Range": "bytes=10-19", "If-Range": '"old"'})
+    assert (stale.status_code, stale.content) == (200, content)
+
+    outside = client.get(url, headers={**ADMIN_HEADERS, "Range": f"bytes={len(content)}-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{len(content)}"
+
+    # Повторный запрос не рендерит документ заново
+    assert rendered == ["student"]
+
+def test_student_report_without_reportlab(client, completed, monkeypatch):
+    user_id, test_id = completed
+
+    async def unavailable(document):
+        raise PdfUnavailableError("PDF-отчеты недоступны: установите reportlab")
+
+    monkeypatch.setattr(pdf_store, "get_or_render", unavailable)
+    response = client.get(f"/admin/reports/users/{user_id}/tests/{test_id}", headers=ADMIN_HEADERS)
+    assert response.status_code == 503
+
+def test_cohort_archive(client, completed, rendered):
+    user_id, test_id = completed
+    response = client.get("/admin/reports/cohort", headers=ADMIN_HEADERS, params={
+        "test_id": test_id, "faculty": "ФКСИС", "course": 2,
+    })
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = archive.namelist()
+    assert names[-1] == "summary.pdf"
+    assert any(name.endswith(f"_{user_id}.pdf") for name in names)
+
+    summary = json.loads(archive.read("summary.pdf"))
+    assert summary["kind"] == "cohort"
+    assert summary["students"] == len(names) - 1
+
+def test_cohort_without_results_is_404(client, completed, rendered):
+    _, test_id = completed
+    response = client.get("/admin/reports/cohort", headers=ADMIN_HEADERS, params={
+        "test_id": test_id, "faculty": "ФКСИС", "course": 6,
+    })
+    assert response.status_code == 404
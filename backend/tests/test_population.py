@@ -0,0 +1,72 @@
+"""Синтетическая популяция для бенчмарков"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from db.database import _create_schema, build_engine
+from models.attempt import LatestTestResult, TestAttempt
+from models.test import Test
+from models.user import User
+from utils.catalog import test_catalog
+from utils.population import (
+    PopulationError, PopulationGenerator, feminine_surname, name_capacity, write_population
+)
+
+UNTIL = datetime(2026, 9, 1, tzinfo=timezone.utc)
+
+@pytest.fixture(scope="module")
+def test_data():
+    return test_catalog.default.get("questions.json").data
+
+def make_generator(test_data, users=50, seed=11, offset=0):
+    return PopulationGenerator(seed=seed, users=users, test_data=test_data, until=UNTIL,
+                               careless_ratio=0.2, offset=offset)
+
+def test_same_seed_gives_same_population(test_data):
+    first, second = make_generator(test_data), make_generator(test_data)
+
+    assert first.user_rows(0, 50, 1, ["hash"]) == second.user_rows(0, 50, 1, ["hash"])
+    assert first.attempt_rows(1, "Тест", 80, 0, 80, 1, 1) == second.attempt_rows(1, "Тест", 80, 0, 80, 1, 1)
+    assert make_generator(test_data, seed=12).user_rows(0, 50, 1, ["hash"]) != first.user_rows(0, 50, 1, ["hash"])
+
+def test_names_stay_unique_across_offsets(test_data):
+    names = {make_generator(test_data).fio(index) for index in range(2000)}
+    extension = make_generator(test_data, users=50, offset=2000)
+    names |= {extension.fio(index) for index in range(2000, 2050)}
+
+    assert len(names) == 2050
+    assert feminine_surname("Высоцкий") == "Высоцкая"
+    with pytest.raises(PopulationError):
+        make_generator(test_data, users=name_capacity() + 1)
+
+def test_attempts_follow_user_order(test_data):
+    generator = make_generator(test_data, users=10)
+
+    attempts, latest = generator.attempt_rows(1, "Тест", 25, 0, 25, first_user_id=100, first_attempt_id=500)
+
+    assert [row["attempt_number"] for row in attempts] == [1] * 10 + [2] * 10 + [3] * 5
+    assert [row["id"] for row in attempts] == list(range(500, 525))
+    # Последний результат - у финальной попытки каждого пользователя
+    assert sorted(row["user_id"] for row in latest) == list(range(100, 110))
+    assert all(row["completed_at"] <= UNTIL for row in attempts)
+    assert all(len(row["answers"]) == len(test_data["questions"]) for row in attempts)
+    assert any(row["quality"]["flags"] for row in attempts)
+
+def test_write_population_appends_after_existing_rows(test_data):
+    engine = build_engine("sqlite://")
+    _create_schema(engine)
+    with engine.begin() as connection:
+        test_id = connection.execute(Test.__table__.insert().values(filename="questions.json")).inserted_primary_key[0]
+
+    summary = write_population(engine, make_generator(test_data, users=30), test_id, "Тест", 45, ["hash"])
+    again = write_population(engine, make_generator(test_data, users=30, offset=30), test_id, "Тест", 30, ["hash"])
+
+    assert summary["first_user_id"] == 1 and again["first_user_id"] == 31
+    assert again["first_attempt_id"] == 46
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(User)).scalar() == 60
+        assert connection.execute(select(func.count()).select_from(TestAttempt)).scalar() == 75
+        assert connection.execute(select(func.count()).select_from(LatestTestResult)).scalar() == 60
+    engine.dispose()
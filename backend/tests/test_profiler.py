@@ -0,0 +1,69 @@
+"""Сэмплер стеков и профиль воркера по запросу"""
+
+import os
+import threading
+
+from utils.profiler import StackSampler, acquire_on_demand, release_on_demand
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+def busy_loop_for_profile(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+def sample_busy_thread(samples=5) -> StackSampler:
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop_for_profile, args=(stop,), name="busy")
+    thread.start()
+    try:
+        sampler = StackSampler(interval=0.01)
+        for _ in range(samples):
+            sampler.sample_once()
+    finally:
+        stop.set()
+        thread.join()
+    return sampler
+
+def test_sampler_records_thread_stacks():
+    sampler = sample_busy_thread()
+
+    assert sampler.sample_count == 5
+    lines = sampler.to_collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("busy_loop_for_profile" in line for line in busy)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in busy) == 5
+
+def test_speedscope_weights_match_samples():
+    sampler = sample_busy_thread()
+
+    profile = sampler.to_speedscope("test")
+    [busy] = [item for item in profile["profiles"] if item["name"] == "busy"]
+    frames = profile["shared"]["frames"]
+    assert sum(busy["weights"]) == busy["endValue"] == 5 * sampler.interval
+    assert all(0 <= index < len(frames) for stack in busy["samples"] for index in stack)
+    assert any(frame["name"] == "busy_loop_for_profile" for frame in frames)
+
+def test_take_resets_sampler():
+    sampler = sample_busy_thread()
+
+    snapshot = sampler.take()
+    assert snapshot.sample_count == 5 and snapshot.samples
+    assert sampler.sample_count == 0 and not sampler.samples
+
+def test_profile_endpoint(client):
+    response = client.get("/admin/profile", params={"seconds": 0.1, "format": "collapsed"}, headers=ADMIN_HEADERS)
+
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Profile-Pid"] == str(os.getpid())
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+    assert client.get("/admin/profile", params={"seconds": 0.1}).status_code == 403
+
+def test_one_profile_at_a_time(client):
+    assert acquire_on_demand()
+    try:
+        response = client.get("/admin/profile", params={"seconds": 0.1}, headers=ADMIN_HEADERS)
+    finally:
+        release_on_demand()
+
+    assert response.status_code == 409
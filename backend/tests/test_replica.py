@@ -0,0 +1,97 @@
+"""Чтение из основной БД после собственной записи при настроенной реплике"""
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+import auth.auth as auth_module
+import db.database as database
+from auth.auth import PRIMARY_PIN_COOKIE, PRIMARY_PIN_HEADER, is_pinned_to_primary, pin_user_to_primary
+from config import get_settings
+from db.tenancy import tenant_scope
+from tests.conftest import cyrillic_suffix
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Реплика - та же БД: маршрутизация проверяется без второго сервера"""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "database_replica_url", settings.database_url)
+    monkeypatch.setattr(database, "_replica_engine", database.get_engine())
+
+def request_with(headers=None, cookies=None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    if cookies:
+        raw.append((b"cookie", "; ".join(f"{name}={value}" for name, value in cookies.items()).encode()))
+    return Request({"type": "http", "headers": raw})
+
+def issue_pin(user_id=7) -> str:
+    response = Response()
+    pin_user_to_primary(response, user_id)
+    return response.headers[PRIMARY_PIN_HEADER]
+
+def test_pin_is_skipped_without_replica():
+    response = Response()
+    pin_user_to_primary(response, 7)
+    assert PRIMARY_PIN_HEADER not in response.headers
+    assert "set-cookie" not in response.headers
+
+def test_pin_travels_in_cookie_and_header(replica):
+    response = Response()
+    pin_user_to_primary(response, 7)
+    pin = response.headers[PRIMARY_PIN_HEADER]
+    assert f"{PRIMARY_PIN_COOKIE}={pin}" in response.headers["set-cookie"]
+
+    assert is_pinned_to_primary(request_with(headers={PRIMARY_PIN_HEADER: pin}), 7)
+    assert is_pinned_to_primary(request_with(cookies={PRIMARY_PIN_COOKIE: pin}), 7)
+    assert not is_pinned_to_primary(request_with(), 7)
+
+def test_pin_is_bound_to_user_and_tenant(replica):
+    pin = issue_pin(7)
+    request = request_with(headers={PRIMARY_PIN_HEADER: pin})
+
+    assert not is_pinned_to_primary(request, 8)
+    with tenant_scope("other"):
+        assert not is_pinned_to_primary(request, 7)
+
+def test_forged_or_expired_pin_is_ignored(replica, monkeypatch):
+    pin = issue_pin(7)
+    value, _, signature = pin.rpartition(":")
+    tenant, _, expires_at = value.split(":")
+    forged = f"{tenant}:8:{expires_at}:{signature}"
+    assert not is_pinned_to_primary(request_with(headers={PRIMARY_PIN_HEADER: forged}), 8)
+    assert not is_pinned_to_primary(request_with(headers={PRIMARY_PIN_HEADER: "garbage"}), 7)
+
+    now = auth_module.time.time()
+    monkeypatch.setattr(auth_module.time, "time", lambda: now + get_settings().db_replica_pin_seconds + 2)
+    assert not is_pinned_to_primary(request_with(headers={PRIMARY_PIN_HEADER: pin}), 7)
+
+def test_reads_after_register_go_to_primary(client, replica, monkeypatch):
+    reads = []
+    original = auth_module.get_read_session
+
+    def recording_read_session(primary=False):
+        reads.append(primary)
+        return original(primary)
+
+    monkeypatch.setattr(auth_module, "get_read_session", recording_read_session)
+
+    response = client.post("/auth/register", json={
+        "first_name": "Иван",
+        "last_name": f"Репликов-{cyrillic_suffix()}",
+        "middle_name": "Иванович",
+        "faculty": "ФКСИС",
+        "course": 2,
+        "password": "secret1",
+    })
+    assert response.status_code == 201, response.text
+    pin = response.headers[PRIMARY_PIN_HEADER]
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # Запрос с меткой может прийти на любой воркер: состояние - у клиента
+    reads.clear()
+    assert client.get("/auth/me", headers={**headers, PRIMARY_PIN_HEADER: pin}).status_code == 200
+    assert reads and all(reads)
+
+    reads.clear()
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert reads and not any(reads)
@@ -0,0 +1,74 @@
+"""Кеш объектов на время HTTP-запроса (utils/request_context.py)"""
+
+import threading
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from utils.request_context import (
+    RequestContext, RequestContextMiddleware, current_context, forget, memoize,
+)
+
+def test_memoize_outside_request_calls_factory():
+    calls = []
+    assert current_context() is None
+    for _ in range(2):
+        memoize("test", 1, lambda: calls.append(1))
+    assert len(calls) == 2
+
+def test_context_caches_none_and_forgets():
+    context = RequestContext()
+    calls = []
+
+    def load():
+        calls.append(1)
+        return None
+
+    assert context.memo("test", 1, load) is None
+    assert context.memo("test", 1, load) is None
+    assert context.memo("test", 2, load) is None
+    assert (len(calls), context.hits, context.misses) == (2, 1, 2)
+
+    context.forget("test", 1)
+    context.forget("test", 404)
+    context.memo("test", 1, load)
+    assert len(calls) == 3
+
+def app_counting_loads():
+    """Приложение, которое ищет один объект дважды за запрос (в пуле потоков)"""
+    loads = []
+    lock = threading.Lock()
+
+    def load(key):
+        with lock:
+            loads.append(key)
+        return {"key": key}
+
+    def endpoint(request):
+        key = request.path_params["key"]
+        first = memoize("item", key, lambda: load(key))
+        second = memoize("item", key, lambda: load(key))
+        forget("item", key)
+        third = memoize("item", key, lambda: load(key))
+        context = current_context()
+        return JSONResponse({
+            "same": first is second, "reloaded": third is not first,
+            "hits": context.hits, "misses": context.misses,
+        })
+
+    app = Starlette(routes=[Route("/items/{key:int}", endpoint)])
+    app.add_middleware(RequestContextMiddleware)
+    return app, loads
+
+def test_middleware_gives_each_request_own_cache():
+    app, loads = app_counting_loads()
+    with TestClient(app) as client:
+        first = client.get("/items/1").json()
+        second = client.get("/items/1").json()
+
+    assert first == second == {"same": True, "reloaded": True, "hits": 1, "misses": 2}
+    # Второй запрос не видит кеш первого
+    assert loads == [1, 1, 1, 1]
+    assert current_context() is None
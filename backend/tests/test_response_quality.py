@@ -0,0 +1,77 @@
+"""Показатели небрежных ответов и их учет при завершении теста"""
+
+import random
+
+import numpy as np
+
+from models.attempt import LatestTestResult, TestAttempt
+from utils.item_analysis import build_answer_matrix
+from utils.response_quality import (
+    MAX_IDENTICAL_RUN, MIN_CONSISTENCY_PAIRS, assess_answers, assess_matrix, longest_runs, reverse_keyed_pairs
+)
+
+def test_longest_run_ignores_missing_tail():
+    matrix = build_answer_matrix([
+        ["да", "да", "нет", "нет", "нет", "да"],
+        ["да", "нет", "да"],
+        ["не знаю"] * 6,
+    ], n_items=6)
+
+    assert longest_runs(matrix).tolist() == [3, 1, 6]
+
+def test_reverse_keyed_pairs_follow_key_order():
+    scales = {
+        "А": {"positive": [1, 3, 9], "negative": [2, 4]},
+        "Б": {"positive": [5], "negative": [6, 7]},
+    }
+
+    assert reverse_keyed_pairs(scales, n_items=8).tolist() == [[0, 1], [2, 3], [4, 5]]
+    assert reverse_keyed_pairs({}, n_items=8).shape == (0, 2)
+
+def test_inconsistency_needs_enough_answered_pairs():
+    n_pairs = MIN_CONSISTENCY_PAIRS
+    pairs = np.array([[2 * index, 2 * index + 1] for index in range(n_pairs)])
+    consistent = ["да", "нет"] * n_pairs
+    contradictory = ["да", "да"] * n_pairs
+    too_few = ["да", "да"] + ["не знаю"] * (2 * n_pairs - 2)
+
+    metrics = assess_matrix(build_answer_matrix([consistent, contradictory, too_few], 2 * n_pairs), pairs)
+
+    assert metrics["inconsistency"][0] == 0
+    assert metrics["inconsistency"][1] == 1
+    assert np.isnan(metrics["inconsistency"][2])
+    assert metrics["flags"]["inconsistency"].tolist() == [False, True, False]
+    assert metrics["flags"]["unknown_ratio"].tolist() == [False, False, True]
+
+def test_assess_answers_reports_flags_and_item_times():
+    questions = [{"question": f"Вопрос {index}"} for index in range(MAX_IDENTICAL_RUN + 5)]
+    test_data = {"questions": questions, "scales": {}}
+    answers = ["да"] * len(questions)
+
+    report = assess_answers(answers, test_data, item_times=[300] * len(questions))
+
+    assert report["longest_run"] == len(questions)
+    assert report["inconsistency"] is None
+    assert report["fast_ratio"] == 1
+    assert set(report["flags"]) == {"long_run", "fast"}
+
+    rng = random.Random(5)
+    varied = [rng.choice(["да", "нет"]) for _ in questions]
+    assert assess_answers(varied, test_data)["flags"] == []
+    assert assess_answers(answers, None) is None
+
+def test_careless_completion_is_stored_and_flagged(client, student, db_session):
+    tests = client.get("/tests/available").json()
+    [test] = [test for test in tests if test["filename"] == "questions.json"]
+    content = client.get(f"/tests/{test['id']}/content").json()
+
+    response = client.post(f"/user-tests/{test['id']}/complete", headers=student, json={
+        "answers": ["да"] * len(content["questions"]),
+        "result": {},
+    })
+    assert response.status_code == 200, response.text
+
+    attempt = db_session.query(TestAttempt).filter(TestAttempt.test_id == test["id"]).order_by(TestAttempt.id.desc()).first()
+    assert "long_run" in attempt.quality["flags"]
+    latest = db_session.get(LatestTestResult, (attempt.user_id, test["id"]))
+    assert latest.is_careless
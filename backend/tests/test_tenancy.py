@@ -0,0 +1,105 @@
+"""Арендаторы: выбор по X-Tenant и домену, своя БД, объекты TenantLocal"""
+
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401
+from db.database import Base, ControlSessionLocal, SessionLocal
+from db.tenancy import TenantLocal, get_current_tenant, tenant_registry, tenant_scope
+from models.reference import seed_reference_data
+from models.tenant import Tenant
+from models.user import User
+from tests.conftest import WORK_DIR, cyrillic_suffix
+
+SLUG = "second-university"
+HOST = "psycho.second.example.edu"
+
+@pytest.fixture(scope="module")
+def tenant_engine():
+    """Второй университет со своей БД SQLite"""
+    url = f"sqlite:///{os.path.join(WORK_DIR, f'tenant-{uuid.uuid4().hex}.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        seed_reference_data(session)
+        session.commit()
+
+    with ControlSessionLocal() as control:
+        control.add(Tenant(slug=SLUG, name="Второй университет", hosts=[HOST], database_url=url))
+        control.commit()
+    tenant_registry.load()
+    yield engine
+
+    with ControlSessionLocal() as control:
+        control.query(Tenant).filter(Tenant.slug == SLUG).delete()
+        control.commit()
+    tenant_registry.load()
+    engine.dispose()
+
+def register(client, headers):
+    last_name = f"Арендов-{cyrillic_suffix()}"
+    response = client.post("/auth/register", headers=headers, json={
+        "first_name": "Анна",
+        "last_name": last_name,
+        "middle_name": "Петровна",
+        "faculty": "ФКСИС",
+        "course": 1,
+        "password": "secret1",
+    })
+    assert response.status_code == 201, response.text
+    headers = {**headers, "Authorization": f"Bearer {response.json()['access_token']}"}
+    # Фамилия сохраняется нормализованной (регистр частей через дефис)
+    saved_last_name = client.get("/auth/me", headers=headers).json()["last_name"]
+    assert saved_last_name.lower() == last_name.lower()
+    return saved_last_name, headers
+
+def test_unknown_tenant_is_404(client):
+    response = client.get("/tests/available", headers={"X-Tenant": "no-such-university"})
+    assert response.status_code == 404
+    assert "no-such-university" in response.json()["message"]
+
+    response = client.get("/tests/available", params={"tenant": "no-such-university"})
+    assert response.status_code == 404
+
+def test_student_lives_in_tenant_database(client, tenant_engine):
+    last_name, _ = register(client, {"X-Tenant": SLUG})
+
+    with sessionmaker(bind=tenant_engine)() as session:
+        assert session.scalar(select(User.id).where(User.last_name == last_name)) is not None
+    with SessionLocal() as session:
+        assert session.scalar(select(User.id).where(User.last_name == last_name)) is None
+
+def test_token_is_valid_only_in_its_tenant(client, tenant_engine):
+    _, headers = register(client, {"X-Tenant": SLUG})
+    default_headers = {"Authorization": headers["Authorization"]}
+    assert client.get("/auth/me", headers=default_headers).status_code == 401
+
+def test_tenant_by_host(client, tenant_engine):
+    last_name, headers = register(client, {"X-Tenant": SLUG})
+    by_host = {"Host": HOST, "Authorization": headers["Authorization"]}
+    assert client.get("/auth/me", headers=by_host).json()["last_name"] == last_name
+
+def test_shared_catalog_is_registered_in_tenant_database(client, tenant_engine):
+    tests = client.get("/tests/available", headers={"X-Tenant": SLUG}).json()
+    assert "questions.json" in [test["filename"] for test in tests]
+
+def test_tenant_local_objects(tenant_engine):
+    created = []
+
+    def factory(config):
+        created.append(config.slug)
+        return {"tenant": config.slug}
+
+    local = TenantLocal(f"test-local-{uuid.uuid4().hex}", factory, default={"tenant": "default"})
+    assert local.for_tenant() == {"tenant": "default"}
+
+    with tenant_scope(SLUG):
+        assert get_current_tenant() == SLUG
+        assert local.get("tenant") == SLUG
+        assert local.for_tenant() is local.for_tenant(SLUG)
+    assert created == [SLUG]
+    assert local.default == {"tenant": "default"}
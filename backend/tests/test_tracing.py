@@ -0,0 +1,45 @@
+"""Трассировка: ленивый импорт OpenTelemetry и экспорт span в файл"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import utils.tracing as tracing
+from config import get_settings
+from tests.conftest import BACKEND_DIR
+
+def test_disabled_tracing_does_not_import_opentelemetry():
+    code = (
+        "import sys, utils.tracing as t; "
+        "print(t.setup_tracing(), any(name.startswith('opentelemetry') for name in sys.modules))"
+    )
+    env = {**os.environ, "TRACING_ENABLED": "false"}
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.split()[-2:] == ["False", "False"]
+
+def test_spans_are_exported_to_file(tmp_path, monkeypatch):
+    pytest.importorskip("opentelemetry.sdk")
+    path = tmp_path / "spans.jsonl"
+    settings = get_settings()
+    monkeypatch.setattr(settings, "tracing_enabled", True)
+    monkeypatch.setattr(settings, "tracing_exporter", "file")
+    monkeypatch.setattr(settings, "tracing_file_path", str(path))
+    monkeypatch.setattr(settings, "tracing_sample_ratio", 1.0)
+    # После теста трассировка снова выключена (события Engine проверяют _tracer)
+    for name in ("_tracer", "trace", "propagate", "SpanKind", "Status", "StatusCode"):
+        monkeypatch.setattr(tracing, name, getattr(tracing, name))
+
+    assert tracing.setup_tracing()
+    with tracing.start_span("test.outer", {"test.value": 1}):
+        tracing.traced("test.inner")(lambda: None)()
+    tracing.shutdown_tracing()
+
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    by_name = {span["name"]: span for span in spans}
+    assert by_name["test.inner"]["parent_id"] == by_name["test.outer"]["context"]["span_id"]
+    assert by_name["test.outer"]["attributes"] == {"test.value": 1}
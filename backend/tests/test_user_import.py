@@ -0,0 +1,50 @@
+"""Разбор файла импорта пользователей, проверка строк и дедупликация"""
+
+import io
+import pytest
+
+from tests.conftest import cyrillic_suffix
+from utils.user_import import ImportFormatError, import_users, read_csv_rows
+
+def csv_stream(text: str):
+    return io.BytesIO(text.encode("utf-8-sig"))
+
+def test_semicolon_csv_with_russian_header():
+    rows = list(read_csv_rows(csv_stream(
+        "Фамилия;Имя;Отчество;Факультет;Курс;Пароль\n"
+        "Петров;Петр;Петрович;ФКСИС;2;secret1\n"
+        ";;;;;\n"
+    )))
+
+    assert rows == [(2, {
+        "last_name": "Петров", "first_name": "Петр", "middle_name": "Петрович",
+        "faculty": "ФКСИС", "course": "2", "password": "secret1",
+    })]
+
+def test_missing_columns_rejected():
+    with pytest.raises(ImportFormatError) as error:
+        list(read_csv_rows(csv_stream("last_name,first_name\nПетров,Петр\n")))
+    assert "middle_name" in str(error.value)
+
+def test_dry_run_validates_and_dedupes(db_session, client, student):
+    me = client.get("/auth/me", headers=student).json()
+    unique = f"Новиков-{cyrillic_suffix()}".title()
+    text = (
+        "last_name,first_name,middle_name,faculty,course,password\n"
+        f"{me['last_name']},{me['first_name']},{me['middle_name']},ФКСИС,2,secret1\n"
+        f"{unique},Петр,Петрович,ФКСИС,2,secret1\n"
+        f"{unique},Петр,Петрович,ФКСИС,2,secret1\n"
+        "Smith,John,Doe,ФКСИС,2,secret1\n"
+    )
+
+    report = import_users(db_session, read_csv_rows(csv_stream(text)), dry_run=True).to_dict()
+
+    assert report["dry_run"] is True
+    assert report["total_rows"] == 4
+    assert report["created"] == 0
+    assert report["error_count"] == 1
+    assert report["errors"][0]["row"] == 5
+    assert [item["reason"] for item in report["skipped"]] == [
+        "Пользователь с таким ФИО уже существует",
+        "ФИО повторяется в файле",
+    ]
@@ -0,0 +1,69 @@
+"""Версии тестов по хешу содержимого файла"""
+
+import json
+import os
+
+import pytest
+
+from utils.catalog import CatalogError, TestCatalog, parse_test_file
+from utils.test_versions import VersionCache
+
+def write_test(directory, name, questions, scales=None):
+    items = [{"title": "Тест", "description": "Описание"}]
+    items += [{"question": text} for text in questions]
+    if scales is not None:
+        items.append({"results": scales})
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(items, file, ensure_ascii=False)
+    return path
+
+def test_hash_follows_content(tmp_path):
+    first = parse_test_file(write_test(tmp_path, "a.json", ["Вопрос 1"]))
+    same = parse_test_file(write_test(tmp_path, "b.json", ["Вопрос 1"]))
+    changed = parse_test_file(write_test(tmp_path, "a.json", ["Вопрос 1", "Вопрос 2"]))
+
+    assert first.content_hash == same.content_hash
+    assert changed.content_hash != first.content_hash
+    assert len(changed.data["questions"]) == 2
+
+def test_scale_with_missing_question_rejected(tmp_path):
+    path = write_test(tmp_path, "bad.json", ["Вопрос 1"], {"шкала": {"positive": [2]}})
+    with pytest.raises(CatalogError):
+        parse_test_file(path)
+
+def test_catalog_keeps_old_versions_reachable_by_hash(tmp_path):
+    path = write_test(tmp_path, "t.json", ["Вопрос 1"])
+    catalog = TestCatalog(str(tmp_path))
+    catalog.load_all()
+    old_hash = catalog.get("t.json").content_hash
+
+    assert catalog.reload_paths([path]) == []
+
+    write_test(tmp_path, "t.json", ["Вопрос 1", "Вопрос 2"])
+    [entry] = catalog.reload_paths([path])
+
+    assert entry.content_hash != old_hash
+    assert catalog.get("t.json") is entry
+    assert catalog.get_by_hash(entry.content_hash) is entry
+
+def test_version_cache_lru():
+    cache = VersionCache(max_size=2)
+    calls = []
+
+    def factory(value):
+        return lambda: calls.append(value) or value
+
+    assert cache.get("h1", "data", factory(1)) == 1
+    assert cache.get("h1", "data", factory(99)) == 1
+    cache.get("h2", "data", factory(2))
+    cache.get("h3", "data", factory(3))
+
+    assert len(cache) == 2
+    assert cache.get("h1", "data", factory(4)) == 4
+    assert calls == [1, 2, 3, 4]
+
+def test_version_cache_skips_none():
+    cache = VersionCache(max_size=2)
+    assert cache.get("missing", "data", lambda: None) is None
+    assert len(cache) == 0
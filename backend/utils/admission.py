@@ -0,0 +1,354 @@
+"""
+Контроль допуска запросов (admission control) при перегрузке.
+
+Когда весь факультет одновременно входит в систему, bcrypt и очередь к БД
+растут быстрее, чем обслуживаются запросы, и каждый запрос ждет до
+таймаута клиента. Middleware ограничивает число одновременно
+обрабатываемых запросов и отказывает сразу (503 + Retry-After), если
+запрос не успеет начаться за отведенное ему время:
+
+- запросы делятся на классы по маршруту (ROUTE_CLASSES); у класса свой
+  предел одновременных запросов, бюджет ожидания и приоритет;
+- общий предел ADMISSION_MAX_CONCURRENCY делится между классами:
+  освободившееся место получает голова очереди самого приоритетного класса,
+  у которого есть свободный слот (завершение теста раньше чтений,
+  чтения раньше входа);
+- ожидаемое время до старта оценивается по длине очереди впереди и
+  среднему времени обслуживания класса; если оно больше бюджета, запрос
+  отклоняется сразу, не занимая место в очереди;
+- запрос, не дождавшийся слота до своего дедлайна, тоже получает 503.
+
+Проверки здоровья, документация, preflight (OPTIONS) и долгие потоки
+событий (/live/events) не ограничиваются. Счетчики отказов по классам -
+в GET /health/admission.
+"""
+
+import asyncio
+import math
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from config import get_settings
+
+# Классы запросов
+CLASS_CRITICAL = "critical"
+CLASS_READ = "read"
+CLASS_LOGIN = "login"
+
+# Порядок обслуживания очередей (первый - самый приоритетный)
+CLASS_PRIORITY = (CLASS_CRITICAL, CLASS_READ, CLASS_LOGIN)
+
+# (класс, метод, шаблон пути); остальные запросы - CLASS_READ.
+# Ход прохождения (/progress) - тоже чтение: это телеметрия для панели
+# проктора, отказ в ней при перегрузке не теряет ответы студента
+ROUTE_CLASSES = (
+    (CLASS_CRITICAL, "POST", re.compile(r"^/user-tests/\d+/complete$")),
+    (CLASS_LOGIN, "POST", re.compile(r"^/auth/(login|register)$")),
+)
+
+# Маршруты без ограничений (и без предела TENANT_MAX_CONCURRENCY): профиль
+# снимают как раз при перегрузке, и он держит запрос PROFILE секунд
+EXEMPT_PATHS = re.compile(r"^/(health(/.*)?|docs|redoc|openapi\.json|live/events|admin/profile)$")
+
+# Вес скользящего среднего времени обслуживания
+SERVICE_TIME_ALPHA = 0.2
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Класс запроса по методу и пути
+
+    Returns:
+        str или None, если запрос не ограничивается
+    """
+    if method == "OPTIONS" or EXEMPT_PATHS.match(path):
+        return None
+    for request_class, route_method, pattern in ROUTE_CLASSES:
+        if method == route_method and pattern.match(path):
+            return request_class
+    return CLASS_READ
+
+class AdmissionRejected(Exception):
+    """Запрос не может начаться вовремя"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    deadline: float
+    # Причина отказа, если ожидание снято контроллером
+    reason: Optional[str] = None
+
+class _ClassState:
+    """Предел, очередь и счетчики одного класса запросов"""
+
+    def __init__(self, name: str, limit: int, budget: float):
+        self.name = name
+        self.limit = limit
+        self.budget = budget
+        self.in_flight = 0
+        self.queue = deque()
+        self.service_time = 0.0
+        self.admitted = 0
+        self.shed = {"estimate": 0, "deadline": 0, "queue_full": 0}
+
+    def record_service(self, seconds: float):
+        if self.service_time == 0.0:
+            self.service_time = seconds
+        else:
+            self.service_time += SERVICE_TIME_ALPHA * (seconds - self.service_time)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "budget_ms": round(self.budget * 1000),
+            "in_flight": self.in_flight,
+            "queued": len(self.queue),
+            "admitted": self.admitted,
+            "avg_service_ms": round(self.service_time * 1000, 1),
+            "shed": dict(self.shed),
+        }
+
+class AdmissionController:
+    """
+    Слоты обработки запросов с приоритетной очередью
+
+    Работает в цикле событий одного процесса, поэтому без блокировок.
+
+    Args:
+        max_concurrency: Общий предел одновременных запросов
+        max_queue: Максимум ожидающих запросов (всех классов)
+        limits: Предел одновременных запросов по классам
+        budgets: Бюджет ожидания по классам, секунды
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int,
+                 limits: Dict[str, int], budgets: Dict[str, float]):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.classes = {
+            name: _ClassState(name, min(limits[name], max_concurrency), budgets[name])
+            for name in CLASS_PRIORITY
+        }
+
+    def _queued(self) -> int:
+        return sum(len(state.queue) for state in self.classes.values())
+
+    def _has_room(self, state: _ClassState) -> bool:
+        return self.in_flight < self.max_concurrency and state.in_flight < state.limit
+
+    def _estimate_wait(self, state: _ClassState) -> float:
+        """
+        Ожидаемое время до старта нового запроса класса
+
+        Впереди - очередь своего класса и более приоритетных; слоты
+        освобождаются со скоростью (предел / среднее время обслуживания).
+        """
+        if state.service_time == 0.0:
+            return 0.0
+
+        ahead = len(state.queue) + 1
+        for name in CLASS_PRIORITY:
+            if name == state.name:
+                break
+            ahead += len(self.classes[name].queue)
+        capacity = state.limit if state.in_flight >= state.limit else self.max_concurrency
+        return math.ceil(ahead / capacity) * state.service_time
+
+    def _admit(self, state: _ClassState):
+        self.in_flight += 1
+        state.in_flight += 1
+        state.admitted += 1
+
+    def _reject(self, state: _ClassState, waiter: _Waiter, reason: str):
+        """Снимает ожидание с отказом (отмененные ожидания - без счетчика)"""
+        if waiter.future.done():
+            return
+        waiter.reason = reason
+        state.shed[reason] += 1
+        waiter.future.set_result(False)
+
+    def _evict_for(self, state: _ClassState) -> bool:
+        """
+        Освобождает место в заполненной очереди для более приоритетного класса
+
+        Отклоняется последний запрос самого низкоприоритетного класса
+        (у него самый поздний дедлайн и наименьшая ценность).
+        """
+        for name in reversed(CLASS_PRIORITY):
+            if name == state.name:
+                return False
+            lower = self.classes[name]
+            while lower.queue:
+                waiter = lower.queue.pop()
+                if not waiter.future.done():
+                    self._reject(lower, waiter, "queue_full")
+                    return True
+        return False
+
+    def _dispatch(self):
+        """Отдает свободные слоты очередям в порядке приоритета"""
+        now = time.monotonic()
+        while self.in_flight < self.max_concurrency:
+            for name in CLASS_PRIORITY:
+                state = self.classes[name]
+                # Отмененные и просроченные ожидания снимаются с головы
+                while state.queue and (state.queue[0].future.done() or state.queue[0].deadline <= now):
+                    self._reject(state, state.queue.popleft(), "deadline")
+                if state.queue and state.in_flight < state.limit:
+                    self._admit(state)
+                    state.queue.popleft().future.set_result(True)
+                    break
+            else:
+                return
+
+    async def acquire(self, request_class: str) -> float:
+        """
+        Занимает слот для запроса класса
+
+        Returns:
+            float: Момент начала обработки (time.monotonic)
+
+        Raises:
+            AdmissionRejected: Если запрос не начнется в пределах бюджета
+        """
+        state = self.classes[request_class]
+        if not state.queue and self._has_room(state):
+            self._admit(state)
+            return time.monotonic()
+
+        estimate = self._estimate_wait(state)
+        if estimate > state.budget:
+            state.shed["estimate"] += 1
+            raise AdmissionRejected("estimate", estimate)
+        if self._queued() >= self.max_queue and not self._evict_for(state):
+            state.shed["queue_full"] += 1
+            raise AdmissionRejected("queue_full", max(estimate, state.service_time))
+
+        deadline = time.monotonic() + state.budget
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), deadline)
+        state.queue.append(waiter)
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(waiter.future), timeout=state.budget)
+        except asyncio.TimeoutError:
+            admitted = False
+        except asyncio.CancelledError:
+            # Клиент отключился: слот, выданный в момент отмены, возвращается
+            if waiter.future.done() and waiter.future.result():
+                self.release(request_class, None)
+            else:
+                waiter.future.cancel()
+            raise
+
+        if not admitted:
+            if waiter.future.done() and waiter.future.result():
+                # Слот выдан одновременно с таймаутом - запрос все же выполняется
+                return time.monotonic()
+            if waiter.reason is None:
+                waiter.reason = "deadline"
+                state.shed["deadline"] += 1
+                waiter.future.cancel()
+            raise AdmissionRejected(waiter.reason, max(self._estimate_wait(state), state.service_time))
+
+        return time.monotonic()
+
+    def release(self, request_class: str, started_at: Optional[float]):
+        """
+        Освобождает слот и передает его следующему запросу
+
+        Args:
+            request_class: Класс запроса
+            started_at: Результат acquire (None - запрос не выполнялся)
+        """
+        state = self.classes[request_class]
+        self.in_flight -= 1
+        state.in_flight -= 1
+        if started_at is not None:
+            state.record_service(time.monotonic() - started_at)
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """Загрузка, очереди и отказы по классам"""
+        classes = {name: state.stats() for name, state in self.classes.items()}
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self._queued(),
+            "shed_total": sum(sum(state["shed"].values()) for state in classes.values()),
+            "classes": classes,
+        }
+
+def create_admission_controller() -> AdmissionController:
+    """Контроллер по настройкам ADMISSION_*"""
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrency=settings.admission_max_concurrency,
+        max_queue=settings.admission_max_queue,
+        limits={
+            CLASS_CRITICAL: settings.admission_max_concurrency,
+            CLASS_READ: settings.admission_read_concurrency,
+            CLASS_LOGIN: settings.admission_login_concurrency,
+        },
+        budgets={
+            CLASS_CRITICAL: settings.admission_critical_budget_ms / 1000,
+            CLASS_READ: settings.admission_read_budget_ms / 1000,
+            CLASS_LOGIN: settings.admission_login_budget_ms / 1000,
+        },
+    )
+
+# Контроллер процесса (один экземпляр на воркер)
+admission_controller = create_admission_controller()
+
+def overloaded_response(retry_after: float) -> JSONResponse:
+    """Ответ 503 в формате обработчиков исключений (utils/exceptions.py)"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": True,
+            "message": "Сервер перегружен, повторите запрос позже",
+            "status_code": 503
+        },
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware контроля допуска
+
+    Слот занят до конца отправки ответа, включая потоковые тела.
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_class = classify(scope["method"], scope["path"])
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            started_at = await self.controller.acquire(request_class)
+        except AdmissionRejected as e:
+            await overloaded_response(e.retry_after)(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(request_class, started_at)
@@ -0,0 +1,539 @@
+"""
+Каталог тестов: все JSON-файлы тестов из каталога TESTS_DIR
+
+- При запуске файлы разбираются параллельно, проверяются и попадают в
+  каталог в памяти; недостающие записи в таблице tests добавляются одной пачкой
+- Наблюдатель (inotify через watchfiles, а без него - опрос mtime)
+  перечитывает измененные файлы без перезапуска сервера и регистрирует
+  их в БД всех активных арендаторов, которые пользуются этим каталогом
+- Каталог заменяется целиком одним присваиванием, а записи неизменяемы:
+  запрос никогда не увидит тест загруженным наполовину. Файл с ошибкой
+  не заменяет предыдущую корректную версию
+- У арендатора (университета) со своим каталогом (tenants.tests_dir) -
+  свой TestCatalog, загружаемый при активации арендатора; остальные
+  пользуются общим каталогом TESTS_DIR. Тесты регистрируются в БД
+  каждого арендатора
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from db.database import SessionLocal
+from db.tenancy import TenantLocal, is_default_tenant, tenant_registry, tenant_scope
+from db.upsert import insert_ignore_conflicts
+from models.test import Test
+from utils.tracing import start_span
+
+# Максимум потоков для разбора файлов при полном сканировании
+CATALOG_PARSE_WORKERS = 8
+
+class CatalogError(ValueError):
+    """Файл теста не прошел проверку"""
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """
+    Загруженный тест
+    
+    Attributes:
+        filename: Имя файла (совпадает с tests.filename)
+        path: Полный путь к файлу
+        content_hash: SHA-256 содержимого файла
+        mtime: Время изменения файла на момент загрузки
+        data: Данные теста в формате load_test_data (title, description, questions, scales)
+        public_body: JSON для клиента (title, description, questions - без ключа шкал)
+    """
+    filename: str
+    path: str
+    content_hash: str
+    mtime: float
+    data: Dict[str, Any]
+    public_body: bytes = field(default=b"", repr=False)
+
+def parse_test_file(path: str) -> CatalogEntry:
+    """
+    Читает и проверяет JSON-файл теста
+    
+    Формат: первый элемент - метаданные (title, description), затем
+    вопросы {"question": ...} и необязательный блок {"results": {...}} с ключом шкал.
+    
+    Args:
+        path: Путь к файлу
+    
+    Returns:
+        CatalogEntry: Загруженный тест
+    
+    Raises:
+        CatalogError: Если файл не является корректным тестом
+    """
+    filename = os.path.basename(path)
+    
+    with start_span("catalog.read_file", {"test.filename": filename}):
+        with open(path, 'rb') as file:
+            raw = file.read()
+        mtime = os.path.getmtime(path)
+        
+        try:
+            data = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise CatalogError(f"{filename}: некорректный JSON ({e})")
+    
+    if not isinstance(data, list) or not data or not isinstance(data[0], dict) or 'title' not in data[0]:
+        raise CatalogError(f"{filename}: первый элемент должен содержать метаданные теста (title)")
+    
+    metadata = data[0]
+    items = [item for item in data[1:] if isinstance(item, dict)]
+    questions = [item for item in items if item.get('question')]
+    if not questions:
+        raise CatalogError(f"{filename}: тест не содержит вопросов")
+    
+    scales = {}
+    for item in items:
+        if item.get('results'):
+            scales = item['results']
+    
+    # Ключ шкал ссылается на вопросы по номеру (с 1)
+    for scale_name, scale in scales.items():
+        for key in ('positive', 'negative'):
+            for number in scale.get(key, []):
+                if not isinstance(number, int) or not 1 <= number <= len(questions):
+                    raise CatalogError(
+                        f"{filename}: шкала '{scale_name}' ссылается на несуществующий вопрос {number}"
+                    )
+    
+    title = metadata.get('title', 'Неизвестный тест')
+    description = metadata.get('description', 'Описание недоступно')
+    
+    # Тело ответа GET /tests/{id}/content сериализуется один раз на версию файла
+    public_body = json.dumps(
+        {'title': title, 'description': description, 'questions': questions},
+        ensure_ascii=False,
+        separators=(',', ':')
+    ).encode('utf-8')
+    
+    return CatalogEntry(
+        filename=filename,
+        path=path,
+        content_hash=hashlib.sha256(raw).hexdigest(),
+        mtime=mtime,
+        data={
+            'title': title,
+            'description': description,
+            'questions': questions,
+            'scales': scales
+        },
+        public_body=public_body
+    )
+
+class TestCatalog:
+    """
+    Каталог тестов в памяти процесса
+    
+    Attributes:
+        directory: Каталог с JSON-файлами тестов
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._entries: Mapping[str, CatalogEntry] = MappingProxyType({})
+        # Индекс content_hash -> CatalogEntry, публикуется вместе с _entries
+        self._by_hash: Mapping[str, CatalogEntry] = MappingProxyType({})
+        # Читатели работают без блокировки, изменения каталога - по одному
+        self._write_lock = threading.Lock()
+    
+    def _list_files(self) -> List[str]:
+        """Возвращает пути к JSON-файлам каталога (без подкаталогов)"""
+        if not os.path.isdir(self.directory):
+            return []
+        
+        return sorted(
+            entry.path for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith('.json')
+        )
+    
+    def get(self, filename: str) -> Optional[CatalogEntry]:
+        """
+        Возвращает загруженный тест по имени файла
+        
+        Args:
+            filename: Имя JSON файла
+        
+        Returns:
+            CatalogEntry или None, если теста нет в каталоге
+        """
+        return self._entries.get(filename)
+    
+    def get_by_hash(self, content_hash: str) -> Optional[CatalogEntry]:
+        """
+        Возвращает загруженный тест по хешу содержимого
+        
+        Args:
+            content_hash: SHA-256 содержимого файла
+        
+        Returns:
+            CatalogEntry или None, если такой версии нет в каталоге
+        """
+        return self._by_hash.get(content_hash)
+    
+    def _publish(self, entries: Dict[str, CatalogEntry]):
+        """Публикует новый снимок каталога (под _write_lock)"""
+        self._entries = MappingProxyType(entries)
+        self._by_hash = MappingProxyType({entry.content_hash: entry for entry in entries.values()})
+    
+    def entries(self) -> Mapping[str, CatalogEntry]:
+        """Текущий снимок каталога: filename -> CatalogEntry"""
+        return self._entries
+    
+    def load_all(self) -> List[str]:
+        """
+        Полностью пересканирует каталог, разбирая файлы параллельно
+        
+        Returns:
+            List[str]: Ошибки для файлов, не прошедших проверку
+        """
+        paths = self._list_files()
+        
+        def parse(path):
+            try:
+                return parse_test_file(path)
+            except (CatalogError, OSError) as e:
+                return e
+        
+        entries = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(1, min(CATALOG_PARSE_WORKERS, len(paths)))) as pool:
+            for result in pool.map(parse, paths):
+                if isinstance(result, CatalogEntry):
+                    entries[result.filename] = result
+                else:
+                    errors.append(str(result))
+        
+        with self._write_lock:
+            self._publish(entries)
+        
+        return errors
+    
+    def reload_paths(self, paths: Iterable[str]) -> List[CatalogEntry]:
+        """
+        Перечитывает новые, измененные и удаленные файлы
+        
+        Args:
+            paths: Пути к файлам
+        
+        Returns:
+            List[CatalogEntry]: Добавленные или обновленные тесты
+        """
+        updated = []
+        
+        with self._write_lock:
+            entries = dict(self._entries)
+            
+            for path in paths:
+                filename = os.path.basename(path)
+                if not filename.endswith('.json'):
+                    continue
+                
+                if not os.path.exists(path):
+                    if entries.pop(filename, None) is not None:
+                        print(f"🗑️ Тест удален из каталога: {filename}")
+                    continue
+                
+                try:
+                    entry = parse_test_file(path)
+                except (CatalogError, OSError) as e:
+                    # Предыдущая корректная версия остается в каталоге
+                    print(f"⚠️ Тест не перезагружен: {e}")
+                    continue
+                
+                previous = entries.get(filename)
+                if previous is not None and previous.content_hash == entry.content_hash:
+                    continue
+                
+                entries[filename] = entry
+                updated.append(entry)
+                print(f"🔄 Тест перезагружен: {filename}")
+            
+            # Новый снимок публикуется одним присваиванием
+            self._publish(entries)
+        
+        return updated
+    
+    def changed_paths(self) -> List[str]:
+        """
+        Находит файлы, изменившиеся с момента загрузки (режим опроса)
+        
+        Returns:
+            List[str]: Пути новых, измененных и удаленных файлов
+        """
+        current = {}
+        for path in self._list_files():
+            try:
+                current[path] = os.path.getmtime(path)
+            except OSError:
+                continue
+        
+        entries = self._entries
+        changed = [
+            path for path, mtime in current.items()
+            if getattr(entries.get(os.path.basename(path)), 'mtime', None) != mtime
+        ]
+        changed.extend(entry.path for entry in entries.values() if entry.path not in current)
+        
+        return changed
+
+def sync_catalog_to_db(db_session, filenames: Iterable[str]) -> int:
+    """
+    Добавляет в таблицу tests недостающие тесты одним запросом
+    
+    Args:
+        db_session: Сессия основной БД
+        filenames: Имена файлов тестов
+    
+    Returns:
+        int: Количество добавленных тестов
+    """
+    filenames = list(filenames)
+    if not filenames:
+        return 0
+    
+    existing = set(db_session.execute(
+        select(Test.filename).where(Test.filename.in_(filenames))
+    ).scalars())
+    missing = [filename for filename in filenames if filename not in existing]
+    if not missing:
+        return 0
+    
+    # Несколько воркеров синхронизируют каталог одновременно - дубликаты пропускаем
+    insert_ignore_conflicts(
+        db_session,
+        Test,
+        [{"filename": filename, "is_available": True} for filename in missing],
+        index_elements=["filename"]
+    )
+    db_session.commit()
+    
+    return len(missing)
+
+def sync_test_catalog() -> int:
+    """
+    Регистрирует в БД текущего арендатора все тесты его каталога и их
+    текущие версии
+    
+    Returns:
+        int: Количество добавленных тестов
+    """
+    # Импорт здесь: utils.test_versions импортирует каталог
+    from utils.test_versions import sync_catalog_versions
+    
+    db = SessionLocal()
+    
+    try:
+        added = sync_catalog_to_db(db, test_catalog.entries().keys())
+        versions = sync_catalog_versions(db)
+        if versions:
+            print(f"🧾 Зарегистрировано новых версий тестов: {versions}")
+        return added
+    finally:
+        db.close()
+
+def load_test_catalog(catalog: Optional[TestCatalog] = None) -> int:
+    """
+    Сканирует каталог тестов и выводит ошибки проверки файлов
+    
+    Args:
+        catalog: Каталог (по умолчанию - каталог текущего арендатора)
+    
+    Returns:
+        int: Количество загруженных тестов
+    """
+    catalog = catalog or test_catalog.for_tenant()
+    for error in catalog.load_all():
+        print(f"⚠️ Тест пропущен: {error}")
+    
+    count = len(catalog.entries())
+    print(f"📚 Загружено тестов: {count} (каталог {catalog.directory})")
+    
+    return count
+
+async def register_test_catalog():
+    """Фоновая регистрация тестов каталога в БД при запуске"""
+    try:
+        added = await run_in_threadpool(sync_test_catalog)
+        if added:
+            print(f"✅ Зарегистрировано новых тестов: {added}")
+    except Exception as e:
+        print(f"⚠️ Не удалось зарегистрировать тесты в БД: {e}")
+
+def catalog_tenants(catalog: TestCatalog) -> List[str]:
+    """
+    Активные арендаторы, которые пользуются каталогом
+    
+    Args:
+        catalog: Каталог тестов
+    
+    Returns:
+        List[str]: Идентификаторы арендаторов
+    """
+    slugs = []
+    for slug in tenant_registry.hot_slugs():
+        state = tenant_registry.peek(slug)
+        if state is None:
+            continue
+        # Объект каталога создается при активации; для арендатора по умолчанию - общий
+        owned = test_catalog.default if is_default_tenant(slug) else state.objects.get("catalog")
+        if owned is catalog:
+            slugs.append(slug)
+    
+    default_slug = get_settings().default_tenant
+    if catalog is test_catalog.default and default_slug not in slugs:
+        slugs.append(default_slug)
+    
+    return slugs
+
+def reload_catalog(catalog: TestCatalog, paths: Iterable[str]) -> List[CatalogEntry]:
+    """
+    Перечитывает измененные файлы каталога и регистрирует их в БД каждого
+    активного арендатора этого каталога
+    
+    Регистрация добавляет новые тесты и новые версии измененных файлов;
+    строки tests удаленных файлов остаются (на них ссылаются попытки).
+    Арендатор, активированный позже, регистрирует каталог при активации.
+    
+    Args:
+        catalog: Каталог тестов
+        paths: Пути новых, измененных и удаленных файлов
+    
+    Returns:
+        List[CatalogEntry]: Добавленные или обновленные тесты
+    """
+    updated = catalog.reload_paths(paths)
+    if not updated:
+        return updated
+    
+    for slug in catalog_tenants(catalog):
+        try:
+            with tenant_scope(slug):
+                sync_test_catalog()
+        except Exception as e:
+            print(f"⚠️ Не удалось зарегистрировать тесты в БД ({slug}): {e}")
+    
+    return updated
+
+def tenant_catalogs() -> List[TestCatalog]:
+    """Свои каталоги (tenants.tests_dir) активных арендаторов"""
+    catalogs = []
+    for slug in tenant_registry.hot_slugs():
+        state = tenant_registry.peek(slug)
+        catalog = state.objects.get("catalog") if state is not None else None
+        if catalog is not None and catalog is not test_catalog.default and catalog not in catalogs:
+            catalogs.append(catalog)
+    return catalogs
+
+def poll_tenant_catalogs() -> int:
+    """
+    Перечитывает измененные файлы своих каталогов активных арендаторов
+    
+    Returns:
+        int: Количество добавленных или обновленных тестов
+    """
+    updated = 0
+    for catalog in tenant_catalogs():
+        changed = catalog.changed_paths()
+        if changed:
+            updated += len(reload_catalog(catalog, changed))
+    return updated
+
+async def watch_test_catalog(stop_event: asyncio.Event):
+    """
+    Следит за каталогами тестов и перезагружает измененные файлы
+    
+    Общий каталог TESTS_DIR отслеживается через inotify (watchfiles,
+    устанавливается с uvicorn[standard]), без него - опросом mtime файлов
+    каждые CATALOG_POLL_SECONDS. Свои каталоги арендаторов меняются вместе
+    с реестром, поэтому всегда опрашиваются каждые CATALOG_POLL_SECONDS.
+    
+    Args:
+        stop_event: Событие остановки наблюдателя
+    """
+    default_catalog = test_catalog.default
+    poll_seconds = get_settings().catalog_poll_seconds
+    
+    async def apply(catalog, paths):
+        try:
+            await run_in_threadpool(reload_catalog, catalog, paths)
+        except Exception as e:
+            print(f"⚠️ Не удалось перезагрузить тесты: {e}")
+    
+    async def poll(poll_default):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if stop_event.is_set():
+                return
+            
+            if poll_default:
+                changed = await run_in_threadpool(default_catalog.changed_paths)
+                if changed:
+                    await apply(default_catalog, changed)
+            try:
+                await run_in_threadpool(poll_tenant_catalogs)
+            except Exception as e:
+                print(f"⚠️ Не удалось перезагрузить тесты арендаторов: {e}")
+    
+    try:
+        from watchfiles import awatch
+    except ImportError:
+        awatch = None
+    
+    if awatch is None or not os.path.isdir(default_catalog.directory):
+        await poll(poll_default=True)
+        return
+    
+    async def watch_default():
+        async for changes in awatch(
+            default_catalog.directory,
+            watch_filter=lambda change, path: path.endswith('.json'),
+            recursive=False,
+            stop_event=stop_event
+        ):
+            await apply(default_catalog, {path for _, path in changes})
+    
+    await asyncio.gather(watch_default(), poll(poll_default=False))
+
+def _tenant_catalog(config) -> TestCatalog:
+    """Каталог арендатора: свой tests_dir или общий каталог"""
+    if not config.tests_dir:
+        return test_catalog.default
+    catalog = TestCatalog(config.tests_dir)
+    load_test_catalog(catalog)
+    return catalog
+
+def activate_tenant_catalog(state):
+    """
+    Загружает каталог активируемого арендатора и регистрирует тесты в его БД
+    
+    Общий каталог арендатора по умолчанию загружается при запуске и
+    регистрируется в фоне (register_test_catalog).
+    """
+    if is_default_tenant(state.config.slug):
+        return
+    test_catalog.for_tenant(state.config.slug)
+    added = sync_test_catalog()
+    if added:
+        print(f"✅ Зарегистрировано новых тестов ({state.config.slug}): {added}")
+
+# Каталог тестов процесса: общий (TESTS_DIR) и свои каталоги арендаторов
+test_catalog = TenantLocal("catalog", _tenant_catalog, default=TestCatalog(get_settings().tests_dir))
@@ -0,0 +1,389 @@
+"""
+Сжатие ответов (brotli/gzip) и кеш предварительно сжатых тел.
+
+CompressionMiddleware сжимает ответы крупнее порога COMPRESSION_MIN_SIZE
+по заголовку Accept-Encoding клиента: brotli, если установлен пакет
+brotli, иначе gzip. Ответы, у которых уже есть Content-Encoding, и
+потоки событий (text/event-stream) передаются без изменений.
+
+Неизменяемые тела (файлы тестов, статика) сжимаются один раз: варианты
+хранятся в LRU-кеше по ключу содержимого (хеш файла или путь+mtime)
+и отдаются с ETag, поэтому повторный запрос обходится без сжатия и
+при совпадении If-None-Match - без тела (304).
+"""
+
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Типы содержимого, которые имеет смысл сжимать
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Потоковые ответы, которые нельзя буферизовать в сжатии
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+# Статические файлы крупнее этого размера сжимаются на лету, а не кешируются
+PRECOMPRESS_MAX_FILE_SIZE = 2 * 1024 * 1024
+
+# Записей в кеше предварительно сжатых тел
+PRECOMPRESSED_CACHE_SIZE = 256
+
+def supported_encodings() -> tuple:
+    """Поддерживаемые кодировки в порядке предпочтения"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Выбирает кодировку по заголовку Accept-Encoding
+
+    Args:
+        accept_encoding: Значение заголовка
+
+    Returns:
+        str или None: "br", "gzip" или None, если клиент не принимает сжатие
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+def is_compressible(content_type: str) -> bool:
+    """Проверяет, стоит ли сжимать содержимое этого типа"""
+    content_type = (content_type or "").lower()
+    if content_type.startswith(UNCOMPRESSED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """
+    Сжимает тело целиком
+
+    Args:
+        body: Исходные байты
+        encoding: "br" или "gzip"
+        gzip_level: Уровень gzip (1-9)
+        brotli_quality: Качество brotli (0-11)
+
+    Returns:
+        bytes: Сжатое тело
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+class _StreamCompressor:
+    """Потоковое сжатие тела, приходящего частями"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            # wbits=31: формат gzip (заголовок и контрольная сумма)
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        """
+        Сжимает очередную часть тела
+
+        Части сбрасываются сразу (flush), чтобы клиент получал данные
+        без ожидания конца ответа.
+
+        Args:
+            chunk: Часть тела
+            final: Последняя часть
+
+        Returns:
+            bytes: Сжатые данные для отправки
+        """
+        data = self._compress(chunk) if chunk else b""
+        return data + (self._finish() if final else self._flush())
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов
+
+    Attributes:
+        minimum_size: Тела меньше порога (байт) не сжимаются
+        gzip_level: Уровень gzip
+        brotli_quality: Качество brotli
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    """Перехватывает сообщения ответа и решает, сжимать ли его"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start_message = None
+        self._compressor = None
+        self._passthrough = False
+
+    def _should_compress(self, headers: MutableHeaders) -> bool:
+        """Ответ еще не сжат и его тип сжимаемый"""
+        status_code = self._start_message["status"]
+        if status_code < 200 or status_code in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        return is_compressible(headers.get("content-type", ""))
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Заголовки отправляются вместе с первой частью тела
+            self._start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is not None:
+            await self._send({
+                "type": "http.response.body",
+                "body": self._compressor.compress(body, final=not more_body),
+                "more_body": more_body
+            })
+            return
+
+        headers = MutableHeaders(raw=self._start_message["headers"])
+        too_small = not more_body and len(body) < self.middleware.minimum_size
+
+        if too_small or not self._should_compress(headers):
+            self._passthrough = True
+            await self._send(self._start_message)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if not more_body:
+            # Тело целиком - сжимаем за один раз и знаем длину
+            body = compress_body(
+                body, self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers["Content-Length"] = str(len(body))
+            await self._send(self._start_message)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        # Потоковый ответ: длина заранее неизвестна
+        del headers["Content-Length"]
+        self._compressor = _StreamCompressor(
+            self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+        )
+        await self._send(self._start_message)
+        await self._send({
+            "type": "http.response.body",
+            "body": self._compressor.compress(body, final=False),
+            "more_body": True
+        })
+
+class PrecompressedCache:
+    """
+    LRU-кеш сжатых вариантов неизменяемых тел
+
+    Ключ должен меняться вместе с содержимым (хеш файла, путь+mtime),
+    поэтому записи не устаревают, а только вытесняются.
+    """
+
+    def __init__(self, max_entries: int = PRECOMPRESSED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, encoding: str, load_body: Callable[[], bytes]) -> bytes:
+        """
+        Возвращает сжатый вариант тела, сжимая его при первом обращении
+
+        Args:
+            key: Ключ содержимого
+            encoding: "br" или "gzip"
+            load_body: Возвращает исходное тело (вызывается только при промахе)
+
+        Returns:
+            bytes: Сжатое тело
+        """
+        cache_key = (key, encoding)
+        with self._lock:
+            compressed = self._entries.get(cache_key)
+            if compressed is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return compressed
+
+        # Максимальное качество: сжатие выполняется один раз на версию содержимого
+        compressed = compress_body(load_body(), encoding, gzip_level=9, brotli_quality=11)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[cache_key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики кеша для мониторинга"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# Кеш процесса для тел тестов и статики
+precompressed_cache = PrecompressedCache()
+
+def _etag_matches(request_headers: Headers, etag: str) -> bool:
+    """Проверяет If-None-Match (список ETag или *, слабое сравнение)"""
+    if_none_match = request_headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def precompressed_response(request: Request, key: Hashable, body: bytes, media_type: str,
+                           etag: str, cache_control: str = "no-cache",
+                           headers: Optional[dict] = None) -> Response:
+    """
+    Ответ с неизменяемым телом: 304 по ETag или сжатый вариант из кеша
+
+    Args:
+        request: Запрос
+        key: Ключ содержимого для кеша сжатых вариантов
+        body: Исходное тело
+        media_type: Content-Type
+        etag: ETag в кавычках (отдается как слабый: варианты сжатия различаются побайтно)
+        cache_control: Значение Cache-Control
+        headers: Дополнительные заголовки
+
+    Returns:
+        Response: Ответ
+    """
+    response_headers = {"ETag": f"W/{etag}", "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    response_headers.update(headers or {})
+
+    if _etag_matches(request.headers, etag):
+        return Response(status_code=304, headers=response_headers)
+
+    encoding = None
+    if get_settings().compression_enabled and len(body) >= get_settings().compression_min_size:
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None:
+        original = body
+        body = precompressed_cache.get(key, encoding, lambda: original)
+        response_headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=response_headers)
+
+def _read_file(path: str) -> bytes:
+    """Читает файл целиком"""
+    with open(path, "rb") as file:
+        return file.read()
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles, отдающий сжимаемые файлы из кеша сжатых вариантов"""
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        settings = get_settings()
+
+        if not settings.compression_enabled:
+            return response
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+
+        stat_result = response.stat_result or os.stat(response.path)
+        if not settings.compression_min_size <= stat_result.st_size <= PRECOMPRESS_MAX_FILE_SIZE:
+            return response
+        if not is_compressible(response.media_type):
+            return response
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            return response
+
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")
+        }
+        headers["Vary"] = "Accept-Encoding"
+
+        # У сжатого варианта свой ETag: побайтно он отличается от файла
+        if "etag" in headers:
+            etag = headers["etag"]
+            headers["etag"] = f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+            if _etag_matches(request_headers, headers["etag"]):
+                return Response(status_code=304, headers=headers)
+
+        key = (response.path, stat_result.st_mtime_ns, stat_result.st_size)
+        compressed = await run_in_threadpool(
+            precompressed_cache.get, key, encoding, lambda: _read_file(response.path)
+        )
+
+        headers["Content-Encoding"] = encoding
+        return Response(content=compressed, media_type=response.media_type, headers=headers)
@@ -5,9 +5,33 @@
 from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, OperationalError, TimeoutError as PoolTimeoutError
 from jose import JWTError
 
+
+# SQLSTATE query_canceled: запрос прерван по statement_timeout
+QUERY_CANCELED_PGCODE = "57014"
+
+# Через сколько секунд клиенту стоит повторить запрос при перегрузке БД
+DB_RETRY_AFTER_SECONDS = "1"
+
+def database_unavailable_response() -> JSONResponse:
+    """
+    Формирует ответ 503 для случаев, когда БД не успела обслужить запрос
+
+    Returns:
+        JSONResponse: Ответ с кодом 503 и заголовком Retry-After
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "error": True,
+            "message": "База данных перегружена, повторите запрос позже",
+            "status_code": 503
+        },
+        headers={"Retry-After": DB_RETRY_AFTER_SECONDS}
+    )
+
 def create_exception_handlers(app: FastAPI):
     """
     Создает и регистрирует обработчики исключений для FastAPI приложения
@@ -47,6 +71,26 @@ def create_exception_handlers(app: FastAPI):
             }
         )
     
+    @app.exception_handler(PoolTimeoutError)
+    async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+        """Обработчик исчерпания пула соединений (истек DB_POOL_TIMEOUT)"""
+        return database_unavailable_response()
+    
+    @app.exception_handler(OperationalError)
+    async def operational_error_handler(request: Request, exc: OperationalError):
+        """Обработчик ошибок соединения и прерванных по таймауту запросов"""
+        if getattr(exc.orig, "pgcode", None) == QUERY_CANCELED_PGCODE:
+            return database_unavailable_response()
+        
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={
+                "error": True,
+                "message": "Ошибка базы данных",
+                "status_code": 500
+            }
+        )
+    
     @app.exception_handler(SQLAlchemyError)
     async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
         """Обработчик ошибок SQLAlchemy"""
@@ -0,0 +1,189 @@
+"""
+Идемпотентные запросы по заголовку Idempotency-Key.
+
+Клиент передает один и тот же ключ при повторе запроса (двойной клик,
+повтор после таймаута). Первый запрос занимает ключ вставкой в таблицу
+idempotency_keys в своей транзакции и сохраняет туда ответ; повторные
+запросы получают сохраненный ответ без повторной записи. Если первый
+запрос еще выполняется, повтор ждет коммита на уникальном ключе.
+
+Недавние ответы дополнительно кешируются в памяти процесса (ограниченный
+по размеру и времени жизни кеш), чтобы частые повторы не ходили в БД.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from db.database import SessionLocal
+from db.tenancy import get_current_tenant, tenant_registry, tenant_scope
+from db.upsert import insert_ignore_conflicts
+from models.idempotency import IdempotencyKey
+
+# Заголовок ответа, отмечающий повтор сохраненного ответа
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# Период удаления просроченных ключей из БД (секунды)
+IDEMPOTENCY_PURGE_SECONDS = 3600
+
+# (арендатор, user_id, key) -> (момент истечения, отпечаток, ответ)
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def request_fingerprint(*parts: Any) -> str:
+    """
+    Считает отпечаток значимых данных запроса
+
+    Args:
+        parts: Данные запроса (сериализуются в JSON)
+
+    Returns:
+        str: SHA-256 в hex
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _check_fingerprint(stored: str, fingerprint: str):
+    """Ключ нельзя использовать повторно для другого запроса"""
+    if stored != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key уже использован для другого запроса"
+        )
+
+def get_cached_response(user_id: int, key: str, fingerprint: str) -> Optional[dict]:
+    """
+    Ищет сохраненный ответ в кеше процесса
+
+    Args:
+        user_id: ID пользователя
+        key: Idempotency-Key
+        fingerprint: Отпечаток текущего запроса
+
+    Returns:
+        dict или None: Сохраненный ответ или None, если его нет в кеше
+    """
+    cache_key = (get_current_tenant(), user_id, key)
+    with _response_cache_lock:
+        cached = _response_cache.get(cache_key)
+        if cached is None:
+            return None
+        expires_at, stored_fingerprint, response = cached
+        if expires_at <= time.monotonic():
+            del _response_cache[cache_key]
+            return None
+
+    _check_fingerprint(stored_fingerprint, fingerprint)
+    return response
+
+def cache_response(user_id: int, key: str, fingerprint: str, response: dict):
+    """
+    Кладет ответ в кеш процесса (самые старые записи вытесняются первыми)
+
+    Args:
+        user_id: ID пользователя
+        key: Idempotency-Key
+        fingerprint: Отпечаток запроса
+        response: Ответ
+    """
+    settings = get_settings()
+    expires_at = time.monotonic() + settings.idempotency_ttl_seconds
+
+    cache_key = (get_current_tenant(), user_id, key)
+    with _response_cache_lock:
+        _response_cache.pop(cache_key, None)
+        _response_cache[cache_key] = (expires_at, fingerprint, response)
+        while len(_response_cache) > settings.idempotency_cache_size:
+            _response_cache.popitem(last=False)
+
+def claim_key(db_session, user_id: int, key: str, fingerprint: str) -> Optional[dict]:
+    """
+    Занимает ключ в текущей транзакции
+
+    Если ключ уже занят другой транзакцией, вставка ждет ее завершения.
+
+    Args:
+        db_session: Сессия основной БД
+        user_id: ID пользователя
+        key: Idempotency-Key
+        fingerprint: Отпечаток текущего запроса
+
+    Returns:
+        dict или None: Сохраненный ответ, если ключ уже использован, иначе None
+
+    Raises:
+        HTTPException: 422, если ключ использован для другого запроса
+    """
+    inserted = insert_ignore_conflicts(
+        db_session,
+        IdempotencyKey,
+        {"user_id": user_id, "key": key, "fingerprint": fingerprint},
+        index_elements=["user_id", "key"]
+    )
+    if inserted:
+        return None
+
+    stored = db_session.get(IdempotencyKey, (user_id, key))
+    _check_fingerprint(stored.fingerprint, fingerprint)
+    return stored.response
+
+def save_response(db_session, user_id: int, key: str, response: dict):
+    """
+    Сохраняет ответ для занятого ключа (коммит выполняет вызывающий код)
+
+    Args:
+        db_session: Сессия основной БД
+        user_id: ID пользователя
+        key: Idempotency-Key
+        response: Ответ
+    """
+    stored = db_session.get(IdempotencyKey, (user_id, key))
+    stored.response = response
+
+def purge_expired_keys() -> int:
+    """
+    Удаляет ключи старше IDEMPOTENCY_TTL_SECONDS
+
+    Returns:
+        int: Количество удаленных ключей
+    """
+    expires_before = datetime.now(timezone.utc) - timedelta(
+        seconds=get_settings().idempotency_ttl_seconds
+    )
+
+    db = SessionLocal()
+    try:
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < expires_before
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+async def run_idempotency_purge_loop(interval_seconds: float):
+    """
+    Периодически удаляет просроченные ключи в БД активных арендаторов
+
+    Args:
+        interval_seconds: Период очистки в секундах
+    """
+    while True:
+        for slug in tenant_registry.hot_slugs():
+            try:
+                with tenant_scope(slug):
+                    deleted = await run_in_threadpool(purge_expired_keys)
+                if deleted:
+                    print(f"🧹 Удалено просроченных Idempotency-Key ({slug}): {deleted}")
+            except Exception as e:
+                print(f"⚠️ Ошибка очистки Idempotency-Key ({slug}): {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,207 @@
+"""
+Психометрический анализ пунктов теста (item analysis).
+
+Ответы всех попыток собираются в плотную матрицу int8 (строка - попытка,
+столбец - вопрос), после чего для каждой шкалы векторно считаются:
+- альфа Кронбаха (для пунктов 0/1 совпадает с KR-20);
+- скорректированная корреляция пункта с суммой остальных пунктов шкалы;
+- распределение ответов "да"/"нет"/"не знаю" по каждому пункту.
+
+Пункт шкалы оценивается так же, как в utils/scoring.py: 1, если ответ
+совпадает с ключом ("да" для positive, "нет" для negative), иначе 0.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Коды ответов в матрице
+CODE_NO = 0
+CODE_YES = 1
+CODE_UNKNOWN = 2
+CODE_MISSING = 3
+
+ANSWER_LABELS = ("нет", "да", "не знаю", "нет ответа")
+
+class _AnswerCodes(dict):
+    """Словарь ответ -> код; неизвестные написания нормализуются один раз и запоминаются"""
+
+    def __missing__(self, answer):
+        code = CODE_MISSING
+        if isinstance(answer, str):
+            code = self.get(answer.strip().lower(), CODE_MISSING)
+            # Кеш написаний ограничен: мусорные ответы не раздувают словарь
+            if len(self) < 1000:
+                self[answer] = code
+        return code
+
+ANSWER_CODES = _AnswerCodes({"нет": CODE_NO, "да": CODE_YES, "не знаю": CODE_UNKNOWN})
+
+class AnswerMatrixBuilder:
+    """
+    Накапливает ответы в матрицу int8 без промежуточных списков Python
+
+    Строки кодируются в bytes и копятся блоками, блоки превращаются
+    в массив numpy одним вызовом frombuffer.
+
+    Attributes:
+        n_items: Количество вопросов теста (ширина матрицы)
+    """
+
+    def __init__(self, n_items: int, block_rows: int = 10000):
+        self.n_items = n_items
+        self.block_rows = block_rows
+        self._padding = bytes([CODE_MISSING]) * n_items
+        self._rows: List[bytes] = []
+        self._blocks: List[np.ndarray] = []
+        self.rows = 0
+
+    def add(self, answers: Optional[List[str]]):
+        """
+        Добавляет ответы одной попытки
+
+        Args:
+            answers: Ответы по порядку вопросов (лишние отбрасываются, недостающие - CODE_MISSING)
+        """
+        row = bytes(map(ANSWER_CODES.__getitem__, (answers or [])[:self.n_items]))
+        if len(row) < self.n_items:
+            row += self._padding[len(row):]
+        self._rows.append(row)
+        self.rows += 1
+
+        if len(self._rows) >= self.block_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            block = np.frombuffer(b"".join(self._rows), dtype=np.int8)
+            self._blocks.append(block.reshape(len(self._rows), self.n_items))
+            self._rows = []
+
+    def build(self) -> np.ndarray:
+        """
+        Возвращает накопленную матрицу
+
+        Returns:
+            np.ndarray: Матрица (попытки x вопросы) dtype=int8
+        """
+        self._flush()
+        if not self._blocks:
+            return np.empty((0, self.n_items), dtype=np.int8)
+        if len(self._blocks) > 1:
+            self._blocks = [np.concatenate(self._blocks)]
+        return self._blocks[0]
+
+def build_answer_matrix(answer_rows: Iterable[Optional[List[str]]], n_items: int) -> np.ndarray:
+    """
+    Собирает матрицу ответов из потока попыток
+
+    Args:
+        answer_rows: Ответы попыток
+        n_items: Количество вопросов теста
+
+    Returns:
+        np.ndarray: Матрица (попытки x вопросы) dtype=int8
+    """
+    builder = AnswerMatrixBuilder(n_items)
+    for answers in answer_rows:
+        builder.add(answers)
+    return builder.build()
+
+def response_distribution(matrix: np.ndarray) -> np.ndarray:
+    """
+    Считает распределение кодов ответов по каждому вопросу за один проход
+
+    Args:
+        matrix: Матрица ответов int8
+
+    Returns:
+        np.ndarray: Счетчики (вопросы x 4) в порядке ANSWER_LABELS
+    """
+    n_items = matrix.shape[1]
+    # Код ответа и номер столбца кодируются в одно число: столбец * 4 + код
+    flat = matrix.astype(np.int32) + np.arange(n_items, dtype=np.int32) * 4
+    return np.bincount(flat.ravel(), minlength=n_items * 4).reshape(n_items, 4)
+
+def analyze_scale(matrix: np.ndarray, positive: List[int], negative: List[int]) -> dict:
+    """
+    Считает надежность шкалы и характеристики ее пунктов
+
+    Args:
+        matrix: Матрица ответов int8
+        positive: Номера вопросов (с 1) с прямым ключом
+        negative: Номера вопросов (с 1) с обратным ключом
+
+    Returns:
+        dict: n_items, alpha, mean, std и список пунктов с item_total_r и p (доля ответов по ключу)
+    """
+    keyed_items = [(number, CODE_YES) for number in positive] + [(number, CODE_NO) for number in negative]
+    keyed_items = [(number, key) for number, key in keyed_items if 1 <= number <= matrix.shape[1]]
+    items = [number for number, _ in keyed_items]
+    keys = np.array([key for _, key in keyed_items], dtype=np.int8)
+
+    n_rows, n_items = matrix.shape[0], len(items)
+    if n_rows < 2 or n_items == 0:
+        return {"n_items": n_items, "alpha": None, "mean": None, "std": None, "items": []}
+
+    columns = np.array(items) - 1
+    keyed = (matrix[:, columns] == keys).astype(np.float64)
+
+    total = keyed.sum(axis=1)
+    item_mean = keyed.mean(axis=0)
+    item_var = keyed.var(axis=0)
+    total_var = total.var()
+
+    # Ковариация каждого пункта с общей суммой - одно матрично-векторное умножение
+    cov_item_total = (keyed - item_mean).T @ (total - total.mean()) / n_rows
+
+    # Корреляция пункта с суммой остальных пунктов шкалы
+    rest_var = total_var + item_var - 2 * cov_item_total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        item_total_r = (cov_item_total - item_var) / np.sqrt(item_var * rest_var)
+
+    alpha = None
+    if n_items > 1 and total_var > 0:
+        alpha = float(n_items / (n_items - 1) * (1 - item_var.sum() / total_var))
+
+    return {
+        "n_items": n_items,
+        "alpha": alpha,
+        "mean": float(total.mean()),
+        "std": float(np.sqrt(total_var)),
+        "items": [
+            {
+                "item": int(number),
+                "key": "positive" if key == CODE_YES else "negative",
+                "p": float(p),
+                "item_total_r": float(r) if np.isfinite(r) else None,
+            }
+            for number, key, p, r in zip(items, keys, item_mean, item_total_r)
+        ],
+    }
+
+def analyze_test(matrix: np.ndarray, scales: Dict[str, dict]) -> dict:
+    """
+    Строит отчет по всем шкалам теста
+
+    Args:
+        matrix: Матрица ответов int8
+        scales: Ключ шкал из JSON-файла теста
+
+    Returns:
+        dict: Число попыток, распределение ответов по вопросам и анализ каждой шкалы
+    """
+    distribution = response_distribution(matrix)
+
+    return {
+        "respondents": int(matrix.shape[0]),
+        "items": int(matrix.shape[1]),
+        "distribution": [
+            {"item": index + 1, **dict(zip(ANSWER_LABELS, map(int, counts)))}
+            for index, counts in enumerate(distribution)
+        ],
+        "scales": {
+            name: analyze_scale(matrix, scale.get("positive", []), scale.get("negative", []))
+            for name, scale in scales.items()
+        },
+    }
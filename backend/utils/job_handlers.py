@@ -0,0 +1,116 @@
+"""
+Обработчики фоновых задач после завершения теста.
+
+Модуль импортируется при запуске раннера (main.py, worker.py),
+чтобы зарегистрировать обработчики в utils/jobs.py.
+"""
+
+import json
+import urllib.request
+
+from config import get_settings
+from db.tenancy import get_current_tenant
+from models.job import BackgroundJob
+from utils.jobs import enqueue_job, job_handler
+from utils.norms import refresh_norms
+
+# Таймаут запроса к внешнему адресу уведомлений (секунды)
+WEBHOOK_TIMEOUT_SECONDS = 5
+
+# Задержка пересчета норм теста: завершения за это время дают один пересчет
+NORMS_REFRESH_DELAY_SECONDS = 30
+
+COMPLETION_WEBHOOK_JOB = "completion.webhook"
+NORMS_REFRESH_JOB = "norms.refresh"
+
+def enqueue_norms_refresh(db_session, test_id: int):
+    """
+    Ставит в очередь пересчет норм теста, если он еще не ожидает запуска
+
+    Одновременные завершения могут поставить две задачи - пересчет
+    идемпотентен, лишняя задача только повторит его.
+
+    Args:
+        db_session: Сессия основной БД
+        test_id: ID теста
+    """
+    pending = db_session.query(BackgroundJob.payload).filter(
+        BackgroundJob.kind == NORMS_REFRESH_JOB,
+        BackgroundJob.status == BackgroundJob.STATUS_PENDING
+    ).all()
+    if any(row.payload.get("test_id") == test_id for row in pending):
+        return
+
+    # Неудачный пересчет не повторяется: его выполнит следующее завершение
+    # или периодический пересчет
+    enqueue_job(db_session, NORMS_REFRESH_JOB, {"test_id": test_id},
+                delay_seconds=NORMS_REFRESH_DELAY_SECONDS, max_attempts=1)
+
+def enqueue_completion_jobs(db_session, attempt, quality: dict = None):
+    """
+    Ставит в очередь задачи, которые не нужны пользователю в ответе
+
+    Вызывается в транзакции завершения теста: задачи появятся в очереди
+    только вместе с попыткой.
+
+    Args:
+        db_session: Сессия основной БД
+        attempt: Сохраненная попытка (TestAttempt)
+        quality: Показатели качества ответов
+    """
+    settings = get_settings()
+
+    # Новый последний результат меняет нормы теста (небрежный - исключает
+    # из них прежний результат пользователя); тесты без шкал норм не имеют.
+    # Нормы хранятся в памяти процессов API: без раннера в API задачу взял
+    # бы worker.py, который запросы не обслуживает, - там нормы обновляет
+    # только периодический пересчет (NORMS_REFRESH_SECONDS)
+    if attempt.scores and settings.jobs_in_process:
+        enqueue_norms_refresh(db_session, attempt.test_id)
+
+    if settings.completion_webhook_url:
+        enqueue_job(db_session, COMPLETION_WEBHOOK_JOB, {
+            "event": "test.completed",
+            "tenant": get_current_tenant(),
+            "user_id": attempt.user_id,
+            "test_id": attempt.test_id,
+            "attempt_id": attempt.id,
+            "attempt_number": attempt.attempt_number,
+            "scores": attempt.scores,
+            "careless": bool(quality and quality.get("flags")),
+            "completed_at": attempt.completed_at.isoformat()
+        })
+
+@job_handler(COMPLETION_WEBHOOK_JOB)
+def send_completion_webhook(payload: dict):
+    """
+    Отправляет уведомление о завершении теста на COMPLETION_WEBHOOK_URL
+
+    Args:
+        payload: Данные события
+
+    Raises:
+        urllib.error.URLError: При ошибке сети или ответе не 2xx (задача будет повторена)
+    """
+    url = get_settings().completion_webhook_url
+    if not url:
+        return
+
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT_SECONDS):
+        pass
+
+@job_handler(NORMS_REFRESH_JOB)
+def refresh_test_norms(payload: dict):
+    """
+    Пересчитывает нормы теста после новых результатов
+
+    Args:
+        payload: {"test_id": ID теста}
+    """
+    refresh_norms(payload["test_id"])
@@ -0,0 +1,388 @@
+"""
+Фоновые задачи с очередью в БД (таблица background_jobs).
+
+- enqueue_job добавляет задачу в текущую транзакцию: задача появляется
+  в очереди только вместе с данными, которые ее породили.
+- JobRunner выбирает готовые задачи (SELECT ... FOR UPDATE SKIP LOCKED),
+  выполняет обработчики в пуле потоков с ограничением параллельности
+  и повторяет упавшие задачи с экспоненциальной задержкой.
+- Задачи, взятые упавшим воркером, возвращаются в очередь по истечении
+  JOB_LOCK_TIMEOUT_SECONDS (исчерпавшие попытки - помечаются failed).
+  Результат сохраняет только воркер, которому задача выдана.
+
+Раннер запускается внутри API (JOBS_IN_PROCESS) и/или отдельным
+процессом: python worker.py. Несколько раннеров не берут одну задачу дважды.
+
+Очередь у каждого арендатора (университета) своя - в его БД. Раннер
+обходит очереди по кругу, начиная каждый проход со следующего арендатора,
+и выполняет задачу в tenant_scope ее арендатора. Раннер API обходит
+активных в процессе арендаторов, worker.py - всех зарегистрированных.
+
+Обработчик - синхронная функция от payload, регистрируется декоратором:
+
+    @job_handler("completion.webhook")
+    def send_completion_webhook(payload: dict):
+        ...
+"""
+
+import asyncio
+import os
+import random
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from db.database import SessionLocal
+from db.tenancy import get_current_tenant, tenant_registry, tenant_scope
+from models.job import BackgroundJob
+
+# Максимальная задержка перед повтором (секунды)
+JOB_MAX_BACKOFF_SECONDS = 3600
+
+# Зарегистрированные обработчики: kind -> функция(payload)
+_handlers: Dict[str, Callable[[dict], None]] = {}
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    """Задача, взятая воркером (без привязки к сессии БД)"""
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    tenant: str
+    worker: str
+
+def job_handler(kind: str):
+    """
+    Регистрирует обработчик задач типа kind
+
+    Args:
+        kind: Тип задачи
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(func: Callable[[dict], None]):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+def enqueue_job(db_session, kind: str, payload: Optional[dict] = None,
+                delay_seconds: float = 0, max_attempts: Optional[int] = None) -> BackgroundJob:
+    """
+    Добавляет задачу в очередь (коммит выполняет вызывающий код)
+
+    Args:
+        db_session: Сессия основной БД
+        kind: Тип задачи
+        payload: Параметры задачи (JSON)
+        delay_seconds: Отложить запуск на указанное число секунд
+        max_attempts: Максимум попыток (по умолчанию JOB_MAX_ATTEMPTS)
+
+    Returns:
+        BackgroundJob: Добавленная задача
+    """
+    job = BackgroundJob(
+        kind=kind,
+        payload=payload or {},
+        max_attempts=max_attempts or get_settings().job_max_attempts,
+        run_after=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    )
+    db_session.add(job)
+    return job
+
+def backoff_seconds(attempts: int) -> float:
+    """
+    Задержка перед следующей попыткой: экспонента со случайной добавкой
+
+    Args:
+        attempts: Сколько попыток уже выполнено
+
+    Returns:
+        float: Задержка в секундах
+    """
+    delay = min(get_settings().job_backoff_seconds * 2 ** (attempts - 1), JOB_MAX_BACKOFF_SECONDS)
+    # Случайная добавка разводит повторы задач, упавших одновременно
+    return delay * (1 + random.random() / 4)
+
+def claim_jobs(limit: int, worker_id: str) -> List[ClaimedJob]:
+    """
+    Берет до limit готовых задач текущего арендатора и помечает их выполняемыми
+
+    Args:
+        limit: Максимум задач
+        worker_id: Идентификатор воркера
+
+    Returns:
+        List[ClaimedJob]: Взятые задачи
+    """
+    now = datetime.now(timezone.utc)
+    tenant = get_current_tenant()
+    db = SessionLocal()
+
+    try:
+        # Задачи упавших воркеров возвращаются в очередь, а исчерпавшие
+        # попытки (воркер падает на самой задаче) - завершаются с ошибкой
+        lock_timeout = get_settings().job_lock_timeout_seconds
+        stale = db.query(BackgroundJob).filter(
+            BackgroundJob.status == BackgroundJob.STATUS_RUNNING,
+            BackgroundJob.locked_at < now - timedelta(seconds=lock_timeout)
+        )
+        released = {
+            BackgroundJob.locked_at: None,
+            BackgroundJob.locked_by: None,
+            BackgroundJob.last_error: f"Воркер не завершил задачу за {lock_timeout} с"
+        }
+        stale.filter(BackgroundJob.attempts >= BackgroundJob.max_attempts).update(
+            {**released, BackgroundJob.status: BackgroundJob.STATUS_FAILED, BackgroundJob.finished_at: now},
+            synchronize_session=False
+        )
+        stale.filter(BackgroundJob.attempts < BackgroundJob.max_attempts).update(
+            {**released, BackgroundJob.status: BackgroundJob.STATUS_PENDING},
+            synchronize_session=False
+        )
+
+        jobs = db.execute(
+            select(BackgroundJob).where(
+                BackgroundJob.status == BackgroundJob.STATUS_PENDING,
+                BackgroundJob.run_after <= now
+            ).order_by(BackgroundJob.run_after).limit(limit).with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        for job in jobs:
+            job.status = BackgroundJob.STATUS_RUNNING
+            job.attempts += 1
+            job.locked_at = now
+            job.locked_by = worker_id
+
+        claimed = [
+            ClaimedJob(job.id, job.kind, job.payload or {}, job.attempts, job.max_attempts, tenant, worker_id)
+            for job in jobs
+        ]
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+def finish_job(job: ClaimedJob, error: Optional[str]) -> bool:
+    """
+    Сохраняет результат выполнения задачи
+
+    Если задача успела вернуться в очередь по JOB_LOCK_TIMEOUT_SECONDS и
+    взята заново, результат не сохраняется: задачей владеет новый воркер.
+
+    Args:
+        job: Выполненная задача
+        error: Текст ошибки или None при успехе
+
+    Returns:
+        bool: Результат сохранен
+    """
+    now = datetime.now(timezone.utc)
+    values = {BackgroundJob.locked_at: None, BackgroundJob.locked_by: None}
+
+    if error is None:
+        values.update({BackgroundJob.status: BackgroundJob.STATUS_DONE, BackgroundJob.finished_at: now})
+    elif job.attempts < job.max_attempts:
+        values.update({
+            BackgroundJob.status: BackgroundJob.STATUS_PENDING,
+            BackgroundJob.run_after: now + timedelta(seconds=backoff_seconds(job.attempts)),
+            BackgroundJob.last_error: error
+        })
+    else:
+        values.update({
+            BackgroundJob.status: BackgroundJob.STATUS_FAILED,
+            BackgroundJob.finished_at: now,
+            BackgroundJob.last_error: error
+        })
+
+    db = SessionLocal()
+    try:
+        updated = db.query(BackgroundJob).filter(
+            BackgroundJob.id == job.id,
+            BackgroundJob.status == BackgroundJob.STATUS_RUNNING,
+            BackgroundJob.locked_by == job.worker,
+            BackgroundJob.attempts == job.attempts
+        ).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    if not updated:
+        print(f"⚠️ Задача {job.id} ({job.kind}) возвращена в очередь по таймауту: результат не сохранен")
+    return bool(updated)
+
+def execute_job(job: ClaimedJob) -> Optional[str]:
+    """
+    Выполняет обработчик задачи и сохраняет результат
+
+    Args:
+        job: Взятая задача
+
+    Returns:
+        str или None: Текст ошибки или None при успехе
+    """
+    error = None
+    handler = _handlers.get(job.kind)
+
+    try:
+        if handler is None:
+            raise LookupError(f"Нет обработчика для задачи '{job.kind}'")
+        handler(job.payload)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"⚠️ Задача {job.id} ({job.kind}), попытка {job.attempts}/{job.max_attempts}: {error}")
+
+    finish_job(job, error)
+    return error
+
+def get_queue_counts() -> Dict[str, int]:
+    """
+    Считает задачи очереди текущего арендатора по статусам
+
+    Returns:
+        Dict[str, int]: status -> количество
+    """
+    db = SessionLocal()
+    try:
+        rows = db.query(BackgroundJob.status, func.count()).group_by(BackgroundJob.status).all()
+        return {job_status: count for job_status, count in rows}
+    finally:
+        db.close()
+
+class JobRunner:
+    """
+    Цикл выборки и выполнения фоновых задач
+
+    Attributes:
+        concurrency: Максимум одновременно выполняемых задач
+        poll_seconds: Период опроса очереди
+        worker_id: Идентификатор воркера (hostname:pid)
+        all_tenants: Обходить всех арендаторов, а не только активных в процессе
+    """
+
+    def __init__(self, concurrency: int, poll_seconds: float, worker_id: Optional[str] = None,
+                 all_tenants: bool = False):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.all_tenants = all_tenants
+        self.counters = {"done": 0, "errors": 0}
+        self._tenant_offset = 0
+        self._running = set()
+        self._loop = None
+        self._wakeup = None
+        self._stopping = False
+
+    def notify(self):
+        """Будит раннер после добавления задачи (можно вызывать из любого потока)"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def stop(self):
+        """Останавливает выборку новых задач; выполняемые задачи дорабатывают"""
+        self._stopping = True
+        self.notify()
+
+    async def _claim(self, limit: int) -> List[ClaimedJob]:
+        """Берет до limit задач из очередей арендаторов по кругу"""
+        slugs = tenant_registry.slugs() if self.all_tenants else tenant_registry.hot_slugs()
+        if not slugs:
+            slugs = [get_current_tenant()]
+        self._tenant_offset = (self._tenant_offset + 1) % len(slugs)
+
+        claimed = []
+        for slug in slugs[self._tenant_offset:] + slugs[:self._tenant_offset]:
+            if len(claimed) >= limit:
+                break
+            try:
+                with tenant_scope(slug):
+                    claimed.extend(await run_in_threadpool(claim_jobs, limit - len(claimed), self.worker_id))
+            except Exception as e:
+                print(f"⚠️ Ошибка выборки фоновых задач ({slug}): {e}")
+        return claimed
+
+    async def _execute(self, job: ClaimedJob):
+        try:
+            with tenant_scope(job.tenant):
+                error = await run_in_threadpool(execute_job, job)
+            self.counters["errors" if error else "done"] += 1
+        except Exception as e:
+            # Не удалось сохранить результат - задача вернется в очередь по таймауту
+            self.counters["errors"] += 1
+            print(f"⚠️ Ошибка выполнения задачи {job.id}: {e}")
+        finally:
+            self._wakeup.set()
+
+    async def run(self, until_empty: bool = False):
+        """
+        Выполняет задачи до вызова stop()
+
+        Args:
+            until_empty: Завершиться, когда готовых задач не останется
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+        while not self._stopping:
+            self._wakeup.clear()
+            claimed = []
+
+            free_slots = self.concurrency - len(self._running)
+            if free_slots > 0:
+                claimed = await self._claim(free_slots)
+
+                for job in claimed:
+                    task = asyncio.create_task(self._execute(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+            if until_empty and not claimed and not self._running:
+                break
+
+            # Все слоты заняты новыми задачами - возможно, в очереди есть еще
+            if claimed and len(claimed) == free_slots:
+                await asyncio.sleep(0)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def status(self) -> dict:
+        """
+        Состояние раннера для мониторинга
+
+        Returns:
+            dict: Параметры, счетчики и число выполняемых задач
+        """
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+            **self.counters
+        }
+
+def create_job_runner() -> JobRunner:
+    """
+    Создает раннер с параметрами из настроек
+
+    Returns:
+        JobRunner: Раннер задач
+    """
+    settings = get_settings()
+    return JobRunner(settings.job_concurrency, settings.job_poll_seconds)
+
+# Раннер процесса API (запускается при старте, если JOBS_IN_PROCESS)
+job_runner = create_job_runner()
@@ -0,0 +1,505 @@
+"""
+События прохождения тестов в реальном времени для панели проктора.
+
+Источник событий - запросы студентов:
+- started / progress: POST /user-tests/{test_id}/progress (сколько ответов дано);
+- completed: POST /user-tests/{test_id}/complete после коммита попытки.
+
+LiveEventBroker раздает события подпискам внутри процесса. Событие
+кодируется в SSE-байты один раз и одна и та же строка кладется в буферы
+всех подходящих подписок, поэтому сотни панелей стоят как один поток.
+Буфер подписки ограничен (LIVE_BUFFER_SIZE): подписчик, который не
+успевает читать, отключается, а не копит память; браузер переподключается
+с Last-Event-ID и получает пропущенное из кольца последних событий.
+Новая панель сначала получает снимок: последнее состояние каждого
+студента (started/progress/completed) из LIVE_STATE_SIZE последних.
+
+При нескольких воркерах uvicorn (LIVE_NOTIFY=True, PostgreSQL) события
+публикуются через NOTIFY: завершение - в транзакции попытки, то есть
+только после коммита; каждый воркер держит одно соединение LISTEN
+и раздает события своим подпискам.
+
+События помечены арендатором (университетом): панель получает события
+только своего арендатора, даже если его БД отдельная - NOTIFY из
+транзакции в чужой БД отправляется через основную после коммита.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import select
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Deque, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event as sa_event, func, select as sa_select
+
+from config import get_settings
+from db.tenancy import get_current_tenant
+from models.reference import faculty_name
+
+# Канал PostgreSQL LISTEN/NOTIFY
+NOTIFY_CHANNEL = "live_test_events"
+
+# Типы событий
+EVENT_STARTED = "started"
+EVENT_PROGRESS = "progress"
+EVENT_COMPLETED = "completed"
+
+# Ключ session.info: события, ждущие коммита транзакции
+PENDING_EVENTS_KEY = "live_pending_events"
+
+# Пауза перед переподключением LISTEN после ошибки, с
+NOTIFY_RECONNECT_SECONDS = 5
+
+class LiveLimitError(RuntimeError):
+    """Достигнут лимит одновременных подписок"""
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _user_fields(user) -> dict:
+    """Поля студента, по которым фильтруют панели"""
+    return {
+        "tenant": get_current_tenant(),
+        "user_id": user.id,
+        "last_name": user.last_name,
+        "first_name": user.first_name,
+        "middle_name": user.middle_name,
+        "faculty": faculty_name(user.faculty),
+        "course": user.course,
+    }
+
+def progress_event(user, test_id: int, answered: int, total: Optional[int]) -> dict:
+    """
+    Событие начала или хода прохождения теста
+
+    Args:
+        user: Текущий пользователь
+        test_id: ID теста
+        answered: Сколько вопросов отвечено (0 - тест открыт)
+        total: Всего вопросов (если известно клиенту)
+
+    Returns:
+        dict: Событие для publish_event
+    """
+    return {
+        "type": EVENT_STARTED if answered == 0 else EVENT_PROGRESS,
+        **_user_fields(user),
+        "test_id": test_id,
+        "answered": answered,
+        "total": total,
+        "at": _now_iso(),
+    }
+
+def completion_event(user, test_id: int, attempt, quality: Optional[dict]) -> dict:
+    """
+    Событие завершения теста
+
+    Args:
+        user: Пользователь
+        test_id: ID теста
+        attempt: Сохраненная попытка (TestAttempt)
+        quality: Показатели качества ответов (флаги небрежных ответов)
+
+    Returns:
+        dict: Событие для publish_event
+    """
+    answered = len(attempt.answers or [])
+    return {
+        "type": EVENT_COMPLETED,
+        **_user_fields(user),
+        "test_id": test_id,
+        "answered": answered,
+        "total": answered,
+        "attempt_number": attempt.attempt_number,
+        "flags": list((quality or {}).get("flags") or []),
+        "at": _now_iso(),
+    }
+
+class LiveFilter:
+    """
+    Фильтр подписки: арендатор, факультет (название), курс, тест
+
+    Пустое поле пропускает любые значения.
+    """
+
+    __slots__ = ("tenant", "faculty", "course", "test_id")
+
+    def __init__(self, tenant: Optional[str] = None, faculty: Optional[str] = None,
+                 course: Optional[int] = None, test_id: Optional[int] = None):
+        self.tenant = tenant
+        self.faculty = faculty
+        self.course = course
+        self.test_id = test_id
+
+    def matches(self, event: dict) -> bool:
+        return (
+            (self.tenant is None or event.get("tenant") == self.tenant)
+            and (self.faculty is None or event["faculty"] == self.faculty)
+            and (self.course is None or event["course"] == self.course)
+            and (self.test_id is None or event["test_id"] == self.test_id)
+        )
+
+class Subscription:
+    """
+    Подписка одной панели: ограниченный буфер готовых SSE-сообщений
+
+    Attributes:
+        live_filter: Фильтр событий
+        dropped: Подписка отключена из-за переполнения буфера
+    """
+
+    def __init__(self, live_filter: LiveFilter, buffer_size: int):
+        self.live_filter = live_filter
+        self.buffer_size = buffer_size
+        self.dropped = False
+        self._buffer: Deque[bytes] = deque()
+        self._wakeup = asyncio.Event()
+
+    def offer(self, message: bytes) -> bool:
+        """
+        Кладет сообщение в буфер (в потоке цикла событий)
+
+        Returns:
+            bool: False, если буфер полон и подписка отключена
+        """
+        if len(self._buffer) >= self.buffer_size:
+            self.dropped = True
+            self._buffer.clear()
+            self._wakeup.set()
+            return False
+        self._buffer.append(message)
+        self._wakeup.set()
+        return True
+
+    async def next_batch(self, timeout: float) -> List[bytes]:
+        """
+        Ждет сообщений не дольше timeout
+
+        Returns:
+            List[bytes]: Накопленные сообщения (пусто - таймаут или отключение)
+        """
+        if not self._buffer and not self.dropped:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._wakeup.clear()
+        batch = list(self._buffer)
+        self._buffer.clear()
+        return batch
+
+def encode_sse(event_id: str, event_type: str, data) -> bytes:
+    """Сообщение Server-Sent Events"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+
+class LiveEventBroker:
+    """
+    Раздача событий подпискам процесса
+
+    Все изменения подписок и раздача выполняются в потоке цикла событий;
+    publish можно вызывать из любого потока.
+
+    Args:
+        buffer_size: Сообщений в буфере одной подписки
+        max_subscribers: Максимум одновременных подписок
+        replay_size: Событий в кольце для переподключения с Last-Event-ID
+        state_size: Студентов в снимке текущего состояния
+    """
+
+    def __init__(self, buffer_size: int = 256, max_subscribers: int = 500,
+                 replay_size: int = 1000, state_size: int = 10000):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions = set()
+        self._replay: Deque[Tuple[int, dict, bytes]] = deque(maxlen=replay_size)
+        self._state: "OrderedDict[Tuple[str, int, int], dict]" = OrderedDict()
+        self._state_size = state_size
+        self._sequence = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prefix = f"{os.getpid()}-"
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Запоминает цикл событий, в котором живут подписки"""
+        self._loop = loop
+
+    def publish(self, event: dict):
+        """
+        Публикует событие подпискам этого процесса
+
+        Args:
+            event: Событие (progress_event / completion_event)
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._dispatch(event)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict):
+        sequence = next(self._sequence)
+        message = encode_sse(f"{self._prefix}{sequence}", event["type"], event)
+        self._replay.append((sequence, event, message))
+        self.published += 1
+
+        key = (event.get("tenant"), event["user_id"], event["test_id"])
+        self._state.pop(key, None)
+        self._state[key] = event
+        while len(self._state) > self._state_size:
+            self._state.popitem(last=False)
+
+        for subscription in list(self._subscriptions):
+            if not subscription.live_filter.matches(event):
+                continue
+            if subscription.offer(message):
+                self.delivered += 1
+            else:
+                # Медленный подписчик отключается, остальные не ждут его
+                self._subscriptions.discard(subscription)
+                self.dropped_subscribers += 1
+
+    def subscribe(self, live_filter: LiveFilter, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Создает подписку и кладет в ее буфер начальные сообщения
+
+        С Last-Event-ID этого процесса - пропущенные события из кольца,
+        иначе - снимок текущего состояния студентов по фильтру.
+
+        Raises:
+            LiveLimitError: Если подписок уже max_subscribers
+        """
+        if len(self._subscriptions) >= self.max_subscribers:
+            raise LiveLimitError("Слишком много подключенных панелей")
+
+        self.bind_loop(asyncio.get_running_loop())
+        subscription = Subscription(live_filter, self.buffer_size)
+
+        missed = self._replay_after(last_event_id, live_filter)
+        if missed is not None:
+            for message in missed[-self.buffer_size:]:
+                subscription.offer(message)
+        else:
+            snapshot = [event for event in self._state.values() if live_filter.matches(event)]
+            subscription.offer(encode_sse(f"{self._prefix}0", "snapshot", snapshot))
+
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def _replay_after(self, last_event_id: Optional[str], live_filter: LiveFilter) -> Optional[List[bytes]]:
+        """Сообщения после last_event_id или None, если восстановить поток нельзя"""
+        if not last_event_id or not last_event_id.startswith(self._prefix):
+            return None
+        try:
+            last_sequence = int(last_event_id[len(self._prefix):])
+        except ValueError:
+            return None
+        if not self._replay or self._replay[0][0] > last_sequence + 1:
+            return None
+        return [
+            message for sequence, event, message in self._replay
+            if sequence > last_sequence and live_filter.matches(event)
+        ]
+
+    def unsubscribe(self, subscription: Subscription):
+        """Удаляет подписку (клиент отключился)"""
+        self._subscriptions.discard(subscription)
+
+    def stats(self) -> dict:
+        """Счетчики для /health/live"""
+        return {
+            "subscribers": len(self._subscriptions),
+            "max_subscribers": self.max_subscribers,
+            "buffer_size": self.buffer_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+            "tracked_students": len(self._state),
+            "notify": _bridge is not None,
+        }
+
+def _create_broker() -> LiveEventBroker:
+    settings = get_settings()
+    return LiveEventBroker(
+        buffer_size=settings.live_buffer_size,
+        max_subscribers=settings.live_max_subscribers,
+        replay_size=settings.live_replay_size,
+        state_size=settings.live_state_size,
+    )
+
+live_broker = _create_broker()
+
+def _notify_enabled(bind) -> bool:
+    return get_settings().live_notify and bind.dialect.name == "postgresql"
+
+def publish_event(event: dict, db_session=None):
+    """
+    Публикует событие с учетом транзакции
+
+    С сессией событие уходит только после ее коммита (при откате -
+    не уходит). С LIVE_NOTIFY - через NOTIFY всем воркерам; без сессии
+    NOTIFY выполняется в отдельной транзакции, поэтому вызывать
+    из синхронного кода (пул потоков), а не из цикла событий.
+
+    Args:
+        event: Событие
+        db_session: Сессия, в транзакции которой произошло событие
+    """
+    if db_session is None:
+        from db.database import get_engine
+        engine = get_engine() if get_settings().live_notify else None
+        if engine is not None and _notify_enabled(engine):
+            with engine.begin() as connection:
+                connection.execute(sa_select(func.pg_notify(NOTIFY_CHANNEL, json.dumps(event, ensure_ascii=False))))
+            return
+        live_broker.publish(event)
+        return
+
+    bind = db_session.get_bind()
+    if _notify_enabled(bind):
+        from db.database import get_engine
+        if bind.url == get_engine().url:
+            # NOTIFY доставляется при коммите транзакции
+            db_session.execute(sa_select(func.pg_notify(NOTIFY_CHANNEL, json.dumps(event, ensure_ascii=False))))
+            return
+        # LISTEN слушает основную БД: из отдельной БД арендатора - после коммита
+        _after_commit(db_session, lambda: publish_event(event))
+        return
+
+    _after_commit(db_session, lambda: live_broker.publish(event))
+
+def _after_commit(db_session, callback):
+    """
+    Откладывает callback до коммита транзакции сессии
+
+    При откате отложенное отбрасывается: иначе событие отмененной
+    транзакции ушло бы со следующим коммитом той же сессии.
+    """
+    pending = db_session.info.get(PENDING_EVENTS_KEY)
+    if pending is None:
+        pending = db_session.info[PENDING_EVENTS_KEY] = []
+        sa_event.listen(db_session, "after_commit", _run_pending)
+        sa_event.listen(db_session, "after_soft_rollback", _drop_pending)
+    pending.append(callback)
+
+def _run_pending(session):
+    callbacks = session.info.get(PENDING_EVENTS_KEY) or []
+    session.info[PENDING_EVENTS_KEY] = []
+    for callback in callbacks:
+        callback()
+
+def _drop_pending(session, previous_transaction):
+    # Откат точки сохранения (begin_nested) не отменяет транзакцию
+    if not previous_transaction.nested:
+        session.info[PENDING_EVENTS_KEY] = []
+
+class _NotifyBridge(threading.Thread):
+    """Поток LISTEN: события из PostgreSQL NOTIFY - в live_broker"""
+
+    def __init__(self, engine):
+        super().__init__(name="live-events-listen", daemon=True)
+        self._engine = engine
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _connect(self):
+        # Отдельное соединение вне пула: LISTEN держит его все время работы
+        cargs, cparams = self._engine.dialect.create_connect_args(self._engine.url)
+        connection = self._engine.dialect.dbapi.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return connection
+
+    def run(self):
+        while not self._stop_event.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                while not self._stop_event.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        live_broker.publish(json.loads(notify.payload))
+            except Exception as e:
+                print(f"⚠️ LISTEN {NOTIFY_CHANNEL}: {e}")
+                self._stop_event.wait(NOTIFY_RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+_bridge: Optional[_NotifyBridge] = None
+
+def start_live_events(loop: asyncio.AbstractEventLoop) -> bool:
+    """
+    Привязывает раздачу к циклу событий и при LIVE_NOTIFY запускает LISTEN
+
+    Returns:
+        bool: События передаются между воркерами через PostgreSQL
+    """
+    global _bridge
+
+    live_broker.bind_loop(loop)
+    if not get_settings().live_notify:
+        return False
+
+    from db.database import get_engine
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        print("⚠️ LIVE_NOTIFY=True работает только с PostgreSQL - события остаются внутри процесса")
+        return False
+
+    _bridge = _NotifyBridge(engine)
+    _bridge.start()
+    return True
+
+def stop_live_events():
+    """Останавливает поток LISTEN"""
+    global _bridge
+    if _bridge is not None:
+        _bridge.stop()
+        _bridge = None
+
+async def stream_events(subscription: Subscription, heartbeat_seconds: float) -> Iterable[bytes]:
+    """
+    Тело ответа text/event-stream для подписки
+
+    Комментарий-пинг раз в heartbeat_seconds не дает прокси закрыть
+    соединение. Отключенный медленный подписчик получает событие
+    "dropped" - браузер переподключится с Last-Event-ID.
+    """
+    try:
+        # Клиент переподключается через 3 с после обрыва
+        yield b"retry: 3000\n\n"
+        last_sent = time.monotonic()
+        while True:
+            batch = await subscription.next_batch(heartbeat_seconds)
+            if batch:
+                yield b"".join(batch)
+                last_sent = time.monotonic()
+            if subscription.dropped:
+                yield b"event: dropped\ndata: {}\n\n"
+                return
+            if time.monotonic() - last_sent >= heartbeat_seconds:
+                yield b": ping\n\n"
+                last_sent = time.monotonic()
+    finally:
+        live_broker.unsubscribe(subscription)
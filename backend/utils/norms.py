@@ -0,0 +1,323 @@
+"""
+Процентильные нормы по шкалам тестов.
+
+Нормы считаются периодически по последним результатам всех пользователей
+(по одному результату на пользователя и тест) для всей выборки, каждого
+факультета и каждого курса - отдельно для каждой версии файла теста,
+по которой посчитаны баллы. Результаты с флагами небрежных ответов
+(utils/response_quality.py) в нормы не входят. Значения проходят через потоковый скетч, так что
+пересчет не сортирует и не держит в памяти все результаты. Готовые таблицы
+кешируются в памяти процесса; поиск процентиля для одного балла - бинарный
+поиск по таблице, без обращения к строкам других пользователей.
+
+После завершения теста нормы этого теста пересчитываются фоновой задачей
+norms.refresh (utils/job_handlers.py) в процессе, который ее выполнил;
+остальные процессы получают их при периодическом пересчете.
+
+Нормы у каждого арендатора (университета) свои: таблицы считаются по его
+БД и хранятся, пока арендатор активен (db/tenancy.py).
+"""
+
+import asyncio
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from db.database import get_read_session
+from db.tenancy import TenantLocal, tenant_registry, tenant_scope
+from models.user import User
+from models.attempt import LatestTestResult
+
+# Группа "вся выборка"
+ALL_GROUP = "all"
+
+# Сколько строк читать из БД за одну порцию при пересчете
+NORMS_BATCH_SIZE = 1000
+
+def faculty_group(faculty: str) -> str:
+    """Ключ группы норм для факультета (код)"""
+    return f"faculty:{faculty}"
+
+def course_group(course: int) -> str:
+    """Ключ группы норм для курса (номер)"""
+    return f"course:{course}"
+
+class QuantileSketch:
+    """
+    Потоковый гистограммный скетч квантилей (Ben-Haim & Tom-Tov).
+
+    Хранит не более max_bins пар (значение, количество). Пока различных
+    значений меньше max_bins (сырые баллы шкал - небольшие целые числа),
+    скетч точен; при переполнении сливаются две ближайшие соседние корзины.
+    """
+
+    def __init__(self, max_bins: int = 64):
+        self.max_bins = max_bins
+        self.count = 0
+        self._bins = {}
+
+    def add(self, value: float, weight: int = 1):
+        """
+        Добавляет наблюдение
+
+        Args:
+            value: Значение
+            weight: Вес (количество одинаковых наблюдений)
+        """
+        self._bins[value] = self._bins.get(value, 0) + weight
+        self.count += weight
+        if len(self._bins) > self.max_bins:
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        """
+        Добавляет в скетч все наблюдения другого скетча
+
+        Args:
+            other: Другой скетч
+        """
+        for value, weight in other._bins.items():
+            self._bins[value] = self._bins.get(value, 0) + weight
+        self.count += other.count
+        if len(self._bins) > self.max_bins:
+            self._compress()
+
+    def _compress(self):
+        """Сливает ближайшие соседние корзины, пока их не станет max_bins"""
+        bins = sorted(self._bins.items())
+        while len(bins) > self.max_bins:
+            i = min(range(len(bins) - 1), key=lambda k: bins[k + 1][0] - bins[k][0])
+            (left_value, left_count), (right_value, right_count) = bins[i], bins[i + 1]
+            total = left_count + right_count
+            bins[i:i + 2] = [((left_value * left_count + right_value * right_count) / total, total)]
+        self._bins = dict(bins)
+
+    def to_table(self) -> "PercentileTable":
+        """
+        Строит неизменяемую таблицу процентилей
+
+        Returns:
+            PercentileTable: Таблица для поиска процентильного ранга
+        """
+        return PercentileTable(sorted(self._bins.items()))
+
+class PercentileTable:
+    """
+    Таблица процентилей одной шкалы в одной группе.
+
+    Процентильный ранг считается по середине ступени:
+    (доля значений ниже x + половина доли значений, равных x) * 100.
+    """
+
+    __slots__ = ("values", "counts", "below", "total")
+
+    def __init__(self, bins):
+        self.values = [value for value, _ in bins]
+        self.counts = [count for _, count in bins]
+        self.below = []
+        running = 0
+        for count in self.counts:
+            self.below.append(running)
+            running += count
+        self.total = running
+
+    def percentile_rank(self, value: float) -> Optional[float]:
+        """
+        Находит процентильный ранг значения за O(log n)
+
+        Args:
+            value: Сырой балл
+
+        Returns:
+            float или None: Процентиль от 0 до 100 или None для пустой таблицы
+        """
+        if not self.total:
+            return None
+
+        i = bisect_left(self.values, value)
+        if i == len(self.values):
+            return 100.0
+
+        below = self.below[i]
+        equal = self.counts[i] if self.values[i] == value else 0
+        return round((below + equal / 2) / self.total * 100, 1)
+
+class NormsEngine:
+    """
+    Кеш процентильных таблиц: test_id -> версия -> группа -> шкала -> PercentileTable
+
+    Баллы разных версий файла теста (version_hash) несопоставимы - ключ шкал
+    мог измениться, поэтому у каждой версии свои нормы. Результаты,
+    сохраненные до появления версий, образуют группу версии None.
+    """
+
+    def __init__(self, min_group_size: int = 30):
+        self.min_group_size = min_group_size
+        self.computed_at = None
+        self._tables = {}
+        self._sample_sizes = {}
+        self._refresh_lock = threading.Lock()
+
+    def _build(self, rows):
+        """
+        Строит таблицы из потока строк (test_id, version_hash, faculty, course, scores)
+
+        Args:
+            rows: Итерируемый поток строк
+
+        Returns:
+            tuple: (таблицы, размеры групп)
+        """
+        sketches = {}
+        sample_sizes = {}
+
+        for test_id, version_hash, faculty, course, scores in rows:
+            if not scores:
+                continue
+
+            groups = (ALL_GROUP, faculty_group(faculty), course_group(course))
+            test_sketches = sketches.setdefault(test_id, {}).setdefault(version_hash, {})
+            test_sizes = sample_sizes.setdefault(test_id, {}).setdefault(version_hash, {})
+
+            for group in groups:
+                group_sketches = test_sketches.setdefault(group, {})
+                test_sizes[group] = test_sizes.get(group, 0) + 1
+                for scale, score in scores.items():
+                    if scale not in group_sketches:
+                        group_sketches[scale] = QuantileSketch()
+                    group_sketches[scale].add(score)
+
+        tables = {
+            test_id: {
+                version_hash: {
+                    group: {scale: sketch.to_table() for scale, sketch in group_sketches.items()}
+                    for group, group_sketches in version_sketches.items()
+                }
+                for version_hash, version_sketches in test_sketches.items()
+            }
+            for test_id, test_sketches in sketches.items()
+        }
+        return tables, sample_sizes
+
+    def refresh(self, db_session, test_id: Optional[int] = None):
+        """
+        Пересчитывает нормы по последним результатам всех пользователей
+
+        Args:
+            db_session: Сессия БД (подходит реплика)
+            test_id: Пересчитать только этот тест (None - все тесты)
+        """
+        query = db_session.query(
+            LatestTestResult.test_id,
+            LatestTestResult.version_hash,
+            User.faculty,
+            User.course,
+            LatestTestResult.scores
+        ).join(User, User.id == LatestTestResult.user_id).filter(
+            LatestTestResult.scores.isnot(None),
+            LatestTestResult.is_careless.is_(False)
+        )
+        if test_id is not None:
+            query = query.filter(LatestTestResult.test_id == test_id)
+
+        with self._refresh_lock:
+            tables, sample_sizes = self._build(query.yield_per(NORMS_BATCH_SIZE))
+            if test_id is not None:
+                # Нормы остальных тестов остаются прежними
+                tables = {**self._tables, test_id: tables.get(test_id, {})}
+                sample_sizes = {**self._sample_sizes, test_id: sample_sizes.get(test_id, {})}
+            else:
+                self.computed_at = datetime.now(timezone.utc)
+            # Подмена ссылок атомарна: читатели видят либо старые, либо новые нормы
+            self._tables, self._sample_sizes = tables, sample_sizes
+
+    def lookup(self, test_id: int, version_hash: Optional[str], faculty, course,
+               scores: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+        """
+        Находит процентильные ранги баллов пользователя среди результатов той же версии теста
+
+        Группы с числом наблюдений меньше min_group_size пропускаются.
+
+        Args:
+            test_id: ID теста
+            version_hash: Версия теста, по которой посчитаны баллы
+            faculty: Факультет пользователя
+            course: Курс пользователя
+            scores: Сырые баллы по шкалам
+
+        Returns:
+            dict: шкала -> {"all"|"faculty"|"course": процентиль}
+        """
+        tables = self._tables.get(test_id, {}).get(version_hash)
+        if not tables or not scores:
+            return {}
+
+        sizes = self._sample_sizes.get(test_id, {}).get(version_hash, {})
+        groups = {
+            "all": ALL_GROUP,
+            "faculty": faculty_group(faculty),
+            "course": course_group(course),
+        }
+
+        percentiles = {}
+        for scale, score in scores.items():
+            ranks = {}
+            for label, group in groups.items():
+                table = tables.get(group, {}).get(scale)
+                if table is not None and sizes.get(group, 0) >= self.min_group_size:
+                    ranks[label] = table.percentile_rank(score)
+            if ranks:
+                percentiles[scale] = ranks
+
+        return percentiles
+
+    def status(self) -> dict:
+        """
+        Возвращает сведения о текущих нормах
+
+        Returns:
+            dict: Время пересчета и размеры групп по тестам и версиям
+        """
+        return {
+            "computed_at": self.computed_at.isoformat() if self.computed_at else None,
+            "sample_sizes": self._sample_sizes,
+        }
+
+def _create_norms_engine(config=None) -> NormsEngine:
+    return NormsEngine(min_group_size=get_settings().norms_min_group_size)
+
+# Нормы процесса: по экземпляру на арендатора
+norms_engine = TenantLocal("norms", _create_norms_engine, default=_create_norms_engine())
+
+def refresh_norms(test_id: Optional[int] = None):
+    """
+    Пересчитывает нормы текущего арендатора, читая результаты с реплики (если она есть)
+
+    Args:
+        test_id: Пересчитать только этот тест (None - все тесты)
+    """
+    db = get_read_session()
+    try:
+        norms_engine.refresh(db, test_id)
+    finally:
+        db.close()
+
+async def run_norms_refresh_loop(interval_seconds: float):
+    """
+    Фоновый цикл периодического пересчета норм активных арендаторов
+
+    Args:
+        interval_seconds: Интервал между пересчетами
+    """
+    while True:
+        for slug in tenant_registry.hot_slugs():
+            try:
+                with tenant_scope(slug):
+                    await run_in_threadpool(refresh_norms)
+            except Exception as e:
+                print(f"⚠️ Ошибка пересчета норм ({slug}): {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,96 @@
+"""
+Keyset-пагинация и оценка количества строк.
+
+Страницы выбираются по условию (created_at, id) < (курсор) с сортировкой
+по тем же столбцам: стоимость запроса не зависит от номера страницы,
+в отличие от OFFSET. Курсор - непрозрачная строка base64.
+
+Точный COUNT(*) по большой таблице читает все подходящие строки, поэтому
+для PostgreSQL общее количество берется из оценки планировщика (EXPLAIN);
+небольшие выборки досчитываются точно.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+
+# Оценки ниже порога заменяются точным подсчетом
+EXACT_COUNT_THRESHOLD = 10000
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Кодирует позицию последней строки страницы
+
+    Args:
+        created_at: created_at последней строки
+        row_id: id последней строки
+
+    Returns:
+        str: Курсор для следующей страницы
+    """
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Разбирает курсор
+
+    Args:
+        cursor: Курсор из предыдущего ответа
+
+    Returns:
+        Tuple[datetime, int]: (created_at, id)
+
+    Raises:
+        HTTPException: 400, если курсор поврежден
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+
+def estimate_count(db_session, statement) -> Tuple[Optional[int], bool]:
+    """
+    Оценивает количество строк запроса
+
+    Args:
+        db_session: Сессия БД
+        statement: SELECT без LIMIT и курсора
+
+    Returns:
+        Tuple[Optional[int], bool]: (количество, точное ли оно)
+    """
+    bind = db_session.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        try:
+            # Значения передаются драйверу параметрами, а не вставляются в
+            # текст: % из LIKE 'Ив%' не смешивается с маркерами параметров
+            compiled = statement.compile(dialect=bind.dialect, compile_kwargs={"render_postcompile": True})
+            # Ошибка в PostgreSQL прерывает всю транзакцию: EXPLAIN выполняется
+            # в точке сохранения, и после ее отката сессия пригодна для запроса страницы
+            with db_session.begin_nested():
+                plan = db_session.connection().exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+                ).scalar()
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            print(f"⚠️ Не удалось оценить количество строк: {e}")
+            return None, False
+
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate, False
+
+    count = db_session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+    return count, True
@@ -0,0 +1,528 @@
+"""
+PDF-отчеты для психологов: по студенту и по группе (факультет × курс).
+
+- Документ описывается словарем (ФИО, тест, баллы и интерпретация шкал
+  из utils/reports.py); SHA-256 его JSON - имя файла в кеше REPORT_PDF_DIR.
+  Тот же результат при тех же нормах не рендерится повторно, а изменение
+  результата, норм или файла теста дает новый файл
+- Рендеринг (reportlab) выполняется в пуле процессов REPORT_PDF_WORKERS,
+  цикл событий не блокируется; одновременные запросы одного документа
+  ждут один рендер
+- Архив группы пишется потоком: студенты читаются страницами, PDF
+  каждой страницы рендерятся параллельно и сразу уходят клиенту,
+  сводный отчет по группе считается по ходу и добавляется последним
+
+Кириллица требует TTF-шрифта (REPORT_PDF_FONT, по умолчанию DejaVu Sans).
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Tuple
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from db.database import ReplicaSessionLocal
+from models.reference import faculty_name
+from models.attempt import LatestTestResult
+from models.user import User
+from utils.norms import norms_engine
+from utils.reports import LEVEL_HIGH, LEVEL_LOW, LEVEL_MEDIUM, build_report
+from utils.test_versions import data_for_result
+
+# Версия макета: при изменении оформления старые файлы кеша не используются
+PDF_LAYOUT_VERSION = 1
+
+# Студентов на страницу выборки при сборке архива группы
+COHORT_PAGE_SIZE = 50
+
+# Имена шрифтов, зарегистрированных в reportlab
+FONT_REGULAR = "ReportSans"
+FONT_BOLD = "ReportSans-Bold"
+
+PDF_MEDIA_TYPE = "application/pdf"
+ZIP_MEDIA_TYPE = "application/zip"
+
+class PdfUnavailableError(RuntimeError):
+    """Пакет reportlab или шрифт недоступен"""
+
+def pdf_available() -> bool:
+    """Установлен ли reportlab (импортируется только в процессах рендеринга)"""
+    return importlib.util.find_spec("reportlab") is not None
+
+def document_hash(document: dict) -> str:
+    """SHA-256 канонического JSON документа - ключ кеша и ETag"""
+    canonical = json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _format_date(value) -> str:
+    return value.astimezone(timezone.utc).strftime("%d.%m.%Y %H:%M UTC") if value else ""
+
+def student_document(user: User, latest: LatestTestResult, filename: str, test_data: dict) -> dict:
+    """
+    Документ отчета по студенту
+
+    Args:
+        user: Студент
+        latest: Последний результат по тесту
+        filename: Имя файла теста
+        test_data: Данные текущей версии теста из load_test_data
+
+    Returns:
+        dict: Документ для render_pdf
+    """
+    # Результат интерпретируется по версии теста, по которой он посчитан
+    version, test_data = data_for_result(filename, latest.version_hash, test_data)
+    percentiles = norms_engine.lookup(
+        latest.test_id, latest.version_hash, user.faculty, user.course, latest.scores
+    )
+    return {
+        "kind": "student",
+        "layout": PDF_LAYOUT_VERSION,
+        "test": {
+            "id": latest.test_id,
+            "title": test_data["title"],
+            "version": version,
+        },
+        "student": {
+            "id": user.id,
+            "name": f"{user.last_name} {user.first_name} {user.middle_name}",
+            "faculty": faculty_name(user.faculty),
+            "course": user.course,
+        },
+        "completed_at": _format_date(latest.completed_at),
+        "attempt_number": latest.attempt_number,
+        "careless": latest.is_careless,
+        "scales": build_report(filename, test_data, latest.scores, percentiles, version) or [],
+    }
+
+class CohortSummary:
+    """
+    Сводка по группе, накапливаемая по ходу сборки архива
+
+    Args:
+        test: Раздел test документа студента
+        faculty: Название факультета
+        course: Курс
+    """
+
+    def __init__(self, test: dict, faculty: str, course: int):
+        self.test = test
+        self.faculty = faculty
+        self.course = course
+        self.students = 0
+        self.careless = 0
+        self._scales = {}
+
+    def add(self, document: dict):
+        """Учитывает отчет студента"""
+        self.students += 1
+        self.careless += int(document["careless"])
+        for scale in document["scales"]:
+            totals = self._scales.setdefault(scale["scale"], {
+                "max_score": scale["max_score"], "sum": 0,
+                LEVEL_LOW: 0, LEVEL_MEDIUM: 0, LEVEL_HIGH: 0,
+            })
+            totals["sum"] += scale["score"]
+            totals[scale["level"]] += 1
+
+    def document(self) -> dict:
+        """Документ сводного отчета"""
+        scales = [
+            {
+                "scale": name,
+                "max_score": totals["max_score"],
+                "mean": round(totals["sum"] / self.students, 2) if self.students else 0,
+                "levels": [totals[LEVEL_LOW], totals[LEVEL_MEDIUM], totals[LEVEL_HIGH]],
+            }
+            for name, totals in self._scales.items()
+        ]
+        return {
+            "kind": "cohort",
+            "layout": PDF_LAYOUT_VERSION,
+            "test": self.test,
+            "faculty": self.faculty,
+            "course": self.course,
+            "students": self.students,
+            "careless": self.careless,
+            "scales": scales,
+        }
+
+# --- Рендеринг (выполняется в процессах пула) ---
+
+def _init_worker(font_path: str, bold_font_path: str):
+    """Регистрирует шрифты с кириллицей в процессе рендеринга"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont(FONT_REGULAR, font_path))
+    pdfmetrics.registerFont(TTFont(FONT_BOLD, bold_font_path if os.path.exists(bold_font_path) else font_path))
+
+def render_pdf(document: dict) -> bytes:
+    """
+    Рендерит документ в PDF
+
+    Args:
+        document: student_document или CohortSummary.document
+
+    Returns:
+        bytes: Содержимое PDF
+    """
+    from xml.sax.saxutils import escape
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    title_style = ParagraphStyle("title", fontName=FONT_BOLD, fontSize=15, leading=19, spaceAfter=4 * mm)
+    heading_style = ParagraphStyle("heading", fontName=FONT_BOLD, fontSize=11, leading=14, spaceBefore=3 * mm)
+    text_style = ParagraphStyle("text", fontName=FONT_REGULAR, fontSize=10, leading=13)
+    muted_style = ParagraphStyle("muted", parent=text_style, textColor=colors.grey)
+
+    def paragraph(text, style=text_style):
+        return Paragraph(escape(str(text)), style)
+
+    def table(rows, widths):
+        result = Table(rows, colWidths=widths, repeatRows=1)
+        result.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), FONT_REGULAR),
+            ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e8eef5")),
+            ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#9aa5b1")),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]))
+        return result
+
+    test = document["test"]
+    story = []
+
+    if document["kind"] == "student":
+        student = document["student"]
+        story.append(paragraph("Отчет о результатах тестирования", title_style))
+        story.append(paragraph(student["name"], heading_style))
+        story.append(paragraph(f"{student['faculty']}, {student['course']} курс"))
+        story.append(paragraph(
+            f"{test['title']}. Завершен: {document['completed_at']}, попытка {document['attempt_number']}"
+        ))
+        if document["careless"]:
+            story.append(paragraph("Ответы отмечены как возможно небрежные - интерпретировать с осторожностью", muted_style))
+        story.append(Spacer(1, 4 * mm))
+
+        rows = [["Шкала", "Балл", "Уровень", "Процентиль", "Относительно норм"]]
+        for scale in document["scales"]:
+            percentile = scale["percentile"]
+            rows.append([
+                scale["scale"],
+                f"{scale['score']} / {scale['max_score']}",
+                scale["level"],
+                f"{percentile:.0f}" if percentile is not None else "-",
+                scale["band"] or "норм недостаточно",
+            ])
+        story.append(table(rows, [42 * mm, 20 * mm, 24 * mm, 28 * mm, 48 * mm]))
+
+        for scale in document["scales"]:
+            story.append(paragraph(f"{scale['scale'].capitalize()}: {scale['level']} уровень", heading_style))
+            story.append(paragraph(scale["description"]))
+    else:
+        story.append(paragraph("Сводный отчет по группе", title_style))
+        story.append(paragraph(f"{document['faculty']}, {document['course']} курс", heading_style))
+        story.append(paragraph(test["title"]))
+        story.append(paragraph(
+            f"Студентов с результатом: {document['students']}, "
+            f"из них с возможно небрежными ответами: {document['careless']}"
+        ))
+        story.append(Spacer(1, 4 * mm))
+
+        rows = [["Шкала", "Средний балл", "Низкий", "Средний", "Высокий"]]
+        for scale in document["scales"]:
+            rows.append([
+                scale["scale"],
+                f"{scale['mean']:.1f} / {scale['max_score']}",
+                *[str(count) for count in scale["levels"]],
+            ])
+        story.append(table(rows, [45 * mm, 32 * mm, 25 * mm, 25 * mm, 25 * mm]))
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(
+        buffer, pagesize=A4, title=f"{test['title']}",
+        leftMargin=18 * mm, rightMargin=18 * mm, topMargin=16 * mm, bottomMargin=16 * mm,
+    ).build(story)
+    return buffer.getvalue()
+
+# --- Кеш файлов и пул процессов ---
+
+class PdfReportStore:
+    """
+    Кеш PDF на диске по хешу документа с рендерингом в пуле процессов
+
+    Файлов хранится не больше keep_files; вытесняются давно не
+    запрашивавшиеся (по mtime, который обновляется при попадании).
+
+    Args:
+        directory: Каталог кеша
+        workers: Процессов рендеринга
+        keep_files: Максимум файлов в кеше
+    """
+
+    def __init__(self, directory: str, workers: int, keep_files: int):
+        self.directory = directory
+        self.workers = workers
+        self.keep_files = keep_files
+        self.rendered = 0
+        self.hits = 0
+        self._pool = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._files = None
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.pdf")
+
+    def check_available(self):
+        """
+        Проверяет, что PDF можно рендерить
+
+        Raises:
+            PdfUnavailableError: Если нет reportlab или шрифта
+        """
+        if not pdf_available():
+            raise PdfUnavailableError("PDF-отчеты недоступны: установите reportlab")
+        font = get_settings().report_pdf_font
+        if not os.path.exists(font):
+            raise PdfUnavailableError(f"PDF-отчеты недоступны: нет шрифта {font}")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self.check_available()
+            settings = get_settings()
+            # spawn: как в utils/user_import.py, fork многопоточного процесса небезопасен
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.report_pdf_font, settings.report_pdf_font_bold),
+            )
+        return self._pool
+
+    def _lookup(self, path: str) -> bool:
+        """Есть ли файл в кеше (с отметкой использования)"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _store(self, path: str, content: bytes):
+        """Атомарно записывает файл и вытесняет лишние"""
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(content)
+        os.replace(temporary, path)
+
+        if self._files is None:
+            self._files = sum(1 for name in os.listdir(self.directory) if name.endswith(".pdf"))
+        else:
+            self._files += 1
+        # Вытеснение пачкой: listdir не на каждую запись
+        if self.keep_files > 0 and self._files > self.keep_files * 1.1:
+            self._prune()
+
+    def _prune(self):
+        """Удаляет давно не использованные файлы сверх keep_files"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pdf"):
+                full_path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(full_path), full_path))
+                except OSError:
+                    pass
+        entries.sort()
+        for _, full_path in entries[:max(len(entries) - self.keep_files, 0)]:
+            try:
+                os.remove(full_path)
+            except OSError:
+                pass
+        self._files = min(len(entries), self.keep_files)
+
+    async def get_or_render(self, document: dict) -> Tuple[str, str]:
+        """
+        Путь к PDF документа (рендерит, если его нет в кеше)
+
+        Args:
+            document: Документ отчета
+
+        Returns:
+            (хеш, путь к файлу)
+
+        Raises:
+            PdfUnavailableError: Если reportlab или шрифт недоступен
+        """
+        digest = document_hash(document)
+        path = self.path_for(digest)
+
+        pending = self._pending.get(digest)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return digest, path
+
+        if await run_in_threadpool(self._lookup, path):
+            self.hits += 1
+            return digest, path
+
+        # Пока проверялся кеш, рендер мог начать другой запрос
+        pending = self._pending.get(digest)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return digest, path
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[digest] = future
+        try:
+            content = await asyncio.wrap_future(self._get_pool().submit(render_pdf, document))
+            await run_in_threadpool(self._store, path, content)
+            self.rendered += 1
+            future.set_result(path)
+        except BaseException as e:
+            future.set_exception(e)
+            # Ожидающих нет - исключение не должно попасть в лог как необработанное
+            future.exception()
+            raise
+        finally:
+            del self._pending[digest]
+        return digest, path
+
+    def stats(self) -> dict:
+        return {
+            "available": pdf_available(),
+            "workers": self.workers,
+            "rendered": self.rendered,
+            "hits": self.hits,
+            "rendering": len(self._pending),
+            "files": self._files,
+            "keep_files": self.keep_files,
+        }
+
+    def shutdown(self):
+        """Останавливает пул процессов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+def _create_store() -> PdfReportStore:
+    settings = get_settings()
+    return PdfReportStore(settings.report_pdf_dir, settings.report_pdf_workers, settings.report_pdf_keep_files)
+
+# Кеш процесса (пул создается при первом отчете)
+pdf_store = _create_store()
+
+# --- Архив группы ---
+
+class _ZipStream(io.RawIOBase):
+    """Несжимаемый поток для zipfile: накопленные байты забираются take()"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _load_cohort_page(test_id: int, faculty, course, after_id: int) -> list:
+    """Страница студентов группы с результатом по тесту (по возрастанию id)"""
+    db = ReplicaSessionLocal()
+    try:
+        rows = db.execute(
+            select(User, LatestTestResult)
+            .join(LatestTestResult, LatestTestResult.user_id == User.id)
+            .where(
+                LatestTestResult.test_id == test_id,
+                User.faculty == faculty,
+                User.course == course,
+                User.id > after_id,
+            )
+            .order_by(User.id)
+            .limit(COHORT_PAGE_SIZE)
+        ).all()
+        db.expunge_all()
+        return rows
+    finally:
+        db.close()
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+def _archive_name(document: dict) -> str:
+    student = document["student"]
+    return f"{student['name'].replace(' ', '_')}_{student['id']}.pdf"
+
+async def stream_cohort_zip(test_id: int, filename: str, test_data: dict, faculty, course) -> AsyncIterator[bytes]:
+    """
+    ZIP с отчетами всех студентов группы и сводным отчетом (summary.pdf)
+
+    PDF уже сжаты, поэтому файлы кладутся в архив без сжатия (ZIP_STORED).
+
+    Args:
+        test_id: ID теста
+        filename: Имя файла теста
+        test_data: Данные теста
+        faculty: Код факультета
+        course: Номер курса
+
+    Yields:
+        bytes: Очередная часть архива
+    """
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED)
+    summary = None
+    after_id = 0
+
+    while True:
+        rows = await run_in_threadpool(_load_cohort_page, test_id, faculty, course, after_id)
+        if not rows:
+            break
+        after_id = rows[-1][0].id
+
+        documents = [student_document(user, latest, filename, test_data) for user, latest in rows]
+        if summary is None:
+            summary = CohortSummary(documents[0]["test"], faculty_name(faculty), course)
+
+        # Страница рендерится параллельно всеми процессами пула
+        rendered = await asyncio.gather(*(pdf_store.get_or_render(document) for document in documents))
+
+        for document, (_, path) in zip(documents, rendered):
+            summary.add(document)
+            content = await run_in_threadpool(_read_bytes, path)
+            archive.writestr(_archive_name(document), content)
+            yield stream.take()
+
+    if summary is not None:
+        _, path = await pdf_store.get_or_render(summary.document())
+        archive.writestr("summary.pdf", await run_in_threadpool(_read_bytes, path))
+
+    archive.close()
+    yield stream.take()
+
+def generated_at() -> str:
+    """Момент формирования архива для имени файла"""
+    return datetime.now(timezone.utc).strftime("%Y%m%d-%H%M")
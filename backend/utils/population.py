@@ -0,0 +1,677 @@
+"""
+Синтетическая популяция студентов для нагрузочных тестов и бенчмарков.
+
+Данные по форме совпадают с настоящими:
+- ФИО на кириллице с отчеством и женскими формами фамилий, уникальные
+  в пределах популяции (аффинная перестановка номеров комбинаций);
+- все факультеты и курсы справочников по умолчанию (models/reference.py)
+  с неравными долями групп;
+- bcrypt-хеши настоящих паролей: хешируется по одному разу каждый из
+  нескольких различных паролей, пользователи получают их по кругу;
+- попытки теста с ответами из модели латентных черт: общий фактор
+  с нагрузками шкал дает реалистичные корреляции баллов (адаптивность
+  против отчужденности и т.п.), трудности вопросов постоянны, повторные
+  попытки пользователя близки к первой; небольшая доля небрежных
+  анкет (одинаковые и случайные ответы) попадает во флаги качества.
+
+Все случайные величины считаются блоками из генераторов numpy с ключом
+(seed, тип блока, номер блока), поэтому при одном seed (и неизменных
+константах модуля) популяция совпадает независимо от порядка записи.
+
+Запись - COPY (psycopg2) пачками с коммитом после каждой; для SQLite
+и других драйверов - многострочный INSERT.
+"""
+
+import csv
+import io
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, select, text
+
+from auth.auth import get_password_hash
+from db.partitions import ensure_attempt_partition
+from models.attempt import LatestTestResult, TestAttempt
+from models.reference import DEFAULT_FACULTIES
+from models.user import User
+from utils.item_analysis import ANSWER_LABELS, CODE_NO, CODE_UNKNOWN, CODE_YES
+from utils.response_quality import assess_batch
+
+MALE_FIRST_NAMES = tuple("""
+    Александр Алексей Анатолий Андрей Антон Аркадий Арсений Артем Артур Богдан
+    Борис Вадим Валентин Валерий Василий Виктор Виталий Владимир Владислав Всеволод
+    Вячеслав Геннадий Георгий Глеб Григорий Даниил Денис Дмитрий Евгений Егор
+    Иван Игорь Илья Кирилл Константин Леонид Максим Марк Матвей Михаил
+    Назар Никита Николай Олег Павел Петр Роман Руслан Семен Сергей
+    Станислав Степан Тимофей Тимур Федор Филипп Эдуард Юрий Яков Ярослав
+""".split())
+
+FEMALE_FIRST_NAMES = tuple("""
+    Александра Алина Алиса Алла Анастасия Ангелина Анна Антонина Арина Валентина
+    Валерия Варвара Василиса Вера Вероника Виктория Виолетта Галина Дарья Диана
+    Ева Евгения Екатерина Елена Елизавета Жанна Злата Инна Ирина Карина
+    Кира Кристина Ксения Лариса Лидия Любовь Людмила Маргарита Марина Мария
+    Милана Надежда Наталья Нина Оксана Ольга Полина Раиса Светлана София
+    Стефания Таисия Тамара Татьяна Ульяна Эвелина Эмилия Юлия Яна Янина
+""".split())
+
+# Основы отчеств: + "ич" для мужчин, + "на" для женщин
+PATRONYMIC_STEMS = tuple("""
+    Александров Алексеев Анатольев Андреев Антонов Аркадьев Арсеньев Артемов Богданов Борисов
+    Вадимов Валентинов Валерьев Васильев Викторов Витальев Владимиров Владиславов Вячеславов Геннадьев
+    Георгиев Глебов Григорьев Даниилов Денисов Дмитриев Евгеньев Егоров Иванов Игорев
+    Кириллов Константинов Леонидов Максимов Матвеев Михайлов Николаев Олегов Павлов Петров
+    Романов Русланов Семенов Сергеев Станиславов Степанов Тимофеев Тимуров Федоров Филиппов
+    Эдуардов Юрьев Яковлев Ярославов Назаров
+""".split())
+
+# Фамилии в мужской форме; женская получается по окончанию (feminine_surname)
+SURNAMES = tuple(dict.fromkeys("""
+    Иванов Петров Смирнов Кузнецов Попов Васильев Соколов Михайлов Новиков Федоров
+    Морозов Волков Алексеев Лебедев Семенов Егоров Павлов Козлов Степанов Николаев
+    Орлов Андреев Макаров Никитин Захаров Зайцев Соловьев Борисов Яковлев Григорьев
+    Романов Воробьев Сергеев Кузьмин Фролов Александров Дмитриев Королев Гусев Киселев
+    Ильин Максимов Поляков Сорокин Виноградов Ковалев Белов Медведев Антонов Тарасов
+    Жуков Баранов Филиппов Комаров Давыдов Беляев Герасимов Богданов Осипов Сидоров
+    Матвеев Титов Марков Миронов Крылов Куликов Карпов Власов Мельников Денисов
+    Гаврилов Тихонов Казаков Афанасьев Данилов Савельев Тимофеев Фомин Чернов Абрамов
+    Мартынов Ефимов Федотов Щербаков Назаров Калинин Исаев Чернышев Быков Маслов
+    Родионов Коновалов Лазарев Воронин Климов Филатов Пономарев Голубев Кудрявцев Прохоров
+    Наумов Потапов Журавлев Овчинников Трофимов Леонов Соболев Ермаков Колесников Гончаров
+    Емельянов Никифоров Грачев Котов Гришин Ефремов Архипов Громов Кириллов Малышев
+    Панов Моисеев Румянцев Акимов Кондратьев Бирюков Горбунов Анисимов Еремин Тихомиров
+    Галкин Лукьянов Михеев Скворцов Юдин Белоусов Нестеров Симонов Прокофьев Харитонов
+    Князев Цветков Левин Митрофанов Воронов Аксенов Мальцев Логинов Горшков Савин
+    Краснов Майоров Демидов Елисеев Рыбаков Сафонов Плотников Демин Хохлов Фадеев
+    Молчанов Игнатов Литвинов Ершов Ушаков Дементьев Рябов Мухин Калашников Леонтьев
+    Лобанов Корнилов Евдокимов Бородин Платонов Некрасов Балашов Бобров Жданов Блинов
+    Коротков Муравьев Крюков Богомолов Дроздов Лавров Зуев Петухов Ларин Никулин
+    Серов Терентьев Зотов Устинов Фокин Самойлов Сахаров Шишкин Черкасов Чистяков
+    Носов Спиридонов Карасев Авдеев Воронцов Зверев Селезнев Нечаев Седов Фирсов
+    Высоцкий Ковальский Соколовский Жуковский Островский Полянский Каминский Лисовский Вишневский Домбровский
+    Ковальчук Шевчук Кравченко Бондаренко Лукашевич Новик Жук Сидорович Климович Ярошевич
+    Мицкевич Радкевич Шубич Гуринович Позняк Лешкевич Богданович Романович Савицкий Рудницкий
+""".split()))
+
+# Доли факультетов и курсов (старшие курсы меньше: отчисления, магистратура)
+FACULTY_WEIGHTS = {
+    "FIB": 0.14,
+    "FKSIS": 0.24,
+    "FKP": 0.14,
+    "FRE": 0.13,
+    "IEF": 0.19,
+    "FITU": 0.16,
+}
+COURSE_WEIGHTS = {
+    1: 0.24,
+    2: 0.22,
+    3: 0.20,
+    4: 0.18,
+    5: 0.10,
+    6: 0.06,
+}
+
+# Код факультета -> название (для входа через API)
+FACULTY_NAMES = dict(DEFAULT_FACULTIES)
+
+# Нагрузки шкал на общий фактор "благополучной адаптации": корреляция
+# латентных черт двух шкал равна произведению их нагрузок
+SCALE_LOADINGS = {
+    "адаптивность": 0.7,
+    "конформность": 0.35,
+    "интерактивность": 0.55,
+    "депрессивность": -0.6,
+    "ностальгия": -0.45,
+    "отчужденность": -0.65,
+}
+# Нагрузка шкал, которых нет в SCALE_LOADINGS, и вопросов вне шкал
+DEFAULT_LOADING = 0.3
+
+# Сдвиг общего фактора за каждый курс после первого (адаптация растет)
+COURSE_EFFECT = 0.12
+
+# Крутизна ответа на вопрос (дискриминативность) и разброс трудностей
+ITEM_DISCRIMINATION = 1.6
+ITEM_DIFFICULTY_SD = 0.8
+
+# Доля ответов "не знаю" у внимательных респондентов
+UNKNOWN_RATE = 0.06
+
+# Разброс черт между попытками одного пользователя
+RETEST_NOISE = 0.3
+
+# Пользователей в одном блоке случайных величин (входит в ключ генератора:
+# после изменения тот же seed дает другую популяцию)
+TRAIT_BLOCK_SIZE = 10000
+
+# Строк в одной пачке COPY/INSERT (попытки генерируются теми же пачками,
+# поэтому размер тоже входит в ключ генератора)
+WRITE_CHUNK_SIZE = 20000
+
+# Различных паролей по умолчанию (каждый хешируется bcrypt один раз)
+DEFAULT_DISTINCT_PASSWORDS = 64
+
+# Ключи генераторов numpy по типу блока
+_STREAM_ITEMS = 0
+_STREAM_USERS = 1
+_STREAM_ATTEMPTS = 2
+_STREAM_NAMES = 3
+
+class PopulationError(ValueError):
+    """Популяция с такими параметрами не может быть построена"""
+
+def feminine_surname(surname: str) -> str:
+    """
+    Женская форма фамилии
+
+    Args:
+        surname: Фамилия в мужской форме
+
+    Returns:
+        str: Иванов -> Иванова, Высоцкий -> Высоцкая, Шевчук -> Шевчук
+    """
+    if surname.endswith(("ов", "ев", "ин")):
+        return surname + "а"
+    if surname.endswith("кий"):
+        return surname[:-2] + "ая"
+    return surname
+
+def name_capacity() -> int:
+    """Сколько уникальных ФИО может дать генератор"""
+    return 2 * len(SURNAMES) * len(MALE_FIRST_NAMES) * len(PATRONYMIC_STEMS)
+
+def benchmark_password(index: int, distinct_passwords: int) -> str:
+    """
+    Пароль пользователя с порядковым номером index
+
+    Args:
+        index: Номер пользователя в популяции (с 0)
+        distinct_passwords: Количество различных паролей
+
+    Returns:
+        str: Пароль в открытом виде
+    """
+    return f"bench-{index % distinct_passwords:04d}"
+
+def hash_benchmark_passwords(distinct_passwords: int, workers: Optional[int] = None) -> List[str]:
+    """
+    Хеширует все различные пароли популяции в пуле процессов
+
+    Args:
+        distinct_passwords: Количество различных паролей
+        workers: Процессов пула (по умолчанию - число ядер)
+
+    Returns:
+        List[str]: Хеш пароля с номером k по индексу k
+    """
+    passwords = [benchmark_password(k, distinct_passwords) for k in range(distinct_passwords)]
+    # spawn: как в utils/user_import.py, fork многопоточного процесса небезопасен
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as pool:
+        return list(pool.map(get_password_hash, passwords))
+
+class _TestModel:
+    """
+    Ключ шкал теста в виде массивов для векторной генерации ответов
+
+    Attributes:
+        n_items: Количество вопросов
+        scale_names: Шкалы в порядке столбцов черт
+        item_trait: Номер черты каждого вопроса (0 - общий фактор)
+        item_keyed_yes: Ключевой ответ вопроса - "да" (иначе "нет")
+        difficulty: Трудность каждого вопроса
+        loadings: Нагрузка каждой шкалы на общий фактор
+    """
+
+    def __init__(self, test_data: dict, seed: int):
+        self.n_items = len(test_data["questions"])
+        scales = test_data.get("scales") or {}
+        self.scale_names = list(scales)
+
+        self.item_trait = np.zeros(self.n_items, dtype=np.intp)
+        self.item_keyed_yes = np.ones(self.n_items, dtype=bool)
+        for column, scale_name in enumerate(self.scale_names, start=1):
+            scale = scales[scale_name]
+            for keyed_yes, items in ((True, scale.get("positive", [])), (False, scale.get("negative", []))):
+                for number in items:
+                    # Вопрос из нескольких шкал относится к первой из них
+                    if 1 <= number <= self.n_items and self.item_trait[number - 1] == 0:
+                        self.item_trait[number - 1] = column
+                        self.item_keyed_yes[number - 1] = keyed_yes
+
+        self.loadings = np.array(
+            [SCALE_LOADINGS.get(name.lower(), DEFAULT_LOADING) for name in self.scale_names],
+            dtype=np.float64
+        )
+        rng = np.random.default_rng([seed, _STREAM_ITEMS])
+        self.difficulty = rng.normal(0.0, ITEM_DIFFICULTY_SD, self.n_items)
+
+        self._positive = [
+            np.array([n - 1 for n in scales[name].get("positive", []) if 1 <= n <= self.n_items], dtype=np.intp)
+            for name in self.scale_names
+        ]
+        self._negative = [
+            np.array([n - 1 for n in scales[name].get("negative", []) if 1 <= n <= self.n_items], dtype=np.intp)
+            for name in self.scale_names
+        ]
+
+    def traits(self, general: np.ndarray, specific: np.ndarray) -> np.ndarray:
+        """
+        Черты шкал из общего и специфических факторов
+
+        Args:
+            general: Общий фактор (n)
+            specific: Специфические факторы (n x шкал)
+
+        Returns:
+            np.ndarray: Столбец 0 - общий фактор, далее черты шкал
+        """
+        loadings = self.loadings
+        scale_traits = general[:, None] * loadings + specific * np.sqrt(1.0 - loadings ** 2)
+        return np.column_stack([general * DEFAULT_LOADING, scale_traits])
+
+    def answer_matrix(self, rng: np.random.Generator, traits: np.ndarray,
+                      careless: np.ndarray) -> np.ndarray:
+        """
+        Генерирует матрицу ответов в кодах utils/item_analysis.py
+
+        Args:
+            rng: Генератор блока
+            traits: Черты попыток (см. traits)
+            careless: Небрежная анкета: 0 - нет, 1 - одинаковые ответы, 2 - случайные
+
+        Returns:
+            np.ndarray: Матрица int8 (попытки x вопросы)
+        """
+        n_rows = traits.shape[0]
+        logits = ITEM_DISCRIMINATION * (traits[:, self.item_trait] - self.difficulty)
+        keyed = rng.random((n_rows, self.n_items)) < 1.0 / (1.0 + np.exp(-logits))
+
+        says_yes = keyed == self.item_keyed_yes
+        matrix = np.where(says_yes, CODE_YES, CODE_NO).astype(np.int8)
+        matrix[rng.random((n_rows, self.n_items)) < UNKNOWN_RATE] = CODE_UNKNOWN
+
+        # Небрежные анкеты: один и тот же ответ подряд или ответы наугад
+        same = careless == 1
+        matrix[same] = rng.integers(CODE_NO, CODE_UNKNOWN + 1, same.sum(), dtype=np.int8)[:, None]
+        random_rows = careless == 2
+        matrix[random_rows] = rng.integers(CODE_NO, CODE_UNKNOWN + 1, (random_rows.sum(), self.n_items), dtype=np.int8)
+        return matrix
+
+    def scores(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Сырые баллы по шкалам (как utils/scoring.py, но для всей матрицы)
+
+        Returns:
+            np.ndarray: Баллы (попытки x шкалы)
+        """
+        yes = matrix == CODE_YES
+        no = matrix == CODE_NO
+        result = np.zeros((matrix.shape[0], len(self.scale_names)), dtype=np.int64)
+        for column, (positive, negative) in enumerate(zip(self._positive, self._negative)):
+            result[:, column] = yes[:, positive].sum(axis=1) + no[:, negative].sum(axis=1)
+        return result
+
+class PopulationGenerator:
+    """
+    Детерминированная популяция: строки пользователей и попыток по номерам
+
+    Args:
+        seed: Зерно генераторов
+        users: Размер популяции
+        test_data: Данные теста из load_test_data
+        until: Верхняя граница дат регистрации и прохождения
+        days: За сколько дней до until регистрируются пользователи
+        careless_ratio: Доля небрежных анкет
+        offset: Номер первого пользователя (продолжение ранее созданной популяции)
+    """
+
+    def __init__(self, seed: int, users: int, test_data: dict, until: datetime,
+                 days: int = 365, careless_ratio: float = 0.03, offset: int = 0):
+        capacity = name_capacity()
+        if offset + users > capacity:
+            raise PopulationError(f"Уникальных ФИО не больше {capacity}, запрошено {offset + users}")
+        if not test_data or not test_data.get("questions"):
+            raise PopulationError("У теста нет вопросов")
+
+        self.seed = seed
+        self.users = users
+        self.offset = offset
+        self.until = until
+        self.span_seconds = days * 86400
+        self.careless_ratio = careless_ratio
+        self.test_data = test_data
+        self.model = _TestModel(test_data, seed)
+
+        # Аффинная перестановка номеров комбинаций ФИО: index -> (a * index + b) mod N
+        rng = np.random.default_rng([seed, _STREAM_NAMES])
+        self._name_space = capacity
+        multiplier = int(rng.integers(capacity // 3, capacity))
+        while math.gcd(multiplier, capacity) != 1:
+            multiplier += 1
+        self._multiplier = multiplier
+        self._shift = int(rng.integers(0, capacity))
+
+        self._faculties = list(FACULTY_WEIGHTS)
+        self._faculty_p = np.array(list(FACULTY_WEIGHTS.values())) / sum(FACULTY_WEIGHTS.values())
+        self._courses = list(COURSE_WEIGHTS)
+        self._course_p = np.array(list(COURSE_WEIGHTS.values())) / sum(COURSE_WEIGHTS.values())
+        self._user_block = lru_cache(maxsize=8)(self._build_user_block)
+
+    def _build_user_block(self, block: int) -> Dict[str, np.ndarray]:
+        """Случайные величины TRAIT_BLOCK_SIZE пользователей блока"""
+        rng = np.random.default_rng([self.seed, _STREAM_USERS, block])
+        size = TRAIT_BLOCK_SIZE
+        course = rng.choice(len(self._courses), size=size, p=self._course_p)
+        general = rng.normal(0.0, 1.0, size) + COURSE_EFFECT * course
+        return {
+            "faculty": rng.choice(len(self._faculties), size=size, p=self._faculty_p),
+            "course": course,
+            # Регистрация раньше у старших курсов
+            "created_before": np.clip(
+                rng.random(size) * self.span_seconds * (0.4 + 0.12 * course), 0, self.span_seconds
+            ),
+            "general": general,
+            "specific": rng.normal(0.0, 1.0, (size, len(self.model.scale_names))),
+            "careless": rng.choice(
+                3, size=size,
+                p=[1 - self.careless_ratio, self.careless_ratio / 2, self.careless_ratio / 2]
+            ),
+        }
+
+    def _user_values(self, indices: np.ndarray, name: str) -> np.ndarray:
+        """Значение name для пользователей с номерами indices"""
+        blocks = indices // TRAIT_BLOCK_SIZE
+        positions = indices % TRAIT_BLOCK_SIZE
+        first = self._user_block(int(blocks[0]))[name]
+        result = np.empty((len(indices),) + first.shape[1:], dtype=first.dtype)
+        for block in np.unique(blocks):
+            mask = blocks == block
+            result[mask] = self._user_block(int(block))[name][positions[mask]]
+        return result
+
+    def fio(self, index: int) -> Tuple[str, str, str]:
+        """
+        ФИО пользователя с номером index (уникально в пределах name_capacity)
+
+        Returns:
+            Tuple[str, str, str]: (фамилия, имя, отчество)
+        """
+        code = (self._multiplier * index + self._shift) % self._name_space
+        female, code = code % 2, code // 2
+        code, surname = divmod(code, len(SURNAMES))
+        patronymic, first = divmod(code, len(MALE_FIRST_NAMES))
+        if female:
+            return (feminine_surname(SURNAMES[surname]), FEMALE_FIRST_NAMES[first],
+                    PATRONYMIC_STEMS[patronymic] + "на")
+        return SURNAMES[surname], MALE_FIRST_NAMES[first], PATRONYMIC_STEMS[patronymic] + "ич"
+
+    def user_rows(self, start: int, stop: int, first_id: int, password_hashes: Sequence[str]) -> List[dict]:
+        """
+        Строки таблицы users для пользователей с номерами [start, stop)
+
+        Args:
+            start: Первый номер (относительно offset)
+            stop: Номер после последнего
+            first_id: users.id пользователя с номером 0
+            password_hashes: Результат hash_benchmark_passwords
+
+        Returns:
+            List[dict]: Значения столбцов users
+        """
+        indices = np.arange(self.offset + start, self.offset + stop)
+        faculty = self._user_values(indices, "faculty")
+        course = self._user_values(indices, "course")
+        created_before = self._user_values(indices, "created_before")
+
+        rows = []
+        for position, index in enumerate(indices.tolist()):
+            last_name, first_name, middle_name = self.fio(index)
+            rows.append({
+                "id": first_id + index - self.offset,
+                "first_name": first_name,
+                "last_name": last_name,
+                "middle_name": middle_name,
+                "faculty": self._faculties[faculty[position]],
+                "course": self._courses[course[position]],
+                "password_hash": password_hashes[index % len(password_hashes)],
+                "created_at": self.until - timedelta(seconds=float(created_before[position])),
+            })
+        return rows
+
+    def credentials(self, count: int, distinct_passwords: int) -> Iterable[Tuple]:
+        """
+        Данные для входа первых count пользователей
+
+        Returns:
+            Iterable[Tuple]: (фамилия, имя, отчество, факультет, курс, пароль)
+        """
+        count = min(count, self.users)
+        indices = np.arange(self.offset, self.offset + count)
+        faculty = self._user_values(indices, "faculty")
+        course = self._user_values(indices, "course")
+        for position, index in enumerate(indices.tolist()):
+            yield (*self.fio(index), FACULTY_NAMES[self._faculties[faculty[position]]],
+                   self._courses[course[position]], benchmark_password(index, distinct_passwords))
+
+    def attempt_rows(self, test_id: int, test_title: str, attempts: int, start: int, stop: int,
+                     first_user_id: int, first_attempt_id: int) -> Tuple[List[dict], List[dict]]:
+        """
+        Строки test_attempts и latest_test_results для попыток [start, stop)
+
+        Попытка j принадлежит пользователю j mod users и имеет номер
+        j // users + 1, поэтому у каждого пользователя попытки идут
+        подряд по времени, а последняя попытка - одна из финальных users.
+
+        Args:
+            test_id: ID теста
+            test_title: Название теста для поля result
+            attempts: Всего попыток в популяции
+            start: Первая попытка пачки
+            stop: Попытка после последней
+            first_user_id: users.id пользователя с номером 0
+            first_attempt_id: test_attempts.id попытки 0
+
+        Returns:
+            Tuple[List[dict], List[dict]]: Попытки и последние результаты
+        """
+        model = self.model
+        numbers = np.arange(start, stop)
+        user_offsets = numbers % self.users
+        indices = user_offsets + self.offset
+        attempt_numbers = numbers // self.users + 1
+        max_attempts = -(-attempts // self.users)
+
+        rng = np.random.default_rng([self.seed, _STREAM_ATTEMPTS, start])
+        specific = self._user_values(indices, "specific")
+        general = self._user_values(indices, "general")
+        traits = model.traits(
+            general + rng.normal(0.0, RETEST_NOISE, len(numbers)),
+            specific + rng.normal(0.0, RETEST_NOISE, specific.shape)
+        )
+        matrix = model.answer_matrix(rng, traits, self._user_values(indices, "careless"))
+        scores = model.scores(matrix)
+        quality = assess_batch(matrix, self.test_data)
+
+        # Попытки пользователя равномерно между регистрацией и until
+        created_before = self._user_values(indices, "created_before")
+        completed_before = created_before * (1.0 - (attempt_numbers - 1 + rng.random(len(numbers))) / max_attempts)
+
+        labels = list(ANSWER_LABELS)
+        attempt_rows, latest_rows = [], []
+        for position in range(len(numbers)):
+            completed_at = self.until - timedelta(seconds=float(completed_before[position]))
+            scale_scores = dict(zip(model.scale_names, scores[position].tolist()))
+            result = {
+                # Как во фронтенде: число отвеченных вопросов
+                "score": model.n_items,
+                "totalQuestions": model.n_items,
+                "completedAt": completed_at.isoformat(),
+                "testTitle": test_title,
+            }
+            attempt_id = first_attempt_id + int(numbers[position])
+            user_id = first_user_id + int(user_offsets[position])
+            attempt_rows.append({
+                "id": attempt_id,
+                "user_id": user_id,
+                "test_id": test_id,
+                "attempt_number": int(attempt_numbers[position]),
+                "answers": [labels[code] for code in matrix[position].tolist()],
+                "result": result,
+                "scores": scale_scores or None,
+                "quality": quality[position],
+                "completed_at": completed_at,
+            })
+            if numbers[position] >= attempts - self.users:
+                latest_rows.append({
+                    "user_id": user_id,
+                    "test_id": test_id,
+                    "attempt_id": attempt_id,
+                    "attempt_number": int(attempt_numbers[position]),
+                    "result": result,
+                    "scores": scale_scores or None,
+                    "is_careless": bool(quality[position]["flags"]),
+                    "completed_at": completed_at,
+                })
+        return attempt_rows, latest_rows
+
+def _copy_value(value):
+    """Значение столбца в формате CSV для COPY"""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    # None записывается пустым полем без кавычек - это NULL
+    return value
+
+def _copy_rows(connection, table, rows: List[dict]):
+    """Записывает строки одной командой COPY ... FROM STDIN (psycopg2)"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+def write_rows(connection, table, rows: List[dict]):
+    """
+    Записывает пачку строк: COPY для psycopg2, иначе многострочный INSERT
+
+    Args:
+        connection: Соединение SQLAlchemy внутри транзакции
+        table: Таблица (Model.__table__)
+        rows: Значения столбцов; у всех строк одинаковые ключи
+    """
+    if not rows:
+        return
+    if connection.dialect.driver == "psycopg2":
+        _copy_rows(connection, table, rows)
+    else:
+        connection.execute(insert(table), rows)
+
+def next_id(connection, column) -> int:
+    """Первый свободный id после уже существующих строк"""
+    return (connection.execute(select(func.max(column))).scalar() or 0) + 1
+
+def _finish_bulk_load(engine):
+    """
+    Сдвигает последовательности за явно записанные id и обновляет статистику
+
+    COPY с явными id не продвигает последовательности, а статистика
+    планировщика без ANALYZE появится только после autovacuum.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        connection.execute(text(
+            "SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(id) FROM users))"
+        ))
+        connection.execute(text(
+            "SELECT setval('test_attempts_id_seq', (SELECT max(id) FROM test_attempts))"
+        ))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in (User.__table__, TestAttempt.__table__, LatestTestResult.__table__):
+            connection.execute(text(f"ANALYZE {table.name}"))
+
+def write_population(engine, generator: PopulationGenerator, test_id: int, test_title: str,
+                     attempts: int, password_hashes: Sequence[str],
+                     progress: Optional[Callable[[str, int, int], None]] = None) -> dict:
+    """
+    Записывает пользователей и попытки популяции в БД
+
+    Каждая пачка - отдельная транзакция. id назначаются явно после
+    существующих строк, поэтому популяцию можно добавлять в непустую БД
+    (ФИО не пересекаются с другими популяциями того же seed при разных offset).
+
+    Args:
+        engine: Движок основной БД
+        generator: Генератор популяции
+        test_id: ID теста, для которого создаются попытки
+        test_title: Название теста
+        attempts: Всего попыток (у пользователя j mod users - по кругу)
+        password_hashes: Результат hash_benchmark_passwords
+        progress: Вызывается после каждой пачки: (таблица, записано, всего)
+
+    Returns:
+        dict: Диапазоны id и количество записанных строк
+    """
+    with engine.connect() as connection:
+        first_user_id = next_id(connection, User.id)
+        first_attempt_id = next_id(connection, TestAttempt.id)
+
+    users = generator.users
+    for start in range(0, users, WRITE_CHUNK_SIZE):
+        stop = min(start + WRITE_CHUNK_SIZE, users)
+        rows = generator.user_rows(start, stop, first_user_id, password_hashes)
+        with engine.begin() as connection:
+            write_rows(connection, User.__table__, rows)
+        if progress:
+            progress("users", stop, users)
+
+    latest_count = 0
+    for start in range(0, attempts, WRITE_CHUNK_SIZE):
+        stop = min(start + WRITE_CHUNK_SIZE, attempts)
+        attempt_rows, latest_rows = generator.attempt_rows(
+            test_id, test_title, attempts, start, stop, first_user_id, first_attempt_id
+        )
+
+        # Секции test_attempts (PostgreSQL) - по одному вызову на месяц пачки
+        months = {}
+        for row in attempt_rows:
+            months.setdefault((row["completed_at"].year, row["completed_at"].month), row["completed_at"])
+        for moment in months.values():
+            ensure_attempt_partition(engine, test_id, moment)
+
+        with engine.begin() as connection:
+            write_rows(connection, TestAttempt.__table__, attempt_rows)
+            write_rows(connection, LatestTestResult.__table__, latest_rows)
+        latest_count += len(latest_rows)
+        if progress:
+            progress("attempts", stop, attempts)
+
+    _finish_bulk_load(engine)
+
+    return {
+        "first_user_id": first_user_id,
+        "users": users,
+        "first_attempt_id": first_attempt_id if attempts else None,
+        "attempts": attempts,
+        "latest_results": latest_count,
+    }
@@ -0,0 +1,399 @@
+"""
+Статистический профилировщик на sys._current_frames (без внешних инструментов).
+
+Поток-сэмплер с заданным интервалом снимает стеки всех потоков процесса
+и считает одинаковые стеки. Результат - collapsed stacks (формат
+flamegraph.pl / speedscope: "поток;функция;функция количество") или
+JSON speedscope (https://www.speedscope.app).
+
+Способы запуска на работающем воркере:
+- GET /admin/profile?seconds=10 - профиль за N секунд в ответе;
+- сигнал PROFILE_SIGNAL (по умолчанию SIGUSR2) - профиль за
+  PROFILE_SIGNAL_SECONDS секунд в файл в PROFILE_DIR;
+- PROFILE_CONTINUOUS=True - постоянный сэмплинг с низкой частотой,
+  окно PROFILE_WINDOW_SECONDS пишется в отдельный файл, старые файлы
+  удаляются (хранятся последние PROFILE_KEEP_FILES).
+
+Потоки, ожидающие ввода-вывода или блокировки (цикл событий в select,
+свободные потоки пула), по умолчанию не учитываются: в профиль
+попадает только работа CPU и ожидание внутри кода приложения.
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+
+# Максимальная длительность профиля по запросу (секунды)
+MAX_PROFILE_SECONDS = 120
+
+# Максимальная глубина стека в одном сэмпле
+MAX_STACK_DEPTH = 200
+
+# Функции-листья, означающие простой потока: (имя файла, функция)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    ("_base.py", "wait"),
+    ("thread.py", "_worker"),
+}
+
+def _frame_label(code, lineno: int) -> str:
+    """Подпись кадра: функция (файл:строка)"""
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+class StackSampler:
+    """
+    Сэмплер стеков всех потоков процесса
+
+    Attributes:
+        interval: Интервал между сэмплами (секунды)
+        include_idle: Учитывать простаивающие потоки
+        samples: Счетчик (поток, стек от корня к листу) -> количество сэмплов
+    """
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._labels: Dict[Tuple, str] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _label(self, frame) -> str:
+        """Подпись кадра (кешируется по коду и строке)"""
+        key = (frame.f_code, frame.f_lineno)
+        label = self._labels.get(key)
+        if label is None:
+            label = self._labels[key] = _frame_label(frame.f_code, frame.f_lineno)
+        return label
+
+    def _is_idle(self, frame) -> bool:
+        """Лист стека - ожидание ввода-вывода или блокировки"""
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+    def sample_once(self):
+        """Снимает стеки всех потоков, кроме самого сэмплера"""
+        own_ident = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                if not self.include_idle and self._is_idle(frame):
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(self._label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+
+                self.samples[(names.get(ident, str(ident)), tuple(stack))] += 1
+            self.sample_count += 1
+
+    def _run(self):
+        """Цикл сэмплинга с постоянным шагом"""
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            self.sample_once()
+            next_at += self.interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Сэмплер не успевает - не пытаемся догонять пропущенные сэмплы
+                next_at = time.perf_counter()
+
+    def start(self):
+        """Запускает сэмплинг в фоновом потоке"""
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает сэмплинг"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.time()
+
+    def take(self) -> "StackSampler":
+        """
+        Забирает накопленные сэмплы, сэмплер продолжает работу с нуля
+
+        Returns:
+            StackSampler: Снимок с накопленными сэмплами (остановленный)
+        """
+        snapshot = StackSampler(self.interval, self.include_idle)
+        now = time.time()
+        with self._lock:
+            snapshot.samples, self.samples = self.samples, Counter()
+            snapshot.sample_count, self.sample_count = self.sample_count, 0
+            snapshot.started_at, self.started_at = self.started_at, now
+        snapshot.stopped_at = now
+        return snapshot
+
+    def to_collapsed(self) -> str:
+        """
+        Профиль в формате collapsed stacks
+
+        Returns:
+            str: Строки "поток;кадр;...;кадр количество"
+        """
+        lines = [
+            ";".join((thread_name,) + stack) + f" {count}"
+            for (thread_name, stack), count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def to_speedscope(self, name: str = "profile") -> dict:
+        """
+        Профиль в формате speedscope (по одному профилю на поток)
+
+        Args:
+            name: Название профиля
+
+        Returns:
+            dict: JSON speedscope
+        """
+        frames: List[dict] = []
+        frame_index: Dict[str, int] = {}
+        profiles: Dict[str, dict] = {}
+
+        for (thread_name, stack), count in self.samples.most_common():
+            indices = []
+            for label in stack:
+                index = frame_index.get(label)
+                if index is None:
+                    index = frame_index[label] = len(frames)
+                    function, _, location = label.rpartition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frames.append({"name": function, "file": file, "line": int(line)})
+                indices.append(index)
+
+            profile = profiles.setdefault(thread_name, {
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": 0,
+                "samples": [],
+                "weights": []
+            })
+            weight = count * self.interval
+            profile["samples"].append(indices)
+            profile["weights"].append(weight)
+            profile["endValue"] += weight
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "university-tests stack sampler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": sorted(profiles.values(), key=lambda profile: -profile["endValue"])
+        }
+
+def profile_for(seconds: float, interval: float = 0.01, include_idle: bool = False) -> StackSampler:
+    """
+    Снимает профиль за указанное время (блокирует вызывающий поток)
+
+    Args:
+        seconds: Длительность
+        interval: Интервал сэмплинга
+        include_idle: Учитывать простаивающие потоки
+
+    Returns:
+        StackSampler: Остановленный сэмплер с результатом
+    """
+    sampler = StackSampler(interval, include_idle)
+    sampler.start()
+    time.sleep(seconds)
+    sampler.stop()
+    return sampler
+
+def write_profile(sampler: StackSampler, directory: str, prefix: str, fmt: str = "speedscope") -> str:
+    """
+    Сохраняет профиль в файл
+
+    Args:
+        sampler: Сэмплер с результатом
+        directory: Каталог
+        prefix: Начало имени файла
+        fmt: "speedscope" или "collapsed"
+
+    Returns:
+        str: Путь к файлу
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.fromtimestamp(sampler.started_at or time.time()).strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(directory, f"{prefix}-{os.getpid()}-{stamp}")
+
+    if fmt == "collapsed":
+        path = base + ".collapsed.txt"
+        content = sampler.to_collapsed()
+    else:
+        path = base + ".speedscope.json"
+        content = json.dumps(sampler.to_speedscope(os.path.basename(base)), ensure_ascii=False)
+
+    # Запись через временный файл: читатель не увидит недописанный профиль
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+# Один профиль по запросу или сигналу за раз
+_on_demand_lock = threading.Lock()
+
+def acquire_on_demand() -> bool:
+    """Занимает слот профилирования по запросу (False - уже идет другой профиль)"""
+    return _on_demand_lock.acquire(blocking=False)
+
+def release_on_demand():
+    """Освобождает слот профилирования по запросу"""
+    _on_demand_lock.release()
+
+def _profile_to_disk(seconds: float, interval: float):
+    """Профиль по сигналу: пишется в PROFILE_DIR"""
+    try:
+        sampler = profile_for(seconds, interval)
+        path = write_profile(sampler, get_settings().profile_dir, "signal")
+        print(f"🔥 Профиль за {seconds:.0f} с сохранен: {path}")
+    except Exception as e:
+        print(f"⚠️ Ошибка профилирования по сигналу: {e}")
+    finally:
+        release_on_demand()
+
+def install_profile_signal_handler() -> Optional[str]:
+    """
+    Устанавливает обработчик сигнала PROFILE_SIGNAL
+
+    Должен вызываться из главного потока процесса.
+
+    Returns:
+        str или None: Имя сигнала или None, если обработчик не установлен
+    """
+    settings = get_settings()
+    signal_name = settings.profile_signal
+    signum = getattr(signal, signal_name, None) if signal_name else None
+    if signum is None:
+        return None
+
+    def handle(signum, frame):
+        # Обработчик сигнала должен вернуться быстро: профиль снимает отдельный поток
+        if not acquire_on_demand():
+            print("⚠️ Профилирование уже выполняется, сигнал пропущен")
+            return
+        threading.Thread(
+            target=_profile_to_disk,
+            args=(settings.profile_signal_seconds, settings.profile_interval_ms / 1000),
+            name="profile-signal",
+            daemon=True
+        ).start()
+
+    try:
+        signal.signal(signum, handle)
+    except ValueError:
+        # Не главный поток
+        return None
+    return signal_name
+
+class ContinuousProfiler:
+    """
+    Постоянный сэмплинг с низкой частотой и ротацией файлов профиля
+
+    Attributes:
+        directory: Каталог профилей
+        window_seconds: Длительность одного файла профиля
+        keep_files: Сколько последних файлов хранить
+    """
+
+    def __init__(self, directory: str, interval: float, window_seconds: float, keep_files: int):
+        self.directory = directory
+        self.window_seconds = window_seconds
+        self.keep_files = keep_files
+        self.sampler = StackSampler(interval)
+        self.files_written = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rotate(self):
+        """Удаляет старые файлы сверх keep_files"""
+        prefix = f"continuous-{os.getpid()}-"
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith(prefix))
+        for name in names[:-self.keep_files] if self.keep_files > 0 else []:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _flush(self):
+        """Записывает накопленное окно в файл"""
+        snapshot = self.sampler.take()
+        if snapshot.samples:
+            write_profile(snapshot, self.directory, "continuous", fmt="collapsed")
+            self.files_written += 1
+            self._rotate()
+
+    def _run(self):
+        """Цикл записи окон"""
+        while not self._stop.wait(self.window_seconds):
+            try:
+                self._flush()
+            except Exception as e:
+                print(f"⚠️ Ошибка записи профиля: {e}")
+
+    def start(self):
+        """Запускает сэмплинг и запись окон"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.sampler.start()
+        self._thread = threading.Thread(target=self._run, name="profile-writer", daemon=True)
+        self._thread.start()
+        print(f"🔥 Непрерывное профилирование: {self.directory}, окно {self.window_seconds:.0f} с")
+
+    def stop(self):
+        """Останавливает сэмплинг и сохраняет последнее окно"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sampler.stop()
+        try:
+            self._flush()
+        except Exception as e:
+            print(f"⚠️ Ошибка записи профиля: {e}")
+
+def create_continuous_profiler() -> ContinuousProfiler:
+    """
+    Создает непрерывный профилировщик с параметрами из настроек
+
+    Returns:
+        ContinuousProfiler: Профилировщик (не запущен)
+    """
+    settings = get_settings()
+    return ContinuousProfiler(
+        settings.profile_dir,
+        settings.profile_continuous_interval_ms / 1000,
+        settings.profile_window_seconds,
+        settings.profile_keep_files
+    )
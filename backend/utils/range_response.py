@@ -0,0 +1,119 @@
+"""
+Отдача файлов с поддержкой Range (докачка и просмотр PDF по частям).
+
+Поддерживается один диапазон bytes=start-end, bytes=start- и bytes=-N.
+Несколько диапазонов в одном запросе (multipart/byteranges) не
+поддерживаются: отдается весь файл (200), как допускает RFC 9110.
+"""
+
+import os
+from typing import Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+# Размер блока чтения файла
+RANGE_CHUNK_SIZE = 64 * 1024
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбирает заголовок Range
+
+    Args:
+        header: Значение заголовка
+        size: Размер файла
+
+    Returns:
+        (start, end) включительно или None, если заголовок не поддерживается
+        (тогда отдается весь файл)
+
+    Raises:
+        ValueError: Если диапазон не пересекается с файлом (416)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+
+    if start is None:
+        # bytes=-N - последние N байт
+        if not end:
+            raise ValueError("Пустой диапазон")
+        return max(size - end, 0), size - 1
+
+    if end is None:
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Диапазон за пределами файла")
+    return start, min(end, size - 1)
+
+def _read_file(file, start: int, length: int):
+    """Читает часть открытого файла блоками и закрывает его"""
+    with file:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def ranged_file_response(request: Request, path: str, media_type: str, etag: str,
+                         filename: Optional[str] = None) -> Response:
+    """
+    Ответ с файлом: 200, 206 (Range), 304 (If-None-Match) или 416
+
+    Args:
+        request: Входящий запрос
+        path: Путь к файлу
+        media_type: Content-Type
+        etag: ETag без кавычек (файл с этим ETag не меняется)
+        filename: Имя для Content-Disposition
+
+    Returns:
+        Response: Ответ
+    """
+    # Файл открывается сразу: вытеснение из кеша во время отдачи ему не мешает
+    file = open(path, "rb")
+    size = os.fstat(file.fileno()).st_size
+    quoted_etag = f'"{etag}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": quoted_etag,
+        "Cache-Control": "private, max-age=3600",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+
+    if request.headers.get("if-none-match") == quoted_etag:
+        file.close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range с другим ETag - файл изменился, отдается целиком
+    if range_header and (if_range is None or if_range == quoted_etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            file.close()
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_read_file(file, 0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(_read_file(file, start, length), status_code=206,
+                             media_type=media_type, headers=headers)
@@ -0,0 +1,183 @@
+"""
+Интерпретация результатов теста: баллы по шкалам, текст описания и
+процентильная полоса в одном ответе GET /user-tests/{test_id}/results.
+
+Описание шкалы берется из блока "results" JSON-файла теста. Необязательное
+поле "levels" задает отдельные тексты для уровней выраженности:
+    "адаптивность": {"positive": [...], "negative": [...], "description": "...",
+                     "levels": {"низкий": "...", "высокий": "..."}}
+Без текста для уровня используется общее описание шкалы.
+
+Интерпретация зависит только от версии файла теста (хеш содержимого,
+см. utils/test_versions.py) и вектора баллов,
+а у многих студентов векторы совпадают, поэтому она кешируется в LRU
+(REPORT_CACHE_SIZE). Процентильная полоса зависит от группы студента
+и пересчета норм, поэтому добавляется к закешированной части при запросе.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+from utils.catalog import test_catalog
+
+# Уровни выраженности по доле от максимального балла шкалы
+LEVEL_LOW = "низкий"
+LEVEL_MEDIUM = "средний"
+LEVEL_HIGH = "высокий"
+LEVEL_THRESHOLDS = ((1 / 3, LEVEL_LOW), (2 / 3, LEVEL_MEDIUM), (1.0, LEVEL_HIGH))
+
+# Полосы по процентильному рангу среди всех студентов (верхние границы)
+PERCENTILE_BANDS = ((25, "ниже среднего"), (75, "в пределах нормы"), (100, "выше среднего"))
+
+def test_version(filename: str, test_data: dict) -> str:
+    """
+    Версия теста для ключа кеша: SHA-256 файла из каталога
+
+    Для файлов вне каталога - хеш ключа шкал.
+
+    Args:
+        filename: Имя файла теста
+        test_data: Данные теста из load_test_data
+
+    Returns:
+        str: Версия теста
+    """
+    entry = test_catalog.get(filename)
+    if entry is not None:
+        return entry.content_hash
+    scales = json.dumps(test_data.get("scales") or {}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(scales.encode("utf-8")).hexdigest()
+
+def score_level(score: int, max_score: int) -> str:
+    """Уровень выраженности шкалы по доле от максимального балла"""
+    if max_score <= 0:
+        return LEVEL_MEDIUM
+    share = score / max_score
+    for threshold, level in LEVEL_THRESHOLDS:
+        if share <= threshold:
+            return level
+    return LEVEL_HIGH
+
+def percentile_band(percentile: Optional[float]) -> Optional[str]:
+    """Полоса по процентильному рангу (None - норм для группы нет)"""
+    if percentile is None:
+        return None
+    for upper, band in PERCENTILE_BANDS:
+        if percentile <= upper:
+            return band
+    return PERCENTILE_BANDS[-1][1]
+
+def _interpret(test_data: dict, scores: Dict[str, int]) -> Tuple[dict, ...]:
+    """
+    Интерпретация баллов без процентилей
+
+    Returns:
+        tuple: Шкалы в порядке ключа теста
+    """
+    report = []
+    for scale_name, scale in (test_data.get("scales") or {}).items():
+        if scale_name not in scores:
+            continue
+        score = scores[scale_name]
+        max_score = len(scale.get("positive", [])) + len(scale.get("negative", []))
+        level = score_level(score, max_score)
+        levels = scale.get("levels") or {}
+        report.append({
+            "scale": scale_name,
+            "score": score,
+            "max_score": max_score,
+            "level": level,
+            "description": levels.get(level) or scale.get("description", ""),
+        })
+    return tuple(report)
+
+class ReportCache:
+    """
+    LRU-кеш интерпретаций: (версия теста, вектор баллов) -> шкалы отчета
+
+    Args:
+        max_size: Максимум записей
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, version: str, test_data: dict, scores: Dict[str, int]) -> Tuple[dict, ...]:
+        """
+        Возвращает интерпретацию из кеша или строит и кеширует ее
+
+        Args:
+            version: Версия теста (test_version)
+            test_data: Данные теста
+            scores: Баллы по шкалам
+
+        Returns:
+            tuple: Шкалы отчета (не изменять - записи общие для всех запросов)
+        """
+        key = (version, tuple(sorted(scores.items())))
+        with self._lock:
+            report = self._entries.get(key)
+            if report is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return report
+            self.misses += 1
+
+        report = _interpret(test_data, scores)
+
+        with self._lock:
+            self._entries[key] = report
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return report
+
+    def stats(self) -> dict:
+        """Размер кеша и попадания"""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+# Кеш процесса (один экземпляр на воркер)
+report_cache = ReportCache(max_size=get_settings().report_cache_size)
+
+def build_report(filename: str, test_data: Optional[dict], scores: Optional[Dict[str, int]],
+                 percentiles: Optional[Dict[str, Dict[str, float]]],
+                 version: Optional[str] = None) -> Optional[List[dict]]:
+    """
+    Интерпретирующий отчет по результату
+
+    Args:
+        filename: Имя файла теста
+        test_data: Данные теста версии, по которой посчитан результат
+        scores: Баллы по шкалам последней попытки
+        percentiles: Процентили из norms_engine.lookup
+        version: Хеш версии test_data (по умолчанию - test_version)
+
+    Returns:
+        List[dict] или None: Шкалы с описанием, уровнем и полосой (None - у теста нет ключа шкал)
+    """
+    if not test_data or not test_data.get("scales") or not scores:
+        return None
+
+    interpretation = report_cache.get_or_render(
+        version or test_version(filename, test_data), test_data, scores
+    )
+    percentiles = percentiles or {}
+
+    report = []
+    for scale in interpretation:
+        percentile = percentiles.get(scale["scale"], {}).get("all")
+        report.append({**scale, "percentile": percentile, "band": percentile_band(percentile)})
+    return report
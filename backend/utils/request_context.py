@@ -0,0 +1,106 @@
+"""
+Контекст запроса: кеш объектов на время одного HTTP-запроса.
+
+RequestContextMiddleware создает RequestContext на каждый запрос и делает
+его доступным через ContextVar: из зависимостей, роутеров и моделей, в том
+числе из кода, выполняемого в пуле потоков (Starlette копирует контекст
+в поток). Повторный поиск того же объекта в пределах запроса (текущий
+пользователь, тест по ID, индекс результатов пользователя по test_id)
+возвращает уже загруженное значение без запроса к БД.
+
+Кеш живет только до конца запроса, поэтому не требует инвалидации между
+запросами; код, изменяющий закешированный объект в том же запросе,
+вызывает forget(). Вне HTTP-запроса (скрипты, фоновые задачи)
+memoize просто вызывает factory.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Hashable, Optional
+
+class RequestContext:
+    """
+    Кеш объектов одного запроса: (вид, ключ) -> значение
+
+    Attributes:
+        hits: Сколько поисков обслужено из кеша
+        misses: Сколько значений загружено
+    """
+
+    __slots__ = ("_values", "hits", "misses")
+
+    def __init__(self):
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def memo(self, kind: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Значение из кеша запроса или результат factory (включая None)
+
+        Args:
+            kind: Вид объекта ("user", "test", ...)
+            key: Ключ внутри вида
+            factory: Загрузка значения при промахе
+
+        Returns:
+            Значение
+        """
+        cache_key = (kind, key)
+        if cache_key in self._values:
+            self.hits += 1
+            return self._values[cache_key]
+
+        self.misses += 1
+        value = factory()
+        self._values[cache_key] = value
+        return value
+
+    def forget(self, kind: str, key: Hashable):
+        """Удаляет значение, измененное в этом запросе"""
+        self._values.pop((kind, key), None)
+
+_current_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+def current_context() -> Optional[RequestContext]:
+    """Контекст текущего запроса или None вне HTTP-запроса"""
+    return _current_context.get()
+
+def memoize(kind: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Кеширует значение на время текущего запроса
+
+    Args:
+        kind: Вид объекта
+        key: Ключ внутри вида
+        factory: Загрузка значения
+
+    Returns:
+        Значение
+    """
+    context = _current_context.get()
+    if context is None:
+        return factory()
+    return context.memo(kind, key, factory)
+
+def forget(kind: str, key: Hashable):
+    """Удаляет значение из кеша текущего запроса (если он есть)"""
+    context = _current_context.get()
+    if context is not None:
+        context.forget(kind, key)
+
+class RequestContextMiddleware:
+    """ASGI-middleware: новый RequestContext на каждый HTTP-запрос"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_context.set(RequestContext())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_context.reset(token)
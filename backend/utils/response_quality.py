@@ -0,0 +1,204 @@
+"""
+Выявление небрежных ответов (careless responding).
+
+Для каждой попытки считаются показатели качества ответов:
+- longest_run: самая длинная серия одинаковых ответов подряд;
+- unknown_ratio: доля ответов "не знаю" (и пропусков);
+- inconsistency: доля противоречивых ответов на пары вопросов одной шкалы
+  с противоположным ключом (positive/negative): одинаковый ответ "да"/"да"
+  или "нет"/"нет" на утверждения, сформулированные в разные стороны;
+- fast_ratio: доля вопросов, отвеченных быстрее MIN_ITEM_TIME_MS
+  (только если переданы времена ответов по вопросам).
+
+Показатели превращаются в флаги по порогам ниже. Попытки с флагами
+сохраняются как есть, но не участвуют в процентильных нормах.
+
+Все расчеты векторные и работают над матрицей ответов из
+utils/item_analysis.py: одна попытка - матрица из одной строки.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.item_analysis import CODE_NO, CODE_YES, CODE_UNKNOWN, CODE_MISSING, build_answer_matrix
+from utils.test_versions import version_cache
+
+# Пороги флагов
+MAX_IDENTICAL_RUN = 15
+MAX_UNKNOWN_RATIO = 0.4
+MAX_INCONSISTENCY = 0.6
+# Минимум пар с ответами "да"/"нет", при котором оценивается противоречивость
+MIN_CONSISTENCY_PAIRS = 5
+MIN_ITEM_TIME_MS = 800
+MAX_FAST_RATIO = 0.5
+
+def reverse_keyed_pairs(scales: Dict[str, dict], n_items: int) -> np.ndarray:
+    """
+    Составляет пары вопросов с противоположным ключом внутри каждой шкалы
+
+    Вопросы positive и negative шкалы сопоставляются по порядку в ключе.
+
+    Args:
+        scales: Ключ шкал из JSON-файла теста
+        n_items: Количество вопросов теста
+
+    Returns:
+        np.ndarray: Индексы столбцов пар (пары x 2), с 0
+    """
+    pairs = []
+    for scale in scales.values():
+        positive = [number for number in scale.get("positive", []) if 1 <= number <= n_items]
+        negative = [number for number in scale.get("negative", []) if 1 <= number <= n_items]
+        pairs.extend(zip(positive, negative))
+
+    return np.array(pairs, dtype=np.intp).reshape(-1, 2) - 1
+
+def _version_pairs(test_data: dict, n_items: int, version: Optional[str]) -> np.ndarray:
+    """Пары вопросов теста, для известной версии - из кеша версий"""
+    build = lambda: reverse_keyed_pairs(test_data.get("scales") or {}, n_items)
+    if version is None:
+        return build()
+    return version_cache.get(version, f"reverse_pairs:{n_items}", build)
+
+def longest_runs(matrix: np.ndarray) -> np.ndarray:
+    """
+    Длина самой длинной серии одинаковых ответов в каждой строке
+
+    Args:
+        matrix: Матрица ответов int8
+
+    Returns:
+        np.ndarray: Длины серий по строкам
+    """
+    n_rows, n_items = matrix.shape
+    if n_items == 0:
+        return np.zeros(n_rows, dtype=np.int64)
+
+    positions = np.arange(n_items)
+    # Начало новой серии: первый столбец, смена ответа или пропуск
+    # (незаполненный хвост анкеты не считается серией одинаковых ответов)
+    starts = np.ones(matrix.shape, dtype=bool)
+    starts[:, 1:] = matrix[:, 1:] != matrix[:, :-1]
+    starts |= matrix == CODE_MISSING
+    # Для каждого столбца - позиция начала его серии
+    run_start = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+
+    return (positions - run_start + 1).max(axis=1)
+
+def assess_matrix(matrix: np.ndarray, pairs: np.ndarray,
+                  item_times: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Считает показатели качества для всех строк матрицы
+
+    Args:
+        matrix: Матрица ответов int8
+        pairs: Пары вопросов из reverse_keyed_pairs
+        item_times: Времена ответов по вопросам в мс (та же форма, что matrix)
+
+    Returns:
+        dict: Массивы показателей, флаги по отдельности (flags) и итоговый флаг flagged
+    """
+    n_rows, n_items = matrix.shape
+    metrics = {"longest_run": longest_runs(matrix)}
+
+    unknown = (matrix == CODE_UNKNOWN) | (matrix == CODE_MISSING)
+    metrics["unknown_ratio"] = unknown.sum(axis=1) / max(n_items, 1)
+
+    if len(pairs):
+        first, second = matrix[:, pairs[:, 0]], matrix[:, pairs[:, 1]]
+        answered = np.isin(first, (CODE_YES, CODE_NO)) & np.isin(second, (CODE_YES, CODE_NO))
+        contradictions = (answered & (first == second)).sum(axis=1)
+        answered_pairs = answered.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inconsistency = np.where(
+                answered_pairs >= MIN_CONSISTENCY_PAIRS, contradictions / answered_pairs, np.nan
+            )
+    else:
+        inconsistency = np.full(n_rows, np.nan)
+    metrics["inconsistency"] = inconsistency
+
+    flags = {
+        "long_run": metrics["longest_run"] > MAX_IDENTICAL_RUN,
+        "unknown_ratio": metrics["unknown_ratio"] > MAX_UNKNOWN_RATIO,
+        "inconsistency": np.nan_to_num(inconsistency) > MAX_INCONSISTENCY,
+    }
+
+    if item_times is not None:
+        metrics["fast_ratio"] = (item_times < MIN_ITEM_TIME_MS).mean(axis=1)
+        flags["fast"] = metrics["fast_ratio"] > MAX_FAST_RATIO
+
+    metrics["flags"] = flags
+    metrics["flagged"] = np.logical_or.reduce(list(flags.values()))
+    return metrics
+
+def _row_report(metrics: Dict[str, np.ndarray], row: int) -> dict:
+    """
+    Переводит показатели одной строки в словарь для сохранения в БД
+
+    Args:
+        metrics: Результат assess_matrix
+        row: Номер строки
+
+    Returns:
+        dict: Показатели и список сработавших флагов
+    """
+    report = {
+        "longest_run": int(metrics["longest_run"][row]),
+        "unknown_ratio": round(float(metrics["unknown_ratio"][row]), 3),
+        "inconsistency": None,
+        "flags": [name for name, values in metrics["flags"].items() if values[row]],
+    }
+
+    inconsistency = metrics["inconsistency"][row]
+    if not np.isnan(inconsistency):
+        report["inconsistency"] = round(float(inconsistency), 3)
+
+    if "fast_ratio" in metrics:
+        report["fast_ratio"] = round(float(metrics["fast_ratio"][row]), 3)
+
+    return report
+
+def assess_answers(answers: List[str], test_data: Optional[dict],
+                   item_times: Optional[Sequence[float]] = None,
+                   version: Optional[str] = None) -> Optional[dict]:
+    """
+    Оценивает качество ответов одной попытки
+
+    Args:
+        answers: Ответы пользователя
+        test_data: Данные теста из load_test_data
+        item_times: Времена ответов по вопросам в мс (если известны)
+        version: Хеш версии теста (пары вопросов берутся из кеша версий)
+
+    Returns:
+        dict или None: Показатели и флаги или None, если данные теста недоступны
+    """
+    if not test_data or not test_data.get("questions"):
+        return None
+
+    n_items = len(test_data["questions"])
+    matrix = build_answer_matrix([answers], n_items)
+    pairs = _version_pairs(test_data, n_items, version)
+
+    times = None
+    if item_times is not None and len(item_times) == n_items:
+        times = np.asarray(item_times, dtype=np.float64).reshape(1, n_items)
+
+    return _row_report(assess_matrix(matrix, pairs, times), 0)
+
+def assess_batch(matrix: np.ndarray, test_data: dict, version: Optional[str] = None) -> List[dict]:
+    """
+    Оценивает качество ответов для многих попыток одного теста
+
+    Args:
+        matrix: Матрица ответов int8 (см. utils/item_analysis.py)
+        test_data: Данные теста из load_test_data
+        version: Хеш версии теста (пары вопросов берутся из кеша версий)
+
+    Returns:
+        List[dict]: Показатели и флаги по строкам матрицы
+    """
+    pairs = _version_pairs(test_data, matrix.shape[1], version)
+    metrics = assess_matrix(matrix, pairs)
+    return [_row_report(metrics, row) for row in range(matrix.shape[0])]
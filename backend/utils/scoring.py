@@ -0,0 +1,55 @@
+"""
+Подсчет баллов по шкалам теста на сервере.
+
+Ключ шкал берется из блока "results" JSON-файла теста: для каждой шкалы
+перечислены номера вопросов (с 1) с прямым (positive) и обратным (negative)
+ключом. Ответ "да" на вопрос с прямым ключом и "нет" на вопрос с обратным
+ключом добавляют шкале один балл; "не знаю" баллов не дает.
+"""
+
+from typing import Dict, List, Optional
+
+POSITIVE_ANSWER = "да"
+NEGATIVE_ANSWER = "нет"
+
+def score_answers(answers: List[str], scales: Dict[str, dict]) -> Dict[str, int]:
+    """
+    Считает сырые баллы по шкалам
+
+    Args:
+        answers: Ответы пользователя по порядку вопросов
+        scales: Ключ шкал из JSON-файла теста
+
+    Returns:
+        Dict[str, int]: Балл по каждой шкале
+    """
+    normalized = [answer.lower() if answer else None for answer in answers]
+    total = len(normalized)
+    scores = {}
+
+    for scale_name, scale in scales.items():
+        score = 0
+        for item in scale.get("positive", []):
+            if item <= total and normalized[item - 1] == POSITIVE_ANSWER:
+                score += 1
+        for item in scale.get("negative", []):
+            if item <= total and normalized[item - 1] == NEGATIVE_ANSWER:
+                score += 1
+        scores[scale_name] = score
+
+    return scores
+
+def score_test_answers(test_data: Optional[dict], answers: List[str]) -> Optional[Dict[str, int]]:
+    """
+    Считает баллы по шкалам для загруженного теста
+
+    Args:
+        test_data: Данные теста из load_test_data (или None)
+        answers: Ответы пользователя
+
+    Returns:
+        Dict[str, int] или None: Баллы по шкалам или None, если у теста нет ключа шкал
+    """
+    if not test_data or not test_data.get("scales"):
+        return None
+    return score_answers(answers, test_data["scales"])
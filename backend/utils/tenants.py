@@ -0,0 +1,207 @@
+"""
+Определение арендатора (университета) запроса и обслуживание арендаторов.
+
+TenantMiddleware выбирает арендатора запроса:
+
+1. заголовок X-Tenant (TENANT_HEADER) или параметр запроса tenant
+   (EventSource не передает заголовки) - неизвестный арендатор дает 404;
+2. домен запроса (Host) из списка hosts арендатора;
+3. арендатор по умолчанию (DEFAULT_TENANT).
+
+Неактивный арендатор активируется в пуле потоков (движок БД, справочники,
+каталог тестов), не блокируя цикл событий. Число одновременных запросов
+одного арендатора ограничено TENANT_MAX_CONCURRENCY: при наплыве
+студентов одного университета его лишние запросы сразу получают 503 и не
+занимают общие слоты контроля допуска (utils/admission.py).
+
+run_tenant_refresh_loop перечитывает реестр арендаторов, их справочники
+и свои каталоги тестов каждые TENANT_REFRESH_SECONDS.
+"""
+
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from config import get_settings
+from db.tenancy import TenantNotFound, tenant_registry, tenant_scope, is_default_tenant
+from models.reference import reference_cache
+from utils.admission import classify, overloaded_response
+from utils.catalog import activate_tenant_catalog, sync_test_catalog, test_catalog
+from utils.norms import refresh_norms
+
+def _load_reference(state):
+    """Справочники факультетов и курсов активируемого арендатора"""
+    reference_cache.for_tenant(state.config.slug).load()
+
+def _refresh_tenant_norms(state):
+    """Нормы активируемого арендатора (по умолчанию - считаются при запуске)"""
+    if not is_default_tenant(state.config.slug) and get_settings().norms_refresh_seconds > 0:
+        refresh_norms()
+
+tenant_registry.on_activate(_load_reference)
+tenant_registry.on_activate(activate_tenant_catalog)
+tenant_registry.on_activate(_refresh_tenant_norms)
+
+def not_found_response(slug: str) -> JSONResponse:
+    """Ответ 404 в формате обработчиков исключений (utils/exceptions.py)"""
+    return JSONResponse(
+        status_code=404,
+        content={
+            "error": True,
+            "message": f"Университет не найден: {slug}",
+            "status_code": 404
+        }
+    )
+
+class TenantConcurrency:
+    """
+    Предел одновременных запросов каждого арендатора в процессе
+
+    Args:
+        max_concurrency: Предел на арендатора (0 - без предела)
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.in_flight: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def try_acquire(self, slug: str) -> bool:
+        """Занимает слот арендатора; False - предел исчерпан"""
+        count = self.in_flight.get(slug, 0)
+        if self.max_concurrency > 0 and count >= self.max_concurrency:
+            self.rejected[slug] = self.rejected.get(slug, 0) + 1
+            return False
+        self.in_flight[slug] = count + 1
+        return True
+
+    def release(self, slug: str):
+        self.in_flight[slug] -= 1
+
+    def stats(self) -> dict:
+        """Запросы в обработке и отклоненные по арендаторам"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": {slug: count for slug, count in self.in_flight.items() if count},
+            "rejected": dict(self.rejected),
+        }
+
+# Один экземпляр на процесс (цикл событий однопоточный - без блокировок)
+tenant_concurrency = TenantConcurrency(get_settings().tenant_max_concurrency)
+
+class TenantMiddleware:
+    """ASGI-middleware: арендатор запроса и предел его одновременных запросов"""
+
+    def __init__(self, app, limiter: TenantConcurrency = tenant_concurrency):
+        self.app = app
+        self.limiter = limiter
+        self.header = get_settings().tenant_header.lower().encode("latin-1")
+
+    def _resolve(self, scope) -> str:
+        """
+        Арендатор по заголовку (параметру), домену или по умолчанию
+
+        Raises:
+            TenantNotFound: Если явно указан незарегистрированный арендатор
+        """
+        requested: Optional[str] = None
+        host = ""
+        for name, value in scope["headers"]:
+            if name == self.header:
+                requested = value.decode("latin-1")
+            elif name == b"host":
+                host = value.decode("latin-1")
+
+        if requested is None and b"tenant=" in scope.get("query_string", b""):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get("tenant")
+            requested = values[0] if values else None
+
+        if requested is not None:
+            slug = requested.strip().lower()
+            if tenant_registry.config(slug) is None:
+                raise TenantNotFound(slug)
+            return slug
+
+        return tenant_registry.resolve_host(host) or get_settings().default_tenant
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            slug = self._resolve(scope)
+        except TenantNotFound as e:
+            await not_found_response(str(e))(scope, receive, send)
+            return
+
+        with tenant_scope(slug):
+            # Активация (подключение к БД, справочники, каталог) - вне цикла событий
+            state = tenant_registry.peek(slug, touch=True)
+            if state is None or not state.ready.is_set():
+                try:
+                    await run_in_threadpool(tenant_registry.activate, slug)
+                except TenantNotFound:
+                    await not_found_response(slug)(scope, receive, send)
+                    return
+
+            # Проверки здоровья, preflight и потоки событий не ограничиваются
+            if classify(scope["method"], scope["path"]) is None:
+                await self.app(scope, receive, send)
+                return
+
+            if not self.limiter.try_acquire(slug):
+                await overloaded_response(1)(scope, receive, send)
+                return
+
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.limiter.release(slug)
+
+def refresh_tenant(slug: str):
+    """
+    Перечитывает справочники арендатора и его каталог тестов
+
+    Каталоги при CATALOG_WATCH перезагружает наблюдатель watch_test_catalog
+    (и сразу регистрирует тесты во всех арендаторах каталога); здесь свой
+    каталог арендатора проверяется и без наблюдателя, а тесты
+    регистрируются в его БД.
+    """
+    if tenant_registry.peek(slug) is None:
+        return
+
+    with tenant_scope(slug):
+        reference_cache.load()
+        if is_default_tenant(slug):
+            return
+
+        catalog = test_catalog.for_tenant()
+        if catalog is not test_catalog.default:
+            changed = catalog.changed_paths()
+            if changed:
+                catalog.reload_paths(changed)
+        sync_test_catalog()
+
+async def run_tenant_refresh_loop(interval_seconds: float):
+    """
+    Фоновый цикл обновления реестра и активных арендаторов
+
+    Args:
+        interval_seconds: Интервал между обновлениями
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(tenant_registry.load)
+        except Exception as e:
+            print(f"⚠️ Ошибка чтения реестра арендаторов: {e}")
+
+        for slug in tenant_registry.hot_slugs():
+            try:
+                await run_in_threadpool(refresh_tenant, slug)
+            except Exception as e:
+                print(f"⚠️ Ошибка обновления арендатора {slug}: {e}")
@@ -6,6 +6,11 @@ import json
 import os
 from typing import Dict, Any, Optional
 
+from config import get_settings
+from utils.catalog import test_catalog
+from utils.tracing import start_span, traced
+
+@traced("tests.load_test_data")
 def load_test_data(filename: str) -> Optional[Dict[str, Any]]:
     """
     Загружает данные теста из JSON файла
@@ -16,9 +21,13 @@ def load_test_data(filename: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dict с данными теста или None если файл не найден
     """
-    # Сначала ищем файл в текущей директории backend (для Railway)
-    current_dir = os.path.dirname(os.path.dirname(__file__))
-    local_json_path = os.path.join(current_dir, filename)
+    # Тесты из каталога TESTS_DIR уже разобраны и проверены при запуске
+    entry = test_catalog.get(filename)
+    if entry is not None:
+        return entry.data
+    
+    # Сначала ищем файл в каталоге тестов backend (для Railway)
+    local_json_path = os.path.join(get_settings().tests_dir, filename)
     
     # Потом в frontend/public (для локальной разработки)
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -34,18 +43,26 @@ def load_test_data(filename: str) -> Optional[Dict[str, Any]]:
         return None
     
     try:
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        with start_span("tests.read_file", {"test.filename": filename}):
+            with open(json_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
             
         # Первый элемент содержит метаданные теста
         if data and len(data) > 0:
             metadata = data[0]
             
+            # Ключ шкал: {"шкала": {"positive": [...], "negative": [...], "description": "..."}}
+            scales = {}
+            for item in data[1:]:
+                if item.get('results'):
+                    scales = item['results']
+            
             # Извлекаем базовую информацию о тесте
             test_info = {
                 'title': metadata.get('title', 'Неизвестный тест'),
                 'description': metadata.get('description', 'Описание недоступно'),
-                'questions': [item for item in data[1:] if item.get('question')]
+                'questions': [item for item in data[1:] if item.get('question')],
+                'scales': scales
             }
             
             return test_info
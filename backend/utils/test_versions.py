@@ -0,0 +1,222 @@
+"""
+Версии тестов, адресуемые содержимым (SHA-256 файла).
+
+Каждое различное содержимое файла теста хранится один раз в test_versions,
+а попытки и последние результаты ссылаются на версию, по которой они
+посчитаны (version_hash). Данные версии неизменяемы, поэтому все
+производные (разобранный тест, пары вопросов для проверки качества,
+интерпретации результатов, PDF) кешируются по хешу и не требуют
+инвалидации: правка файла дает новый хеш, а старые записи просто
+вытесняются из LRU.
+
+Поиск данных версии: каталог текущего арендатора (utils/catalog.py), затем
+кеш версий, затем таблица test_versions его БД. Кеш версий общий для
+всех арендаторов: одинаковый хеш - одинаковое содержимое.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event as sa_event, select
+
+from config import get_settings
+from db.database import ReplicaSessionLocal, SessionLocal
+from db.tenancy import get_current_tenant
+from models.test import Test, TestVersion
+from utils.catalog import CatalogEntry, test_catalog
+from utils.reports import test_version
+from utils.test_loader import load_test_data
+
+class VersionCache:
+    """
+    LRU производных данных версий: (хеш, вид) -> значение
+
+    Args:
+        max_size: Максимум записей
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, content_hash: str, kind: str, factory: Callable[[], Any]) -> Any:
+        """
+        Значение из кеша или результат factory (None не кешируется)
+
+        Args:
+            content_hash: Хеш версии
+            kind: Вид данных ("data", "reverse_pairs", ...)
+            factory: Построение значения при промахе
+
+        Returns:
+            Значение
+        """
+        key = (content_hash, kind)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = factory()
+        if value is None:
+            return None
+
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Кеш процесса (один экземпляр на воркер)
+version_cache = VersionCache(max_size=get_settings().version_cache_size)
+
+# (арендатор, хеш) версий, уже записанных этим процессом в test_versions
+# БД арендатора
+_registered = set()
+_registered_lock = threading.Lock()
+
+def version_row(test_id: int, entry: CatalogEntry) -> dict:
+    """Строка test_versions для загруженного файла теста"""
+    return {"content_hash": entry.content_hash, "test_id": test_id, "content": entry.data}
+
+def register_versions(db_session, rows: Iterable[dict]) -> int:
+    """
+    Регистрирует версии, которые этот процесс еще не записывал
+
+    Коммит выполняет вызывающий код.
+
+    Args:
+        db_session: Сессия основной БД
+        rows: Строки version_row
+
+    Returns:
+        int: Количество добавленных версий
+    """
+    tenant = get_current_tenant()
+    with _registered_lock:
+        new_rows = [row for row in rows if (tenant, row["content_hash"]) not in _registered]
+    if not new_rows:
+        return 0
+    return TestVersion.register(db_session, new_rows)
+
+def mark_registered(content_hashes: Iterable[str], tenant: Optional[str] = None):
+    """Отмечает версии записанными в БД арендатора (после коммита)"""
+    tenant = tenant or get_current_tenant()
+    with _registered_lock:
+        _registered.update((tenant, content_hash) for content_hash in content_hashes)
+
+def ensure_version(db_session, test: Test) -> Optional[CatalogEntry]:
+    """
+    Текущая версия теста из каталога, зарегистрированная в БД
+
+    Строка версии добавляется в транзакции вызывающего кода, поэтому
+    попытка не может сослаться на незаписанную версию.
+
+    Args:
+        db_session: Сессия основной БД
+        test: Тест
+
+    Returns:
+        CatalogEntry или None, если файла теста нет в каталоге
+    """
+    entry = test_catalog.get(test.filename)
+    if entry is None:
+        return None
+    tenant = get_current_tenant()
+    with _registered_lock:
+        known = (tenant, entry.content_hash) in _registered
+    if not known:
+        TestVersion.register(db_session, [version_row(test.id, entry)])
+        sa_event.listen(
+            db_session, "after_commit",
+            lambda session: mark_registered([entry.content_hash], tenant), once=True
+        )
+    return entry
+
+def sync_catalog_versions(db_session) -> int:
+    """
+    Регистрирует версии всех тестов каталога процесса
+
+    Args:
+        db_session: Сессия основной БД
+
+    Returns:
+        int: Количество добавленных версий
+    """
+    entries = test_catalog.entries()
+    if not entries:
+        return 0
+
+    test_ids = dict(db_session.execute(
+        select(Test.filename, Test.id).where(Test.filename.in_(list(entries)))
+    ).all())
+    rows = [
+        version_row(test_ids[filename], entry)
+        for filename, entry in entries.items() if filename in test_ids
+    ]
+    added = register_versions(db_session, rows)
+    db_session.commit()
+    mark_registered(row["content_hash"] for row in rows)
+    return added
+
+def _fetch_version(content_hash: str) -> Optional[Dict[str, Any]]:
+    """Данные версии из test_versions (реплика, затем основная БД)"""
+    for session_factory in (ReplicaSessionLocal, SessionLocal):
+        db = session_factory()
+        try:
+            content = db.execute(
+                select(TestVersion.content).where(TestVersion.content_hash == content_hash)
+            ).scalar()
+        finally:
+            db.close()
+        if content is not None:
+            return content
+    return None
+
+def load_version(content_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Данные теста версии в формате load_test_data
+
+    Args:
+        content_hash: Хеш версии
+
+    Returns:
+        dict или None, если версия не найдена
+    """
+    entry = test_catalog.get_by_hash(content_hash)
+    if entry is not None:
+        return entry.data
+    return version_cache.get(content_hash, "data", lambda: _fetch_version(content_hash))
+
+def data_for_result(filename: str, version_hash: Optional[str],
+                    current_data: Optional[dict] = None) -> Tuple[Optional[str], Optional[dict]]:
+    """
+    Данные теста, по которым посчитан результат
+
+    Результаты до версионирования (version_hash NULL) и версии, которых
+    нет ни в каталоге, ни в БД, интерпретируются по текущему файлу.
+
+    Args:
+        filename: Имя файла теста
+        version_hash: Версия из попытки или последнего результата
+        current_data: Уже загруженные данные текущего файла (если есть)
+
+    Returns:
+        (версия, данные теста); данные None, если теста нет
+    """
+    if version_hash:
+        test_data = load_version(version_hash)
+        if test_data is not None:
+            return version_hash, test_data
+
+    entry = test_catalog.get(filename)
+    if entry is not None:
+        return entry.content_hash, entry.data
+
+    test_data = current_data if current_data is not None else load_test_data(filename)
+    return (test_version(filename, test_data) if test_data else None), test_data
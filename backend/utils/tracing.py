@@ -0,0 +1,267 @@
+"""
+Трассировка OpenTelemetry (включается TRACING_ENABLED=True).
+
+- TracingMiddleware открывает span на каждый HTTP-запрос (с продолжением
+  трассы из заголовка traceparent), имя span - шаблон маршрута.
+- Каждый SQL-запрос любого движка SQLAlchemy - дочерний span "db ...".
+- Отдельные участки кода размечаются декоратором @traced или
+  контекстным менеджером start_span: получение текущего пользователя,
+  чтение файлов тестов, построение ответов.
+
+Экспорт - в OTLP-коллектор (TRACING_EXPORTER=otlp, TRACING_OTLP_ENDPOINT),
+в файл JSON Lines (file, TRACING_FILE_PATH) или в консоль (console).
+Доля записываемых трасс - TRACING_SAMPLE_RATIO; решение принимается
+для корневого span и наследуется дочерними, поэтому трассы не рвутся.
+
+Пакеты OpenTelemetry необязательны и импортируются только при включенной
+трассировке: без них и при выключенной трассировке start_span и @traced
+ничего не делают и почти ничего не стоят.
+
+    pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http
+"""
+
+import functools
+import inspect
+import threading
+from contextlib import nullcontext
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+# Модули OpenTelemetry импортируются в setup_tracing только при включенной
+# трассировке: без нее импорт SDK не замедляет запуск процесса
+trace = propagate = SpanKind = Status = StatusCode = None
+
+# Максимальная длина текста SQL в атрибуте span
+MAX_STATEMENT_LENGTH = 2000
+
+# Трассировщик процесса; None - трассировка выключена
+_tracer = None
+
+def tracing_active() -> bool:
+    """Включена ли трассировка в этом процессе"""
+    return _tracer is not None
+
+def start_span(name: str, attributes: Optional[dict] = None):
+    """
+    Открывает дочерний span текущей трассы
+
+    Args:
+        name: Имя span
+        attributes: Атрибуты span
+
+    Returns:
+        Контекстный менеджер (без трассировки - пустой)
+    """
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+def traced(name: Optional[str] = None):
+    """
+    Декоратор: выполнение функции - отдельный span
+
+    Подходит для синхронных и асинхронных функций, в том числе для
+    зависимостей FastAPI (сигнатура сохраняется).
+
+    Args:
+        name: Имя span (по умолчанию - имя функции)
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with _tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+class JsonLinesSpanExporter:
+    """
+    Экспорт span в файл: одна строка JSON на span
+
+    Реализует интерфейс SpanExporter без наследования, чтобы модуль
+    загружался без SDK OpenTelemetry.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        with self._lock:
+            for span in spans:
+                self._file.write(span.to_json(indent=None) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+def _create_exporter(settings):
+    """Экспортер по TRACING_EXPORTER"""
+    if settings.tracing_exporter == "file":
+        return JsonLinesSpanExporter(settings.tracing_file_path)
+    if settings.tracing_exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Открывает span SQL-запроса (дочерний к текущему span)"""
+    if _tracer is None or context is None:
+        return
+    # Запросы вне записываемой трассы (не попавшие в выборку) не размечаются
+    if not trace.get_current_span().is_recording():
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._tracing_span = _tracer.start_span(
+        f"db {operation}",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.operation": operation,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            "db.executemany": executemany,
+        }
+    )
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Закрывает span SQL-запроса"""
+    span = getattr(context, "_tracing_span", None)
+    if span is not None:
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+        context._tracing_span = None
+
+def _handle_error(exception_context):
+    """Закрывает span упавшего SQL-запроса с ошибкой"""
+    context = exception_context.execution_context
+    span = getattr(context, "_tracing_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR, type(exception_context.original_exception).__name__))
+        span.end()
+        context._tracing_span = None
+
+def setup_tracing() -> bool:
+    """
+    Настраивает провайдер трассировки по настройкам TRACING_*
+
+    SQL-запросы размечаются через события класса Engine, поэтому
+    охватываются и основной движок, и реплика, созданные позже.
+
+    Returns:
+        bool: Трассировка включена
+    """
+    global _tracer, trace, propagate, SpanKind, Status, StatusCode
+
+    settings = get_settings()
+    if not settings.tracing_enabled or _tracer is not None:
+        return _tracer is not None
+
+    try:
+        from opentelemetry import propagate, trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+    except ImportError:
+        print("⚠️ TRACING_ENABLED=True, но пакеты OpenTelemetry не установлены - трассировка выключена")
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio))
+    )
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter(settings)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("university-tests")
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+    print(f"🔭 Трассировка: {settings.tracing_exporter}, доля трасс {settings.tracing_sample_ratio}")
+    return True
+
+def shutdown_tracing():
+    """Отправляет накопленные span перед остановкой процесса"""
+    if _tracer is not None:
+        trace.get_tracer_provider().shutdown()
+
+class TracingMiddleware:
+    """
+    ASGI-middleware: span на каждый HTTP-запрос
+
+    Имя span уточняется до шаблона маршрута ("GET /user-tests/{test_id}/results")
+    после того, как роутер выбрал маршрут.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+        }
+        method = scope["method"]
+
+        with _tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.method": method,
+                "http.target": scope["path"],
+                "http.scheme": scope.get("scheme", "http"),
+            }
+        ) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
@@ -0,0 +1,386 @@
+"""
+Массовый импорт пользователей из CSV/XLSX (списки студентов от деканата).
+
+Конвейер:
+- строки читаются из файла потоково и проверяются схемой UserCreate
+  (те же правила, что при регистрации);
+- пачка строк сверяется с существующими ФИО одним запросом
+  (tuple IN), повторы внутри файла отсекаются по множеству ФИО;
+- пароли пачки хешируются bcrypt в пуле процессов, пока предыдущая
+  пачка вставляется в БД;
+- вставка - многострочным INSERT, коммит после каждой пачки: при сбое
+  повторный запуск пропустит уже импортированных как существующих.
+
+Ошибки возвращаются построчно с номером строки файла.
+"""
+
+import codecs
+import csv
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+
+from auth.auth import get_password_hash
+from models.user import User
+from schemas.user import UserCreate
+
+# Строк файла в одной пачке (один запрос проверки ФИО и один INSERT)
+IMPORT_CHUNK_SIZE = 1000
+
+# Паролей в одной задаче пула хеширования
+HASH_BATCH_SIZE = 50
+
+# Сколько ошибок и пропусков перечислять в отчете (счетчики - все)
+MAX_REPORTED_ROWS = 1000
+
+# Заголовки столбцов файла -> поля UserCreate
+HEADER_ALIASES = {
+    "фамилия": "last_name",
+    "имя": "first_name",
+    "отчество": "middle_name",
+    "факультет": "faculty",
+    "курс": "course",
+    "пароль": "password",
+    "last_name": "last_name",
+    "first_name": "first_name",
+    "middle_name": "middle_name",
+    "faculty": "faculty",
+    "course": "course",
+    "password": "password",
+}
+
+REQUIRED_FIELDS = ("last_name", "first_name", "middle_name", "faculty", "course", "password")
+
+class ImportFormatError(ValueError):
+    """Файл не удалось разобрать (формат, заголовок)"""
+
+@dataclass
+class ImportReport:
+    """
+    Итог импорта
+
+    Attributes:
+        total_rows: Строк с данными в файле
+        created: Создано пользователей
+        skipped_count: Пропущено (ФИО уже есть в БД или повторяется в файле)
+        error_count: Строк с ошибками проверки
+        skipped: Пропущенные строки (первые MAX_REPORTED_ROWS)
+        errors: Строки с ошибками (первые MAX_REPORTED_ROWS)
+        dry_run: Проверка без записи в БД
+    """
+    total_rows: int = 0
+    created: int = 0
+    skipped_count: int = 0
+    error_count: int = 0
+    skipped: List[dict] = field(default_factory=list)
+    errors: List[dict] = field(default_factory=list)
+    dry_run: bool = False
+
+    def add_error(self, row: int, messages: List[str]):
+        """Учитывает строку с ошибками проверки"""
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ROWS:
+            self.errors.append({"row": row, "errors": messages})
+
+    def add_skipped(self, row: int, full_name: str, reason: str):
+        """Учитывает пропущенную строку"""
+        self.skipped_count += 1
+        if len(self.skipped) < MAX_REPORTED_ROWS:
+            self.skipped.append({"row": row, "full_name": full_name, "reason": reason})
+
+    def to_dict(self) -> dict:
+        """Отчет для JSON-ответа"""
+        return {
+            "total_rows": self.total_rows,
+            "created": self.created,
+            "skipped_count": self.skipped_count,
+            "error_count": self.error_count,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "dry_run": self.dry_run
+        }
+
+def _map_header(header: Iterable) -> List[Optional[str]]:
+    """
+    Сопоставляет заголовки столбцов полям пользователя
+
+    Args:
+        header: Первая строка файла
+
+    Returns:
+        List[Optional[str]]: Поле для каждого столбца (None - столбец не используется)
+
+    Raises:
+        ImportFormatError: Если не хватает обязательных столбцов
+    """
+    columns = [
+        HEADER_ALIASES.get(str(name).strip().lower()) if name is not None else None
+        for name in header
+    ]
+    missing = [name for name in REQUIRED_FIELDS if name not in columns]
+    if missing:
+        raise ImportFormatError(f"В файле нет столбцов: {', '.join(missing)}")
+    return columns
+
+def _rows_with_header(rows: Iterator[tuple], first_row: int = 1) -> Iterator[Tuple[int, dict]]:
+    """
+    Превращает строки таблицы в словари по заголовку
+
+    Args:
+        rows: Строки таблицы (первая - заголовок)
+        first_row: Номер строки заголовка в файле
+
+    Yields:
+        Tuple[int, dict]: (номер строки в файле, значения полей)
+    """
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFormatError("Файл пуст")
+    columns = _map_header(header)
+
+    for row_number, values in enumerate(rows, start=first_row + 1):
+        record = {}
+        for name, value in zip(columns, values):
+            if name is None or value is None:
+                continue
+            record[name] = value.strip() if isinstance(value, str) else value
+        # Пустые строки (часто в конце выгрузок) пропускаются
+        if any(value not in ("", None) for value in record.values()):
+            yield row_number, record
+
+def read_csv_rows(stream) -> Iterator[Tuple[int, dict]]:
+    """
+    Потоково читает CSV (UTF-8, разделитель "," или ";")
+
+    Args:
+        stream: Бинарный файловый объект
+
+    Yields:
+        Tuple[int, dict]: (номер строки, значения полей)
+    """
+    text = codecs.getreader("utf-8-sig")(stream)
+    try:
+        header_line = text.readline()
+    except UnicodeDecodeError:
+        raise ImportFormatError("CSV должен быть в кодировке UTF-8")
+
+    # Excel с русской локалью сохраняет CSV через точку с запятой
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    reader = csv.reader(itertools.chain([header_line], text), delimiter=delimiter)
+
+    try:
+        yield from _rows_with_header(reader)
+    except UnicodeDecodeError:
+        raise ImportFormatError("CSV должен быть в кодировке UTF-8")
+
+def read_xlsx_rows(stream) -> Iterator[Tuple[int, dict]]:
+    """
+    Потоково читает первый лист XLSX (режим read_only openpyxl)
+
+    Args:
+        stream: Бинарный файловый объект
+
+    Yields:
+        Tuple[int, dict]: (номер строки, значения полей)
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("Для импорта XLSX установите openpyxl")
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Не удалось открыть XLSX: {e}")
+
+    try:
+        yield from _rows_with_header(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+def read_rows(stream, filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Выбирает разбор по расширению файла
+
+    Args:
+        stream: Бинарный файловый объект
+        filename: Имя файла
+
+    Returns:
+        Iterator[Tuple[int, dict]]: Строки файла
+
+    Raises:
+        ImportFormatError: Если формат не поддерживается
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return read_csv_rows(stream)
+    if extension == ".xlsx":
+        return read_xlsx_rows(stream)
+    raise ImportFormatError("Поддерживаются файлы .csv и .xlsx")
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    """Сообщения ошибок pydantic в виде 'поле: текст'"""
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    """Хеширует пачку паролей (выполняется в процессе пула)"""
+    return [get_password_hash(password) for password in passwords]
+
+def _fio_key(user: UserCreate) -> Tuple[str, str, str]:
+    """Ключ уникальности пользователя (как при регистрации)"""
+    return (user.last_name, user.first_name, user.middle_name)
+
+def _select_new_users(db_session, chunk: List[Tuple[int, UserCreate]], seen: set,
+                      report: ImportReport) -> List[Tuple[int, UserCreate]]:
+    """
+    Отбрасывает строки с ФИО, которые уже есть в БД или выше в файле
+
+    Args:
+        db_session: Сессия основной БД
+        chunk: Проверенные строки пачки
+        seen: ФИО, уже встреченные в файле (дополняется)
+        report: Отчет импорта
+
+    Returns:
+        List[Tuple[int, UserCreate]]: Строки для вставки
+    """
+    keys = {_fio_key(user) for _, user in chunk}
+    existing = set(db_session.execute(
+        select(User.last_name, User.first_name, User.middle_name).where(
+            tuple_(User.last_name, User.first_name, User.middle_name).in_(list(keys))
+        )
+    ).tuples())
+
+    new_users = []
+    for row_number, user in chunk:
+        key = _fio_key(user)
+        full_name = " ".join(key)
+        if key in existing:
+            report.add_skipped(row_number, full_name, "Пользователь с таким ФИО уже существует")
+        elif key in seen:
+            report.add_skipped(row_number, full_name, "ФИО повторяется в файле")
+        else:
+            seen.add(key)
+            new_users.append((row_number, user))
+    return new_users
+
+def _insert_chunk(db_session, users: List[Tuple[int, UserCreate]], hash_futures: list,
+                  report: ImportReport):
+    """
+    Дожидается хешей пачки и вставляет ее одним многострочным INSERT
+
+    Args:
+        db_session: Сессия основной БД
+        users: Строки для вставки
+        hash_futures: Задачи хеширования в порядке строк
+        report: Отчет импорта
+    """
+    if not users:
+        return
+
+    hashes = [password_hash for future in hash_futures for password_hash in future.result()]
+    db_session.execute(insert(User), [
+        {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "middle_name": user.middle_name,
+            "faculty": user.faculty,
+            "course": user.course,
+            "password_hash": password_hash,
+            "completed_tests": []
+        }
+        for (_, user), password_hash in zip(users, hashes)
+    ])
+    db_session.commit()
+    report.created += len(users)
+
+def _validated_chunks(rows: Iterable[Tuple[int, dict]], chunk_size: int,
+                      report: ImportReport) -> Iterator[List[Tuple[int, UserCreate]]]:
+    """
+    Проверяет строки схемой UserCreate и группирует корректные в пачки
+
+    Args:
+        rows: Строки файла
+        chunk_size: Размер пачки
+        report: Отчет импорта (ошибки, количество строк)
+
+    Yields:
+        List[Tuple[int, UserCreate]]: Пачка проверенных строк
+    """
+    chunk = []
+    for row_number, record in rows:
+        report.total_rows += 1
+        missing = [name for name in REQUIRED_FIELDS if record.get(name) in ("", None)]
+        if missing:
+            report.add_error(row_number, [f"{name}: не заполнено" for name in missing])
+            continue
+        try:
+            chunk.append((row_number, UserCreate(**record)))
+        except ValidationError as e:
+            report.add_error(row_number, _validation_messages(e))
+            continue
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_users(db_session, rows: Iterable[Tuple[int, dict]], workers: Optional[int] = None,
+                 chunk_size: int = IMPORT_CHUNK_SIZE, dry_run: bool = False) -> ImportReport:
+    """
+    Импортирует пользователей из строк файла
+
+    Хеширование пачки N выполняется в пуле процессов параллельно
+    со вставкой пачки N-1, поэтому основное время импорта - bcrypt,
+    разделенный на workers процессов.
+
+    Args:
+        db_session: Сессия основной БД
+        rows: Строки файла (read_rows)
+        workers: Процессов хеширования (по умолчанию - число ядер)
+        chunk_size: Строк в одной пачке
+        dry_run: Только проверить строки и ФИО, ничего не записывать
+
+    Returns:
+        ImportReport: Итог импорта
+
+    Raises:
+        ImportFormatError: Если файл не удалось разобрать
+    """
+    report = ImportReport(dry_run=dry_run)
+    seen = set()
+
+    if dry_run:
+        for chunk in _validated_chunks(rows, chunk_size, report):
+            _select_new_users(db_session, chunk, seen, report)
+        return report
+
+    # spawn: процесс API многопоточный, fork в нем небезопасен
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as pool:
+        pending = None
+        for chunk in _validated_chunks(rows, chunk_size, report):
+            users = _select_new_users(db_session, chunk, seen, report)
+            futures = [
+                pool.submit(_hash_passwords, [user.password for _, user in users[start:start + HASH_BATCH_SIZE]])
+                for start in range(0, len(users), HASH_BATCH_SIZE)
+            ]
+            if pending is not None:
+                _insert_chunk(db_session, *pending, report)
+            pending = (users, futures)
+
+        if pending is not None:
+            _insert_chunk(db_session, *pending, report)
+
+    return report
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Отдельный процесс для фоновых задач (очередь в таблице background_jobs).
+
+Можно запускать вместе с раннером внутри API или вместо него
+(JOBS_IN_PROCESS=False): воркеры не берут одну задачу дважды.
+
+Использование:
+    python worker.py                    # работать до SIGINT/SIGTERM
+    python worker.py --concurrency 8
+    python worker.py --once             # выполнить готовые задачи и выйти
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+# Добавляем текущую директорию в путь Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import get_settings
+from db.tenancy import tenant_registry
+from utils.jobs import JobRunner, get_queue_counts
+import utils.job_handlers  # Регистрация обработчиков фоновых задач
+
+async def run_worker(runner: JobRunner, once: bool):
+    """
+    Запускает раннер и останавливает его по сигналу
+
+    Args:
+        runner: Раннер задач
+        once: Завершиться, когда готовых задач не останется
+    """
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, runner.stop)
+        except NotImplementedError:
+            # Windows: остановка по Ctrl+C через KeyboardInterrupt
+            pass
+
+    await runner.run(until_empty=once)
+
+def main():
+    """Точка входа скрипта"""
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Воркер фоновых задач")
+    parser.add_argument("--concurrency", type=int, default=settings.job_concurrency,
+                        help="Максимум одновременно выполняемых задач")
+    parser.add_argument("--poll", type=float, default=settings.job_poll_seconds,
+                        help="Период опроса очереди (секунды)")
+    parser.add_argument("--once", action="store_true", help="Выполнить готовые задачи и выйти")
+    args = parser.parse_args()
+
+    # Очереди всех арендаторов (университетов) из реестра основной БД
+    tenant_registry.load()
+    runner = JobRunner(args.concurrency, args.poll, all_tenants=True)
+    print(f"👷 Воркер {runner.worker_id}: параллельность {args.concurrency}, арендаторов {len(tenant_registry.slugs())}")
+    print(f"📋 Очередь: {get_queue_counts()}")
+
+    asyncio.run(run_worker(runner, args.once))
+
+    print(f"✅ Выполнено задач: {runner.counters['done']}, с ошибкой: {runner.counters['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+#!/bin/sh
+# Подготовка основной БД к потоковой репликации.
+# Выполняется один раз при инициализации тома postgres (docker-entrypoint-initdb.d).
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE ${REPLICATION_USER} WITH REPLICATION LOGIN PASSWORD '${REPLICATION_PASSWORD}';
+SQL
+
+echo "host replication ${REPLICATION_USER} all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,18 @@
+#!/bin/sh
+# Точка входа реплики: при пустом томе клонирует основную БД через
+# pg_basebackup (-R создает standby.signal и primary_conninfo), затем
+# запускает postgres в режиме hot standby.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    echo "⏳ Клонирование основной БД ${PRIMARY_HOST}..."
+    until pg_isready -h "$PRIMARY_HOST" -U "$REPLICATION_USER"; do
+        sleep 1
+    done
+
+    export PGPASSWORD="$REPLICATION_PASSWORD"
+    pg_basebackup -h "$PRIMARY_HOST" -U "$REPLICATION_USER" -D "$PGDATA" -X stream -R -P
+    chmod 0700 "$PGDATA"
+fi
+
+exec postgres -c hot_standby=on
@@ -5,7 +5,7 @@ import { Button } from './ui/button';
 import { Input } from './ui/input';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from './ui/select';
 import { AlertCircle, X, Loader2, UserPlus, LogIn } from 'lucide-react';
-import { authService, apiUtils } from '../services/api';
+import { authService, tenantService, apiUtils } from '../services/api';
 
 const RegistrationForm = () => {
   const navigate = useNavigate();
@@ -43,8 +43,18 @@ const RegistrationForm = () => {
   const [isLoading, setIsLoading] = useState(false);
   const [submitError, setSubmitError] = useState('');
 
-  const faculties = ['ФИБ', 'ФКСИС', 'ФКП', 'ФРЭ', 'ИЭФ', 'ФИТУ'];
-  const courses = ['1', '2', '3', '4', '5', '6'];
+  const [faculties, setFaculties] = useState(['ФИБ', 'ФКСИС', 'ФКП', 'ФРЭ', 'ИЭФ', 'ФИТУ']);
+  const [courses, setCourses] = useState(['1', '2', '3', '4', '5', '6']);
+
+  // Факультеты и курсы университета
+  useEffect(() => {
+    tenantService.getTenant()
+      .then((tenant) => {
+        setFaculties(tenant.faculties.map((faculty) => faculty.name));
+        setCourses(tenant.courses.map((course) => String(course.number)));
+      })
+      .catch((error) => console.error('Ошибка при загрузке справочников:', error));
+  }, []);
 
   // Функция для капитализации с учетом дефиса
   const capitalizeWithHyphen = (str) => {
@@ -234,6 +234,43 @@ const ResultsPage = () => {
           </div>
         </motion.div>
 
+        {/* Интерпретация по шкалам (приходит вместе с результатом) */}
+        {results.report && results.report.length > 0 && (
+          <motion.div
+            initial={{ opacity: 0, y: 30 }}
+            animate={{ opacity: 1, y: 0 }}
+            transition={{ duration: 0.6, delay: 0.3 }}
+            className="space-y-4 mb-8"
+          >
+            {results.report.map((scale) => (
+              <Card key={scale.scale} className="bg-black/20 backdrop-blur-sm border-[#f5e8d0]/30">
+                <CardHeader className="pb-3">
+                  <CardTitle className="text-[#f5e8d0] text-lg flex items-center justify-between">
+                    <span className="capitalize">{scale.scale}</span>
+                    <span className="text-sm font-normal text-[#f5e8d0]/70">
+                      {scale.score} из {scale.max_score} · {scale.level} уровень
+                    </span>
+                  </CardTitle>
+                  {scale.band && (
+                    <CardDescription className="text-[#a5f3b4]">
+                      {scale.band} (процентиль {Math.round(scale.percentile)})
+                    </CardDescription>
+                  )}
+                </CardHeader>
+                <CardContent>
+                  <div className="w-full bg-gray-700/50 rounded-full h-2 mb-4">
+                    <div
+                      className="bg-[#a5f3b4] h-2 rounded-full"
+                      style={{ width: `${scale.max_score ? (scale.score / scale.max_score) * 100 : 0}%` }}
+                    />
+                  </div>
+                  <p className="text-[#f5e8d0]/80 text-sm leading-relaxed">{scale.description}</p>
+                </CardContent>
+              </Card>
+            ))}
+          </motion.div>
+        )}
+
         {/* Статистика результатов */}
         {analysis && (
           <motion.div
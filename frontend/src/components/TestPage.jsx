@@ -1,10 +1,13 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useNavigate, useParams } from 'react-router-dom';
 import { Button } from './ui/button';
 import { ArrowLeft, X, CheckCircle, Circle, Loader2, AlertCircle } from 'lucide-react';
 import { authService, testsService, apiUtils } from '../services/api';
 
+// Как часто сообщать о ходе прохождения (панель проктора), ответов
+const PROGRESS_REPORT_EVERY = 5;
+
 const TestPage = () => {
   const navigate = useNavigate();
   const { testId } = useParams();
@@ -15,6 +18,12 @@ const TestPage = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [user, setUser] = useState(null);
+  
+  // Ключ идемпотентности прохождения: повторная отправка тех же ответов
+  // возвращает уже сохраненный результат
+  const submissionKeyRef = useRef(
+    window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`
+  );
 
   // Загрузка данных теста
   useEffect(() => {
@@ -55,6 +64,7 @@ const TestPage = () => {
         };
         
         setTestData(formattedTestData);
+        testsService.reportProgress(testId, 0, formattedTestData.questions.length);
         
       } catch (error) {
         console.error('Ошибка при загрузке данных теста:', error);
@@ -91,6 +101,12 @@ const TestPage = () => {
     if (currentQuestion < testData.questions.length - 1) {
       const nextQuestion = currentQuestion + 1;
       setCurrentQuestion(nextQuestion);
+      
+      // Ход прохождения для панели проктора - раз в PROGRESS_REPORT_EVERY ответов
+      const answeredCount = newAnswers.filter(a => a).length;
+      if (answeredCount % PROGRESS_REPORT_EVERY === 0) {
+        testsService.reportProgress(testId, answeredCount, testData.questions.length);
+      }
     } else {
       // Тест завершен
       try {
@@ -116,7 +132,7 @@ const TestPage = () => {
           result: testResult      // Объект с результатами теста
         };
         
-        await testsService.completeTest(testId, completionData);
+        await testsService.completeTest(testId, completionData, submissionKeyRef.current);
         
       } catch (error) {
         console.error('Ошибка при завершении теста:', error);
@@ -1,25 +1,36 @@
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
+// Университет (заголовок X-Tenant); без него - по домену или университет по умолчанию
+const TENANT = import.meta.env.VITE_TENANT || '';
 
 // Базовый класс для API запросов
 class ApiService {
   constructor(baseURL = API_BASE_URL) {
     this.baseURL = baseURL;
+    // Метка чтения из основной БД после записи (дублирует cookie primary_pin
+    // для браузеров, не отправляющих сторонние cookie)
+    this.primaryPin = '';
   }
 
   // Метод для выполнения HTTP запросов
   async request(endpoint, options = {}) {
     const url = `${this.baseURL}${endpoint}`;
     const config = {
+      credentials: 'include', // Важно для отправки httpOnly cookies
+      ...options,
       headers: {
         'Content-Type': 'application/json',
+        ...(TENANT ? { 'X-Tenant': TENANT } : {}),
+        ...(this.primaryPin ? { 'X-Primary-Pin': this.primaryPin } : {}),
         ...options.headers,
       },
-      credentials: 'include', // Важно для отправки httpOnly cookies
-      ...options,
     };
 
     try {
       const response = await fetch(url, config);
+      const primaryPin = response.headers.get('X-Primary-Pin');
+      if (primaryPin) {
+        this.primaryPin = primaryPin;
+      }
       
       // Проверяем статус ответа
       if (!response.ok) {
@@ -146,6 +157,14 @@ export const authService = {
   }
 };
 
+// Сервис университета
+export const tenantService = {
+  // Университет и его справочники факультетов и курсов
+  async getTenant() {
+    return api.get('/tenant');
+  }
+};
+
 // Сервис тестов
 export const testsService = {
   // Получение всех доступных тестов
@@ -207,8 +226,31 @@ export const testsService = {
     }
   },
 
+  // Ход прохождения для панели проктора: ошибки не мешают проходить тест
+  async reportProgress(testId, answered, total) {
+    const token = localStorage.getItem('access_token');
+    const authHeaders = token ? { 'Authorization': `Bearer ${token}` } : {};
+    
+    try {
+      await api.request(`/user-tests/${testId}/progress`, {
+        method: 'POST',
+        headers: {
+          ...authHeaders,
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ answered, total })
+      });
+    } catch (error) {
+      console.warn('Не удалось отправить ход прохождения теста:', error);
+    }
+  },
+
   // Завершение теста
-  async completeTest(testId, completionData) {
+  // idempotencyKey - один ключ на прохождение: повтор запроса (двойной клик,
+  // повтор после ошибки сети) не создаст вторую попытку
+  async completeTest(testId, completionData, idempotencyKey) {
+    const idempotencyHeaders = idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {};
+    
     // Для Safari - используем Authorization header вместо cookies
     const token = localStorage.getItem('access_token');
     if (token) {
@@ -216,7 +258,8 @@ export const testsService = {
         method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          ...idempotencyHeaders
         },
         body: JSON.stringify(completionData)
       });
@@ -224,7 +267,14 @@ export const testsService = {
     
     // Fallback на cookies
     // completionData должен содержать поля: answers и result
-    return api.post(`/user-tests/${testId}/complete`, completionData);
+    return api.request(`/user-tests/${testId}/complete`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...idempotencyHeaders
+      },
+      body: JSON.stringify(completionData)
+    });
   },
 
   // Получение результатов теста